@@ -43,11 +43,11 @@ class EventoAgendaForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['destinatarios'].queryset = NumeroAutorizado.objects.filter(activo=True)
         self.fields['destinatarios'].help_text = 'Números autorizados a los que se enviará el recordatorio.'
-        self.fields['cliente'].queryset = Cliente.objects.filter(deleted_at__isnull=True)
+        self.fields['cliente'].queryset = Cliente.alive.all()
         self.fields['cliente'].required = False
         self.fields['direccion'].required = False
-        self.fields['colocador'].queryset = Cuenta.objects.filter(
-            tipo_cuenta__tipo='colocadores', activo=True, deleted_at__isnull=True,
+        self.fields['colocador'].queryset = Cuenta.alive.filter(
+            tipo_cuenta__tipo='colocadores', activo=True,
         ).select_related('tipo_cuenta')
         self.fields['colocador'].required = False
         self.fields['tecnico'].queryset = User.objects.filter(is_active=True).order_by('first_name', 'username')
@@ -161,7 +161,7 @@ def cliente_info(request, pk):
     """Datos del cliente para autocompletar la dirección en el form de visita."""
     from comercial.models import Cliente
     from django.shortcuts import get_object_or_404
-    cliente = get_object_or_404(Cliente, pk=pk, deleted_at__isnull=True)
+    cliente = get_object_or_404(Cliente.alive, pk=pk)
     direccion = cliente.direccion or ''
     if cliente.localidad:
         direccion = f"{direccion}, {cliente.localidad}".strip(', ')
@@ -16,6 +16,11 @@ DATABASES = {
     }
 }
 
+# TEST_SQLITE_NAME=/ruta/archivo.sqlite3 manda la base de tests a disco; hace falta
+# para los tests que usan varias conexiones a la vez (ej. numeración concurrente).
+if os.environ.get('TEST_SQLITE_NAME'):
+    DATABASES['default']['TEST'] = {'NAME': os.environ['TEST_SQLITE_NAME']}
+
 MIGRATION_MODULES = DisableMigrations()
 PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 SECURE_SSL_REDIRECT = False
@@ -0,0 +1,68 @@
+"""Base de la suite de benchmarks.
+
+Los benchmarks viven fuera de las apps y no corren con la suite normal:
+
+    AKUN_BENCHMARKS=1 python manage.py test benchmarks --settings=akuna_calc.settings_test_sqlite
+
+Cada benchmark arma sus datos en la base de tests, mide el camino actual y, si
+aplica, una copia del camino anterior para comparar antes/después. Los resultados
+se imprimen (mediana, mínimo y queries por corrida); no hay umbrales que hagan
+fallar la corrida, salvo los asserts de correctitud de cada benchmark.
+"""
+import os
+import statistics
+import sys
+import time
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+
+BENCHMARKS_ACTIVOS = os.environ.get('AKUN_BENCHMARKS', '').lower() in ('1', 'true', 'yes')
+
+
+@unittest.skipUnless(BENCHMARKS_ACTIVOS, 'Benchmarks desactivados (AKUN_BENCHMARKS=1 para correrlos).')
+class BenchmarkTestCase(TestCase):
+    repeticiones = 5
+
+    def medir(self, etiqueta, funcion, preparar=None, repeticiones=None):
+        """Corre `funcion` varias veces y reporta tiempos y queries.
+
+        `preparar` (opcional) se llama antes de cada corrida, fuera de la medición,
+        y lo que devuelve se pasa como argumentos a `funcion`.
+        """
+        tiempos = []
+        queries = 0
+        for _ in range(repeticiones or self.repeticiones):
+            argumentos = preparar() if preparar else ()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                funcion(*argumentos)
+                tiempos.append(time.perf_counter() - inicio)
+            queries = len(capturadas)
+
+        resultado = {
+            'etiqueta': etiqueta,
+            'mediana_ms': statistics.median(tiempos) * 1000,
+            'min_ms': min(tiempos) * 1000,
+            'queries': queries,
+        }
+        self.reportar(resultado)
+        return resultado
+
+    def reportar(self, resultado):
+        sys.stdout.write(
+            f"\n[{self.__class__.__name__}] {resultado['etiqueta']:<45} "
+            f"mediana {resultado['mediana_ms']:9.2f} ms  "
+            f"min {resultado['min_ms']:9.2f} ms  "
+            f"{resultado['queries']:6d} queries"
+        )
+        sys.stdout.flush()
+
+    def comparar(self, antes, despues):
+        mejora = antes['mediana_ms'] / despues['mediana_ms'] if despues['mediana_ms'] else float('inf')
+        sys.stdout.write(f"\n[{self.__class__.__name__}] antes/después: x{mejora:.1f}\n")
+        sys.stdout.flush()
+        return mejora
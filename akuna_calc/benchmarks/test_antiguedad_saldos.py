@@ -0,0 +1,94 @@
+"""Antigüedad de saldos con 100.000 ventas: recorrido en Python vs agregado en la base.
+
+El camino anterior (el de `construir_reporte_ventas`) trae todas las ventas con
+saldo y las reparte por tramo y por cliente en Python. El actual agrupa en la
+base por cliente y tramo (`antiguedad.por_cliente`) y suma los totales de esas
+filas. También mide la vista completa y el export.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from comercial import antiguedad
+from comercial.models import Cliente, Venta
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_CLIENTES = 2_000
+CANTIDAD_VENTAS = 100_000
+OBJETIVO_MS = 200
+
+
+def _antiguedad_anterior(hoy):
+    tramos = defaultdict(Decimal)
+    clientes = defaultdict(lambda: defaultdict(Decimal))
+    ventas = Venta.objects.filter(deleted_at__isnull=True, saldo__gt=0).select_related('cliente')
+    for venta in ventas:
+        clave = antiguedad.tramo((hoy - timezone.localtime(venta.created_at).date()).days)
+        tramos[clave] += venta.saldo
+        clientes[venta.cliente][clave] += venta.saldo
+    return tramos, sorted(clientes.items(), key=lambda item: -sum(item[1].values()))
+
+
+class AntiguedadSaldosBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser('bench-antiguedad', password='x')
+        clientes = Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente{indice}', apellido='Saldo', razon_social=f'Razón {indice % 300}',
+                    direccion='Calle 1', localidad='CABA')
+            for indice in range(CANTIDAD_CLIENTES)
+        ])
+        Venta.objects.bulk_create([
+            Venta(
+                numero_pedido=f'PED-{indice:06d}',
+                cliente=clientes[indice % CANTIDAD_CLIENTES],
+                valor_total=Decimal('1500.50'),
+                sena=Decimal('300'),
+                # Una de cada tres ya está cobrada.
+                saldo=Decimal('0') if indice % 3 == 0 else Decimal('1200.50'),
+                con_factura=indice % 2 == 0,
+            )
+            for indice in range(CANTIDAD_VENTAS)
+        ], batch_size=5_000)
+        # `created_at` es auto_now_add: las fechas (hasta 400 días atrás) se reparten después.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE comercial_venta SET created_at = datetime('now', '-' || (id % 400) || ' days')"
+            )
+
+    def setUp(self):
+        self.client_http = Client()
+        self.client_http.login(username='bench-antiguedad', password='x')
+
+    def test_saldos_por_tramo(self):
+        hoy = timezone.localdate()
+        tramos, _ = _antiguedad_anterior(hoy)
+        totales = antiguedad.totales_de(antiguedad.por_cliente(antiguedad.ventas_abiertas(), hoy))
+        self.assertEqual({tramo['clave']: tramo['saldo'] for tramo in totales['tramos']}, dict(tramos))
+
+        antes = self.medir('Python sobre todas las ventas', lambda: _antiguedad_anterior(hoy), repeticiones=3)
+        despues = self.medir(
+            'agrupado por cliente y tramo',
+            lambda: antiguedad.totales_de(antiguedad.por_cliente(antiguedad.ventas_abiertas(), hoy)),
+        )
+        self.comparar(antes, despues)
+        self.assertLess(despues['mediana_ms'], OBJETIVO_MS)
+
+    def test_vista_y_export(self):
+        url = reverse('comercial:reporte_antiguedad')
+        self.assertEqual(self.client_http.get(url).status_code, 200)
+        self.medir('vista reporte_antiguedad', lambda: self.client_http.get(url))
+        self.medir('vista filtrada (negro)', lambda: self.client_http.get(url, {'tipo_factura': 'negro'}))
+        exportar = reverse('comercial:exportar_reporte_antiguedad_excel')
+        self.medir(
+            'export a Excel',
+            lambda: b''.join(self.client_http.get(exportar).streaming_content),
+            repeticiones=1,
+        )
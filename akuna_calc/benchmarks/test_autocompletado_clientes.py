@@ -0,0 +1,92 @@
+"""Formularios de ventas y reportes: todos los clientes como `<option>` vs select asincrónico.
+
+Mide el GET de `venta_create` y `reportes` con 10.000 clientes, con los
+formularios actuales y con una copia que vuelve a los selects comunes sobre
+todos los clientes (y todas las razones sociales), e informa el peso de cada
+página. Después mide una página del autocompletado.
+"""
+import sys
+from unittest.mock import patch
+
+from django import forms
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+
+from comercial import autocompletado
+from comercial.forms import ReporteForm, VentaForm
+from comercial.models import Cliente
+from core.busqueda import armar_documento
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_CLIENTES = 10_000
+APELLIDOS = ['González', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'Pérez', 'Gómez', 'Díaz', 'Sosa', 'Romero']
+
+
+class VentaFormAnterior(VentaForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campo = self.fields['cliente']
+        campo.widget = forms.Select(choices=campo.choices)
+
+
+class ReporteFormAnterior(ReporteForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campo = self.fields['cliente']
+        campo.widget = forms.SelectMultiple(choices=campo.choices)
+        razones = Cliente.objects.filter(deleted_at__isnull=True).exclude(razon_social='').values_list(
+            'razon_social', flat=True,
+        ).distinct().order_by('razon_social')
+        self.fields['razon_social'] = forms.MultipleChoiceField(
+            choices=[(razon, razon) for razon in razones], required=False, widget=forms.SelectMultiple,
+        )
+
+
+class AutocompletadoClientesBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser('bench-autocompletado', password='x')
+        clientes = []
+        for indice in range(CANTIDAD_CLIENTES):
+            apellido = APELLIDOS[indice % len(APELLIDOS)]
+            razon_social = f'Aberturas {indice} SRL' if indice % 3 == 0 else ''
+            cuit = f'20{indice:08d}1'
+            clientes.append(Cliente(
+                nombre=f'Cliente{indice}', apellido=apellido, razon_social=razon_social, cuit=cuit,
+                direccion='Calle 1', localidad='CABA',
+                documento_busqueda=armar_documento(f'Cliente{indice}', apellido, razon_social, 'CABA', cuit),
+            ))
+        Cliente.objects.bulk_create(clientes, batch_size=2_000)
+
+    def setUp(self):
+        self.client_http = Client()
+        self.client_http.login(username='bench-autocompletado', password='x')
+
+    def _pagina(self, url, etiqueta):
+        peso = len(self.client_http.get(url).content)
+        resultado = self.medir(etiqueta, lambda: self.client_http.get(url))
+        sys.stdout.write(f'  {peso / 1024:8.1f} KB')
+        return resultado, peso
+
+    def _comparar_pagina(self, nombre, vista, clase_actual, clase_anterior):
+        url = reverse(f'comercial:{vista}')
+        with patch(f'comercial.views.{clase_actual}', clase_anterior):
+            antes, peso_antes = self._pagina(url, f'{nombre} (todas las opciones)')
+        despues, peso_despues = self._pagina(url, f'{nombre} (select asincrónico)')
+        self.assertLess(peso_despues * 5, peso_antes)
+        self.comparar(antes, despues)
+
+    def test_venta_create(self):
+        self._comparar_pagina('venta_create', 'venta_create', 'VentaForm', VentaFormAnterior)
+
+    def test_reportes(self):
+        self._comparar_pagina('reportes', 'reportes', 'ReporteForm', ReporteFormAnterior)
+
+    def test_pagina_de_autocompletado(self):
+        for termino in ('', 'perez', 'aberturas 12', '20-0000'):
+            resultados, _ = autocompletado.clientes(termino)
+            self.assertTrue(resultados)
+            self.medir(f'autocompletado {termino!r}', lambda: autocompletado.clientes(termino))
@@ -0,0 +1,77 @@
+"""Buscador de ventas: cadena de `icontains` con JOINs vs índice de texto completo."""
+from decimal import Decimal
+
+from django.db.models import Q
+
+from comercial.models import Cliente, Venta
+from core.busqueda import armar_documento, buscar
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_CLIENTES = 2_000
+CANTIDAD_VENTAS = 100_000
+APELLIDOS = ['Gonzalez', 'Rodriguez', 'Fernandez', 'Lopez', 'Martinez', 'Perez', 'Gomez', 'Diaz', 'Sosa', 'Romero']
+
+
+def _busqueda_anterior(termino):
+    return Venta.objects.filter(
+        Q(numero_pedido__icontains=termino) |
+        Q(cliente__nombre__icontains=termino) |
+        Q(cliente__apellido__icontains=termino) |
+        Q(cliente__razon_social__icontains=termino) |
+        Q(numero_factura__icontains=termino) |
+        Q(pagos__numero_factura__icontains=termino)
+    ).distinct().order_by('-created_at')
+
+
+def _busqueda_actual(termino):
+    return buscar(Venta.objects.all(), termino).order_by('-relevancia', '-created_at')
+
+
+class BusquedaVentasBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clientes = Cliente.objects.bulk_create([
+            Cliente(
+                nombre=f'Cliente{indice}',
+                apellido=APELLIDOS[indice % len(APELLIDOS)],
+                razon_social=f'Aberturas {indice} SRL' if indice % 3 == 0 else '',
+                direccion='Calle 1',
+                localidad='CABA',
+            )
+            for indice in range(CANTIDAD_CLIENTES)
+        ])
+        ventas = []
+        for indice in range(CANTIDAD_VENTAS):
+            cliente = clientes[indice % CANTIDAD_CLIENTES]
+            numero_factura = f'0001-{indice:08d}'
+            ventas.append(Venta(
+                numero_pedido=f'PED-{indice:06d}',
+                cliente=cliente,
+                numero_factura=numero_factura,
+                valor_total=Decimal('1000'),
+                documento_busqueda=armar_documento(
+                    f'PED-{indice:06d}', numero_factura,
+                    cliente.nombre, cliente.apellido, cliente.razon_social,
+                ),
+            ))
+        Venta.objects.bulk_create(ventas, batch_size=2_000)
+
+    def _comparar(self, termino):
+        antes = self.medir(f'icontains "{termino}" ({CANTIDAD_VENTAS:,} ventas)', lambda: list(_busqueda_anterior(termino)[:20]))
+        despues = self.medir(f'texto completo "{termino}"', lambda: list(_busqueda_actual(termino)[:20]))
+        self.comparar(antes, despues)
+        return antes, despues
+
+    def test_busqueda_por_cliente(self):
+        self._comparar('Cliente1234')
+        self.assertTrue(_busqueda_actual('Cliente1234').exists())
+
+    def test_busqueda_por_numero_de_factura(self):
+        self._comparar('00054321')
+        self.assertEqual(_busqueda_actual('54321').count(), 1)
+
+    def test_busqueda_sin_resultados(self):
+        self._comparar('inexistente')
+        self.assertFalse(_busqueda_actual('inexistente').exists())
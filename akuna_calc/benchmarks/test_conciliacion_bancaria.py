@@ -0,0 +1,121 @@
+"""Conciliación de un extracto bancario: índices por clave vs recorrer todos los documentos.
+
+Mide leer + proponer un extracto de 30.000 líneas contra 10.000 ventas y
+10.000 compras abiertas. La comparación antes/después usa 2.000 movimientos:
+recorrer la lista de documentos por cada movimiento no termina en un tiempo
+razonable con el extracto completo.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from comercial import conciliacion_bancaria as conciliacion
+from comercial.models import Cliente, Compra, Cuenta, TipoCuenta, Venta
+from comercial.planillas import leer_texto
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_DOCUMENTOS = 10_000
+CANTIDAD_MOVIMIENTOS = 30_000
+CANTIDAD_COMPARACION = 2_000
+INICIO = date(2026, 1, 1)
+
+
+def _importe(indice):
+    return Decimal(1000 + indice * 7) + Decimal('0.50')
+
+
+def _extracto(cantidad):
+    lineas = ['Fecha;Descripción;Referencia;Débito;Crédito']
+    for indice in range(cantidad):
+        documento = indice % CANTIDAD_DOCUMENTOS
+        fecha = (INICIO + timedelta(days=documento % 300)).strftime('%d/%m/%Y')
+        importe = f'{_importe(documento):.2f}'.replace('.', ',')
+        if indice % 3 == 0:
+            lineas.append(f'{fecha};TRANSF. RECIBIDA 20-{documento:08d}-1;{indice};;{importe}')
+        elif indice % 3 == 1:
+            lineas.append(f'{fecha};PAGO PROVEEDOR FC 0001-{documento:08d};{indice};{importe};')
+        else:
+            lineas.append(f'{fecha};DEPOSITO {indice};{indice};;{indice},00')
+    return '\n'.join(lineas)
+
+
+def _proponer_anterior(movimientos, documentos):
+    """Por cada movimiento, puntúa todos los documentos abiertos del tipo que corresponde."""
+    propuestas = []
+    for movimiento in movimientos:
+        mejor, mejor_puntaje = None, 0
+        for documento in documentos[movimiento.tipo]:
+            if abs(movimiento.importe) > documento.restante:
+                continue
+            puntaje, _ = conciliacion.puntuar(movimiento, documento)
+            if puntaje > mejor_puntaje:
+                mejor, mejor_puntaje = documento, puntaje
+        if mejor is not None and mejor_puntaje >= conciliacion.MINIMO:
+            mejor.restante -= abs(movimiento.importe)
+        propuestas.append(mejor)
+    return propuestas
+
+
+def _documentos():
+    ventas = conciliacion.Indice.de_ventas()
+    compras = conciliacion.Indice.de_compras()
+    return {
+        conciliacion.VENTA: list({doc.pk: doc for docs in ventas.por_importe.values() for doc in docs}.values()),
+        conciliacion.COMPRA: list({doc.pk: doc for docs in compras.por_importe.values() for doc in docs}.values()),
+    }
+
+
+class ConciliacionBancariaBenchmark(BenchmarkTestCase):
+    repeticiones = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_superuser('bench-conciliacion', password='x')
+        clientes = Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente{indice}', apellido='Banco', cuit=f'20{indice:08d}1', direccion='Calle 1', localidad='CABA')
+            for indice in range(CANTIDAD_DOCUMENTOS)
+        ], batch_size=5_000)
+        Venta.objects.bulk_create([
+            Venta(
+                numero_pedido=f'PED-{indice:06d}', cliente=clientes[indice], valor_total=_importe(indice),
+                saldo=_importe(indice), fecha_pago=INICIO + timedelta(days=indice % 300),
+            )
+            for indice in range(CANTIDAD_DOCUMENTOS)
+        ], batch_size=5_000)
+        tipo = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        cuentas = Cuenta.objects.bulk_create([
+            Cuenta(nombre=f'Proveedor{indice}', tipo_cuenta=tipo) for indice in range(100)
+        ])
+        Compra.objects.bulk_create([
+            Compra(
+                numero_pedido=f'OC-{indice:06d}', cuenta=cuentas[indice % 100], valor_total=_importe(indice),
+                saldo=_importe(indice), numero_factura=f'0001-{indice:08d}',
+                fecha_pago=INICIO + timedelta(days=indice % 300), created_by=user,
+            )
+            for indice in range(CANTIDAD_DOCUMENTOS)
+        ], batch_size=5_000)
+
+    def test_extracto_completo(self):
+        texto = _extracto(CANTIDAD_MOVIMIENTOS)
+
+        def conciliar():
+            movimientos, _ = conciliacion.leer_extracto(leer_texto(texto))
+            return conciliacion.proponer(movimientos)
+
+        self.medir(f'leer + proponer ({CANTIDAD_MOVIMIENTOS:,} líneas)', conciliar)
+        propuestas = conciliar()
+        self.assertEqual(len(propuestas), CANTIDAD_MOVIMIENTOS)
+        # Cada venta y cada compra tiene exactamente un movimiento que la salda; los depósitos no coinciden.
+        self.assertEqual(sum(1 for propuesta in propuestas if propuesta.documento), 2 * CANTIDAD_DOCUMENTOS)
+
+    def test_indices_vs_recorrido(self):
+        movimientos, _ = conciliacion.leer_extracto(leer_texto(_extracto(CANTIDAD_COMPARACION)))
+        antes = self.medir(
+            f'recorrido ({CANTIDAD_COMPARACION:,} x {2 * CANTIDAD_DOCUMENTOS:,})',
+            _proponer_anterior, preparar=lambda: (movimientos, _documentos()), repeticiones=1,
+        )
+        despues = self.medir('índices por clave', lambda: conciliacion.proponer(movimientos))
+        self.comparar(antes, despues)
@@ -0,0 +1,101 @@
+"""Confirmación de un presupuesto grande: órdenes de fabricación antes/después del bulk."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from comercial.models import Cliente
+from plantillas.models import OrdenFabricacion, PedidoFabrica
+from presupuestos.models import ItemPresupuesto, Presupuesto
+from presupuestos.views import (
+    _construir_medida_desde_item,
+    _construir_orden_desde_item,
+    _crear_ordenes_desde_items,
+)
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_ITEMS = 150
+
+
+def _ordenes_camino_anterior(pedido, items, presupuesto):
+    """Copia del circuito previo: MAX()+1 y un create() por orden y otro por medida."""
+    fecha_comprometida = None
+    if presupuesto.plazo_entrega_dias:
+        fecha_comprometida = timezone.now().date() + timedelta(days=presupuesto.plazo_entrega_dias)
+    numero_base = (OrdenFabricacion.objects.aggregate(m=Max('numero'))['m'] or 0) + 1
+    for indice, item in enumerate(items):
+        orden = _construir_orden_desde_item(
+            pedido, item, numero_base + indice, indice + 1, presupuesto, fecha_comprometida,
+        )
+        orden.save()
+        _construir_medida_desde_item(orden, item).save()
+
+
+class ConfirmacionPresupuestoBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bench-confirmacion', password='x')
+        cliente = Cliente.objects.create(
+            nombre='Obra', apellido='Grande', direccion='Calle 1', localidad='CABA',
+        )
+        cls.presupuesto = Presupuesto.objects.create(
+            numero='PRES-BENCH-001',
+            cliente=cliente,
+            fecha_expiracion=date.today() + timedelta(days=30),
+            plazo_entrega_dias=30,
+            created_by=cls.user,
+        )
+        ItemPresupuesto.objects.bulk_create([
+            ItemPresupuesto(
+                presupuesto=cls.presupuesto,
+                descripcion=f'Ventana {indice}',
+                cantidad=2,
+                ancho_mm=1200 + indice,
+                alto_mm=1500,
+                margen_porcentaje=Decimal('30'),
+                precio_unitario=Decimal('50000'),
+                precio_total=Decimal('100000'),
+                orden=indice,
+                resultado_json={'snapshot_item': {
+                    'producto': {'descripcion': 'CORREDIZA 2 HOJAS'},
+                    'linea': {'nombre': 'MODENA'},
+                    'tratamiento': {'descripcion': 'BLANCO'},
+                    'vidrio': {'descripcion': 'DVH 4+9+4'},
+                }},
+            )
+            for indice in range(CANTIDAD_ITEMS)
+        ])
+
+    def _nuevo_pedido(self):
+        pedido = PedidoFabrica.objects.create(
+            numero=PedidoFabrica.generar_numero(),
+            cliente='Obra Grande',
+            usuario=self.user,
+            presupuesto=self.presupuesto,
+        )
+        return pedido, list(self.presupuesto.items.all()), self.presupuesto
+
+    def test_ordenes_de_fabricacion_150_items(self):
+        def bulk(pedido, items, presupuesto):
+            with transaction.atomic():
+                _crear_ordenes_desde_items(pedido, items, presupuesto)
+
+        def anterior(pedido, items, presupuesto):
+            with transaction.atomic():
+                _ordenes_camino_anterior(pedido, items, presupuesto)
+
+        despues = self.medir(f'bulk_create ({CANTIDAD_ITEMS} ítems)', bulk, preparar=self._nuevo_pedido)
+        # El camino anterior numera con MAX()+1, así que corre después del nuevo.
+        antes = self.medir(f'create() por ítem ({CANTIDAD_ITEMS} ítems)', anterior, preparar=self._nuevo_pedido)
+        self.comparar(antes, despues)
+
+        self.assertLess(despues['queries'], antes['queries'])
+        self.assertEqual(
+            OrdenFabricacion.objects.count(),
+            CANTIDAD_ITEMS * self.repeticiones * 2,
+        )
@@ -0,0 +1,134 @@
+"""Export de ventas a Excel: libro en memoria con estilo por celda vs motor write-only.
+
+Mide el tiempo de exportar 100.000 ventas y el pico de memoria (tracemalloc,
+que multiplica el costo de cada asignación) con 10.000. El
+camino anterior arma el `Workbook` completo con Font/Fill/Border por celda y
+resuelve la factura electrónica de cada venta con una consulta aparte; el
+actual escribe fila por fila con estilos con nombre y envía un temporal.
+"""
+import sys
+import tracemalloc
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+
+from comercial.models import Cliente, Venta
+from comercial.views import exportar_ventas_excel
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_CLIENTES = 1_000
+CANTIDAD_VENTAS = 100_000
+CANTIDAD_VENTAS_MEMORIA = 10_000
+
+
+def _exportar_anterior():
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    ventas = Venta.objects.filter(deleted_at__isnull=True).select_related('cliente').order_by('-created_at')
+    wb = Workbook()
+    ws = wb.active
+    header_fill = PatternFill(start_color='1e293b', end_color='1e293b', fill_type='solid')
+    header_font = Font(bold=True, color='FFFFFF', size=11)
+    thin = Side(style='thin', color='CBD5E1')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    headers = ['N° Pedido', 'Fecha', 'Cliente', 'Razón Social', 'Valor Total', 'Seña', 'Saldo Pendiente', 'Estado', 'Tipo', 'N° Factura']
+    for i, h in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=i, value=h)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.border = border
+    for row_num, venta in enumerate(ventas, 2):
+        datos = [
+            venta.numero_pedido, venta.created_at.strftime('%d/%m/%Y'), str(venta.cliente),
+            venta.cliente.razon_social or '', float(venta.valor_total), float(venta.sena), float(venta.saldo),
+            venta.get_estado_display(), 'Blanco' if venta.con_factura else 'Negro', venta.get_numero_factura_display(),
+        ]
+        for col_num, valor in enumerate(datos, 1):
+            cell = ws.cell(row=row_num, column=col_num, value=valor)
+            cell.border = border
+            cell.alignment = Alignment(vertical='center')
+            if col_num in [5, 6, 7]:
+                cell.number_format = '#,##0.00'
+    total_row = ws.max_row + 1
+    ws.cell(row=total_row, column=5, value=sum(float(v.valor_total) for v in ventas))
+    ws.cell(row=total_row, column=6, value=sum(float(v.sena) for v in ventas))
+    ws.cell(row=total_row, column=7, value=sum(float(v.saldo) for v in ventas))
+    salida = BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+def _cargar_ventas(cantidad):
+    clientes = Cliente.objects.bulk_create([
+        Cliente(nombre=f'Cliente{indice}', apellido='Excel', razon_social=f'Razón {indice}', direccion='Calle 1', localidad='CABA')
+        for indice in range(CANTIDAD_CLIENTES)
+    ])
+    Venta.objects.bulk_create([
+        Venta(
+            numero_pedido=f'PED-{indice:06d}',
+            cliente=clientes[indice % CANTIDAD_CLIENTES],
+            valor_total=Decimal('1500.50'),
+            sena=Decimal('300'),
+            saldo=Decimal('1200.50'),
+            con_factura=indice % 2 == 0,
+            numero_factura=f'0001-{indice:08d}' if indice % 2 == 0 else '',
+        )
+        for indice in range(cantidad)
+    ], batch_size=5_000)
+
+
+def _exportar_actual(user):
+    request = RequestFactory().get('/comercial/ventas/exportar-excel/')
+    request.user = user
+    return b''.join(exportar_ventas_excel(request).streaming_content)
+
+
+class ExportacionVentasExcelBenchmark(BenchmarkTestCase):
+    repeticiones = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('bench-excel', password='x')
+        _cargar_ventas(CANTIDAD_VENTAS)
+
+    def test_exportar_ventas(self):
+        # Primero el camino actual: el anterior llena el log de consultas (tope 9000)
+        # y después ya no se puede contar.
+        despues = self.medir('write-only + estilos con nombre', lambda: _exportar_actual(self.user))
+        antes = self.medir(f'Workbook en memoria ({CANTIDAD_VENTAS:,} filas)', _exportar_anterior)
+        self.comparar(antes, despues)
+        self.assertLess(despues['queries'], 10)
+
+        from openpyxl import load_workbook
+
+        # El libro write-only no guarda la dimensión de la hoja: se cuentan las filas.
+        hoja = load_workbook(BytesIO(_exportar_actual(self.user)), read_only=True).active
+        self.assertEqual(sum(1 for _ in hoja.iter_rows(values_only=True)), CANTIDAD_VENTAS + 2)
+
+
+class MemoriaExportacionVentasExcelBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('bench-excel', password='x')
+        _cargar_ventas(CANTIDAD_VENTAS_MEMORIA)
+
+    def _pico_memoria(self, etiqueta, funcion):
+        tracemalloc.start()
+        try:
+            contenido = funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        sys.stdout.write(f'\n[{self.__class__.__name__}] {etiqueta:<45} pico {pico / 2**20:9.1f} MiB  ({len(contenido) / 2**20:.1f} MiB de xlsx)')
+        return pico
+
+    def test_pico_memoria(self):
+        pico_antes = self._pico_memoria(f'Workbook en memoria ({CANTIDAD_VENTAS_MEMORIA:,} filas)', _exportar_anterior)
+        pico_despues = self._pico_memoria('write-only', lambda: _exportar_actual(self.user))
+        sys.stdout.write('\n')
+        self.assertLess(pico_despues, pico_antes)
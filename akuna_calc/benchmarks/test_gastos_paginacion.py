@@ -0,0 +1,108 @@
+"""Listado y reporte de gastos con 60.000 compras: Paginator con OFFSET vs paginación por clave.
+
+El camino anterior de `compras_list` contaba todas las compras (`COUNT`) y
+pedía la página con `OFFSET`, que crece con la profundidad; el del reporte
+recorría las compras en Python para los totales y los resúmenes. El actual pide
+`limite + 1` filas después del cursor `(fecha_pago, pk)` y agrega en la base
+(`gastos.totales`, `por_tipo_cuenta`, `por_tipo_gasto`).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.test import Client
+from django.urls import reverse
+
+from comercial import gastos
+from comercial.models import Compra, Cuenta, TipoCuenta, TipoGasto
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_COMPRAS = 60_000
+PAGINA_PROFUNDA = 2_500
+
+
+def _pagina_anterior(numero):
+    compras = Compra.objects.filter(deleted_at__isnull=True).select_related('cuenta', 'cuenta__tipo_cuenta').order_by('-fecha_pago', '-pk')
+    pagina = Paginator(compras, gastos.POR_PAGINA).get_page(numero)
+    return list(pagina), pagina.paginator.count
+
+
+def _resumen_anterior():
+    totales = defaultdict(Decimal)
+    por_tipo_cuenta = defaultdict(Decimal)
+    por_tipo_gasto = defaultdict(Decimal)
+    compras = Compra.objects.filter(deleted_at__isnull=True).select_related('cuenta__tipo_cuenta', 'tipo_gasto')
+    for compra in compras:
+        totales['blanco' if compra.con_factura else 'negro'] += compra.valor_total
+        por_tipo_cuenta[compra.cuenta.tipo_cuenta.get_tipo_display()] += compra.valor_total
+        por_tipo_gasto[compra.tipo_gasto.nombre if compra.tipo_gasto else gastos.SIN_TIPO] += compra.valor_total
+    return totales, por_tipo_cuenta, por_tipo_gasto
+
+
+class GastosPaginacionBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('bench-gastos', password='x')
+        tipos = [TipoCuenta.objects.create(tipo=tipo, descripcion=etiqueta) for tipo, etiqueta in TipoCuenta.TIPOS_CUENTA]
+        cuentas = Cuenta.objects.bulk_create([
+            Cuenta(nombre=f'Cuenta {indice}', tipo_cuenta=tipos[indice % len(tipos)]) for indice in range(200)
+        ])
+        tipos_gasto = [TipoGasto.objects.create(nombre=f'Gasto {indice}', tipo_cuenta=tipos[0]) for indice in range(10)]
+        inicio = date(2024, 1, 1)
+        Compra.objects.bulk_create([
+            Compra(
+                numero_pedido=f'COMP-{indice:06d}',
+                cuenta=cuentas[indice % len(cuentas)],
+                tipo_gasto=tipos_gasto[indice % 11] if indice % 11 < 10 else None,
+                fecha_pago=inicio + timedelta(days=indice % 900),
+                valor_total=Decimal('1000') + indice % 500,
+                con_factura=indice % 2 == 0,
+                created_by=cls.user,
+            )
+            for indice in range(CANTIDAD_COMPRAS)
+        ], batch_size=5_000)
+
+    def setUp(self):
+        self.client_http = Client()
+        self.client_http.login(username='bench-gastos', password='x')
+
+    def _cursor_profundo(self):
+        compra = gastos.ordenar(gastos.construir())[PAGINA_PROFUNDA * gastos.POR_PAGINA - 1]
+        return gastos.cursor_de(compra)
+
+    def test_pagina_profunda(self):
+        cursor = self._cursor_profundo()
+        anteriores, _ = _pagina_anterior(PAGINA_PROFUNDA + 1)
+        actuales, _ = gastos.pagina(gastos.construir().select_related('cuenta', 'cuenta__tipo_cuenta'), cursor)
+        self.assertEqual([compra.pk for compra in actuales], [compra.pk for compra in anteriores])
+
+        antes = self.medir('Paginator (COUNT + OFFSET) página profunda', lambda: _pagina_anterior(PAGINA_PROFUNDA + 1))
+        despues = self.medir(
+            'por clave página profunda',
+            lambda: gastos.pagina(gastos.construir().select_related('cuenta', 'cuenta__tipo_cuenta'), cursor),
+        )
+        self.comparar(antes, despues)
+
+        url = reverse('comercial:compras_list')
+        self.medir('vista compras_list primera página', lambda: self.client_http.get(url))
+        self.medir('vista compras_list página profunda', lambda: self.client_http.get(url, {'desde': cursor}))
+
+    def test_resumen_del_reporte(self):
+        totales, _, por_tipo_gasto = _resumen_anterior()
+        compras = gastos.construir()
+        actuales = gastos.totales(compras)
+        self.assertEqual((actuales['total_blanco'], actuales['total_negro']), (totales['blanco'], totales['negro']))
+        self.assertEqual({fila['nombre']: fila['total'] for fila in gastos.por_tipo_gasto(compras)}, dict(por_tipo_gasto))
+
+        antes = self.medir('resumen en Python', _resumen_anterior, repeticiones=3)
+        despues = self.medir(
+            'agregados en la base',
+            lambda: (gastos.totales(compras), gastos.por_tipo_cuenta(compras), gastos.por_tipo_gasto(compras)),
+        )
+        self.comparar(antes, despues)
+        url = reverse('comercial:reportes_gastos')
+        self.medir('vista reportes_gastos (POST)', lambda: self.client_http.post(url, {}))
@@ -0,0 +1,173 @@
+"""Índices compuestos de comercial con 200.000 ventas: planes y tiempos sin y con índices.
+
+Cada consulta es la que arman los listados y reportes (`ventas_list`, el
+reporte de ventas, cobranzas, `gastos` y la cuenta corriente). Para el "antes"
+se borran los índices de la migración 0032 dentro de la transacción del test
+y después se recrean con el mismo SQL; de cada consulta se imprime el plan
+(`QuerySet.explain()`) y la mediana de tiempos en los dos estados. Se mide
+solo la base (el SQL de la consulta con `fetchall()`), sin armar instancias.
+
+El reporte de ventas y las señas de cobranzas filtraban con
+`created_at__date`, que convierte cada fila y no puede usar un índice; ese
+camino anterior se mide aparte, sin índices, contra el rango de
+`rango_de_dias`.
+"""
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
+
+from comercial import cobranzas, gastos
+from comercial.models import Cliente, Compra, Cuenta, PagoVenta, TipoCuenta, Venta
+from comercial.views import filtrar_reporte_ventas
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_VENTAS = 200_000
+CANTIDAD_COMPRAS = 50_000
+DIAS = 730
+INICIO = date(2024, 1, 1)
+DESDE, HASTA = date(2025, 3, 1), date(2025, 3, 31)
+
+NUEVOS = (
+    'comercial_venta_fecha_idx',
+    'comercial_venta_estado_idx',
+    'comercial_pagoventa_fecha_idx',
+    'comercial_pagoventa_venta_idx',
+    'comercial_compra_fecha_idx',
+    'comercial_compra_cuenta_idx',
+)
+
+
+def _anterior_reporte_ventas():
+    return (
+        Venta.objects.filter(deleted_at__isnull=True, created_at__date__gte=DESDE, created_at__date__lte=HASTA)
+        .select_related('cliente').order_by('-created_at', '-pk')
+    )
+
+
+def _ejecutar(queryset):
+    sql, parametros = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+
+
+def _consultas(cuenta_id):
+    """`(etiqueta, queryset, índice que debería elegir la base)`."""
+    vivas = Venta.objects.filter(deleted_at__isnull=True)
+    return [
+        ('ventas_list: primera página', vivas.order_by('-created_at')[:20], 'comercial_venta_fecha_idx'),
+        ('ventas_list: por estado', vivas.filter(estado='entregado').order_by('-created_at')[:20], 'comercial_venta_estado_idx'),
+        (
+            'ventas_list: por fecha de pago',
+            vivas.filter(
+                Q(fecha_pago__gte=DESDE, fecha_pago__lte=HASTA) | Q(pagos__fecha_pago__gte=DESDE, pagos__fecha_pago__lte=HASTA)
+            ).distinct().order_by('-created_at')[:20],
+            'comercial_pagoventa_venta_idx',
+        ),
+        ('reporte de ventas: un mes', filtrar_reporte_ventas(fecha_desde=DESDE, fecha_hasta=HASTA), 'comercial_venta_fecha_idx'),
+        ('cobranzas: un mes', cobranzas.construir(fecha_desde=DESDE, fecha_hasta=HASTA), 'comercial_pagoventa_fecha_idx'),
+        ('compras_list: primera página', gastos.ordenar(gastos.construir())[:21], 'comercial_compra_fecha_idx'),
+        ('gastos: un mes', gastos.construir(fecha_desde=DESDE, fecha_hasta=HASTA).values('valor_total'), 'comercial_compra_fecha_idx'),
+        (
+            'compras de una cuenta',
+            Compra.objects.filter(deleted_at__isnull=True, cuenta_id=cuenta_id).order_by('fecha_pago', 'created_at', 'pk'),
+            'comercial_compra_cuenta_idx',
+        ),
+        (
+            'gastos de una cuenta: primera página',
+            gastos.ordenar(gastos.construir(cuenta_filtro=[cuenta_id]))[:21],
+            'comercial_compra_cuenta_idx',
+        ),
+    ]
+
+
+class IndicesComercialesBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_superuser('bench-indices', password='x')
+        clientes = Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente{indice}', apellido='Indice', direccion='Calle 1', localidad='CABA')
+            for indice in range(2_000)
+        ])
+        estados = [estado for estado, _ in Venta.ESTADO_CHOICES]
+        Venta.objects.bulk_create([
+            Venta(
+                numero_pedido=f'PED-{indice:06d}',
+                cliente=clientes[indice % len(clientes)],
+                valor_total=Decimal('1500'),
+                sena=Decimal('300'),
+                saldo=Decimal('0') if indice % 3 == 0 else Decimal('1200'),
+                con_factura=indice % 2 == 0,
+                estado=estados[indice % len(estados)],
+                fecha_pago=INICIO + timedelta(days=indice % DIAS) if indice % 4 else None,
+            )
+            for indice in range(CANTIDAD_VENTAS)
+        ], batch_size=5_000)
+        # `created_at` es auto_now_add: las fechas se reparten después.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE comercial_venta SET created_at = datetime('2024-01-01', '+' || (id % %s) || ' days', '+15 hours')",
+                [DIAS],
+            )
+        ventas = list(Venta.objects.order_by('pk').values_list('pk', flat=True)[::2])
+        PagoVenta.objects.bulk_create([
+            PagoVenta(
+                venta_id=venta_id, monto=Decimal('600'), fecha_pago=INICIO + timedelta(days=(indice * 7) % DIAS),
+                forma_pago='transferencia', con_factura=indice % 2 == 0, created_by=usuario,
+            )
+            for indice, venta_id in enumerate(ventas)
+        ], batch_size=5_000)
+        tipo = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        cuentas = Cuenta.objects.bulk_create([Cuenta(nombre=f'Cuenta {indice}', tipo_cuenta=tipo) for indice in range(200)])
+        # La primera cuenta concentra un quinto de las compras (un proveedor grande).
+        cls.cuenta_id = cuentas[0].pk
+        Compra.objects.bulk_create([
+            Compra(
+                numero_pedido=f'COMP-{indice:06d}', cuenta=cuentas[0 if indice % 5 == 0 else indice % len(cuentas)],
+                fecha_pago=INICIO + timedelta(days=indice % DIAS), valor_total=Decimal('800'),
+                con_factura=indice % 2 == 0, created_by=usuario,
+            )
+            for indice in range(CANTIDAD_COMPRAS)
+        ], batch_size=5_000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _medir_todas(self, estado):
+        resultados = {}
+        for etiqueta, queryset, _ in _consultas(self.cuenta_id):
+            sys.stdout.write(f'\n--- {etiqueta} ({estado})\n{queryset.explain()}')
+            resultados[etiqueta] = self.medir(f'{etiqueta} ({estado})', lambda: _ejecutar(queryset))
+        return resultados
+
+    def test_planes_y_tiempos(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN ({', '.join(['%s'] * len(NUEVOS))})",
+                NUEVOS,
+            )
+            creaciones = dict(cursor.fetchall())
+            self.assertEqual(set(creaciones), set(NUEVOS))
+            for nombre in NUEVOS:
+                cursor.execute(f'DROP INDEX "{nombre}"')
+        anterior = self.medir('reporte de ventas con __date (sin índices)', lambda: _ejecutar(_anterior_reporte_ventas()))
+        antes = self._medir_todas('sin índices')
+
+        with connection.cursor() as cursor:
+            for sql in creaciones.values():
+                cursor.execute(sql)
+            cursor.execute('ANALYZE')
+        despues = self._medir_todas('con índices')
+
+        for etiqueta, queryset, indice in _consultas(self.cuenta_id):
+            self.assertIn(indice, queryset.explain(), etiqueta)
+            sys.stdout.write(f'\n{etiqueta}:')
+            self.comparar(antes[etiqueta], despues[etiqueta])
+        sys.stdout.write('\nreporte de ventas, __date sin índices vs rango con índices:')
+        self.comparar(anterior, despues['reporte de ventas: un mes'])
+        self.assertEqual(len(_ejecutar(_anterior_reporte_ventas())), len(_ejecutar(filtrar_reporte_ventas(fecha_desde=DESDE, fecha_hasta=HASTA))))
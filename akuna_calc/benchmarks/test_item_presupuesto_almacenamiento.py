@@ -0,0 +1,163 @@
+"""Resultado del cotizador en columnas + desglose comprimido vs un único JSON por ítem.
+
+Mide dos cosas sobre un presupuesto de aluminio con ítems de desglose realista:
+
+- tamaño por fila: el JSON completo de antes contra lo que se lee siempre ahora
+  (columnas + `datos_calculo`) y contra la fila completa (con el blob zlib);
+- tiempo de la página de detalle: antes cada ítem traía y embebía el resultado
+  completo; ahora se trae sin el blob y se embebe solo el resultado resumido.
+"""
+import json
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.utils.html import json_script
+
+from comercial.models import Cliente
+from presupuestos.almacenamiento import CAMPOS_COLUMNA
+from presupuestos.models import ItemPresupuesto, Presupuesto
+from presupuestos.pdf_descriptions import build_pdf_item_context
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_ITEMS = 60
+# Un DECIMAL(14,2) ocupa 7 bytes en InnoDB.
+BYTES_DECIMAL = 7
+
+
+def _resultado_aluminio(indice):
+    perfiles = [
+        {
+            'codigo': f'PERF-{n:03d}', 'descripcion': f'Perfil {n} línea Modena',
+            'cantidad': 2, 'longitud_mm': 1200 + n, 'longitud_m': 1.2, 'peso_kg': 1.35,
+            'precio_kg': 9500.0, 'precio_total': 25650.0 + n, 'angulo': 45,
+        }
+        for n in range(24)
+    ]
+    accesorios = [
+        {
+            'codigo': f'ACC-{n:03d}', 'descripcion': f'Accesorio {n}', 'cantidad': 4,
+            'precio_unitario': 1200.0, 'precio_total': 4800.0,
+        }
+        for n in range(30)
+    ]
+    opcionales = [
+        {
+            'codigo': 'MOSQ', 'nombre': 'Mosquitero', 'tipo': 'mosquitero', 'precio_m2': 18000,
+            'precio_total': 32400.0,
+            'formulas': [{'cantidad': 1, 'area_m2': 1.8, 'precio': 32400.0}],
+        },
+    ]
+    return {
+        'precio_total': 1450000.0 + indice,
+        'subtotal': 1115384.62,
+        'margen': 334615.38,
+        'precio_unitario_base': 1450000.0 + indice,
+        'recargo_renovacion_unitario_aplicado': 0,
+        'recargo_renovacion_total_aplicado': 0,
+        'resumen': {
+            'total_perfiles': 615600.0, 'total_accesorios': 144000.0, 'total_vidrios': 210000.0,
+            'total_secciones': 0, 'total_tratamiento': 98000.0, 'total_mano_obra': 15384.62,
+            'total_opcionales': 32400.0,
+        },
+        'desglose': {
+            'perfiles': perfiles,
+            'accesorios': accesorios,
+            'vidrios': {
+                'codigo': 'DVH', 'descripcion': 'DVH 4+9+4', 'ancho_mm': 1100, 'alto_mm': 1400,
+                'area_m2': 1.54, 'precio_m2': 136363.64, 'cantidad_hojas': 2, 'precio_total': 210000.0,
+            },
+            'secciones': [],
+            'tratamiento': {'descripcion': 'Anodizado natural', 'peso_total_kg': 32.4, 'precio_kg': 3024.69, 'precio_total': 98000.0},
+            'mano_obra': {'horas': 2, 'valor_hora': 7692.31, 'precio_total': 15384.62},
+            'opcionales': opcionales,
+        },
+        'snapshot_item': {
+            'titulo_item': f'Ventana {indice}',
+            'linea': {'id': 1, 'nombre': 'MODENA'},
+            'producto': {'id': 3, 'descripcion': 'CORREDIZA 2 HOJAS'},
+            'vidrio': {'codigo': 'DVH', 'descripcion': 'DVH 4+9+4'},
+            'tratamiento': {'id': 2, 'descripcion': 'Anodizado natural'},
+            'opcionales': [{'codigo': 'MOSQ', 'nombre': 'Mosquitero'}],
+            'ancho_mm': 1200, 'alto_mm': 1500,
+        },
+    }
+
+
+def _bytes_columnas(item):
+    presentes = sum(1 for campo in CAMPOS_COLUMNA if getattr(item, campo) is not None)
+    return presentes * BYTES_DECIMAL + 1  # + tiene_desglose
+
+
+class AlmacenamientoItemPresupuestoBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('bench-almacenamiento', password='x')
+        cliente = Cliente.objects.create(nombre='Obra', apellido='Grande', direccion='Calle 1', localidad='CABA')
+        cls.presupuesto = Presupuesto.objects.create(
+            numero='PRES-BENCH-ALM',
+            cliente=cliente,
+            fecha_expiracion=date.today() + timedelta(days=30),
+            created_by=cls.user,
+        )
+        ItemPresupuesto.objects.bulk_create([
+            ItemPresupuesto(
+                presupuesto=cls.presupuesto,
+                descripcion=f'Ventana {indice}',
+                cantidad=1,
+                ancho_mm=1200,
+                alto_mm=1500,
+                margen_porcentaje=Decimal('30'),
+                precio_unitario=Decimal('1450000'),
+                precio_total=Decimal('1450000'),
+                orden=indice,
+                resultado_json=_resultado_aluminio(indice),
+            )
+            for indice in range(CANTIDAD_ITEMS)
+        ])
+
+    def test_tamano_por_fila(self):
+        antes = lectura = completa = 0
+        for item in ItemPresupuesto._base_manager.filter(presupuesto=self.presupuesto):
+            antes += len(json.dumps(item.resultado_json).encode('utf-8'))
+            liviano = len(json.dumps(item.datos_calculo).encode('utf-8')) + _bytes_columnas(item)
+            lectura += liviano
+            completa += liviano + len(bytes(item.desglose_comprimido))
+
+        sys.stdout.write(
+            f'\n[{self.__class__.__name__}] bytes/fila: JSON completo {antes / CANTIDAD_ITEMS:,.0f}'
+            f' | lectura habitual {lectura / CANTIDAD_ITEMS:,.0f}'
+            f' | fila completa (con zlib) {completa / CANTIDAD_ITEMS:,.0f}\n'
+        )
+        self.assertLess(completa, antes)
+        self.assertLess(lectura * 5, antes)
+
+    def test_detalle_del_presupuesto(self):
+        def anterior():
+            # Camino previo: la fila completa por ítem y el resultado entero embebido.
+            for item in ItemPresupuesto._base_manager.filter(presupuesto=self.presupuesto):
+                build_pdf_item_context(item)
+                json_script(item.resultado_json, f'resultado-item-{item.pk}')
+
+        def actual():
+            for item in self.presupuesto.items.all():
+                build_pdf_item_context(item)
+                json_script(item.resultado_resumido, f'resultado-item-{item.pk}')
+
+        antes = self.medir(f'ítems con resultado completo ({CANTIDAD_ITEMS})', anterior)
+        despues = self.medir(f'ítems sin desglose ({CANTIDAD_ITEMS})', actual)
+        self.comparar(antes, despues)
+        self.assertEqual(antes['queries'], despues['queries'])
+
+        client = Client()
+        client.force_login(self.user)
+        pagina = self.medir('GET detalle del presupuesto', lambda: client.get(f'/presupuestos/{self.presupuesto.pk}/'))
+        respuesta = client.get(f'/presupuestos/{self.presupuesto.pk}/')
+        sys.stdout.write(f'\n[{self.__class__.__name__}] HTML del detalle: {len(respuesta.content):,} bytes\n')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn(b'PERF-000', respuesta.content)
+        self.assertGreater(pagina['queries'], 0)
@@ -0,0 +1,167 @@
+"""Managers `alive`/`all_objects` e índices parciales de comercial con 200.000 ventas.
+
+`Modelo.alive` arma el mismo SQL que el `filter(deleted_at__isnull=True)` que
+repetía cada vista, así que se verifica la igualdad del SQL y no se mide. Lo
+que se mide son los índices parciales de la migración 0033 (ventas y compras
+vivas con saldo): como en el benchmark de índices, se borran dentro de la
+transacción del test, se imprime el plan y la mediana de la consulta (solo la
+base, con `fetchall()`) sin y con ellos, y después se recrean con el mismo SQL.
+
+Los datos siguen la forma real: la mayoría de las ventas y compras ya están
+saldadas y una de cada diez está eliminada, así que el índice parcial guarda
+una fracción chica de la tabla. El índice va sobre `saldo` y no sobre la fecha:
+SQLite cuenta los NULL como valores distintos en sus estadísticas, así que
+`deleted_at IS NULL` sobre los índices compuestos le parece muy selectivo y
+nunca elegía un índice parcial por fecha. Con `saldo` la primera página del
+listado con saldo pasa a ordenar en memoria (algo más lenta), pero la consulta
+de ids para los totales, que la vista corre antes y recorre todo el filtro, es
+varias veces más rápida.
+"""
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from comercial import conciliacion_bancaria as conciliacion
+from comercial.models import Cliente, Compra, Cuenta, TipoCuenta, Venta
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_VENTAS = 200_000
+CANTIDAD_COMPRAS = 50_000
+DIAS = 730
+INICIO = date(2024, 1, 1)
+
+PARCIALES = ('comercial_venta_abierta_idx', 'comercial_compra_abierta_idx')
+
+
+def _ejecutar(queryset):
+    sql, parametros = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+
+
+def _plan(queryset):
+    """Plan de SQLite; `QuerySet.explain()` pierde columnas con `values_list().distinct()`."""
+    sql, parametros = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros)
+        return '\n'.join(fila[-1] for fila in cursor.fetchall())
+
+
+def _consultas():
+    """`(etiqueta, queryset, índice que debería elegir la base)`."""
+    return [
+        (
+            'ventas_list con saldo: primera página',
+            Venta.alive.filter(saldo__gt=0).order_by('-created_at')[:20],
+            'comercial_venta_abierta_idx',
+        ),
+        (
+            'ventas_list con saldo: ids para los totales',
+            Venta.alive.filter(saldo__gt=0).values_list('id').distinct(),
+            'comercial_venta_abierta_idx',
+        ),
+        (
+            'conciliación: ventas con saldo',
+            Venta.alive.filter(saldo__gt=0).order_by('pk').values_list('pk', 'numero_factura', 'saldo'),
+            'comercial_venta_abierta_idx',
+        ),
+        (
+            'conciliación: compras con saldo',
+            Compra.alive.filter(saldo__gt=0).order_by('pk').values_list('pk', 'numero_factura', 'saldo'),
+            'comercial_compra_abierta_idx',
+        ),
+    ]
+
+
+class ManagersVivosBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_superuser('bench-vivos', password='x')
+        clientes = Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente{indice}', apellido='Vivo', direccion='Calle 1', localidad='CABA')
+            for indice in range(2_000)
+        ])
+        eliminada = timezone.now()
+        Venta.objects.bulk_create([
+            Venta(
+                numero_pedido=f'PED-{indice:06d}',
+                cliente=clientes[indice % len(clientes)],
+                valor_total=Decimal('1500'),
+                sena=Decimal('300'),
+                # Una de cada veinte sigue con saldo.
+                saldo=Decimal('1200') if indice % 20 == 0 else Decimal('0'),
+                numero_factura=f'A-{indice:08d}',
+                deleted_at=eliminada if indice % 10 == 7 else None,
+            )
+            for indice in range(CANTIDAD_VENTAS)
+        ], batch_size=5_000)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE comercial_venta SET created_at = datetime('2024-01-01', '+' || (id % %s) || ' days', '+15 hours')",
+                [DIAS],
+            )
+        tipo = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        cuentas = Cuenta.objects.bulk_create([Cuenta(nombre=f'Cuenta {indice}', tipo_cuenta=tipo) for indice in range(200)])
+        Compra.objects.bulk_create([
+            Compra(
+                numero_pedido=f'COMP-{indice:06d}', cuenta=cuentas[indice % len(cuentas)],
+                fecha_pago=INICIO + timedelta(days=indice % DIAS), valor_total=Decimal('800'),
+                saldo=Decimal('800') if indice % 20 == 0 else Decimal('0'),
+                deleted_at=eliminada if indice % 10 == 7 else None, created_by=usuario,
+            )
+            for indice in range(CANTIDAD_COMPRAS)
+        ], batch_size=5_000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_alive_arma_el_mismo_sql(self):
+        for modelo in (Cliente, Venta, Compra, Cuenta):
+            self.assertEqual(
+                str(modelo.alive.all().query), str(modelo.objects.filter(deleted_at__isnull=True).query), modelo.__name__,
+            )
+
+    def _medir_todas(self, estado):
+        resultados = {}
+        for etiqueta, queryset, _ in _consultas():
+            sys.stdout.write(f'\n--- {etiqueta} ({estado})\n{_plan(queryset)}')
+            resultados[etiqueta] = self.medir(f'{etiqueta} ({estado})', lambda: _ejecutar(queryset))
+        return resultados
+
+    def test_indices_parciales(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN ({', '.join(['%s'] * len(PARCIALES))})",
+                PARCIALES,
+            )
+            creaciones = dict(cursor.fetchall())
+            self.assertEqual(set(creaciones), set(PARCIALES))
+            for nombre in PARCIALES:
+                cursor.execute(f'DROP INDEX "{nombre}"')
+        antes = self._medir_todas('sin índices parciales')
+        antes_documentos = self.medir('Indice.de_ventas + de_compras (sin índices parciales)', lambda: (
+            conciliacion.Indice.de_ventas(), conciliacion.Indice.de_compras(),
+        ))
+
+        with connection.cursor() as cursor:
+            for sql in creaciones.values():
+                cursor.execute(sql)
+            cursor.execute('ANALYZE')
+        despues = self._medir_todas('con índices parciales')
+        despues_documentos = self.medir('Indice.de_ventas + de_compras (con índices parciales)', lambda: (
+            conciliacion.Indice.de_ventas(), conciliacion.Indice.de_compras(),
+        ))
+
+        for etiqueta, queryset, indice in _consultas():
+            self.assertIn(indice, _plan(queryset), etiqueta)
+            sys.stdout.write(f'\n{etiqueta}:')
+            self.comparar(antes[etiqueta], despues[etiqueta])
+        sys.stdout.write('\níndices de documentos de la conciliación:')
+        self.comparar(antes_documentos, despues_documentos)
+        self.assertEqual(conciliacion.Indice.de_ventas().cantidad, CANTIDAD_VENTAS // 20)
@@ -0,0 +1,160 @@
+"""PDF de detalle de venta: estilos armados en cada request vs plantilla por proceso y cache.
+
+Mide una venta con 30 pagos: el camino anterior (importa reportlab y arma
+estilos y tablas en cada llamada), el actual sin cache (solo las filas de la
+venta) y el actual con el PDF ya en cache. Informa PDFs por segundo.
+"""
+import io
+import sys
+from datetime import date, datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from comercial import pdf_venta
+from comercial.models import Cliente, PagoVenta, Venta
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_PAGOS = 30
+
+
+def pdf_anterior(venta):
+    """Copia del `generar_pdf_venta` anterior, devolviendo los bytes."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+
+    pagos = venta.pagos.all().order_by('-fecha_pago')
+    total_pagado = venta.sena + sum(p.monto for p in pagos)
+    salida = io.BytesIO()
+    doc = SimpleDocTemplate(salida, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    elements = []
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#1e40af'), spaceAfter=6, alignment=TA_CENTER, fontName='Helvetica-Bold')
+    subtitle_style = ParagraphStyle('CustomSubtitle', parent=styles['Normal'], fontSize=11, textColor=colors.HexColor('#64748b'), spaceAfter=20, alignment=TA_CENTER)
+    heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#1e293b'), spaceAfter=12, spaceBefore=20, fontName='Helvetica-Bold')
+    elements.append(Paragraph("AKUNA ABERTURAS", title_style))
+    elements.append(Paragraph("Detalle de Venta", subtitle_style))
+    elements.append(Spacer(1, 0.2*inch))
+    info_data = [
+        ['Pedido N°:', venta.numero_pedido, 'Fecha:', venta.created_at.strftime('%d/%m/%Y')],
+        ['Cliente:', f"{venta.cliente}", 'Estado:', venta.get_estado_display()],
+    ]
+    info_table = Table(info_data, colWidths=[1.2*inch, 2.5*inch, 1*inch, 1.8*inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f1f5f9')),
+        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f1f5f9')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1e293b')),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+    ]))
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Paragraph("Resumen Financiero", heading_style))
+
+    def format_currency(value):
+        return f"${value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+    resumen_data = [
+        ['Concepto', 'Monto'],
+        ['Valor Total', format_currency(venta.valor_total)],
+        ['Seña Inicial', format_currency(venta.sena)],
+        ['Pagos Adicionales', format_currency(sum(p.monto for p in pagos))],
+        ['Total Pagado', format_currency(total_pagado)],
+        ['Saldo Pendiente', format_currency(venta.saldo)],
+    ]
+    resumen_table = Table(resumen_data, colWidths=[4*inch, 2.5*inch])
+    resumen_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#dbeafe')),
+        ('BACKGROUND', (0, 4), (-1, 4), colors.HexColor('#dcfce7')),
+        ('FONTNAME', (0, 4), (-1, 4), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 5), (-1, 5), colors.HexColor('#fef3c7') if venta.saldo > 0 else colors.HexColor('#dcfce7')),
+        ('FONTNAME', (0, 5), (-1, 5), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 5), (-1, 5), 12),
+    ]))
+    elements.append(resumen_table)
+    elements.append(Spacer(1, 0.3*inch))
+    if pagos.exists() or venta.sena > 0:
+        elements.append(Paragraph("Historial de Pagos", heading_style))
+        pagos_data = [['Fecha', 'Concepto', 'Forma de Pago', 'N° Factura', 'Monto']]
+        pagos_data.append([venta.created_at.strftime('%d/%m/%Y'), 'Seña Inicial', '-', venta.numero_factura or '-', format_currency(venta.sena)])
+        for pago in pagos:
+            pagos_data.append([pago.fecha_pago.strftime('%d/%m/%Y'), 'Pago', pago.get_forma_pago_display(), pago.numero_factura or '-', format_currency(pago.monto)])
+        pagos_table = Table(pagos_data, colWidths=[1.1*inch, 1.5*inch, 1.3*inch, 1.3*inch, 1.3*inch])
+        pagos_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (4, 0), (4, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+        ]))
+        elements.append(pagos_table)
+    elements.append(Spacer(1, 0.5*inch))
+    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=colors.HexColor('#64748b'), alignment=TA_CENTER)
+    elements.append(Paragraph(f"Documento generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", footer_style))
+    elements.append(Paragraph("Akuna Aberturas - Sistema de Gestión", footer_style))
+    doc.build(elements)
+    return salida.getvalue()
+
+
+class PdfVentaBenchmark(BenchmarkTestCase):
+    repeticiones = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('bench-pdf-venta', password='x')
+        cliente = Cliente.objects.create(nombre='Obra', apellido='Grande', direccion='Calle 1', localidad='CABA')
+        venta = Venta.objects.create(numero_pedido='VTA-BENCH-PDF', cliente=cliente, valor_total=100_000, sena=10_000)
+        PagoVenta.objects.bulk_create([
+            PagoVenta(venta=venta, monto=1_000, fecha_pago=date(2026, 1 + indice % 12, 1 + indice % 28),
+                      forma_pago='transferencia', numero_factura=f'0001-{indice:08d}', created_by=user)
+            for indice in range(CANTIDAD_PAGOS)
+        ])
+        cls.venta_id = venta.pk
+
+    def _venta(self):
+        return (Venta.objects.select_related('cliente').get(pk=self.venta_id),)
+
+    def _por_segundo(self, resultado):
+        sys.stdout.write(f'  {1000 / resultado["mediana_ms"]:8.1f} PDF/s')
+        return resultado
+
+    def test_pdfs_por_segundo(self):
+        self.assertTrue(pdf_anterior(*self._venta()).startswith(b'%PDF'))
+        self.assertTrue(pdf_venta.pdf_venta(*self._venta()).startswith(b'%PDF'))
+
+        antes = self._por_segundo(self.medir('armando todo en cada llamada', pdf_anterior, self._venta))
+
+        def sin_cache():
+            cache.clear()
+            return self._venta()
+
+        plantilla = self._por_segundo(self.medir('plantilla por proceso, sin cache', pdf_venta.pdf_venta, sin_cache))
+        cacheado = self._por_segundo(self.medir('plantilla por proceso, en cache', pdf_venta.pdf_venta, self._venta))
+        self.comparar(antes, plantilla)
+        self.comparar(antes, cacheado)
@@ -0,0 +1,55 @@
+"""Textos del PDF de presupuesto: redactados en cada render vs guardados en el ítem."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from comercial.models import Cliente
+from presupuestos.models import ItemPresupuesto, Presupuesto
+from presupuestos.pdf_descriptions import build_item_texts, build_pdf_item_context
+
+from .base import BenchmarkTestCase
+
+
+CANTIDAD_ITEMS = 200
+
+
+class TextosPdfBenchmark(BenchmarkTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('bench-textos', password='x')
+        cliente = Cliente.objects.create(nombre='Obra', apellido='Grande', direccion='Calle 1', localidad='CABA')
+        cls.presupuesto = Presupuesto.objects.create(
+            numero='PRES-BENCH-TXT', cliente=cliente,
+            fecha_expiracion=date.today() + timedelta(days=30), created_by=user,
+        )
+        for indice in range(CANTIDAD_ITEMS):
+            ItemPresupuesto.objects.create(
+                presupuesto=cls.presupuesto,
+                descripcion=f'Ventana {indice}',
+                cantidad=2,
+                ancho_mm=1200,
+                alto_mm=1500,
+                margen_porcentaje=Decimal('30'),
+                precio_unitario=Decimal('50000'),
+                orden=indice,
+                resultado_json={'snapshot_item': {
+                    'titulo_item': f'Ventana {indice}',
+                    'linea': {'nombre': 'MODENA'},
+                    'producto': {'descripcion': 'CORREDIZA 2 HOJAS'},
+                    'marco': {'descripcion': 'MARCO 2 GUIAS'},
+                    'hoja': {'descripcion': 'HOJA DVH'},
+                    'tratamiento': {'descripcion': 'BLANCO'},
+                    'vidrio': {'codigo': 'DVH', 'descripcion': 'DVH 4+9+4'},
+                    'opcionales': [{'codigo': 'MOSQ', 'nombre': 'Mosquitero'}],
+                    'ancho_mm': 1200, 'alto_mm': 1500, 'cantidad': 2,
+                }},
+            )
+
+    def test_contexto_pdf(self):
+        items = list(self.presupuesto.items.all())
+
+        antes = self.medir(f'redactar en cada render ({CANTIDAD_ITEMS} ítems)', lambda: [build_item_texts(i) for i in items])
+        despues = self.medir(f'textos guardados ({CANTIDAD_ITEMS} ítems)', lambda: [build_pdf_item_context(i) for i in items])
+        self.comparar(antes, despues)
+        self.assertEqual(build_pdf_item_context(items[0])['titulo'], build_item_texts(items[0])['titulo'])
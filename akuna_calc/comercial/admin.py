@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Cliente, Venta, TipoCuenta, TipoGasto, Cuenta, Compra, PagoCompra, PagoVenta, Percepcion, Retencion, Recibo
+from .models import Cliente, Venta, TipoCuenta, TipoGasto, Cuenta, Compra, PagoCompra, PagoVenta, Percepcion, Retencion, Recibo, CotizacionUSD
 
 @admin.register(Recibo)
 class ReciboAdmin(admin.ModelAdmin):
@@ -78,4 +78,11 @@ class PercepcionAdmin(admin.ModelAdmin):
 class RetencionAdmin(admin.ModelAdmin):
     list_display = ['pago', 'tipo', 'importe_retenido', 'numero_comprobante', 'fecha_comprobante']
     list_filter = ['tipo', 'fecha_comprobante']
-    search_fields = ['pago__venta__numero_pedido', 'numero_comprobante']
\ No newline at end of file
+    search_fields = ['pago__venta__numero_pedido', 'numero_comprobante']
+
+
+@admin.register(CotizacionUSD)
+class CotizacionUSDAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'valor', 'fuente', 'updated_at']
+    list_filter = ['fuente']
+    date_hierarchy = 'fecha'
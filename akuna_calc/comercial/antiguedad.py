@@ -0,0 +1,176 @@
+"""Antigüedad de saldos de ventas (0–30, 31–60, 61–90 y más de 90 días) resuelta en la base.
+
+La antigüedad de una venta se cuenta desde su fecha (`created_at`, la misma que
+muestran el listado y el PDF) hasta hoy. En lugar de calcular los días por fila,
+los límites de los tramos se arman en Python como inicios de día (`_tramo`) y
+la base solo compara `created_at` contra ellos en un `CASE`; con eso
+`saldos_por_tramo` resuelve todo en una consulta agrupada por cliente y tramo.
+
+- `por_cliente`: esa consulta pasada a una fila por cliente (saldos y
+  cantidades de cada tramo), de mayor a menor saldo; `filas_cliente` les
+  completa el nombre de a un lote de clientes.
+- `totales_de`: los totales por tramo, sumando las filas por cliente (no
+  vuelve a recorrer las ventas).
+- `detalle`: las ventas abiertas una por una con sus días y su tramo, para la
+  segunda hoja del export, que la recorre con `iterator()`.
+
+Solo entran ventas vivas con saldo pendiente (`saldo > 0`); el índice
+`comercial_venta_antiguedad_idx` cubre las columnas que lee la consulta.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from .models import Cliente, Venta, inicio_del_dia
+
+
+# (clave, etiqueta, días desde, días hasta); el último tramo no tiene tope.
+TRAMOS = (
+    ('0_30', '0 a 30 días', 0, 30),
+    ('31_60', '31 a 60 días', 31, 60),
+    ('61_90', '61 a 90 días', 61, 90),
+    ('mas_90', 'Más de 90 días', 91, None),
+)
+
+_ETIQUETAS = {clave: etiqueta for clave, etiqueta, _, _ in TRAMOS}
+# Lo que se suma por cliente y en los totales.
+_CAMPOS = ('total', 'cantidad', *(f'{campo}_{clave}' for clave in _ETIQUETAS for campo in ('saldo', 'cantidad')))
+
+
+def _tramo(hoy):
+    """Posición en `TRAMOS` de cada venta a la fecha `hoy`, según su `created_at`.
+
+    Una venta del día `hoy - n` tiene n días, así que cae en el primer tramo cuyo
+    tope `hasta` cumple `created_at >= inicio de hoy - hasta`. Una fecha futura
+    cuenta como del día.
+    """
+    return Case(
+        *[
+            When(created_at__gte=inicio_del_dia(hoy - timedelta(days=hasta)), then=Value(posicion))
+            for posicion, (_, _, _, hasta) in enumerate(TRAMOS) if hasta is not None
+        ],
+        default=Value(len(TRAMOS) - 1),
+        output_field=IntegerField(),
+    )
+
+
+def tramo(dias):
+    """Clave del tramo que corresponde a `dias` de antigüedad."""
+    for clave, _, desde, hasta in TRAMOS:
+        if dias >= desde and (hasta is None or dias <= hasta):
+            return clave
+    return TRAMOS[0][0]
+
+
+def ventas_abiertas(cliente_filtro=None, razon_social_filtro=None, tipo_factura_filtro=None):
+    """Ventas vivas con saldo pendiente, con los filtros del reporte."""
+    ventas = Venta.alive.filter(saldo__gt=0)
+    if cliente_filtro:
+        ventas = ventas.filter(cliente__in=cliente_filtro)
+    if razon_social_filtro:
+        ventas = ventas.filter(cliente__razon_social__in=razon_social_filtro)
+    if tipo_factura_filtro:
+        if 'blanco' in tipo_factura_filtro and 'negro' not in tipo_factura_filtro:
+            ventas = ventas.filter(con_factura=True)
+        elif 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
+            ventas = ventas.filter(con_factura=False)
+    return ventas.order_by()
+
+
+def saldos_por_tramo(ventas, hoy=None):
+    """Queryset de dicts `{cliente_id, tramo, saldo_tramo, cantidad_tramo}`: la única consulta del reporte."""
+    return ventas.annotate(tramo=_tramo(hoy or timezone.localdate())).values('cliente_id', 'tramo').annotate(
+        saldo_tramo=Sum('saldo'), cantidad_tramo=Count('pk'),
+    ).order_by()
+
+
+def por_cliente(ventas, hoy=None):
+    """Una fila por cliente con saldo (`cliente_id` y `_CAMPOS`), de mayor a menor saldo total."""
+    clientes = {}
+    for fila in saldos_por_tramo(ventas, hoy):
+        cliente = clientes.get(fila['cliente_id'])
+        if cliente is None:
+            cliente = clientes[fila['cliente_id']] = {'cliente_id': fila['cliente_id'], **dict.fromkeys(_CAMPOS, 0)}
+        clave = TRAMOS[fila['tramo']][0]
+        cliente[f'saldo_{clave}'] += fila['saldo_tramo']
+        cliente[f'cantidad_{clave}'] += fila['cantidad_tramo']
+        cliente['total'] += fila['saldo_tramo']
+        cliente['cantidad'] += fila['cantidad_tramo']
+    return sorted(clientes.values(), key=lambda cliente: (-cliente['total'], cliente['cliente_id']))
+
+
+def _tramos(fila):
+    total = fila['total']
+    return [
+        {
+            'clave': clave,
+            'etiqueta': etiqueta,
+            'saldo': fila[f'saldo_{clave}'],
+            'cantidad': fila[f'cantidad_{clave}'],
+            'porcentaje': (fila[f'saldo_{clave}'] * 100 / total).quantize(Decimal('0.1')) if total else Decimal('0'),
+        }
+        for clave, etiqueta, _, _ in TRAMOS
+    ]
+
+
+def totales_de(filas):
+    """Saldos, cantidades y porcentajes por tramo sumando las filas de `por_cliente`."""
+    total = dict.fromkeys(_CAMPOS, 0)
+    for fila in filas:
+        for campo in _CAMPOS:
+            total[campo] += fila[campo]
+    return {
+        'total': Decimal(total['total']),
+        'cantidad': total['cantidad'],
+        'cantidad_clientes': len(filas),
+        'tramos': _tramos(total),
+    }
+
+
+def filas_cliente(filas, lote=2000):
+    """Filas de `por_cliente` con el nombre, la razón social y la lista de tramos
+    (template y export), con una consulta de clientes cada `lote` filas."""
+    filas = iter(filas)
+    while True:
+        bloque = list(islice(filas, lote))
+        if not bloque:
+            return
+        clientes = Cliente.objects.in_bulk([fila['cliente_id'] for fila in bloque])
+        for fila in bloque:
+            cliente = clientes.get(fila['cliente_id'])
+            yield {
+                **fila,
+                'cliente': f'{cliente.nombre} {cliente.apellido}'.strip() if cliente else '-',
+                'razon_social': (cliente.razon_social if cliente else '') or '-',
+                'tramos': _tramos(fila),
+            }
+
+
+def detalle(ventas):
+    """Queryset de las ventas abiertas (dicts), de la más antigua a la más nueva."""
+    return ventas.values(
+        'pk', 'numero_pedido', 'created_at', 'con_factura', 'valor_total', 'saldo',
+        'cliente__nombre', 'cliente__apellido', 'cliente__razon_social',
+    ).order_by('created_at', 'pk')
+
+
+def como_fila_venta(fila, hoy=None):
+    """Fila de `detalle` con los días de antigüedad y el tramo."""
+    hoy = hoy or timezone.localdate()
+    fecha = timezone.localtime(fila['created_at']).date()
+    dias = max((hoy - fecha).days, 0)
+    return {
+        'venta_id': fila['pk'],
+        'pedido': fila['numero_pedido'],
+        'fecha': fecha,
+        'cliente': f"{fila['cliente__nombre']} {fila['cliente__apellido']}".strip(),
+        'razon_social': fila['cliente__razon_social'] or '-',
+        'tipo': 'Blanco' if fila['con_factura'] else 'Negro',
+        'valor_total': fila['valor_total'],
+        'saldo': fila['saldo'],
+        'dias': dias,
+        'tramo': _ETIQUETAS[tramo(dias)],
+    }
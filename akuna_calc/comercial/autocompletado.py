@@ -0,0 +1,76 @@
+"""Opciones de clientes y razones sociales para los selects asincrónicos (select2 con `ajax`).
+
+Los formularios de ventas y reportes ya no renderizan todos los clientes: solo
+las opciones elegidas (ver `forms.SelectAsincrono`) y select2 pide el resto a
+`comercial:clientes_list_api` a medida que se escribe, de a `POR_PAGINA`.
+
+La búsqueda usa `documento_busqueda` del cliente (nombre, apellido, razón social,
+localidad y CUIT normalizados, con índice de texto completo; ver core/busqueda.py),
+así que "perez" encuentra "Pérez" y cada palabra se busca como prefijo. Un
+término que parece un CUIT (dígitos y guiones) también compara por prefijo
+contra la columna `cuit`, que tiene índice único.
+"""
+import re
+
+from django.db.models import Q
+
+from core.busqueda import buscar
+
+from .models import Cliente
+
+
+POR_PAGINA = 20
+_CUIT = re.compile(r'^[\d\s-]+$')
+LARGO_MINIMO_CUIT = 2
+
+
+def _pagina(valor):
+    try:
+        return max(int(valor), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _filtrar(termino):
+    clientes = Cliente.alive.all()
+    termino = (termino or '').strip()
+    if not termino:
+        return clientes
+    ademas = None
+    digitos = re.sub(r'\D', '', termino)
+    if _CUIT.match(termino) and len(digitos) >= LARGO_MINIMO_CUIT:
+        ademas = Q(cuit__startswith=digitos)
+    # Solo el filtro: el puntaje de relevancia se calcula por fila y con términos
+    # cortos coinciden miles; el autocompletado ordena alfabéticamente.
+    return clientes.filter(pk__in=buscar(clientes, termino, ademas).values('pk'))
+
+
+def _cortar(filas, pagina):
+    """La página pedida y si hay más, trayendo una fila de más en lugar de contar."""
+    inicio = (pagina - 1) * POR_PAGINA
+    filas = list(filas[inicio:inicio + POR_PAGINA + 1])
+    return filas[:POR_PAGINA], len(filas) > POR_PAGINA
+
+
+def texto_cliente(cliente):
+    texto = cliente.get_nombre_completo()
+    if cliente.cuit:
+        texto = f'{texto} — CUIT {cliente.cuit}'
+    return texto
+
+
+def clientes(termino='', pagina=1):
+    """`([{id, text}], hay_mas)` de los clientes vivos que coinciden con `termino`."""
+    filas = _filtrar(termino).only('pk', 'nombre', 'apellido', 'razon_social', 'cuit').order_by('apellido', 'nombre', 'pk')
+    filas, hay_mas = _cortar(filas, _pagina(pagina))
+    return [{'id': cliente.pk, 'text': texto_cliente(cliente)} for cliente in filas], hay_mas
+
+
+def razones_sociales(termino='', pagina=1):
+    """`([{id, text}], hay_mas)` de las razones sociales distintas de los clientes que coinciden."""
+    filas = (
+        _filtrar(termino).exclude(razon_social='').exclude(razon_social__isnull=True)
+        .order_by('razon_social').values_list('razon_social', flat=True).distinct()
+    )
+    filas, hay_mas = _cortar(filas, _pagina(pagina))
+    return [{'id': razon, 'text': razon} for razon in filas], hay_mas
@@ -0,0 +1,243 @@
+"""Reporte de cobranzas (señas y pagos de ventas) resuelto en la base.
+
+Las señas salen de `Venta` y los pagos de `PagoVenta`; cada lado arma las
+mismas columnas anotadas (`COLUMNAS`) y se combinan con un `UNION ALL`. Sobre
+esa consulta la base ordena y pagina (`ordenar` + slicing), los totales salen
+de un único agregado sobre el UNION (`totales`) y el export a Excel recorre el
+mismo queryset con `iterator()`, sin armar la lista completa en memoria.
+
+Las filas vienen como tuplas en el orden de `CAMPOS`; `como_dict` las pasa a
+los diccionarios que usan el template, el export y los tests.
+"""
+from decimal import Decimal
+from itertools import islice
+
+from django.db import connections
+from django.db.models import Case, CharField, DecimalField, F, Q, Value, When
+from django.db.models.functions import Coalesce, Concat, NullIf, TruncDate
+
+from . import cotizaciones
+from .models import PagoVenta, Venta, rango_de_dias
+
+
+CONCEPTO_SENA = 'Seña inicial'
+CONCEPTO_PAGO = 'Pago'
+
+CAMPOS = (
+    'fecha', 'pedido', 'numero_factura', 'cliente', 'razon_social', 'concepto', 'forma_pago',
+    'monto', 'tipo', 'venta_id', 'pago_en_dolares', 'monto_usd', 'cotizacion_usd',
+)
+# Alias de las columnas en SQL: con el nombre del campo chocarían con los del modelo.
+COLUMNAS = tuple(f'cobro_{campo}' for campo in CAMPOS)
+
+ORDENES = {
+    'fecha_desc': ('-cobro_fecha', '-cobro_pedido', '-cobro_monto'),
+    'fecha_asc': ('cobro_fecha', 'cobro_pedido', 'cobro_monto'),
+    'monto_desc': ('-cobro_monto', '-cobro_fecha', '-cobro_pedido'),
+    'monto_asc': ('cobro_monto', 'cobro_fecha', 'cobro_pedido'),
+    'cliente_asc': ('cobro_cliente', 'cobro_fecha', 'cobro_pedido'),
+}
+
+_IMPORTE = DecimalField(max_digits=12, decimal_places=2)
+_TEXTO = CharField()
+_CENTAVOS = Decimal('0.01')
+
+
+def _texto_o_guion(*campos):
+    return Coalesce(*[NullIf(campo, Value('')) for campo in campos], Value('-'), output_field=_TEXTO)
+
+
+def _display(campo, choices, default):
+    return Case(
+        *[When(**{campo: valor}, then=Value(etiqueta)) for valor, etiqueta in choices],
+        default=default,
+        output_field=_TEXTO,
+    )
+
+
+def _tipo(campo):
+    return Case(When(**{campo: True}, then=Value('Blanco')), default=Value('Negro'), output_field=_TEXTO)
+
+
+def _solo_en_dolares(flag, campo):
+    return Case(When(**{flag: True}, then=F(campo)), default=Value(None), output_field=_IMPORTE)
+
+
+def _columnas(queryset, **expresiones):
+    """Anota las columnas en el orden de `CAMPOS` (el UNION empareja por posición)."""
+    return queryset.annotate(
+        **{columna: expresiones[campo] for campo, columna in zip(CAMPOS, COLUMNAS)}
+    ).values_list(*COLUMNAS)
+
+
+def _filtro_moneda(moneda, flag, campo_usd):
+    if moneda == 'usd':
+        return Q(**{flag: True, f'{campo_usd}__gt': 0})
+    if moneda == 'ars':
+        return Q(**{flag: False}) | Q(**{f'{campo_usd}__isnull': True}) | Q(**{f'{campo_usd}__lte': 0})
+    return Q()
+
+
+def _filtro_tipo_factura(tipo_factura_filtro, campo):
+    if tipo_factura_filtro:
+        if 'blanco' in tipo_factura_filtro and 'negro' not in tipo_factura_filtro:
+            return Q(**{campo: True})
+        if 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
+            return Q(**{campo: False})
+    return Q()
+
+
+def construir(
+    fecha_desde=None,
+    fecha_hasta=None,
+    cliente_filtro=None,
+    razon_social_filtro=None,
+    estado_venta_filtro=None,
+    tipo_factura_filtro=None,
+    numero_factura_filtro=None,
+    moneda_cobranza_filtro='todas',
+):
+    """Queryset `UNION ALL` de señas y pagos (tuplas en el orden de `CAMPOS`), sin ordenar."""
+    senas = Venta.alive.filter(sena__gt=0)
+    pagos = PagoVenta.objects.filter(venta__deleted_at__isnull=True)
+
+    if fecha_desde or fecha_hasta:
+        senas = senas.filter(rango_de_dias('created_at', fecha_desde, fecha_hasta))
+    if fecha_desde:
+        pagos = pagos.filter(fecha_pago__gte=fecha_desde)
+    if fecha_hasta:
+        pagos = pagos.filter(fecha_pago__lte=fecha_hasta)
+    if cliente_filtro:
+        senas = senas.filter(cliente__in=cliente_filtro)
+        pagos = pagos.filter(venta__cliente__in=cliente_filtro)
+    if razon_social_filtro:
+        senas = senas.filter(cliente__razon_social__in=razon_social_filtro)
+        pagos = pagos.filter(venta__cliente__razon_social__in=razon_social_filtro)
+    if estado_venta_filtro:
+        senas = senas.filter(estado__in=estado_venta_filtro)
+        pagos = pagos.filter(venta__estado__in=estado_venta_filtro)
+    if numero_factura_filtro:
+        senas = senas.filter(numero_factura__icontains=numero_factura_filtro)
+        pagos = pagos.filter(
+            Q(numero_factura__icontains=numero_factura_filtro) |
+            Q(venta__numero_factura__icontains=numero_factura_filtro)
+        )
+    senas = senas.filter(
+        _filtro_tipo_factura(tipo_factura_filtro, 'con_factura'),
+        _filtro_moneda(moneda_cobranza_filtro, 'sena_en_dolares', 'sena_usd'),
+    )
+    pagos = pagos.filter(
+        _filtro_tipo_factura(tipo_factura_filtro, 'con_factura'),
+        _filtro_moneda(moneda_cobranza_filtro, 'pago_en_dolares', 'monto_usd'),
+    )
+
+    senas = _columnas(
+        senas.order_by(),
+        fecha=TruncDate('created_at'),
+        pedido=F('numero_pedido'),
+        numero_factura=_texto_o_guion('numero_factura'),
+        cliente=Concat('cliente__nombre', Value(' '), 'cliente__apellido', output_field=_TEXTO),
+        razon_social=_texto_o_guion('cliente__razon_social'),
+        concepto=Value(CONCEPTO_SENA, output_field=_TEXTO),
+        forma_pago=_display('forma_pago', Venta.FORMA_PAGO_CHOICES, Value('-')),
+        monto=F('sena'),
+        tipo=_tipo('con_factura'),
+        venta_id=F('pk'),
+        pago_en_dolares=F('sena_en_dolares'),
+        monto_usd=_solo_en_dolares('sena_en_dolares', 'sena_usd'),
+        cotizacion_usd=_solo_en_dolares('sena_en_dolares', 'cotizacion_sena_usd'),
+    )
+    pagos = _columnas(
+        pagos.order_by(),
+        fecha=F('fecha_pago'),
+        pedido=F('venta__numero_pedido'),
+        numero_factura=_texto_o_guion('numero_factura', 'venta__numero_factura'),
+        cliente=Concat('venta__cliente__nombre', Value(' '), 'venta__cliente__apellido', output_field=_TEXTO),
+        razon_social=_texto_o_guion('venta__cliente__razon_social'),
+        concepto=Value(CONCEPTO_PAGO, output_field=_TEXTO),
+        forma_pago=_display('forma_pago', PagoVenta.FORMA_PAGO_CHOICES, F('forma_pago')),
+        monto=F('monto'),
+        tipo=_tipo('con_factura'),
+        venta_id=F('venta_id'),
+        pago_en_dolares=F('pago_en_dolares'),
+        monto_usd=F('monto_usd'),
+        cotizacion_usd=F('cotizacion_usd'),
+    )
+    return senas.union(pagos, all=True)
+
+
+def ordenar(cobranzas, orden='fecha_desc'):
+    return cobranzas.order_by(*ORDENES.get(orden, ORDENES['fecha_desc']))
+
+
+def como_dict(fila):
+    return dict(zip(CAMPOS, fila))
+
+
+def como_dicts(filas):
+    return [como_dict(fila) for fila in filas]
+
+
+def con_usd_a_la_fecha(filas, serie=None):
+    """Agrega `usd_a_la_fecha` a las filas (dicts): lo cobrado en dólares tal cual y
+    el resto convertido con la cotización del día, en una pasada sobre la serie."""
+    filas = list(filas)
+    convertidos = (serie or cotizaciones.serie()).convertir((fila['fecha'], fila['monto']) for fila in filas)
+    for fila, usd in zip(filas, convertidos):
+        fila['usd_a_la_fecha'] = fila['monto_usd'] if fila['pago_en_dolares'] and fila['monto_usd'] else usd
+    return filas
+
+
+def dicts_con_usd(filas, lote):
+    """Como `con_usd_a_la_fecha` sobre un iterador largo (el export), de a `lote` filas."""
+    filas = iter(filas)
+    serie = cotizaciones.serie()
+    while True:
+        bloque = [como_dict(fila) for fila in islice(filas, lote)]
+        if not bloque:
+            return
+        yield from con_usd_a_la_fecha(bloque, serie)
+
+
+def _importe(valor):
+    # SQLite devuelve floats en los SUM crudos; MySQL, Decimal.
+    return Decimal(str(valor or 0)).quantize(_CENTAVOS)
+
+
+def totales(cobranzas):
+    """Totales y cantidades del reporte en una sola consulta agregada sobre el UNION."""
+    conexion = connections[cobranzas.db]
+    sql, params = cobranzas.order_by().query.get_compiler(cobranzas.db).as_sql()
+    columna = {campo: conexion.ops.quote_name(f'cobro_{campo}') for campo in CAMPOS}
+    en_dolares = f"{columna['pago_en_dolares']} = %s AND {columna['monto_usd']} <> 0"
+    consulta = (
+        'SELECT COUNT(*), '
+        f"SUM(CASE WHEN {columna['tipo']} = %s THEN {columna['monto']} ELSE 0 END), "
+        f"SUM(CASE WHEN {columna['tipo']} = %s THEN {columna['monto']} ELSE 0 END), "
+        f"SUM(CASE WHEN {columna['tipo']} = %s THEN 1 ELSE 0 END), "
+        f"SUM(CASE WHEN {en_dolares} THEN {columna['monto_usd']} ELSE 0 END), "
+        f"SUM(CASE WHEN {en_dolares} THEN 1 ELSE 0 END), "
+        f"SUM(CASE WHEN {columna['concepto']} = %s THEN 1 ELSE 0 END) "
+        f'FROM ({sql}) cobranzas'
+    )
+    with conexion.cursor() as cursor:
+        cursor.execute(consulta, ('Blanco', 'Negro', 'Blanco', True, True, CONCEPTO_SENA, *params))
+        cantidad, total_blanco, total_negro, cantidad_blanco, total_usd, cantidad_usd, cantidad_senas = cursor.fetchone()
+
+    cantidad = cantidad or 0
+    cantidad_blanco = int(cantidad_blanco or 0)
+    cantidad_senas = int(cantidad_senas or 0)
+    total_blanco = _importe(total_blanco)
+    total_negro = _importe(total_negro)
+    return {
+        'total_blanco': total_blanco,
+        'total_negro': total_negro,
+        'total': total_blanco + total_negro,
+        'total_usd': _importe(total_usd),
+        'cantidad_blanco': cantidad_blanco,
+        'cantidad_negro': cantidad - cantidad_blanco,
+        'cantidad': cantidad,
+        'cantidad_usd': int(cantidad_usd or 0),
+        'cantidad_senas': cantidad_senas,
+        'cantidad_pagos': cantidad - cantidad_senas,
+    }
@@ -0,0 +1,353 @@
+"""Conciliación del extracto bancario con las ventas y compras abiertas.
+
+`leer_extracto` toma el CSV/XLSX que baja del home banking y reconoce las
+columnas por el encabezado (fecha, descripción, importe o débito/crédito,
+referencia); las líneas que no son movimientos (saldos, subtotales) se saltean.
+
+`Indice` carga con una consulta las ventas (o compras) con saldo y las reparte
+en diccionarios por número de factura, por (CUIT, saldo) y por saldo. Cada
+movimiento se resuelve buscando sus claves en esos diccionarios, sin recorrer
+los documentos: conciliar es lineal en movimientos + documentos. Los créditos
+se buscan entre las ventas y los débitos entre las compras.
+
+`proponer` devuelve una `Propuesta` por movimiento con el documento de mayor
+puntaje; `registrar` da de alta como pagos las que el usuario confirma.
+"""
+import re
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import planillas
+from .models import Compra, PagoCompra, PagoVenta, Venta
+from .pagos_masivos import guardar_con_recibos
+
+
+VENTA = 'venta'
+COMPRA = 'compra'
+
+# Días entre el movimiento y la fecha del documento para que la fecha sume puntos.
+VENTANA_DIAS = 45
+PUNTOS = {'factura': 4, 'cuit': 3, 'importe': 3, 'fecha': 1}
+# Por debajo no se propone nada; desde `SEGURO` (y sin empate) la propuesta viene marcada.
+MINIMO = 4
+SEGURO = 6
+
+COLUMNAS = {
+    'fecha': ('fecha', 'fecha movimiento', 'fecha mov', 'fecha operacion', 'fecha valor'),
+    'descripcion': ('descripcion', 'concepto', 'detalle', 'movimiento', 'leyenda'),
+    'importe': ('importe', 'monto', 'importe en pesos'),
+    'debito': ('debito', 'debitos', 'debe'),
+    'credito': ('credito', 'creditos', 'haber'),
+    'referencia': ('referencia', 'comprobante', 'nro comprobante', 'numero de comprobante', 'nro de comprobante'),
+}
+_ALIAS = {alias: columna for columna, alias_columna in COLUMNAS.items() for alias in alias_columna}
+
+_CUIT = re.compile(r'\b(\d{2})-?(\d{8})-?(\d)\b')
+_NUMERO = re.compile(r'\d+(?:-\d+)?')
+
+
+def claves_factura(texto):
+    """Números de comprobante que aparecen en un texto: `0001-00001234` da `100001234` y `1234`."""
+    claves = set()
+    for numero in _NUMERO.findall(str(texto or '')):
+        partes = numero.split('-')
+        if len(partes) == 1 and len(numero) == 11:
+            continue  # un CUIT sin guiones
+        for clave in {''.join(partes).lstrip('0'), partes[-1].lstrip('0')}:
+            if len(clave) >= 3:
+                claves.add(clave)
+    return claves
+
+
+def _cuit(texto):
+    return ''.join(caracter for caracter in str(texto or '') if caracter.isdigit())
+
+
+class Movimiento:
+    """Una línea del extracto. `importe` es positivo para créditos y negativo para débitos."""
+
+    def __init__(self, linea, fecha, descripcion, importe, referencia=''):
+        self.linea = linea
+        self.fecha = fecha
+        self.descripcion = str(descripcion or '').strip()
+        self.referencia = str(referencia or '').strip()
+        self.importe = importe
+        texto = f'{self.descripcion} {self.referencia}'
+        self.cuits = {''.join(partes) for partes in _CUIT.findall(texto)}
+        self.facturas = claves_factura(_CUIT.sub(' ', texto))
+
+    @property
+    def tipo(self):
+        return VENTA if self.importe > 0 else COMPRA
+
+
+class Documento:
+    """Venta o compra abierta; `restante` es lo que le queda después de las propuestas ya hechas."""
+
+    def __init__(self, tipo, pk, numero_pedido, nombre, cuit, factura, fecha, saldo):
+        self.tipo = tipo
+        self.pk = pk
+        self.numero_pedido = numero_pedido
+        self.nombre = nombre
+        self.cuit = _cuit(cuit)
+        self.facturas = claves_factura(factura)
+        self.fecha = fecha
+        self.saldo = saldo
+        self.restante = saldo
+
+
+class Indice:
+    """Documentos abiertos indexados por factura, (CUIT, saldo) y saldo."""
+
+    def __init__(self, documentos):
+        self.por_factura = defaultdict(list)
+        self.por_cuit_importe = defaultdict(list)
+        self.por_importe = defaultdict(list)
+        self.cantidad = 0
+        for documento in documentos:
+            self.cantidad += 1
+            for clave in documento.facturas:
+                self.por_factura[clave].append(documento)
+            if documento.cuit:
+                self.por_cuit_importe[(documento.cuit, documento.saldo)].append(documento)
+            self.por_importe[documento.saldo].append(documento)
+
+    @classmethod
+    def de_ventas(cls):
+        filas = (
+            Venta.alive.filter(saldo__gt=0)
+            .order_by('pk')
+            .values_list(
+                'pk', 'numero_pedido', 'cliente__razon_social', 'cliente__apellido', 'cliente__nombre',
+                'cliente__cuit', 'numero_factura', 'fecha_pago', 'created_at', 'saldo',
+            )
+        )
+        return cls(
+            Documento(
+                VENTA, pk, pedido, razon_social or f'{apellido}, {nombre}', cuit, factura,
+                fecha_pago or timezone.localdate(creada), saldo,
+            )
+            for pk, pedido, razon_social, apellido, nombre, cuit, factura, fecha_pago, creada, saldo in filas.iterator(chunk_size=5_000)
+        )
+
+    @classmethod
+    def de_compras(cls):
+        filas = (
+            Compra.alive.filter(saldo__gt=0)
+            .order_by('pk')
+            .values_list(
+                'pk', 'numero_pedido', 'cuenta__razon_social', 'cuenta__nombre', 'cuenta__cuit',
+                'numero_factura', 'comprobante', 'fecha_pago', 'saldo',
+            )
+        )
+        return cls(
+            Documento(COMPRA, pk, pedido, razon_social or nombre, cuit, f'{factura} {comprobante}', fecha_pago, saldo)
+            for pk, pedido, razon_social, nombre, cuit, factura, comprobante, fecha_pago, saldo in filas.iterator(chunk_size=5_000)
+        )
+
+    def candidatos(self, movimiento):
+        importe = abs(movimiento.importe)
+        encontrados = {}
+        for clave in movimiento.facturas:
+            for documento in self.por_factura.get(clave, ()):
+                encontrados[documento.pk] = documento
+        for cuit in movimiento.cuits:
+            for documento in self.por_cuit_importe.get((cuit, importe), ()):
+                encontrados[documento.pk] = documento
+        for documento in self.por_importe.get(importe, ()):
+            encontrados[documento.pk] = documento
+        return encontrados.values()
+
+
+def puntuar(movimiento, documento):
+    """`(puntaje, motivos)` de un documento para el movimiento."""
+    motivos = []
+    if movimiento.facturas & documento.facturas:
+        motivos.append('factura')
+    if documento.cuit and documento.cuit in movimiento.cuits:
+        motivos.append('cuit')
+    if abs(movimiento.importe) == documento.saldo:
+        motivos.append('importe')
+    if documento.fecha and abs((movimiento.fecha - documento.fecha).days) <= VENTANA_DIAS:
+        motivos.append('fecha')
+    return sum(PUNTOS[motivo] for motivo in motivos), motivos
+
+
+class Propuesta:
+    def __init__(self, movimiento, documento=None, puntaje=0, motivos=(), empatados=0):
+        self.movimiento = movimiento
+        self.documento = documento
+        self.puntaje = puntaje
+        self.motivos = list(motivos)
+        # Otros documentos con el mismo puntaje: la propuesta no es segura.
+        self.empatados = empatados
+
+    @property
+    def segura(self):
+        return self.documento is not None and self.puntaje >= SEGURO and not self.empatados
+
+    def valor(self):
+        """Lo que viaja en el formulario para confirmar: `tipo:pk:fecha:importe`."""
+        return ':'.join((
+            self.documento.tipo, str(self.documento.pk),
+            self.movimiento.fecha.isoformat(), str(abs(self.movimiento.importe)),
+        ))
+
+
+def proponer(movimientos, ventas=None, compras=None):
+    """Una `Propuesta` por movimiento, en el orden del extracto.
+
+    Un documento no recibe propuestas por más que su saldo: lo ya propuesto a
+    movimientos anteriores se descuenta de `restante`.
+    """
+    indices = {
+        VENTA: ventas if ventas is not None else Indice.de_ventas(),
+        COMPRA: compras if compras is not None else Indice.de_compras(),
+    }
+    propuestas = []
+    for movimiento in movimientos:
+        importe = abs(movimiento.importe)
+        mejor, mejor_puntaje, mejores_motivos, empatados = None, 0, [], 0
+        for documento in indices[movimiento.tipo].candidatos(movimiento):
+            if importe > documento.restante:
+                continue
+            puntaje, motivos = puntuar(movimiento, documento)
+            if puntaje > mejor_puntaje:
+                mejor, mejor_puntaje, mejores_motivos, empatados = documento, puntaje, motivos, 0
+            elif mejor is not None and puntaje == mejor_puntaje:
+                empatados += 1
+        if mejor is None or mejor_puntaje < MINIMO:
+            propuestas.append(Propuesta(movimiento))
+            continue
+        mejor.restante -= importe
+        propuestas.append(Propuesta(movimiento, mejor, mejor_puntaje, mejores_motivos, empatados))
+    return propuestas
+
+
+def _columnas(encabezado):
+    columnas = {}
+    for posicion, titulo in enumerate(encabezado):
+        columna = _ALIAS.get(planillas.normalizar(titulo).rstrip('.:'))
+        if columna and columna not in columnas:
+            columnas[columna] = posicion
+    return columnas
+
+
+def leer_extracto(registros):
+    """Movimientos de las filas de un extracto: `(movimientos, ignoradas)`.
+
+    El encabezado es la primera fila que tiene fecha e importe (o débito/crédito);
+    lo que viene antes son los datos de la cuenta. Las filas sin fecha o sin
+    importe distinto de cero (saldos iniciales, subtotales) se cuentan como ignoradas.
+    """
+    movimientos, ignoradas, columnas = [], 0, None
+    for linea, valores in enumerate(registros, 1):
+        if planillas.fila_vacia(valores):
+            continue
+        if columnas is None:
+            candidatas = _columnas(valores)
+            if 'fecha' in candidatas and ('importe' in candidatas or {'debito', 'credito'} <= candidatas.keys()):
+                columnas = candidatas
+            continue
+
+        def valor(columna):
+            posicion = columnas.get(columna)
+            return valores[posicion] if posicion is not None and posicion < len(valores) else None
+
+        fecha = planillas.convertir_fecha(valor('fecha'))
+        if 'importe' in columnas:
+            importe = planillas.convertir_monto(valor('importe'))
+        else:
+            credito = planillas.convertir_monto(valor('credito')) or Decimal('0')
+            debito = planillas.convertir_monto(valor('debito')) or Decimal('0')
+            importe = credito - abs(debito)
+        if fecha is None or not importe:
+            ignoradas += 1
+            continue
+        movimientos.append(Movimiento(linea, fecha, valor('descripcion'), importe, valor('referencia')))
+    if columnas is None:
+        raise ValueError('No se encontró el encabezado del extracto (se necesitan las columnas fecha e importe, o débito y crédito).')
+    return movimientos, ignoradas
+
+
+def leer_valor(valor):
+    """Lo que devuelve `Propuesta.valor()`: `(tipo, pk, fecha, importe)`, o None si no es válido."""
+    try:
+        tipo, pk, fecha, importe = valor.split(':')
+        fecha = planillas.convertir_fecha(fecha)
+        importe = Decimal(importe)
+        pk = int(pk)
+    except (ValueError, ArithmeticError):
+        return None
+    if not importe.is_finite():
+        return None
+    if tipo not in (VENTA, COMPRA) or fecha is None or importe <= 0:
+        return None
+    return tipo, pk, fecha, importe
+
+
+def registrar(confirmados, usuario, descripcion='Conciliación bancaria'):
+    """Da de alta como pagos los movimientos confirmados, `[(tipo, pk, fecha, importe)]`.
+
+    Bloquea los documentos y revisa que sigan abiertos y que lo confirmado no
+    pase su saldo; si algo no cierra no escribe nada. Devuelve `(pagos_venta,
+    pagos_compra, errores)`.
+    """
+    with transaction.atomic():
+        ventas = Venta.alive.select_for_update(of=('self',)).filter(
+            pk__in=[pk for tipo, pk, _, _ in confirmados if tipo == VENTA],
+        ).in_bulk()
+        compras = Compra.alive.select_for_update(of=('self',)).filter(
+            pk__in=[pk for tipo, pk, _, _ in confirmados if tipo == COMPRA],
+        ).in_bulk()
+        documentos = {VENTA: ventas, COMPRA: compras}
+
+        errores, acumulado = [], defaultdict(Decimal)
+        for tipo, pk, fecha, importe in confirmados:
+            documento = documentos[tipo].get(pk)
+            if documento is None:
+                errores.append(f'La {tipo} {pk} ya no existe.')
+                continue
+            acumulado[(tipo, pk)] += importe
+            if acumulado[(tipo, pk)] > documento.saldo:
+                errores.append(
+                    f'Lo confirmado para el pedido {documento.numero_pedido} (${acumulado[(tipo, pk)]}) '
+                    f'pasa su saldo (${documento.saldo}).'
+                )
+        if errores:
+            return [], [], errores
+
+        pagos_venta = guardar_con_recibos([
+            PagoVenta(
+                venta=ventas[pk],
+                monto=importe,
+                fecha_pago=fecha,
+                forma_pago='transferencia',
+                con_factura=ventas[pk].con_factura,
+                observaciones=descripcion,
+                created_by=usuario,
+            )
+            for tipo, pk, fecha, importe in confirmados if tipo == VENTA
+        ])
+        pagos_compra = [
+            PagoCompra.objects.create(
+                compra=compras[pk],
+                monto=importe,
+                fecha_pago=fecha,
+                forma_pago='transferencia',
+                con_factura=compras[pk].con_factura,
+                observaciones=descripcion,
+                created_by=usuario,
+            )
+            for tipo, pk, fecha, importe in confirmados if tipo == COMPRA
+        ]
+        for pk in {pago.compra_id for pago in pagos_compra}:
+            compra = compras[pk]
+            if compra.saldo - acumulado[(COMPRA, pk)] <= 0 and compra.estado == 'pendiente':
+                compra.estado = 'pagado'
+            # Recalcula el saldo con los pagos nuevos.
+            compra.save()
+    return pagos_venta, pagos_compra, errores
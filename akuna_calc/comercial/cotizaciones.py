@@ -0,0 +1,165 @@
+"""Serie diaria de la cotización del dólar (`CotizacionUSD`) y conversión a USD a la fecha.
+
+Las ventas, pagos y señas cobrados en dólares guardan su propia cotización; el
+resto de las operaciones solo tiene el importe en pesos. Con la serie, cualquier
+importe se puede expresar en dólares a la fecha de la operación: un día sin
+cotización (fin de semana, feriado) usa la última anterior, y antes de la
+primera fila no hay conversión (None).
+
+`serie()` devuelve la serie en memoria (fechas ordenadas y valores), leída una
+vez por proceso y releída solo cuando cambia la tabla: como el reporte general,
+la vigencia se controla con una versión en el cache de Django que `invalidar`
+cambia después de cada importación. `Serie.convertir` pasa un resultado entero
+en una sola recorrida (ordena las fechas y avanza sobre la serie) y
+`cotizacion_del_dia` da la misma cotización como subconsulta, para anotar o
+agregar en la base.
+
+Las cotizaciones se cargan desde un CSV o XLSX con columnas fecha y valor
+(`importar`, comando `importar_cotizaciones`), sin consultar servicios externos.
+"""
+import uuid
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from . import planillas
+from .models import CotizacionUSD
+
+
+CLAVE_VERSION = 'comercial:cotizaciones:version'
+
+COLUMNAS = {
+    'fecha': ('fecha', 'dia', 'date'),
+    'valor': ('valor', 'cotizacion', 'venta', 'tipo de cambio', 'dolar', 'usd'),
+}
+_ALIAS = {alias: columna for columna, alias_columna in COLUMNAS.items() for alias in alias_columna}
+_CENTAVOS = Decimal('0.01')
+
+
+class Serie:
+    """Cotizaciones por fecha, ordenadas, con búsqueda de la vigente a una fecha."""
+
+    def __init__(self, filas=()):
+        filas = sorted(filas)
+        self.fechas = [fecha for fecha, _ in filas]
+        self.valores = [valor for _, valor in filas]
+
+    def __len__(self):
+        return len(self.fechas)
+
+    def valor(self, fecha):
+        """Cotización vigente en `fecha` (la del día o la última anterior); None si no hay."""
+        if fecha is None:
+            return None
+        posicion = bisect_right(self.fechas, _dia(fecha))
+        return self.valores[posicion - 1] if posicion else None
+
+    def convertir(self, importes):
+        """`[usd]` de pares `(fecha, importe en pesos)`, en el mismo orden, recorriendo la serie una vez."""
+        importes = list(importes)
+        resultado = [None] * len(importes)
+        orden = sorted(
+            (indice for indice, (fecha, importe) in enumerate(importes) if fecha is not None and importe is not None),
+            key=lambda indice: _dia(importes[indice][0]),
+        )
+        posicion, vigente = 0, None
+        for indice in orden:
+            fecha, importe = importes[indice]
+            fecha = _dia(fecha)
+            while posicion < len(self.fechas) and self.fechas[posicion] <= fecha:
+                vigente = self.valores[posicion]
+                posicion += 1
+            if vigente:
+                resultado[indice] = (Decimal(importe) / vigente).quantize(_CENTAVOS)
+        return resultado
+
+
+def _dia(fecha):
+    return fecha.date() if hasattr(fecha, 'date') else fecha
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar():
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex, None)
+
+
+_serie = {'version': None, 'serie': Serie()}
+
+
+def serie():
+    """La serie completa en memoria; se relee de la base cuando cambió la versión."""
+    version = _version()
+    if _serie['version'] != version:
+        _serie['serie'] = Serie(CotizacionUSD.objects.order_by().values_list('fecha', 'valor'))
+        _serie['version'] = version
+    return _serie['serie']
+
+
+def cotizacion_del_dia(campo_fecha):
+    """Subconsulta con la cotización vigente en `campo_fecha` (un campo de fecha, no de fecha y hora)."""
+    return Subquery(
+        CotizacionUSD.objects.filter(fecha__lte=OuterRef(campo_fecha)).order_by('-fecha').values('valor')[:1]
+    )
+
+
+def _columnas(encabezado):
+    columnas = {}
+    for posicion, titulo in enumerate(encabezado):
+        columna = _ALIAS.get(planillas.normalizar(titulo).rstrip('.:'))
+        if columna and columna not in columnas:
+            columnas[columna] = posicion
+    return columnas
+
+
+def leer(registros):
+    """`({fecha: valor}, ignoradas)` de las filas de una planilla con encabezado fecha y valor.
+
+    Las filas sin fecha o sin un valor positivo se cuentan como ignoradas; si una
+    fecha se repite queda la última.
+    """
+    cotizaciones, ignoradas, columnas = {}, 0, None
+    for valores in registros:
+        if planillas.fila_vacia(valores):
+            continue
+        if columnas is None:
+            candidatas = _columnas(valores)
+            if {'fecha', 'valor'} <= candidatas.keys():
+                columnas = candidatas
+            continue
+        fecha = planillas.convertir_fecha(valores[columnas['fecha']] if columnas['fecha'] < len(valores) else None)
+        valor = planillas.convertir_monto(valores[columnas['valor']] if columnas['valor'] < len(valores) else None)
+        if fecha is None or not valor or valor <= 0:
+            ignoradas += 1
+            continue
+        cotizaciones[fecha] = valor
+    if columnas is None:
+        raise ValueError('No se encontró el encabezado (se necesitan las columnas fecha y valor).')
+    return cotizaciones, ignoradas
+
+
+def importar(registros, fuente=''):
+    """Carga o actualiza las cotizaciones de la planilla. Devuelve `(cargadas, ignoradas)`."""
+    cotizaciones, ignoradas = leer(registros)
+    # MySQL no acepta `unique_fields`: su ON DUPLICATE KEY UPDATE ya choca contra
+    # el índice único de `fecha`, que es el único de la tabla.
+    conflicto = {'unique_fields': ['fecha']} if connection.features.supports_update_conflicts_with_target else {}
+    with transaction.atomic():
+        CotizacionUSD.objects.bulk_create(
+            [CotizacionUSD(fecha=fecha, valor=valor, fuente=fuente) for fecha, valor in cotizaciones.items()],
+            batch_size=500,
+            update_conflicts=True,
+            update_fields=['valor', 'fuente', 'updated_at'],
+            **conflicto,
+        )
+        transaction.on_commit(invalidar)
+    return len(cotizaciones), ignoradas
@@ -0,0 +1,298 @@
+"""Cuenta corriente de cuentas y proveedores como libro mayor materializado.
+
+Cada compra, seña y pago de compra tiene una fila en `MovimientoCuenta` con su
+debe/haber y el saldo acumulado de la cuenta hasta ese movimiento. El orden del
+libro es `(fecha, orden_tipo, id)`: en una misma fecha la compra va antes que
+las señas y pagos, y a igual fecha y tipo manda el orden de carga.
+
+Las filas se mantienen al guardar compras y pagos (`sincronizar_compra`):
+insertar un movimiento toma el saldo de la fila anterior y corre con un único
+UPDATE el saldo de las posteriores; quitarlo las corre en sentido contrario.
+Cada sincronización bloquea las filas de las cuentas involucradas para que dos
+escrituras sobre la misma cuenta no se pisen el acumulado.
+
+Los listados leen el libro por páginas con paginación por clave
+(`pagina_movimientos`) y los totales de todas las cuentas salen de una sola
+consulta agrupada (`anotar_resumen`). `reconstruir_cuenta` rehace el libro de
+una cuenta desde las compras (migración y comando `reconstruir_cuenta_corriente`).
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Compra, Cuenta, MovimientoCuenta, PagoCompra
+
+
+ORDEN_COMPRA = 0
+ORDEN_HABER = 1
+
+MOVIMIENTOS_POR_PAGINA = 200
+
+CAMPOS_CLAVE = ('cuenta_id', 'fecha', 'orden_tipo', 'debe', 'haber')
+CAMPOS_TEXTO = ('descripcion', 'referencia', 'forma_pago')
+
+_CERO = Decimal('0')
+
+
+def armar_movimientos(compra, pagos):
+    """Movimientos (dicts) que le corresponden a una compra viva y sus pagos.
+
+    Solo usa atributos de los objetos, así sirve también con los modelos
+    históricos de una migración.
+    """
+    if compra.deleted_at is not None:
+        return []
+    base = {'cuenta_id': compra.cuenta_id, 'compra_id': compra.pk}
+    referencia = compra.numero_factura or compra.numero_pedido
+    movimientos = [{
+        **base,
+        'tipo': 'compra',
+        'pago_id': None,
+        'fecha': compra.fecha_pago,
+        'orden_tipo': ORDEN_COMPRA,
+        'descripcion': f'Compra #{compra.numero_pedido}',
+        'referencia': referencia,
+        'forma_pago': '-',
+        'debe': compra.valor_total,
+        'haber': _CERO,
+    }]
+    if compra.sena > 0:
+        movimientos.append({
+            **base,
+            'tipo': 'sena',
+            'pago_id': None,
+            'fecha': compra.fecha_pago,
+            'orden_tipo': ORDEN_HABER,
+            'descripcion': f'Seña inicial de compra #{compra.numero_pedido}',
+            'referencia': referencia,
+            'forma_pago': compra.get_forma_pago_sena_display() if compra.forma_pago_sena else 'Sin informar',
+            'debe': _CERO,
+            'haber': compra.sena,
+        })
+    for pago in pagos:
+        movimientos.append({
+            **base,
+            'tipo': 'pago',
+            'pago_id': pago.pk,
+            'fecha': pago.fecha_pago,
+            'orden_tipo': ORDEN_HABER,
+            'descripcion': f'Pago de compra #{compra.numero_pedido}',
+            'referencia': pago.numero_factura or compra.numero_pedido,
+            'forma_pago': pago.get_forma_pago_display(),
+            'debe': _CERO,
+            'haber': pago.monto,
+        })
+    return movimientos
+
+
+def acumular_saldos(movimientos):
+    """Ordena los movimientos de una cuenta como el libro y completa `saldo`."""
+    movimientos = sorted(movimientos, key=lambda mov: (mov['fecha'], mov['orden_tipo']))
+    saldo = _CERO
+    for movimiento in movimientos:
+        saldo += movimiento['debe'] - movimiento['haber']
+        movimiento['saldo'] = saldo
+    return movimientos
+
+
+def _normalizar(datos):
+    """Convierte fecha e importes a sus tipos (la compra en memoria puede traer strings)."""
+    for campo in ('fecha', 'debe', 'haber'):
+        datos[campo] = MovimientoCuenta._meta.get_field(campo).to_python(datos[campo])
+    return datos
+
+
+def _posteriores(cuenta_id, fecha, orden_tipo, pk=None):
+    """Q de los movimientos de la cuenta que van después de la clave dada.
+
+    Sin `pk` es la posición de una fila nueva: queda última entre las de su
+    misma fecha y tipo.
+    """
+    posteriores = Q(fecha__gt=fecha) | Q(fecha=fecha, orden_tipo__gt=orden_tipo)
+    if pk is not None:
+        posteriores |= Q(fecha=fecha, orden_tipo=orden_tipo, pk__gt=pk)
+    return Q(cuenta_id=cuenta_id) & posteriores
+
+
+def _insertar(datos):
+    neto = datos['debe'] - datos['haber']
+    anterior = (
+        MovimientoCuenta.objects.filter(cuenta_id=datos['cuenta_id'])
+        .exclude(_posteriores(datos['cuenta_id'], datos['fecha'], datos['orden_tipo']))
+        .order_by('-fecha', '-orden_tipo', '-pk')
+        .values_list('saldo', flat=True)
+        .first()
+    )
+    if neto:
+        MovimientoCuenta.objects.filter(
+            _posteriores(datos['cuenta_id'], datos['fecha'], datos['orden_tipo'])
+        ).update(saldo=F('saldo') + neto)
+    MovimientoCuenta.objects.create(**datos, saldo=(anterior or _CERO) + neto)
+
+
+def _quitar(movimiento):
+    neto = movimiento.debe - movimiento.haber
+    if neto:
+        MovimientoCuenta.objects.filter(
+            _posteriores(movimiento.cuenta_id, movimiento.fecha, movimiento.orden_tipo, movimiento.pk)
+        ).update(saldo=F('saldo') - neto)
+    movimiento.delete()
+
+
+def _bloquear_cuentas(cuenta_ids):
+    cuenta_ids = sorted(pk for pk in cuenta_ids if pk)
+    if cuenta_ids:
+        list(Cuenta.objects.select_for_update().filter(pk__in=cuenta_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def sincronizar_compra(compra):
+    """Deja el libro igual a lo que dicen la compra y sus pagos.
+
+    Compara las filas existentes con las esperadas: si no cambió nada no
+    escribe, si solo cambió el texto lo actualiza, y si cambió fecha, importe o
+    cuenta quita la fila y la vuelve a insertar en su lugar.
+    """
+    if compra.pk is None:
+        return
+    with transaction.atomic():
+        _bloquear_cuentas(
+            {compra.cuenta_id}
+            | set(MovimientoCuenta.objects.filter(compra_id=compra.pk).order_by().values_list('cuenta_id', flat=True))
+        )
+        pagos = PagoCompra.objects.filter(compra_id=compra.pk).order_by('fecha_pago', 'created_at', 'pk')
+        esperados = {
+            (mov['tipo'], mov['pago_id']): _normalizar(mov)
+            for mov in armar_movimientos(compra, pagos)
+        }
+
+        for movimiento in MovimientoCuenta.objects.filter(compra_id=compra.pk).order_by('pk'):
+            datos = esperados.pop((movimiento.tipo, movimiento.pago_id), None)
+            if datos is None or any(getattr(movimiento, campo) != datos[campo] for campo in CAMPOS_CLAVE):
+                _quitar(movimiento)
+                if datos is not None:
+                    _insertar(datos)
+            elif any(getattr(movimiento, campo) != datos[campo] for campo in CAMPOS_TEXTO):
+                for campo in CAMPOS_TEXTO:
+                    setattr(movimiento, campo, datos[campo])
+                movimiento.save(update_fields=CAMPOS_TEXTO)
+
+        for datos in sorted(esperados.values(), key=lambda mov: (mov['fecha'], mov['orden_tipo'])):
+            _insertar(datos)
+
+
+def reconstruir_cuenta(cuenta_id):
+    """Rehace desde cero el libro de una cuenta. Devuelve la cantidad de movimientos."""
+    with transaction.atomic():
+        _bloquear_cuentas([cuenta_id])
+        MovimientoCuenta.objects.filter(cuenta_id=cuenta_id).delete()
+        compras = (
+            Compra.alive.filter(cuenta_id=cuenta_id)
+            .prefetch_related('pagos_compra')
+            .order_by('fecha_pago', 'created_at', 'pk')
+        )
+        movimientos = []
+        for compra in compras:
+            pagos = sorted(compra.pagos_compra.all(), key=lambda pago: (pago.fecha_pago, pago.created_at, pago.pk))
+            movimientos.extend(armar_movimientos(compra, pagos))
+        movimientos = acumular_saldos(movimientos)
+        MovimientoCuenta.objects.bulk_create([MovimientoCuenta(**mov) for mov in movimientos], batch_size=500)
+    return len(movimientos)
+
+
+def _total_por_cuenta(campo, **filtro):
+    return Coalesce(
+        Subquery(
+            MovimientoCuenta.objects.filter(cuenta_id=OuterRef('pk'), **filtro)
+            .order_by()
+            .values('cuenta_id')
+            .annotate(total=Sum(campo))
+            .values('total')
+        ),
+        Value(_CERO),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def anotar_resumen(cuentas):
+    """Anota total_compras, total_senas, total_pagos, saldo_actual y cantidad_movimientos.
+
+    Es una sola consulta para todas las cuentas del queryset, resuelta por el
+    índice (cuenta, fecha, ...) del libro.
+    """
+    return cuentas.annotate(
+        total_compras=_total_por_cuenta('debe'),
+        total_senas=_total_por_cuenta('haber', tipo='sena'),
+        total_pagos=_total_por_cuenta('haber', tipo='pago'),
+        cantidad_movimientos=Coalesce(
+            Subquery(
+                MovimientoCuenta.objects.filter(cuenta_id=OuterRef('pk'))
+                .order_by()
+                .values('cuenta_id')
+                .annotate(cantidad=Count('pk'))
+                .values('cantidad')
+            ),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def resumen(cuenta):
+    """Dict de cuenta corriente a partir de una cuenta anotada con `anotar_resumen`.
+
+    `movimientos` es un queryset perezoso con el libro completo (dicts): solo
+    se consulta si alguien lo recorre.
+    """
+    return {
+        'proveedor': cuenta,
+        'compras': Compra.alive.filter(cuenta=cuenta).order_by('fecha_pago', 'created_at', 'pk'),
+        'movimientos': movimientos_de(cuenta.pk),
+        'total_compras': cuenta.total_compras,
+        'total_senas': cuenta.total_senas,
+        'total_pagos': cuenta.total_pagos,
+        'saldo_actual': cuenta.total_compras - cuenta.total_senas - cuenta.total_pagos,
+        'cantidad_movimientos': cuenta.cantidad_movimientos,
+    }
+
+
+def movimientos_de(cuenta_id):
+    return (
+        MovimientoCuenta.objects.filter(cuenta_id=cuenta_id)
+        .order_by('fecha', 'orden_tipo', 'pk')
+        .values('pk', 'tipo', 'compra_id', 'pago_id', 'fecha', 'orden_tipo',
+                'descripcion', 'referencia', 'forma_pago', 'debe', 'haber', 'saldo')
+    )
+
+
+def cursor_de(movimiento):
+    return f"{movimiento['fecha'].isoformat()}.{movimiento['orden_tipo']}.{movimiento['pk']}"
+
+
+def _leer_cursor(cursor):
+    try:
+        fecha, orden_tipo, pk = str(cursor).split('.')
+        return date.fromisoformat(fecha), int(orden_tipo), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def pagina_movimientos(cuenta_id, cursor=None, limite=None):
+    """Página del libro después de `cursor` (paginación por clave, sin OFFSET).
+
+    Devuelve `(movimientos, numero_inicial, siguiente_cursor)`; el cursor es
+    `None` en la última página.
+    """
+    limite = limite or MOVIMIENTOS_POR_PAGINA
+    movimientos = movimientos_de(cuenta_id)
+    numero_inicial = 1
+    clave = _leer_cursor(cursor) if cursor else None
+    if clave:
+        posteriores = _posteriores(cuenta_id, *clave)
+        numero_inicial = movimientos.exclude(posteriores).count() + 1
+        movimientos = movimientos.filter(posteriores)
+    filas = list(movimientos[:limite + 1])
+    siguiente = cursor_de(filas[limite - 1]) if len(filas) > limite else None
+    return filas[:limite], numero_inicial, siguiente
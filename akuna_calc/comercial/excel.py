@@ -0,0 +1,145 @@
+"""Motor común de las exportaciones a Excel de comercial.
+
+Los libros se escriben con openpyxl en modo write-only: cada fila se vuelca al
+archivo en cuanto se agrega, así que los listados se recorren directo desde el
+queryset (`iterator(chunk_size=...)`) sin armar listas ni celdas en memoria. El
+libro terminado queda en un archivo temporal que `respuesta()` envía por partes
+con un `FileResponse`.
+
+Los formatos son estilos con nombre registrados una vez por libro (`ESTILOS`),
+no objetos Font/Fill por celda. Cada export declara sus columnas una sola vez
+con `Columna` (título, ancho, valor y estilo); `HojaExcel.filas()` reutiliza
+una celda por columna con estilo en lugar de crear una por fila.
+"""
+import tempfile
+
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+FILAS_POR_LOTE = 2000
+
+FORMATO_MONEDA = '$#,##0.00'
+FORMATO_NUMERO = '#,##0.00'
+
+_LINEA = Side(style='thin', color='CBD5E1')
+_BORDE = Border(left=_LINEA, right=_LINEA, top=_LINEA, bottom=_LINEA)
+_RELLENO_TOTAL = PatternFill(start_color='DBEAFE', end_color='DBEAFE', fill_type='solid')
+
+ESTILOS = {
+    'titulo': {'font': Font(bold=True, size=14)},
+    'etiqueta': {'font': Font(bold=True)},
+    'etiqueta_total': {'font': Font(bold=True, size=12)},
+    'moneda': {'number_format': FORMATO_MONEDA},
+    'moneda_total': {'font': Font(bold=True, size=12), 'number_format': FORMATO_MONEDA},
+    'numero': {'number_format': FORMATO_NUMERO},
+    'celda': {'border': _BORDE, 'alignment': Alignment(vertical='center')},
+    'numero_celda': {'border': _BORDE, 'alignment': Alignment(vertical='center'), 'number_format': FORMATO_NUMERO},
+    'total': {'font': Font(bold=True, size=11), 'fill': _RELLENO_TOTAL, 'border': _BORDE},
+    'numero_total': {'font': Font(bold=True, size=11), 'fill': _RELLENO_TOTAL, 'border': _BORDE, 'number_format': FORMATO_NUMERO},
+}
+
+
+def _estilo_encabezado(color, borde):
+    return NamedStyle(
+        name=f'encabezado_{color}{"_borde" if borde else ""}',
+        font=Font(bold=True, color='FFFFFF', size=12),
+        fill=PatternFill(start_color=color, end_color=color, fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center'),
+        border=_BORDE if borde else Border(),
+    )
+
+
+class Columna:
+    """Columna de un export: `valor` es la clave del dict/atributo de la fila o una función."""
+
+    def __init__(self, titulo, valor, ancho=15, estilo=None):
+        self.titulo = titulo
+        self.ancho = ancho
+        self.estilo = estilo
+        if callable(valor):
+            self.obtener = valor
+        else:
+            self.obtener = lambda fila: fila[valor] if isinstance(fila, dict) else getattr(fila, valor)
+
+
+class LibroExcel:
+    """Libro write-only con los estilos con nombre comunes y, si hace falta, los propios del export."""
+
+    def __init__(self, color_encabezado='366092', borde_encabezado=False, estilos=None):
+        self.wb = Workbook(write_only=True)
+        for nombre, atributos in {**ESTILOS, **(estilos or {})}.items():
+            self.wb.add_named_style(NamedStyle(name=nombre, **atributos))
+        encabezado = _estilo_encabezado(color_encabezado, borde_encabezado)
+        self.wb.add_named_style(encabezado)
+        self.estilo_encabezado = encabezado.name
+
+    def hoja(self, titulo, columnas):
+        return HojaExcel(self, self.wb.create_sheet(titulo), columnas)
+
+    def respuesta(self, nombre_archivo):
+        archivo = tempfile.TemporaryFile()
+        self.wb.save(archivo)
+        archivo.seek(0)
+        # FileResponse cierra (y con eso borra) el temporal al terminar de enviarlo.
+        return FileResponse(archivo, as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPE)
+
+
+class HojaExcel:
+    def __init__(self, libro, ws, columnas):
+        self.libro = libro
+        self.ws = ws
+        self.columnas = columnas
+        # En write-only los anchos se fijan antes de la primera fila.
+        for indice, columna in enumerate(columnas, 1):
+            ws.column_dimensions[get_column_letter(indice)].width = columna.ancho
+
+    def celda(self, valor, estilo=None):
+        cell = WriteOnlyCell(self.ws, value=valor)
+        if estilo:
+            cell.style = estilo
+        return cell
+
+    def fila(self, *valores):
+        """Fila suelta; cada valor puede ser `(valor, estilo)`."""
+        self.ws.append([
+            self.celda(*valor) if isinstance(valor, tuple) else valor
+            for valor in valores
+        ])
+
+    def titulo(self, texto):
+        self.fila((texto, 'titulo'))
+
+    def dato(self, etiqueta, valor, estilo='moneda', estilo_etiqueta='etiqueta'):
+        self.fila((etiqueta, estilo_etiqueta), (valor, estilo))
+
+    def vacia(self):
+        self.ws.append([])
+
+    def encabezados(self):
+        self.fila(*[(columna.titulo, self.libro.estilo_encabezado) for columna in self.columnas])
+
+    def filas(self, registros):
+        """Escribe una fila por registro y devuelve cuántas escribió.
+
+        La fila se serializa en el `append`, así que las celdas con estilo se
+        reutilizan de una fila a la siguiente.
+        """
+        celdas = [self.celda(None, columna.estilo) if columna.estilo else None for columna in self.columnas]
+        obtener = [columna.obtener for columna in self.columnas]
+        cantidad = 0
+        for registro in registros:
+            fila = []
+            for funcion, cell in zip(obtener, celdas):
+                valor = funcion(registro)
+                if cell is not None and valor is not None:
+                    cell.value = valor
+                    valor = cell
+                fila.append(valor)
+            self.ws.append(fila)
+            cantidad += 1
+        return cantidad
@@ -1,10 +1,77 @@
 from decimal import Decimal
 
 from django import forms
+from django.core.exceptions import ValidationError
 from django.db.models import Exists, OuterRef, Q
+from django.forms.models import ModelChoiceIterator
+from django.urls import reverse
 from .models import Cliente, Venta, Cuenta, Compra, TipoCuenta, TipoGasto
 
 
+_CLASES_SELECT = 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+
+
+class SelectAsincrono(forms.Select):
+    """Select que solo renderiza las opciones elegidas; select2 busca el resto en `url_name`.
+
+    `base.html` arma el `ajax` de select2 para los selects con `data-autocomplete-url`.
+    Con un ModelChoiceField consulta solo los objetos elegidos; con un campo de
+    opciones libres (razones sociales) cada valor es su propio texto.
+    """
+
+    def __init__(self, url_name, parametros='', attrs=None, choices=()):
+        super().__init__(attrs=attrs, choices=choices)
+        self.url_name = url_name
+        self.parametros = parametros
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        url = reverse(self.url_name)
+        attrs['data-autocomplete-url'] = f'{url}?{self.parametros}' if self.parametros else url
+        return attrs
+
+    def _opciones_elegidas(self, valores):
+        if not isinstance(self.choices, ModelChoiceIterator):
+            return [(valor, valor) for valor in valores]
+        try:
+            elegidos = self.choices.queryset.filter(pk__in=valores)
+            return [self.choices.choice(obj) for obj in elegidos]
+        except (ValueError, TypeError, ValidationError):
+            return []
+
+    def optgroups(self, name, value, attrs=None):
+        valores = [str(valor) for valor in value if valor not in ('', None)]
+        opciones = self._opciones_elegidas(valores)
+        if not self.allow_multiple_selected:
+            opciones = [('', '')] + opciones
+        grupos = []
+        for indice, (valor, etiqueta) in enumerate(opciones):
+            elegido = str(valor) in valores
+            grupos.append((None, [self.create_option(name, valor, etiqueta, elegido, indice, attrs=attrs)], indice))
+        return grupos
+
+
+class SelectMultipleAsincrono(SelectAsincrono, forms.SelectMultiple):
+    pass
+
+
+class RazonesSocialesField(forms.MultipleChoiceField):
+    """Razones sociales de clientes vivos, validadas contra la base en vez de contra una lista de opciones."""
+
+    def validate(self, value):
+        if self.required and not value:
+            raise ValidationError(self.error_messages['required'], code='required')
+        existentes = set(
+            Cliente.alive.filter(razon_social__in=value)
+            .values_list('razon_social', flat=True)
+        )
+        for valor in value:
+            if valor not in existentes:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'], code='invalid_choice', params={'value': valor},
+                )
+
+
 def _resolver_importe_formulario_usd(form, cleaned_data, *, enabled_field, ars_field, usd_field, rate_field, usd_required_message, rate_required_message):
     enabled = cleaned_data.get(enabled_field)
     ars_value = cleaned_data.get(ars_field)
@@ -57,7 +124,7 @@ class ClienteForm(forms.ModelForm):
         email = (self.cleaned_data.get('email') or '').strip()
         if not email:
             return email
-        qs = Cliente.objects.filter(email__iexact=email, deleted_at__isnull=True)
+        qs = Cliente.alive.filter(email__iexact=email)
         if self.instance and self.instance.pk:
             qs = qs.exclude(pk=self.instance.pk)
         existente = qs.first()
@@ -84,7 +151,7 @@ class VentaForm(forms.ModelForm):
         exclude = ['saldo', 'created_at', 'updated_at']
         widgets = {
             'numero_pedido': forms.TextInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'placeholder': 'Ej: PVC, 001, etc.'}),
-            'cliente': forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
+            'cliente': SelectAsincrono('comercial:clientes_list_api', attrs={'class': _CLASES_SELECT, 'data-placeholder': 'Buscar cliente por nombre, razón social o CUIT...'}),
             'venta_en_dolares': forms.CheckboxInput(attrs={'class': 'rounded border-gray-300 text-blue-600 shadow-sm focus:border-blue-300 focus:ring focus:ring-blue-200 focus:ring-opacity-50', 'id': 'id_venta_en_dolares'}),
             'valor_total': forms.NumberInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'step': '0.01'}),
             'valor_total_usd': forms.NumberInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'step': '0.01', 'id': 'id_valor_total_usd'}),
@@ -163,7 +230,7 @@ class CuentaForm(forms.ModelForm):
 
 class CompraForm(forms.ModelForm):
     tipo_cuenta_filter = forms.ModelChoiceField(
-        queryset=TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True),
+        queryset=TipoCuenta.alive.filter(activo=True),
         required=False,
         empty_label="Seleccione tipo de cuenta...",
         widget=forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'id': 'id_tipo_cuenta_filter'}),
@@ -196,21 +263,21 @@ class CompraForm(forms.ModelForm):
             if tipo_gasto_post:
                 tipo_gasto_actual_id = tipo_gasto_post
 
-        cuentas_qs = Cuenta.objects.filter(activo=True, deleted_at__isnull=True)
-        tipos_gasto_qs = TipoGasto.objects.filter(activo=True, deleted_at__isnull=True)
-        tipos_cuenta_qs = TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True)
+        cuentas_qs = Cuenta.alive.filter(activo=True)
+        tipos_gasto_qs = TipoGasto.alive.filter(activo=True)
+        tipos_cuenta_qs = TipoCuenta.alive.filter(activo=True)
 
         # Incluir los valores actuales por si fueron desactivados, para no perder selección al editar.
         if cuenta_actual_id:
-            cuentas_qs = Cuenta.objects.filter(
+            cuentas_qs = Cuenta.all_objects.filter(
                 Q(activo=True, deleted_at__isnull=True) | Q(pk=cuenta_actual_id)
             )
         if tipo_gasto_actual_id:
-            tipos_gasto_qs = TipoGasto.objects.filter(
+            tipos_gasto_qs = TipoGasto.all_objects.filter(
                 Q(activo=True, deleted_at__isnull=True) | Q(pk=tipo_gasto_actual_id)
             )
         if tipo_cuenta_actual_id:
-            tipos_cuenta_qs = TipoCuenta.objects.filter(
+            tipos_cuenta_qs = TipoCuenta.all_objects.filter(
                 Q(activo=True, deleted_at__isnull=True) | Q(pk=tipo_cuenta_actual_id)
             )
 
@@ -323,9 +390,13 @@ class ReporteForm(forms.Form):
         widget=forms.DateInput(format='%Y-%m-%d', attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'type': 'date'})
     )
     cliente = forms.ModelMultipleChoiceField(
-        queryset=Cliente.objects.filter(deleted_at__isnull=True),
+        queryset=Cliente.alive.all(),
+        required=False,
+        widget=SelectMultipleAsincrono('comercial:clientes_list_api', attrs={'class': _CLASES_SELECT, 'id': 'id_cliente'})
+    )
+    razon_social = RazonesSocialesField(
         required=False,
-        widget=forms.SelectMultiple(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'id': 'id_cliente'})
+        widget=SelectMultipleAsincrono('comercial:clientes_list_api', 'campo=razon_social', attrs={'class': _CLASES_SELECT, 'id': 'id_razon_social'})
     )
     numero_factura = forms.CharField(
         required=False,
@@ -348,17 +419,6 @@ class ReporteForm(forms.Form):
         super().__init__(*args, **kwargs)
         self.fields['fecha_desde'].widget.format = '%Y-%m-%d'
         self.fields['fecha_hasta'].widget.format = '%Y-%m-%d'
-        # Obtener razones sociales únicas y no vacías
-        razones = Cliente.objects.filter(
-            deleted_at__isnull=True,
-            razon_social__isnull=False
-        ).exclude(razon_social='').values_list('razon_social', flat=True).distinct().order_by('razon_social')
-        
-        self.fields['razon_social'] = forms.MultipleChoiceField(
-            choices=[(r, r) for r in razones],
-            required=False,
-            widget=forms.SelectMultiple(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'id': 'id_razon_social'})
-        )
     
     estado_venta = forms.MultipleChoiceField(
         choices=Venta.ESTADO_CHOICES,
@@ -390,6 +450,25 @@ class ReporteCobranzasForm(ReporteForm):
     )
 
 
+class ReporteAntiguedadForm(forms.Form):
+    TIPO_FACTURA_CHOICES = ReporteForm.TIPO_FACTURA_CHOICES
+
+    cliente = forms.ModelMultipleChoiceField(
+        queryset=Cliente.alive.all(),
+        required=False,
+        widget=SelectMultipleAsincrono('comercial:clientes_list_api', attrs={'class': _CLASES_SELECT, 'id': 'id_cliente'})
+    )
+    razon_social = RazonesSocialesField(
+        required=False,
+        widget=SelectMultipleAsincrono('comercial:clientes_list_api', 'campo=razon_social', attrs={'class': _CLASES_SELECT, 'id': 'id_razon_social'})
+    )
+    tipo_factura = forms.MultipleChoiceField(
+        choices=TIPO_FACTURA_CHOICES,
+        required=False,
+        widget=forms.SelectMultiple(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'id': 'id_tipo_factura'})
+    )
+
+
 class ReporteGastosForm(forms.Form):
     TIPO_FACTURA_CHOICES = [
         ('blanco', 'Blanco'),
@@ -407,17 +486,17 @@ class ReporteGastosForm(forms.Form):
         widget=forms.DateInput(format='%Y-%m-%d', attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'type': 'date'})
     )
     cuenta = forms.ModelMultipleChoiceField(
-        queryset=Cuenta.objects.filter(deleted_at__isnull=True, activo=True),
+        queryset=Cuenta.alive.filter(activo=True).select_related('tipo_cuenta'),
         required=False,
         widget=forms.SelectMultiple(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'})
     )
     tipo_cuenta = forms.ModelMultipleChoiceField(
-        queryset=TipoCuenta.objects.filter(deleted_at__isnull=True, activo=True),
+        queryset=TipoCuenta.alive.filter(activo=True),
         required=False,
         widget=forms.SelectMultiple(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'})
     )
     tipo_gasto = forms.ModelMultipleChoiceField(
-        queryset=TipoGasto.objects.filter(deleted_at__isnull=True, activo=True),
+        queryset=TipoGasto.alive.filter(activo=True).select_related('tipo_cuenta'),
         required=False,
         widget=forms.SelectMultiple(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'})
     )
@@ -435,13 +514,10 @@ class ReporteGastosForm(forms.Form):
 
 class ReporteProveedorForm(forms.Form):
     proveedor = forms.ModelChoiceField(
-        queryset=Cuenta.objects.filter(
-            deleted_at__isnull=True,
+        queryset=Cuenta.alive.filter(
             tipo_cuenta__tipo='proveedores',
         ).annotate(
-            tiene_movimientos=Exists(
-                Compra.objects.filter(cuenta=OuterRef('pk'), deleted_at__isnull=True)
-            )
+            tiene_movimientos=Exists(Compra.alive.filter(cuenta=OuterRef('pk')))
         ).filter(
             Q(activo=True) | Q(tiene_movimientos=True)
         ).select_related('tipo_cuenta').order_by('nombre'),
@@ -0,0 +1,152 @@
+"""Gastos (compras) filtrados, agregados y paginados en la base.
+
+El listado de gastos, el reporte de gastos y su export a Excel parten del mismo
+queryset (`construir`) con los mismos filtros. Sobre él:
+
+- `totales`: blanco, negro, total y cantidades en un único agregado.
+- `por_tipo_cuenta` y `por_tipo_gasto`: los resúmenes del reporte, agrupados
+  con `values().annotate()`.
+- `pagina`: paginación por clave sobre `(fecha_pago, pk)` descendente, sin
+  OFFSET ni COUNT, así que una página profunda cuesta lo mismo que la primera.
+  El cursor es la fecha y el pk de la última fila mostrada.
+
+El export recorre el mismo queryset con `ordenar` + `iterator()`.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Compra, TipoCuenta
+
+
+POR_PAGINA = 20
+ORDEN = ('-fecha_pago', '-pk')
+SIN_TIPO = 'Sin tipo'
+
+_IMPORTE = DecimalField(max_digits=14, decimal_places=2)
+_CERO = Value(Decimal('0'), output_field=_IMPORTE)
+
+
+def construir(
+    fecha_desde=None,
+    fecha_hasta=None,
+    cuenta_filtro=None,
+    tipo_cuenta_filtro=None,
+    tipo_gasto_filtro=None,
+    tipo_factura_filtro=None,
+    buscar=None,
+):
+    """Compras vivas con los filtros del listado o del reporte, sin ordenar.
+
+    Los filtros de cuenta y tipos aceptan instancias, querysets o ids;
+    `tipo_factura_filtro` es una lista con 'blanco' y/o 'negro'.
+    """
+    compras = Compra.alive.all()
+    if fecha_desde:
+        compras = compras.filter(fecha_pago__gte=fecha_desde)
+    if fecha_hasta:
+        compras = compras.filter(fecha_pago__lte=fecha_hasta)
+    if cuenta_filtro:
+        compras = compras.filter(cuenta__in=cuenta_filtro)
+    if tipo_cuenta_filtro:
+        compras = compras.filter(cuenta__tipo_cuenta__in=tipo_cuenta_filtro)
+    if tipo_gasto_filtro:
+        compras = compras.filter(tipo_gasto__in=tipo_gasto_filtro)
+    if tipo_factura_filtro:
+        if 'blanco' in tipo_factura_filtro and 'negro' not in tipo_factura_filtro:
+            compras = compras.filter(con_factura=True)
+        elif 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
+            compras = compras.filter(con_factura=False)
+    if buscar:
+        compras = compras.filter(
+            Q(numero_pedido__icontains=buscar) |
+            Q(cuenta__nombre__icontains=buscar) |
+            Q(numero_factura__icontains=buscar)
+        )
+    return compras.order_by()
+
+
+def _suma(filtro=None):
+    return Coalesce(Sum('valor_total', filter=filtro), _CERO, output_field=_IMPORTE)
+
+
+def totales(compras):
+    """Totales y cantidades en blanco, en negro y en conjunto, en una consulta."""
+    blanco, negro = Q(con_factura=True), Q(con_factura=False)
+    totales = compras.aggregate(
+        total_blanco=_suma(blanco),
+        total_negro=_suma(negro),
+        cantidad_blanco=Count('pk', filter=blanco),
+        cantidad_negro=Count('pk', filter=negro),
+    )
+    totales['total'] = totales['total_blanco'] + totales['total_negro']
+    totales['cantidad'] = totales['cantidad_blanco'] + totales['cantidad_negro']
+    return totales
+
+
+def por_tipo_cuenta(compras):
+    """`[{nombre, total, cantidad}]` por tipo de cuenta, de mayor a menor total."""
+    etiquetas = dict(TipoCuenta.TIPOS_CUENTA)
+    filas = compras.values('cuenta__tipo_cuenta__tipo').annotate(total=_suma(), cantidad=Count('pk')).order_by('-total')
+    return [
+        {'nombre': etiquetas.get(fila['cuenta__tipo_cuenta__tipo'], fila['cuenta__tipo_cuenta__tipo']),
+         'total': fila['total'], 'cantidad': fila['cantidad']}
+        for fila in filas
+    ]
+
+
+def por_tipo_gasto(compras):
+    """`[{nombre, total, cantidad}]` por tipo de gasto (`SIN_TIPO` si no tiene), de mayor a menor total."""
+    filas = compras.values('tipo_gasto__nombre').annotate(total=_suma(), cantidad=Count('pk')).order_by('-total')
+    return [
+        {'nombre': fila['tipo_gasto__nombre'] or SIN_TIPO, 'total': fila['total'], 'cantidad': fila['cantidad']}
+        for fila in filas
+    ]
+
+
+def ordenar(compras):
+    return compras.order_by(*ORDEN)
+
+
+def cursor_de(compra):
+    return f'{compra.fecha_pago.isoformat()}.{compra.pk}'
+
+
+def _leer_cursor(cursor):
+    try:
+        fecha, pk = str(cursor).split('.')
+        return date.fromisoformat(fecha), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def pagina(compras, cursor=None, limite=None):
+    """Página de `compras` después de `cursor` (paginación por clave, sin OFFSET).
+
+    Devuelve `(compras, siguiente_cursor)`; el cursor es `None` en la última
+    página. Un cursor inválido vuelve a la primera.
+    """
+    limite = limite or POR_PAGINA
+    clave = _leer_cursor(cursor) if cursor else None
+    if clave:
+        fecha, pk = clave
+        compras = compras.filter(Q(fecha_pago__lt=fecha) | Q(fecha_pago=fecha, pk__lt=pk))
+    filas = list(ordenar(compras)[:limite + 1])
+    siguiente = cursor_de(filas[limite - 1]) if len(filas) > limite else None
+    return filas[:limite], siguiente
+
+
+def como_dict(compra):
+    """Fila del detalle del reporte (necesita `cuenta__tipo_cuenta` y `tipo_gasto` en el select_related)."""
+    return {
+        'fecha': compra.fecha_pago,
+        'numero_pedido': compra.numero_pedido or '-',
+        'numero_factura': compra.numero_factura or '-',
+        'cuenta': str(compra.cuenta),
+        'tipo_cuenta': compra.cuenta.tipo_cuenta.get_tipo_display(),
+        'tipo_gasto': compra.tipo_gasto.nombre if compra.tipo_gasto else SIN_TIPO,
+        'monto': compra.valor_total,
+        'tipo': 'Blanco' if compra.con_factura else 'Negro',
+    }
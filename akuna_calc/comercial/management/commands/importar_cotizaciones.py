@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from comercial import cotizaciones, planillas
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga o actualiza la serie diaria de cotizaciones del dólar desde un CSV o XLSX '
+        'con columnas fecha y valor (pesos por USD). No consulta servicios externos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del CSV o XLSX.')
+        parser.add_argument('--fuente', default='', help='Origen de las cotizaciones (p. ej. BNA), se guarda en cada fila.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                registros = planillas.leer_archivo(archivo)
+            cargadas, ignoradas = cotizaciones.importar(registros, fuente=options['fuente'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'{cargadas} cotizaciones cargadas, {ignoradas} filas ignoradas'))
@@ -1,14 +1,131 @@
-from django.core.management.base import BaseCommand
-from comercial.models import Venta
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from comercial import resumenes
+from comercial.models import PagoVenta, Percepcion, Venta
+
+
+ANCHO_BARRA = 30
 
 
 class Command(BaseCommand):
-    help = 'Recalcula los saldos de todas las ventas'
+    help = (
+        'Recalcula los saldos de las ventas por lotes: un agregado agrupado de pagos y '
+        'percepciones por lote y bulk_update solo de las ventas cuyo saldo cambió (y del '
+        'saldo pendiente de sus clientes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', '--verificar',
+            action='store_true',
+            dest='dry_run',
+            help='No escribe nada: informa las ventas con saldo desfasado.',
+        )
+        parser.add_argument(
+            '--since',
+            metavar='AAAA-MM-DD',
+            help='Solo ventas modificadas desde esa fecha o con pagos/percepciones cargados desde entonces.',
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Ventas por lote (default 1000).')
 
     def handle(self, *args, **options):
-        ventas = Venta.objects.filter(deleted_at__isnull=True)
-        for venta in ventas:
-            venta.save()  # Esto recalculará el saldo
-            self.stdout.write(f'Venta {venta.numero_pedido}: Saldo = ${venta.saldo}')
-        
-        self.stdout.write(self.style.SUCCESS(f'Se recalcularon {ventas.count()} ventas'))
+        lote = max(options['lote'], 1)
+        dry_run = options['dry_run']
+        ventas = self._ventas(options['since'])
+        total = ventas.count()
+
+        procesadas = desfasadas = 0
+        ultimo_pk = 0
+        while True:
+            with transaction.atomic():
+                # Se bloquea el lote para que un pago concurrente no aplique su delta
+                # entre la lectura y la escritura (en SQLite no hace nada).
+                filas = list(
+                    ventas.filter(pk__gt=ultimo_pk)
+                    .select_for_update()
+                    .order_by('pk')
+                    .values_list('pk', 'numero_pedido', 'valor_total', 'sena', 'monto_retenciones', 'saldo', 'cliente_id')[:lote]
+                )
+                if not filas:
+                    break
+                ultimo_pk = filas[-1][0]
+                movimientos = self._movimientos([fila[0] for fila in filas])
+
+                cambios, clientes = [], set()
+                for pk, numero_pedido, valor_total, sena, monto_retenciones, saldo, cliente_id in filas:
+                    calculado = valor_total + monto_retenciones - sena + movimientos.get(pk, 0)
+                    if calculado == saldo:
+                        continue
+                    cambios.append(Venta(pk=pk, saldo=calculado))
+                    clientes.add(cliente_id)
+                    if options['verbosity'] > 1 or dry_run:
+                        self._limpiar_barra()
+                        self.stdout.write(f'Venta #{pk} ({numero_pedido}): guardado ${saldo} / calculado ${calculado}')
+                if cambios and not dry_run:
+                    Venta.objects.bulk_update(cambios, ['saldo'], batch_size=lote)
+                    # bulk_update no pasa por `aplicar_delta_saldo`: se rehace la ficha
+                    # de los clientes tocados para que `saldo_pendiente` no quede viejo.
+                    resumenes.reconciliar(resumenes=('clientes',), ids=clientes)
+
+            desfasadas += len(cambios)
+            procesadas += len(filas)
+            self._barra(procesadas, total, options)
+
+        self._limpiar_barra()
+        if dry_run:
+            estilo = self.style.WARNING if desfasadas else self.style.SUCCESS
+            self.stdout.write(estilo(f'{procesadas} ventas revisadas, {desfasadas} con saldo desfasado (sin cambios: --dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{procesadas} ventas revisadas, {desfasadas} saldos corregidos'))
+
+    def _ventas(self, since):
+        ventas = Venta.alive.all()
+        if not since:
+            return ventas
+        try:
+            fecha = datetime.strptime(since, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('--since debe tener el formato AAAA-MM-DD')
+        desde = datetime.combine(fecha, time.min)
+        if settings.USE_TZ:
+            desde = timezone.make_aware(desde)
+        return ventas.filter(
+            Q(updated_at__gte=desde)
+            | Q(pk__in=PagoVenta.objects.filter(created_at__gte=desde).values('venta_id'))
+            | Q(pk__in=Percepcion.objects.filter(created_at__gte=desde).values('venta_id'))
+        )
+
+    def _movimientos(self, venta_ids):
+        """{venta_id: percepciones - pagos} del lote, en una sola consulta agrupada."""
+        pagos = (
+            PagoVenta.objects.filter(venta_id__in=venta_ids).order_by()
+            .values('venta_id').annotate(total=-Sum('monto')).values_list('venta_id', 'total')
+        )
+        percepciones = (
+            Percepcion.objects.filter(venta_id__in=venta_ids).order_by()
+            .values('venta_id').annotate(total=Sum('importe')).values_list('venta_id', 'total')
+        )
+        movimientos = {}
+        for venta_id, total in pagos.union(percepciones, all=True):
+            movimientos[venta_id] = movimientos.get(venta_id, 0) + total
+        return movimientos
+
+    def _barra(self, hechas, total, options):
+        if options['verbosity'] < 1 or not total:
+            return
+        llenas = ANCHO_BARRA * hechas // total
+        porcentaje = 100 * hechas // total
+        self.stdout.write(f'\r[{"#" * llenas}{"." * (ANCHO_BARRA - llenas)}] {porcentaje}% ({hechas}/{total})', ending='')
+        self.stdout.flush()
+        self._barra_abierta = True
+
+    def _limpiar_barra(self):
+        if getattr(self, '_barra_abierta', False):
+            self.stdout.write('')
+            self._barra_abierta = False
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from comercial.resumenes import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        'Rehace los resúmenes mensuales de ventas, cobranzas y compras y las fichas de clientes con consultas '
+        'agrupadas y corrige las filas que no coinciden con lo que mantienen los deltas. '
+        'Pensado para correr de noche.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', '--verificar',
+            action='store_true',
+            dest='dry_run',
+            help='No escribe nada: informa cuántas filas de cada resumen están desfasadas.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        resultado = reconciliar(verificar=dry_run)
+
+        desfasadas = 0
+        for resumen, (nuevas, corregidas, sobrantes, vacias) in resultado.items():
+            desfasadas += nuevas + corregidas + sobrantes
+            self.stdout.write(
+                f'Resumen de {resumen}: {nuevas} filas faltantes, {corregidas} con valores distintos, '
+                f'{sobrantes} sobrantes, {vacias} en cero'
+            )
+
+        if dry_run:
+            estilo = self.style.WARNING if desfasadas else self.style.SUCCESS
+            self.stdout.write(estilo(f'{desfasadas} filas desfasadas (sin cambios: --dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{desfasadas} filas desfasadas corregidas'))
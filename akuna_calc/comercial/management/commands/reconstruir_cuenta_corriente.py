@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from comercial.cuenta_corriente import reconstruir_cuenta
+from comercial.models import Compra, Cuenta, MovimientoCuenta
+
+
+class Command(BaseCommand):
+    help = (
+        'Rehace el libro de movimientos (cuenta corriente) de las cuentas a partir de sus '
+        'compras, señas y pagos. Sin argumentos reconstruye todas las cuentas con movimientos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cuentas', nargs='*', type=int, help='IDs de cuenta a reconstruir.')
+
+    def handle(self, *args, **options):
+        cuenta_ids = options['cuentas']
+        if not cuenta_ids:
+            cuenta_ids = sorted(
+                set(Compra.objects.values_list('cuenta_id', flat=True))
+                | set(MovimientoCuenta.objects.values_list('cuenta_id', flat=True))
+            )
+        cuenta_ids = list(Cuenta.objects.filter(pk__in=cuenta_ids).order_by('pk').values_list('pk', flat=True))
+
+        total = 0
+        for cuenta_id in cuenta_ids:
+            total += reconstruir_cuenta(cuenta_id)
+        self.stdout.write(self.style.SUCCESS(f'Libro reconstruido: {len(cuenta_ids)} cuentas, {total} movimientos'))
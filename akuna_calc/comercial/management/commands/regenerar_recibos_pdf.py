@@ -1,24 +1,78 @@
-from django.core.management.base import BaseCommand
-from comercial.models import PagoVenta, Recibo
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from comercial import recibos_pdf
 
 
 class Command(BaseCommand):
-    help = "Genera (o regenera) los PDFs de todos los recibos a partir de los pagos existentes."
+    help = (
+        "Genera (o regenera) los PDFs de todos los recibos a partir de los pagos existentes, "
+        "en paralelo y salteando los recibos cuyo contenido no cambió."
+    )
 
-    def handle(self, *args, **options):
-        total = 0
-        errores = 0
-        pagos = PagoVenta.objects.select_related('venta', 'venta__cliente').prefetch_related('retenciones').order_by('fecha_pago', 'pk')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--procesos', type=int, default=os.cpu_count() or 1,
+            help='Procesos en paralelo (default: uno por CPU; 1 corre sin pool).',
+        )
+        parser.add_argument('--lote', type=int, default=50, help='Pagos por lote de trabajo (default 50).')
+        parser.add_argument('--desde', type=int, metavar='PAGO_ID', help='Retoma después de ese pago.')
+        parser.add_argument(
+            '--estado', metavar='ARCHIVO',
+            help='Archivo donde se guarda el último pago terminado; si existe, se retoma desde ahí.',
+        )
+        parser.add_argument(
+            '--todos', action='store_true',
+            help='Regenera también los recibos cuyo contenido no cambió.',
+        )
 
-        for pago in pagos:
+    def handle(self, *args, **options):
+        estado = Path(options['estado']) if options['estado'] else None
+        desde = options['desde']
+        if desde is None and estado and estado.exists():
             try:
-                recibo = Recibo.obtener_o_crear_desde_pago(pago, force=True)
-                self.stdout.write(self.style.SUCCESS(f"Recibo {recibo.numero} generado para pago {pago.pk}"))
-                total += 1
-            except Exception as exc:
-                errores += 1
-                self.stdout.write(self.style.ERROR(f"Error al generar recibo para pago {pago.pk}: {exc}"))
-
-        self.stdout.write(self.style.SUCCESS(f"Total de recibos generados: {total}"))
-        if errores:
-            self.stdout.write(self.style.WARNING(f"Errores: {errores}"))
+                desde = int(estado.read_text().strip() or 0)
+            except ValueError:
+                raise CommandError(f'{estado} no tiene un id de pago válido')
+
+        pago_ids = recibos_pdf.pagos_a_procesar(desde)
+        creados = recibos_pdf.crear_recibos_faltantes(pago_ids)
+        if creados:
+            self.stdout.write(f'Recibos nuevos numerados: {creados}')
+
+        lote = max(options['lote'], 1)
+        avance = recibos_pdf.Avance(
+            [pago_ids[inicio:inicio + lote] for inicio in range(0, len(pago_ids), lote)], desde,
+        )
+        cuentas = {recibos_pdf.REGENERADO: 0, recibos_pdf.SIN_CAMBIOS: 0, recibos_pdf.ERROR: 0}
+
+        def al_terminar(ids, resultados):
+            for pago_id, numero, resultado, error in resultados:
+                cuentas[resultado] += 1
+                if resultado == recibos_pdf.ERROR:
+                    self.stdout.write(self.style.ERROR(f"Error al generar recibo para pago {pago_id}: {error}"))
+                elif resultado == recibos_pdf.REGENERADO and options['verbosity'] > 1:
+                    self.stdout.write(self.style.SUCCESS(f"Recibo {numero} generado para pago {pago_id}"))
+            ultimo = avance.terminar(ids)
+            if estado and ultimo is not None:
+                estado.write_text(str(ultimo))
+
+        try:
+            recibos_pdf.regenerar(
+                pago_ids,
+                procesos=options['procesos'],
+                lote=lote,
+                aunque_no_cambie=options['todos'],
+                al_terminar=al_terminar,
+            )
+        except KeyboardInterrupt:
+            if avance.ultimo is not None:
+                self.stdout.write(self.style.WARNING(f"Interrumpido. Para retomar: --desde {avance.ultimo}"))
+            raise
+
+        self.stdout.write(self.style.SUCCESS(f"Total de recibos generados: {cuentas[recibos_pdf.REGENERADO]}"))
+        self.stdout.write(f"Sin cambios (mismo contenido): {cuentas[recibos_pdf.SIN_CAMBIOS]}")
+        if cuentas[recibos_pdf.ERROR]:
+            self.stdout.write(self.style.WARNING(f"Errores: {cuentas[recibos_pdf.ERROR]}"))
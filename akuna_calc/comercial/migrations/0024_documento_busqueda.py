@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+from core.busqueda import armar_documento
+
+
+LOTE = 500
+INDICES_FULLTEXT = (
+    ('comercial_cliente', 'comercial_cliente_busqueda_ft'),
+    ('comercial_venta', 'comercial_venta_busqueda_ft'),
+)
+
+
+def _guardar_en_lotes(modelo, filas, armar):
+    lote = []
+    for fila in filas.iterator(chunk_size=LOTE):
+        fila.documento_busqueda = armar(fila)
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            modelo.objects.bulk_update(lote, ['documento_busqueda'])
+            lote = []
+    if lote:
+        modelo.objects.bulk_update(lote, ['documento_busqueda'])
+
+
+def armar_documentos(apps, schema_editor):
+    """Completa `documento_busqueda` de clientes y ventas existentes.
+
+    Repite lo que hacen `Cliente.armar_documento_busqueda` y
+    `Venta.armar_documento_busqueda` (los modelos históricos no tienen métodos).
+    """
+    Cliente = apps.get_model('comercial', 'Cliente')
+    Venta = apps.get_model('comercial', 'Venta')
+    _guardar_en_lotes(
+        Cliente,
+        Cliente.objects.all(),
+        lambda c: armar_documento(c.nombre, c.apellido, c.razon_social, c.localidad),
+    )
+    _guardar_en_lotes(
+        Venta,
+        Venta.objects.select_related('cliente').prefetch_related('pagos'),
+        lambda v: armar_documento(
+            v.numero_pedido, v.numero_factura,
+            v.cliente.nombre, v.cliente.apellido, v.cliente.razon_social,
+            *[p.numero_factura for p in v.pagos.all()],
+        ),
+    )
+
+
+def crear_indices_fulltext(apps, schema_editor):
+    # En SQLite el índice es una tabla FTS5 que crea core.busqueda en post_migrate.
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for tabla, indice in INDICES_FULLTEXT:
+        schema_editor.execute(f'ALTER TABLE {tabla} ADD FULLTEXT INDEX {indice} (documento_busqueda)')
+
+
+def borrar_indices_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for tabla, indice in INDICES_FULLTEXT:
+        schema_editor.execute(f'ALTER TABLE {tabla} DROP INDEX {indice}')
+
+
+class Migration(migrations.Migration):
+    """Documento de búsqueda desnormalizado para clientes y ventas (ver core/busqueda.py).
+
+    NOTA DE DEPLOY: en MySQL el primer índice FULLTEXT de cada tabla la
+    reconstruye (agrega FTS_DOC_ID); conviene correrla fuera de horario.
+    """
+
+    dependencies = [
+        ('comercial', '0023_tipocuenta_caja_chica'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='documento_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='documento_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(armar_documentos, migrations.RunPython.noop),
+        migrations.RunPython(crear_indices_fulltext, borrar_indices_fulltext),
+    ]
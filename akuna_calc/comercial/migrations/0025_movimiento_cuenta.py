@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from comercial.cuenta_corriente import acumular_saldos, armar_movimientos
+
+
+def armar_libro(apps, schema_editor):
+    """Arma el libro de cada cuenta con sus compras vivas, señas y pagos."""
+    Compra = apps.get_model('comercial', 'Compra')
+    PagoCompra = apps.get_model('comercial', 'PagoCompra')
+    MovimientoCuenta = apps.get_model('comercial', 'MovimientoCuenta')
+
+    cuenta_ids = Compra.objects.filter(deleted_at__isnull=True).order_by().values_list('cuenta_id', flat=True).distinct()
+    for cuenta_id in list(cuenta_ids):
+        compras = list(
+            Compra.objects.filter(cuenta_id=cuenta_id, deleted_at__isnull=True)
+            .order_by('fecha_pago', 'created_at', 'pk')
+        )
+        pagos_por_compra = {}
+        for pago in PagoCompra.objects.filter(compra__in=compras).order_by('fecha_pago', 'created_at', 'pk'):
+            pagos_por_compra.setdefault(pago.compra_id, []).append(pago)
+        movimientos = []
+        for compra in compras:
+            movimientos.extend(armar_movimientos(compra, pagos_por_compra.get(compra.pk, [])))
+        MovimientoCuenta.objects.bulk_create(
+            [MovimientoCuenta(**mov) for mov in acumular_saldos(movimientos)],
+            batch_size=500,
+        )
+
+
+def vaciar_libro(apps, schema_editor):
+    apps.get_model('comercial', 'MovimientoCuenta').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0024_documento_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoCuenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('compra', 'Compra'), ('sena', 'Seña'), ('pago', 'Pago')], max_length=10)),
+                ('fecha', models.DateField()),
+                ('orden_tipo', models.PositiveSmallIntegerField(default=0)),
+                ('descripcion', models.CharField(max_length=200)),
+                ('referencia', models.CharField(blank=True, max_length=100)),
+                ('forma_pago', models.CharField(blank=True, max_length=50)),
+                ('debe', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('haber', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('compra', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_cuenta', to='comercial.compra')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='comercial.cuenta')),
+                ('pago', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='comercial.pagocompra')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de cuenta',
+                'verbose_name_plural': 'Movimientos de cuenta',
+                'ordering': ['fecha', 'orden_tipo', 'id'],
+                'indexes': [models.Index(fields=['cuenta', 'fecha', 'orden_tipo', 'id'], name='comercial_movcta_libro_idx')],
+            },
+        ),
+        migrations.RunPython(armar_libro, vaciar_libro),
+    ]
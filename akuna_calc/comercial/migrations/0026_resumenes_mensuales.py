@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from comercial.resumenes import reconciliar
+
+
+def armar_resumenes(apps, schema_editor):
+    """Arma los resúmenes mensuales desde las ventas, pagos y compras vivas."""
+    reconciliar(apps=apps, resumenes=('ventas', 'compras'))
+
+
+def vaciar_resumenes(apps, schema_editor):
+    apps.get_model('comercial', 'ResumenVentasMes').objects.all().delete()
+    apps.get_model('comercial', 'ResumenComprasMes').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0025_movimiento_cuenta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVentasMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('con_factura', models.BooleanField()),
+                ('total_ventas', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad_ventas', models.IntegerField(default=0)),
+                ('cantidad_pendientes', models.IntegerField(default=0)),
+                ('total_cobrado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad_cobros', models.IntegerField(default=0)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='comercial.cliente')),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual de ventas',
+                'verbose_name_plural': 'Resúmenes mensuales de ventas',
+                'unique_together': {('mes', 'cliente', 'con_factura')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenComprasMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('con_factura', models.BooleanField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('tipo_cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='comercial.tipocuenta')),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual de compras',
+                'verbose_name_plural': 'Resúmenes mensuales de compras',
+                'unique_together': {('mes', 'tipo_cuenta', 'con_factura')},
+            },
+        ),
+        migrations.RunPython(armar_resumenes, vaciar_resumenes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0026_resumenes_mensuales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recibo',
+            name='pdf_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
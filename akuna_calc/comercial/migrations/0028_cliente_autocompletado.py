@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+from core.busqueda import armar_documento
+
+
+LOTE = 500
+
+
+def armar_documentos(apps, schema_editor):
+    """Rearma `documento_busqueda` de los clientes, que ahora incluye el CUIT.
+
+    Repite `Cliente.armar_documento_busqueda` (los modelos históricos no tienen métodos).
+    """
+    Cliente = apps.get_model('comercial', 'Cliente')
+    lote = []
+    for cliente in Cliente.objects.all().iterator(chunk_size=LOTE):
+        cliente.documento_busqueda = armar_documento(
+            cliente.nombre, cliente.apellido, cliente.razon_social, cliente.localidad, cliente.cuit,
+        )
+        lote.append(cliente)
+        if len(lote) >= LOTE:
+            Cliente.objects.bulk_update(lote, ['documento_busqueda'])
+            lote = []
+    if lote:
+        Cliente.objects.bulk_update(lote, ['documento_busqueda'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0027_recibo_pdf_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['deleted_at', 'apellido', 'nombre'], name='comercial_cliente_orden_idx'),
+        ),
+        migrations.RunPython(armar_documentos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from comercial.resumenes import reconciliar
+
+
+def armar_fichas(apps, schema_editor):
+    """Arma la ficha de cada cliente con ventas desde las ventas y pagos vivos."""
+    reconciliar(apps=apps, resumenes=('clientes',))
+
+
+def vaciar_fichas(apps, schema_editor):
+    apps.get_model('comercial', 'ClienteResumen').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0028_cliente_autocompletado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClienteResumen',
+            fields=[
+                ('cliente', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='comercial.cliente')),
+                ('total_comprado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_cobrado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo_pendiente', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad_ventas', models.IntegerField(default=0)),
+                ('ventas_pendientes', models.IntegerField(default=0)),
+                ('ventas_entregadas', models.IntegerField(default=0)),
+                ('ventas_colocadas', models.IntegerField(default=0)),
+                ('ultima_compra', models.DateTimeField(blank=True, null=True)),
+                ('ventas_por_mes', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'verbose_name': 'Resumen de cliente',
+                'verbose_name_plural': 'Resúmenes de clientes',
+            },
+        ),
+        migrations.RunPython(armar_fichas, vaciar_fichas),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:07
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0029_cliente_resumen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CotizacionUSD',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('fuente', models.CharField(blank=True, max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cotización USD',
+                'verbose_name_plural': 'Cotizaciones USD',
+                'ordering': ['fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0030_cotizacion_usd'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['deleted_at', 'cliente', 'created_at', 'saldo', 'con_factura'], name='comercial_venta_antiguedad_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0031_venta_antiguedad_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['deleted_at', 'fecha_pago'], name='comercial_compra_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['cuenta', 'deleted_at', 'fecha_pago'], name='comercial_compra_cuenta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagoventa',
+            index=models.Index(fields=['fecha_pago', 'venta'], name='comercial_pagoventa_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagoventa',
+            index=models.Index(fields=['venta', 'fecha_pago'], name='comercial_pagoventa_venta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['deleted_at', 'created_at'], name='comercial_venta_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['deleted_at', 'estado', 'created_at'], name='comercial_venta_estado_idx'),
+        ),
+    ]
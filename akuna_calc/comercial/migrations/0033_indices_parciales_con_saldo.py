@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0032_indices_filtros_frecuentes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('saldo__gt', 0)), fields=['saldo'], name='comercial_compra_abierta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('saldo__gt', 0)), fields=['saldo'], name='comercial_venta_abierta_idx'),
+        ),
+    ]
@@ -1,10 +1,19 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
 from django.core.validators import MinValueValidator
-from django.db.models import Max, Sum
+from django.db.models import Aggregate, CharField, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
 from decimal import Decimal
+from functools import lru_cache
 from pathlib import Path
+import hashlib
+
+from core.busqueda import actualizar_documento, armar_documento, refrescar_documentos
+from core.numeracion import siguiente_numero
 
 
 _UNIDADES = {
@@ -69,6 +78,146 @@ def _formatear_cuit(cuit):
     return cuit
 
 
+@lru_cache(maxsize=1)
+def _logo_recibo_url():
+    """Logo de los recibos como data URL: se lee y codifica una vez por proceso."""
+    import base64
+
+    from django.conf import settings
+
+    logo_candidates = [
+        Path(settings.BASE_DIR) / 'static' / 'imagenes' / 'AKUN-LOGO.png',
+        Path(settings.BASE_DIR) / 'static' / 'AKUN-LOGO.png',
+        Path(settings.STATIC_ROOT) / 'imagenes' / 'AKUN-LOGO.png',
+        Path(settings.STATIC_ROOT) / 'AKUN-LOGO.png',
+    ]
+    logo_path = next((path for path in logo_candidates if path.exists()), None)
+    if not logo_path:
+        return ''
+    logo_b64 = base64.b64encode(logo_path.read_bytes()).decode('ascii')
+    return f'data:image/png;base64,{logo_b64}'
+
+
+def _pdf_desde_html(html):
+    import io
+
+    from xhtml2pdf import pisa
+
+    result = io.BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=result)
+    if pisa_status.err:
+        raise Exception('Error generando PDF de recibo')
+    return result.getvalue()
+
+
+def _suma_por_venta(relacion, campo):
+    """Subconsulta con la suma de `campo` de una relación inversa de Venta (0 si no hay filas)."""
+    modelo = Venta._meta.get_field(relacion).related_model
+    return Coalesce(
+        Subquery(
+            modelo.objects.filter(venta_id=OuterRef('pk'))
+            .order_by()
+            .values('venta_id')
+            .annotate(total=Sum(campo))
+            .values('total')
+        ),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+class _ConcatenarFacturas(Aggregate):
+    """`GROUP_CONCAT` de números de factura separados por salto de línea.
+
+    En MySQL van del pago más reciente al más viejo (el orden de `venta.pagos`);
+    SQLite (3.40) no admite `ORDER BY` dentro del agregado, así que ahí salen en
+    el orden de la tabla. Los repetidos los quita `Venta.get_facturas_relacionadas`.
+
+    MySQL corta el resultado en `group_concat_max_len` sin avisar (1024 bytes por
+    defecto); el `init_command` de `settings.py` lo sube a 1 MB por sesión.
+    """
+    function = 'GROUP_CONCAT'
+    SEPARADOR = '\n'
+
+    def __init__(self, expresion, **extra):
+        super().__init__(expresion, output_field=CharField(), **extra)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="%(function)s(%(expressions)s ORDER BY fecha_pago DESC, id DESC SEPARATOR '\\n')",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="%(function)s(%(expressions)s, char(10))", **extra_context)
+
+
+def _facturas_de_pagos():
+    """Subconsulta con los números de factura de los pagos de la venta (None si no hay)."""
+    return Subquery(
+        PagoVenta.objects.filter(venta_id=OuterRef('pk'))
+        .exclude(numero_factura='')
+        .order_by()
+        .values('venta_id')
+        .annotate(facturas=_ConcatenarFacturas('numero_factura'))
+        .values('facturas')
+    )
+
+
+def rango_de_dias(campo, desde=None, hasta=None):
+    """`Q` de `campo` (fecha y hora) entre los días locales `desde` y `hasta`, inclusive.
+
+    Equivale a `campo__date__gte` / `campo__date__lte`, pero compara la columna
+    contra inicios de día, así la base puede recorrer un índice en lugar de
+    convertir cada fila a fecha. Acepta `date` o texto ISO; un texto que no es
+    fecha no filtra.
+    """
+    filtro = Q()
+    desde, hasta = _como_fecha(desde), _como_fecha(hasta)
+    if desde:
+        filtro &= Q(**{f'{campo}__gte': inicio_del_dia(desde)})
+    if hasta:
+        filtro &= Q(**{f'{campo}__lt': inicio_del_dia(hasta + timedelta(days=1))})
+    return filtro
+
+
+def _como_fecha(valor):
+    if not isinstance(valor, str):
+        return valor
+    try:
+        return parse_date(valor)
+    except ValueError:
+        return None
+
+
+def inicio_del_dia(dia):
+    """Medianoche local del día `dia`, con zona horaria."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+class EliminacionLogicaQuerySet(models.QuerySet):
+    """Queryset de los modelos con eliminado lógico (`deleted_at`).
+
+    Cada modelo tiene tres managers: `alive` (solo vivos) para listados y
+    reportes, `all_objects` para las consultas que incluyen eliminados a
+    propósito y `objects`, que sigue trayendo todo porque lo usan la validación
+    de campos únicos, el admin y los formularios de Django. Las relaciones
+    inversas (`cliente.venta_set`) heredan `.alive()`.
+    """
+
+    def alive(self):
+        """Solo las filas sin eliminar."""
+        return self.filter(deleted_at__isnull=True)
+
+
+class VivosManager(models.Manager.from_queryset(EliminacionLogicaQuerySet)):
+    """`Modelo.alive`: excluye de entrada las filas eliminadas."""
+
+    def get_queryset(self):
+        return super().get_queryset().alive()
+
+
 class Cliente(models.Model):
     CONDICION_IVA_CHOICES = [
         ('RI', 'Responsable Inscripto'),
@@ -89,9 +238,26 @@ class Cliente(models.Model):
     email = models.EmailField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    documento_busqueda = models.TextField(blank=True, default='', editable=False)
+
+    objects = EliminacionLogicaQuerySet.as_manager()
+    all_objects = EliminacionLogicaQuerySet.as_manager()
+    alive = VivosManager()
     
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
+
+    def armar_documento_busqueda(self):
+        return armar_documento(self.nombre, self.apellido, self.razon_social, self.localidad, self.cuit)
+
+    def save(self, *args, **kwargs):
+        anterior = self.documento_busqueda
+        actualizar_documento(self, kwargs, ('nombre', 'apellido', 'razon_social', 'localidad', 'cuit'))
+        super().save(*args, **kwargs)
+        if anterior and anterior != self.documento_busqueda:
+            # Ventas y presupuestos indexan el nombre del cliente.
+            refrescar_documentos(self.venta_set.select_related('cliente').prefetch_related('pagos'))
+            refrescar_documentos(self.presupuestos.select_related('cliente'))
     
     def get_nombre_completo(self):
         if self.razon_social:
@@ -107,6 +273,10 @@ class Cliente(models.Model):
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
+        indexes = [
+            # Listado del autocompletado sin término: vivos por apellido y nombre.
+            models.Index(fields=['deleted_at', 'apellido', 'nombre'], name='comercial_cliente_orden_idx'),
+        ]
 
 
 class Venta(models.Model):
@@ -126,6 +296,13 @@ class Venta(models.Model):
         ('entregado', 'Entregado'),
         ('colocado', 'Colocado'),
     ]
+
+    # Importes propios de la venta que entran en el saldo.
+    CAMPOS_SALDO = ('valor_total', 'sena', 'monto_retenciones')
+    # Campos que definen su aporte a los resúmenes mensuales (`comercial.resumenes`).
+    CAMPOS_RESUMEN = (
+        'cliente_id', 'created_at', 'con_factura', 'estado', 'valor_total', 'sena', 'monto_retenciones', 'deleted_at',
+    )
     
     numero_pedido = models.CharField(max_length=50)  # Permite duplicados (PVC, PVC, etc.)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
@@ -152,30 +329,101 @@ class Venta(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    documento_busqueda = models.TextField(blank=True, default='', editable=False)
+
+    objects = EliminacionLogicaQuerySet.as_manager()
+    all_objects = EliminacionLogicaQuerySet.as_manager()
+    alive = VivosManager()
+
+    def armar_documento_busqueda(self):
+        facturas_pagos = [pago.numero_factura for pago in self.pagos.all()] if self.pk else []
+        return armar_documento(
+            self.numero_pedido,
+            self.numero_factura,
+            self.cliente.nombre,
+            self.cliente.apellido,
+            self.cliente.razon_social,
+            *facturas_pagos,
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        guardado = dict(zip(field_names, values))
+        if all(campo in guardado for campo in cls.CAMPOS_RESUMEN):
+            # Lo que aporta hoy a los resúmenes, para no releerlo al guardar.
+            instancia._resumen_guardado = tuple(guardado[campo] for campo in cls.CAMPOS_RESUMEN)
+        return instancia
+
+    @classmethod
+    def refrescar_documento_busqueda(cls, venta_id):
+        refrescar_documentos(cls.objects.filter(pk=venta_id).select_related('cliente').prefetch_related('pagos'))
     
     def save(self, *args, **kwargs):
-        # Calcular saldo: Total + Percepciones + Retenciones - Seña - Pagos realizados
-        # Las retenciones se suman porque son montos que el cliente no paga pero que se deben considerar en el total
-        total_con_percepciones = self.valor_total
-        if self.pk:  # Solo si la venta ya existe, calcular percepciones
-            total_con_percepciones += self.get_total_percepciones()
-        
-        # Las retenciones se suman al total porque son montos que el cliente no paga
-        valor_neto = total_con_percepciones + self.monto_retenciones
-        
-        if self.pk:  # Solo calcular pagos si la venta ya existe
-            total_pagos = sum(pago.monto for pago in self.pagos.all())
-            self.saldo = valor_neto - self.sena - total_pagos
-        else:
+        actualizar_documento(self, kwargs, ('numero_pedido', 'numero_factura', 'cliente', 'cliente_id'))
+        # Saldo: Total + Percepciones + Retenciones - Seña - Pagos realizados.
+        # Los pagos y percepciones lo ajustan con deltas al guardarse; acá solo se
+        # recalcula si cambia algún importe propio de la venta (o en un save completo,
+        # para no pisar con un saldo viejo en memoria lo que ya ajustaron ellos).
+        update_fields = kwargs.get('update_fields')
+        if self.pk is None:
             # Nueva venta: saldo = total neto - seña
-            self.saldo = valor_neto - self.sena
-        super().save(*args, **kwargs)
-    
+            self.saldo = self.valor_total + self.monto_retenciones - self.sena
+        elif update_fields is None or set(update_fields) & set(self.CAMPOS_SALDO):
+            total_percepciones, total_pagos = self._totales_movimientos()
+            self.saldo = self.valor_total + total_percepciones + self.monto_retenciones - self.sena - total_pagos
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'saldo'}
+        from . import resumenes
+
+        if not resumenes.afecta(update_fields, resumenes.CAMPOS_VENTA):
+            return super().save(*args, **kwargs)
+        anterior = resumenes.estado_venta(self)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            resumenes.sincronizar_venta(self, anterior, kwargs.get('update_fields'))
+
+    def _totales_movimientos(self):
+        """(percepciones, pagos) de la venta, leídos en una sola consulta."""
+        totales = (
+            Venta.objects.filter(pk=self.pk)
+            .annotate(
+                total_percepciones=_suma_por_venta('percepciones', 'importe'),
+                total_pagos=_suma_por_venta('pagos', 'monto'),
+            )
+            .values_list('total_percepciones', 'total_pagos')
+            .first()
+        )
+        return totales or (Decimal('0'), Decimal('0'))
+
+    @classmethod
+    def anotar_listado(cls, queryset):
+        """Lo que muestra cada fila del listado, resuelto en la consulta de la página.
+
+        `suma_percepciones` y `facturas_pagos` reemplazan recorrer `percepciones`
+        y `pagos` por venta (ver `get_total_percepciones` y
+        `get_facturas_relacionadas`), así que no hace falta prefetch.
+        """
+        return queryset.select_related('factura_electronica__punto_venta').annotate(
+            suma_percepciones=_suma_por_venta('percepciones', 'importe'),
+            facturas_pagos=_facturas_de_pagos(),
+        )
+
+    @classmethod
+    def aplicar_delta_saldo(cls, venta_id, delta):
+        """Suma `delta` al saldo guardado (y al del resumen del cliente si la venta está viva) sin leer filas."""
+        if venta_id and delta:
+            cls.objects.filter(pk=venta_id).update(saldo=F('saldo') + delta)
+            cliente_id = cls.alive.filter(pk=venta_id).values('cliente_id')
+            ClienteResumen.objects.filter(cliente_id=Subquery(cliente_id)).update(
+                saldo_pendiente=F('saldo_pendiente') + delta,
+            )
+
     def delete(self, *args, **kwargs):
         """Eliminado lógico"""
         from django.utils import timezone
         self.deleted_at = timezone.now()
-        self.save()
+        self.save(update_fields=['deleted_at', 'updated_at'])
     
     def get_numero_factura_display(self):
         """Obtiene número de factura (electrónica o manual)"""
@@ -190,14 +438,20 @@ class Venta(models.Model):
         if factura_principal and factura_principal != '-':
             facturas.append(factura_principal)
 
-        for pago in self.pagos.all():
-            if pago.numero_factura and pago.numero_factura not in facturas:
-                facturas.append(pago.numero_factura)
+        if hasattr(self, 'facturas_pagos'):
+            numeros = (self.facturas_pagos or '').split(_ConcatenarFacturas.SEPARADOR)
+        else:
+            numeros = (pago.numero_factura for pago in self.pagos.all())
+        for numero in numeros:
+            if numero and numero not in facturas:
+                facturas.append(numero)
 
         return facturas
     
     def get_total_percepciones(self):
         """Calcula el total de percepciones"""
+        if hasattr(self, 'suma_percepciones'):
+            return self.suma_percepciones
         return sum(p.importe for p in self.percepciones.all())
     
     def get_total_con_percepciones(self):
@@ -217,6 +471,20 @@ class Venta(models.Model):
         verbose_name = "Venta"
         verbose_name_plural = "Ventas"
         ordering = ['-created_at']
+        indexes = [
+            # Cubre la antigüedad de saldos (`comercial.antiguedad`): ventas vivas agrupadas por cliente.
+            models.Index(fields=['deleted_at', 'cliente', 'created_at', 'saldo', 'con_factura'], name='comercial_venta_antiguedad_idx'),
+            # Listado de ventas (orden por fecha sin ordenar en memoria) y rangos de fecha de reportes y cobranzas.
+            models.Index(fields=['deleted_at', 'created_at'], name='comercial_venta_fecha_idx'),
+            # Listado de ventas filtrado por estado.
+            models.Index(fields=['deleted_at', 'estado', 'created_at'], name='comercial_venta_estado_idx'),
+            # Parcial: solo ventas vivas con saldo (listado con saldo, conciliación bancaria).
+            # En MySQL, sin índices parciales, queda un índice común sobre `saldo`.
+            models.Index(
+                fields=['saldo'], name='comercial_venta_abierta_idx',
+                condition=Q(deleted_at__isnull=True, saldo__gt=0),
+            ),
+        ]
 
 
 class TipoCuenta(models.Model):
@@ -234,6 +502,10 @@ class TipoCuenta(models.Model):
     descripcion = models.CharField(max_length=100)
     activo = models.BooleanField(default=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EliminacionLogicaQuerySet.as_manager()
+    all_objects = EliminacionLogicaQuerySet.as_manager()
+    alive = VivosManager()
     
     def __str__(self):
         return self.get_tipo_display()
@@ -257,6 +529,10 @@ class TipoGasto(models.Model):
     activo = models.BooleanField(default=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = EliminacionLogicaQuerySet.as_manager()
+    all_objects = EliminacionLogicaQuerySet.as_manager()
+    alive = VivosManager()
     
     def __str__(self):
         return f"{self.nombre} ({self.tipo_cuenta})"
@@ -293,9 +569,21 @@ class Cuenta(models.Model):
     activo = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EliminacionLogicaQuerySet.as_manager()
+    all_objects = EliminacionLogicaQuerySet.as_manager()
+    alive = VivosManager()
     
     def __str__(self):
         return f"{self.nombre} ({self.tipo_cuenta})"
+
+    def save(self, *args, **kwargs):
+        from . import resumenes
+
+        anterior_tipo_id = resumenes.estado_cuenta(self.pk)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            resumenes.sincronizar_cuenta(self, anterior_tipo_id)
     
     def delete(self, *args, **kwargs):
         """Eliminado lógico"""
@@ -345,13 +633,24 @@ class Compra(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = EliminacionLogicaQuerySet.as_manager()
+    all_objects = EliminacionLogicaQuerySet.as_manager()
+    alive = VivosManager()
+
     def save(self, *args, **kwargs):
         if self.pk:
             total_pagos = self.pagos_compra.aggregate(total=Sum('monto'))['total'] or Decimal('0')
             self.saldo = self.valor_total - self.sena - total_pagos
         else:
             self.saldo = self.valor_total - self.sena
-        super().save(*args, **kwargs)
+        from . import resumenes
+        from .cuenta_corriente import sincronizar_compra
+
+        anterior = resumenes.estado_compra(self.pk)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            sincronizar_compra(self)
+            resumenes.sincronizar_compra(self, anterior)
 
     def __str__(self):
         return f"Compra {self.numero_pedido} - {self.cuenta}"
@@ -370,6 +669,17 @@ class Compra(models.Model):
         verbose_name = "Compra"
         verbose_name_plural = "Compras"
         ordering = ['-fecha_pago']
+        indexes = [
+            # Listado y reporte de gastos (`comercial.gastos`): orden y rangos por fecha de pago.
+            models.Index(fields=['deleted_at', 'fecha_pago'], name='comercial_compra_fecha_idx'),
+            # Compras de una cuenta: cuenta corriente, resúmenes y filtro por cuenta.
+            models.Index(fields=['cuenta', 'deleted_at', 'fecha_pago'], name='comercial_compra_cuenta_idx'),
+            # Parcial: solo compras vivas con saldo (conciliación bancaria). Igual que en Venta.
+            models.Index(
+                fields=['saldo'], name='comercial_compra_abierta_idx',
+                condition=Q(deleted_at__isnull=True, saldo__gt=0),
+            ),
+        ]
 
 
 class PagoCompra(models.Model):
@@ -393,6 +703,21 @@ class PagoCompra(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    def save(self, *args, **kwargs):
+        from .cuenta_corriente import sincronizar_compra
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            sincronizar_compra(self.compra)
+
+    def delete(self, *args, **kwargs):
+        from .cuenta_corriente import sincronizar_compra
+
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            sincronizar_compra(self.compra)
+        return resultado
+
     def __str__(self):
         return f"Pago ${self.monto} - Compra {self.compra.numero_pedido}"
 
@@ -402,7 +727,206 @@ class PagoCompra(models.Model):
         ordering = ['-fecha_pago']
 
 
-class PagoVenta(models.Model):
+class MovimientoCuenta(models.Model):
+    """Libro mayor de cada cuenta: compras al debe, señas y pagos al haber, con el
+    saldo acumulado hasta cada movimiento. Lo mantiene `comercial.cuenta_corriente`."""
+
+    TIPO_CHOICES = [
+        ('compra', 'Compra'),
+        ('sena', 'Seña'),
+        ('pago', 'Pago'),
+    ]
+
+    cuenta = models.ForeignKey(Cuenta, on_delete=models.CASCADE, related_name='movimientos')
+    compra = models.ForeignKey(Compra, on_delete=models.CASCADE, related_name='movimientos_cuenta')
+    # SET_NULL: al borrar el pago la fila queda huérfana hasta que la sincronización
+    # la quita corriendo el saldo de las posteriores.
+    pago = models.ForeignKey(PagoCompra, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    fecha = models.DateField()
+    orden_tipo = models.PositiveSmallIntegerField(default=0)
+    descripcion = models.CharField(max_length=200)
+    referencia = models.CharField(max_length=100, blank=True)
+    forma_pago = models.CharField(max_length=50, blank=True)
+    debe = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    haber = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.fecha} - {self.cuenta_id}"
+
+    class Meta:
+        verbose_name = "Movimiento de cuenta"
+        verbose_name_plural = "Movimientos de cuenta"
+        ordering = ['fecha', 'orden_tipo', 'id']
+        indexes = [
+            models.Index(fields=['cuenta', 'fecha', 'orden_tipo', 'id'], name='comercial_movcta_libro_idx'),
+        ]
+
+
+class ResumenVentasMes(models.Model):
+    """Ventas vivas y lo cobrado (señas y pagos) por mes, cliente y blanco/negro,
+    para los tableros. Lo mantiene `comercial.resumenes`."""
+
+    mes = models.DateField()
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='+')
+    con_factura = models.BooleanField()
+    total_ventas = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad_ventas = models.IntegerField(default=0)
+    cantidad_pendientes = models.IntegerField(default=0)
+    total_cobrado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad_cobros = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} - {self.cliente_id} - {'Blanco' if self.con_factura else 'Negro'}"
+
+    class Meta:
+        verbose_name = "Resumen mensual de ventas"
+        verbose_name_plural = "Resúmenes mensuales de ventas"
+        unique_together = [['mes', 'cliente', 'con_factura']]
+
+
+class ResumenComprasMes(models.Model):
+    """Compras vivas por mes de pago, tipo de cuenta y blanco/negro, para los
+    tableros. Lo mantiene `comercial.resumenes`."""
+
+    mes = models.DateField()
+    tipo_cuenta = models.ForeignKey(TipoCuenta, on_delete=models.CASCADE, related_name='+')
+    con_factura = models.BooleanField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} - {self.tipo_cuenta_id} - {'Blanco' if self.con_factura else 'Negro'}"
+
+    class Meta:
+        verbose_name = "Resumen mensual de compras"
+        verbose_name_plural = "Resúmenes mensuales de compras"
+        unique_together = [['mes', 'tipo_cuenta', 'con_factura']]
+
+
+class ClienteResumen(models.Model):
+    """Cifras de la ficha del cliente en una fila: ventas vivas (total, saldo,
+    cantidad por estado, última compra y total por mes) y lo cobrado en pagos.
+    Lo mantiene `comercial.resumenes`."""
+
+    cliente = models.OneToOneField(Cliente, on_delete=models.CASCADE, primary_key=True, related_name='resumen')
+    total_comprado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_cobrado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo_pendiente = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad_ventas = models.IntegerField(default=0)
+    ventas_pendientes = models.IntegerField(default=0)
+    ventas_entregadas = models.IntegerField(default=0)
+    ventas_colocadas = models.IntegerField(default=0)
+    ultima_compra = models.DateTimeField(null=True, blank=True)
+    # [["aaaa-mm", "total"], ...] en orden, solo los meses con ventas.
+    ventas_por_mes = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"Resumen de {self.cliente_id}"
+
+    class Meta:
+        verbose_name = "Resumen de cliente"
+        verbose_name_plural = "Resúmenes de clientes"
+
+
+class CotizacionUSD(models.Model):
+    """Cotización del dólar por día (pesos por USD), para expresar importes en
+    dólares a la fecha de cada operación. Se carga por CSV (`importar_cotizaciones`);
+    los días sin fila toman la cotización anterior. Ver `comercial.cotizaciones`."""
+
+    fecha = models.DateField(unique=True)
+    valor = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    fuente = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        from .cotizaciones import invalidar
+
+        super().save(*args, **kwargs)
+        transaction.on_commit(invalidar)
+
+    def delete(self, *args, **kwargs):
+        from .cotizaciones import invalidar
+
+        resultado = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidar)
+        return resultado
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} - ${self.valor}"
+
+    class Meta:
+        verbose_name = "Cotización USD"
+        verbose_name_plural = "Cotizaciones USD"
+        ordering = ['fecha']
+
+
+class MovimientoSaldoVenta(models.Model):
+    """Base de pagos y percepciones: al guardarse o borrarse ajustan `Venta.saldo`
+    con un delta en la misma transacción, en lugar de recalcularlo sumando todo."""
+
+    CAMPO_IMPORTE = None
+    # Los pagos descuentan del saldo y las percepciones lo aumentan.
+    SIGNO_SALDO = 1
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        guardado = dict(zip(field_names, values))
+        instancia._saldo_guardado = (guardado.get('venta_id'), guardado.get(cls.CAMPO_IMPORTE))
+        return instancia
+
+    def _importe_guardado(self):
+        """(venta_id, importe) tal como están en la base, o (None, 0) si la fila es nueva."""
+        if self.pk is None:
+            return None, Decimal('0')
+        venta_id, importe = getattr(self, '_saldo_guardado', (None, None))
+        if venta_id is None or importe is None:
+            fila = type(self)._base_manager.filter(pk=self.pk).values_list('venta_id', self.CAMPO_IMPORTE).first()
+            venta_id, importe = fila or (None, Decimal('0'))
+        return venta_id, importe
+
+    def _aplicar_delta(self, venta_id, importe):
+        delta = self.SIGNO_SALDO * importe
+        if not venta_id or not delta:
+            return
+        Venta.aplicar_delta_saldo(venta_id, delta)
+        # Mantener al día la venta cacheada (p. ej. `pago.venta`), que suelen usar las vistas.
+        venta = self._state.fields_cache.get('venta')
+        if venta is not None and venta.pk == venta_id:
+            venta.saldo += delta
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & {'venta', 'venta_id', self.CAMPO_IMPORTE}:
+            return super().save(*args, **kwargs)
+
+        anterior_venta_id, anterior_importe = self._importe_guardado()
+        campo = self._meta.get_field(self.CAMPO_IMPORTE)
+        importe = campo.to_python(getattr(self, self.CAMPO_IMPORTE))
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if anterior_venta_id == self.venta_id:
+                self._aplicar_delta(self.venta_id, importe - anterior_importe)
+            else:
+                self._aplicar_delta(anterior_venta_id, -anterior_importe)
+                self._aplicar_delta(self.venta_id, importe)
+        self._saldo_guardado = (self.venta_id, importe)
+
+    def delete(self, *args, **kwargs):
+        venta_id, importe = self._importe_guardado()
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            self._aplicar_delta(venta_id, -importe)
+        self._saldo_guardado = (None, None)
+        return resultado
+
+
+class PagoVenta(MovimientoSaldoVenta):
     FORMA_PAGO_CHOICES = [
         ('transferencia', 'Transferencia'),
         ('efectivo', 'Efectivo'),
@@ -423,7 +947,36 @@ class PagoVenta(models.Model):
     fecha_factura = models.DateField(null=True, blank=True, verbose_name="Fecha de Factura")
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    CAMPO_IMPORTE = 'monto'
+    SIGNO_SALDO = -1
     
+    def save(self, *args, **kwargs):
+        from . import resumenes
+
+        es_edicion = self.pk is not None
+        if resumenes.afecta(kwargs.get('update_fields'), resumenes.CAMPOS_PAGO):
+            anterior = resumenes.estado_pago(self.pk)
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                resumenes.sincronizar_pago(self, anterior)
+        else:
+            super().save(*args, **kwargs)
+        if self.numero_factura or es_edicion:
+            # La venta indexa los números de factura de sus pagos.
+            Venta.refrescar_documento_busqueda(self.venta_id)
+
+    def delete(self, *args, **kwargs):
+        from . import resumenes
+
+        anterior = resumenes.estado_pago(self.pk)
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            resumenes.sincronizar_pago(self, anterior, borrado=True)
+        if self.numero_factura:
+            Venta.refrescar_documento_busqueda(self.venta_id)
+        return resultado
+
     def get_total_retenciones(self):
         """Calcula el total de retenciones aplicadas a este pago"""
         return sum(r.importe_retenido for r in self.retenciones.all())
@@ -439,9 +992,15 @@ class PagoVenta(models.Model):
         verbose_name = "Pago de Venta"
         verbose_name_plural = "Pagos de Ventas"
         ordering = ['-fecha_pago']
+        indexes = [
+            # Cobranzas y reporte general: pagos de un rango de fechas.
+            models.Index(fields=['fecha_pago', 'venta'], name='comercial_pagoventa_fecha_idx'),
+            # Listado de ventas filtrado por fecha de pago: los pagos de cada venta en el rango.
+            models.Index(fields=['venta', 'fecha_pago'], name='comercial_pagoventa_venta_idx'),
+        ]
 
 
-class Percepcion(models.Model):
+class Percepcion(MovimientoSaldoVenta):
     """Percepciones aplicadas a las ventas (se suman al total)"""
     
     TIPO_CHOICES = [
@@ -456,6 +1015,8 @@ class Percepcion(models.Model):
     observaciones = models.TextField(blank=True)
     importe = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
     created_at = models.DateTimeField(auto_now_add=True)
+
+    CAMPO_IMPORTE = 'importe'
     
     def __str__(self):
         return f"{self.get_tipo_display()} - ${self.importe}"
@@ -474,55 +1035,59 @@ class Recibo(models.Model):
     importe_letras = models.CharField(max_length=300)
     concepto = models.CharField(max_length=100)
     pdf = models.FileField(upload_to="recibos/", blank=True, null=True)
+    # sha256 del HTML con el que se generó `pdf`: si no cambió, no se vuelve a generar.
+    pdf_hash = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def _ultimo_numero_emitido(cls):
+        return cls.objects.aggregate(max_numero=Max('numero'))['max_numero'] or 0
+
     @classmethod
     def siguiente_numero(cls):
-        ultimo = cls.objects.aggregate(max_numero=Max('numero'))['max_numero'] or 0
-        return ultimo + 1
+        return siguiente_numero('recibo', inicial=cls._ultimo_numero_emitido)
 
     @classmethod
-    def obtener_o_crear_desde_pago(cls, pago, force=False):
+    def desde_pago(cls, pago):
+        """Crea o actualiza el recibo del pago (número, importe y concepto), sin generar el PDF."""
         recibo = cls.objects.filter(pago=pago).order_by('-created_at', '-pk').first()
-        es_nuevo = recibo is None
-        if es_nuevo:
-            recibo = cls(
-                numero=cls.siguiente_numero(),
-                venta=pago.venta,
-                pago=pago,
-            )
-
-        recibo.importe = pago.monto
-        recibo.importe_letras = _importe_a_letras(pago.monto)
-        recibo.concepto = 'SALDO' if pago.venta.saldo <= 0 else 'PAGO PARCIAL'
-        if es_nuevo:
+        datos = {
+            'importe': pago.monto,
+            'importe_letras': _importe_a_letras(pago.monto),
+            'concepto': 'SALDO' if pago.venta.saldo <= 0 else 'PAGO PARCIAL',
+        }
+        if recibo is None:
+            recibo = cls(numero=cls.siguiente_numero(), venta=pago.venta, pago=pago, **datos)
             recibo.save()
-        else:
-            recibo.save(update_fields=['importe', 'importe_letras', 'concepto', 'venta', 'pago'])
+            return recibo
 
-        recibo.generar_pdf(force=force)
+        # Una corrida sin cambios no reescribe la fila.
+        cambios = [campo for campo, valor in datos.items() if getattr(recibo, campo) != valor]
+        if recibo.venta_id != pago.venta_id:
+            cambios.append('venta')
+        # Reusar el pago y la venta ya cargados (con sus retenciones) al armar el PDF.
+        recibo.pago = pago
+        recibo.venta = pago.venta
+        for campo, valor in datos.items():
+            setattr(recibo, campo, valor)
+        if cambios:
+            recibo.save(update_fields=cambios)
         return recibo
 
-    def construir_pdf_bytes(self):
-        """Renderiza el template y devuelve los bytes del PDF en memoria, sin tocar disco."""
-        import base64
-        import io
+    @classmethod
+    def obtener_o_crear_desde_pago(cls, pago, force=False):
+        recibo = cls.desde_pago(pago)
+        recibo.generar_pdf(force=force)
+        return recibo
 
-        from django.conf import settings
+    def construir_html_pdf(self):
+        """HTML del recibo tal como se pasa a xhtml2pdf (también es lo que se hashea)."""
         from django.template.defaultfilters import date as date_filter
         from django.template.loader import render_to_string
-        from xhtml2pdf import pisa
 
         cliente = self.venta.cliente
         venta = self.venta
         retenciones = {ret.tipo: ret.importe_retenido for ret in self.pago.retenciones.all()}
-        logo_candidates = [
-            Path(settings.BASE_DIR) / 'static' / 'imagenes' / 'AKUN-LOGO.png',
-            Path(settings.BASE_DIR) / 'static' / 'AKUN-LOGO.png',
-            Path(settings.STATIC_ROOT) / 'imagenes' / 'AKUN-LOGO.png',
-            Path(settings.STATIC_ROOT) / 'AKUN-LOGO.png',
-        ]
-        logo_path = next((path for path in logo_candidates if path.exists()), None)
         payment_rows = []
 
         if venta.sena > 0:
@@ -552,14 +1117,9 @@ class Recibo(models.Model):
         payment_only_pages = payment_pages[:-1] if payment_pages else []
         closing_payment_rows = payment_pages[-1] if payment_pages else []
 
-        logo_url = ''
-        if logo_path:
-            logo_b64 = base64.b64encode(logo_path.read_bytes()).decode('ascii')
-            logo_url = f'data:image/png;base64,{logo_b64}'
-
         context = {
             'recibo': self,
-            'logo_url': logo_url,
+            'logo_url': _logo_recibo_url(),
             'cliente_nombre': cliente.get_nombre_completo(),
             'cliente_direccion': cliente.direccion,
             'cliente_localidad': cliente.localidad,
@@ -575,24 +1135,39 @@ class Recibo(models.Model):
             'payment_only_pages': payment_only_pages,
             'closing_payment_rows': closing_payment_rows,
         }
-        html = render_to_string('comercial/recibo_pdf.html', context)
+        # El loader de templates de Django ya guarda el template compilado por proceso.
+        return render_to_string('comercial/recibo_pdf.html', context)
 
-        result = io.BytesIO()
-        pisa_status = pisa.CreatePDF(html, dest=result)
-        if pisa_status.err:
-            raise Exception('Error generando PDF de recibo')
+    def construir_pdf_bytes(self):
+        """Renderiza el template y devuelve los bytes del PDF en memoria, sin tocar disco."""
+        return _pdf_desde_html(self.construir_html_pdf())
 
-        result.seek(0)
-        return result.read()
+    def generar_pdf(self, force=False, aunque_no_cambie=False):
+        """Genera el PDF y lo guarda en el campo pdf. Devuelve si lo escribió.
 
-    def generar_pdf(self, force=False):
-        """Genera el PDF y lo guarda en el campo pdf. Si force=True, lo regenera aunque ya exista."""
+        Si force=True lo regenera aunque ya exista, salvo que el HTML tenga el mismo
+        hash que el del PDF guardado (y el archivo siga en disco); `aunque_no_cambie`
+        lo regenera igual.
+        """
         if self.pdf and not force:
-            return
+            return False
+
+        html = self.construir_html_pdf()
+        contenido_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        if (
+            not aunque_no_cambie
+            and self.pdf
+            and self.pdf_hash == contenido_hash
+            and self.pdf.storage.exists(self.pdf.name)
+        ):
+            return False
 
-        pdf_bytes = self.construir_pdf_bytes()
+        pdf_bytes = _pdf_desde_html(html)
         filename = f"recibo_{self.numero}.pdf"
-        self.pdf.save(filename, ContentFile(pdf_bytes), save=True)
+        self.pdf_hash = contenido_hash
+        self.pdf.save(filename, ContentFile(pdf_bytes), save=False)
+        self.save(update_fields=['pdf', 'pdf_hash'])
+        return True
 
     def __str__(self):
         return f"Recibo {self.numero} - Venta {self.venta.numero_pedido} - ${self.importe}"
@@ -0,0 +1,186 @@
+"""Carga masiva de pagos de ventas (fin de mes, desde el extracto del banco).
+
+Las filas (pedido, fecha, monto, forma de pago) llegan pegadas como texto o en
+un archivo CSV/XLSX (`leer_texto`, `leer_archivo`). `validar` las revisa todas
+antes de escribir nada: que el pedido exista y no sea ambiguo, la fecha, el
+monto, la forma de pago y que lo que suman las filas de cada venta no pase su
+saldo.
+
+`registrar` vuelve a validar con las ventas bloqueadas y, si todo está bien,
+escribe en una sola transacción: los pagos (cada uno aplica su delta de saldo y
+de resúmenes al guardarse), un rango de números de recibo reservado de una vez
+y los recibos con `bulk_create`. Los PDF se generan después del commit, en
+segundo plano (`recibos_pdf.generar_en_segundo_plano`).
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from core.numeracion import reservar_numeros
+
+from . import planillas
+from .models import PagoVenta, Recibo, Venta, _importe_a_letras
+from .recibos_pdf import generar_en_segundo_plano
+
+
+COLUMNAS = ('pedido', 'fecha', 'monto', 'forma')
+FORMAS_PAGO = {
+    planillas.normalizar(valor): clave
+    for clave, etiqueta in PagoVenta.FORMA_PAGO_CHOICES
+    for valor in (clave, etiqueta)
+}
+
+
+class FilaPago:
+    """Una fila de la carga: los valores tal como vinieron y, si son válidos, ya convertidos."""
+
+    def __init__(self, linea, pedido, fecha, monto, forma):
+        self.linea = linea
+        self.pedido = str(pedido or '').strip()
+        self.fecha_original = fecha
+        self.monto_original = monto
+        self.forma_original = str(forma or '').strip()
+        self.venta = None
+        self.fecha = None
+        self.monto = None
+        self.forma_pago = None
+        self.errores = []
+
+    def como_texto(self):
+        """La fila normalizada, para volver a enviarla al confirmar."""
+        return '\t'.join((self.pedido, self.fecha.strftime('%d/%m/%Y'), str(self.monto), self.forma_pago))
+
+    def como_dict(self):
+        return {
+            'linea': self.linea,
+            'pedido': self.pedido,
+            'venta_id': self.venta.pk if self.venta else None,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'monto': str(self.monto) if self.monto is not None else None,
+            'forma_pago': self.forma_pago,
+            'errores': self.errores,
+        }
+
+
+def _filas(registros):
+    filas = []
+    for linea, valores in enumerate(registros, 1):
+        if planillas.fila_vacia(valores):
+            continue
+        if not filas and planillas.normalizar(valores[0]) == 'pedido':
+            continue  # encabezado
+        valores = (list(valores) + [None] * len(COLUMNAS))[:len(COLUMNAS)]
+        filas.append(FilaPago(linea, *valores))
+    return filas
+
+
+def leer_texto(texto):
+    return _filas(planillas.leer_texto(texto))
+
+
+def leer_archivo(archivo):
+    return _filas(planillas.leer_archivo(archivo))
+
+
+def _ventas_por_pedido(pedidos, bloquear=False):
+    ventas = Venta.alive.filter(numero_pedido__in=pedidos).select_related('cliente')
+    if bloquear:
+        ventas = ventas.select_for_update(of=('self',))
+    por_pedido = {}
+    for venta in ventas.order_by('pk'):
+        por_pedido.setdefault(venta.numero_pedido, []).append(venta)
+    return por_pedido
+
+
+def validar(filas, bloquear=False):
+    """Revisa todas las filas y carga sus errores. Devuelve si no hubo ninguno."""
+    por_pedido = _ventas_por_pedido({fila.pedido for fila in filas if fila.pedido}, bloquear)
+    acumulado = {}
+    for fila in filas:
+        fila.errores = []
+        candidatas = por_pedido.get(fila.pedido, [])
+        if len(candidatas) > 1:
+            # `numero_pedido` admite duplicados: sirve solo si una sola tiene saldo.
+            candidatas = [venta for venta in candidatas if venta.saldo > 0]
+        if not fila.pedido:
+            fila.errores.append('Falta el número de pedido.')
+        elif not candidatas:
+            fila.errores.append(f'No hay una venta activa con saldo para el pedido {fila.pedido}.')
+        elif len(candidatas) > 1:
+            fila.errores.append(f'El pedido {fila.pedido} corresponde a {len(candidatas)} ventas con saldo: cargalo desde la venta.')
+        else:
+            fila.venta = candidatas[0]
+
+        fila.fecha = planillas.convertir_fecha(fila.fecha_original)
+        if fila.fecha is None:
+            fila.errores.append(f'Fecha inválida: "{fila.fecha_original or ""}" (usar dd/mm/aaaa).')
+
+        fila.monto = planillas.convertir_monto(fila.monto_original)
+        if fila.monto is None:
+            fila.errores.append(f'Monto inválido: "{fila.monto_original or ""}".')
+        elif fila.monto <= 0:
+            fila.errores.append('El monto debe ser mayor a 0.')
+
+        fila.forma_pago = FORMAS_PAGO.get(planillas.normalizar(fila.forma_original))
+        if fila.forma_pago is None:
+            fila.errores.append(f'Forma de pago inválida: "{fila.forma_original}".')
+
+        if fila.venta is not None and fila.monto is not None and fila.monto > 0:
+            total = acumulado.get(fila.venta.pk, Decimal('0')) + fila.monto
+            acumulado[fila.venta.pk] = total
+            if total > fila.venta.saldo:
+                fila.errores.append(
+                    f'Con esta fila los pagos del pedido suman ${total}, más que el saldo pendiente (${fila.venta.saldo}).'
+                )
+    return bool(filas) and not any(fila.errores for fila in filas)
+
+
+def guardar_con_recibos(pagos):
+    """Guarda pagos de venta nuevos con sus recibos; hay que llamarla dentro de una transacción.
+
+    Cada pago aplica su delta de saldo al guardarse; los números de recibo se
+    reservan como un rango y los PDF quedan para después del commit.
+    """
+    if not pagos:
+        return pagos
+    recibos = []
+    for pago in pagos:
+        pago.save()
+        # El pago ya descontó su monto del saldo de `pago.venta`, compartida
+        # entre los pagos de la misma venta: el concepto sale del saldo tras este pago.
+        recibos.append(Recibo(
+            venta=pago.venta,
+            pago=pago,
+            importe=pago.monto,
+            importe_letras=_importe_a_letras(pago.monto),
+            concepto='SALDO' if pago.venta.saldo <= 0 else 'PAGO PARCIAL',
+        ))
+
+    numeros = reservar_numeros('recibo', len(recibos), inicial=Recibo._ultimo_numero_emitido)
+    for recibo, numero in zip(recibos, numeros):
+        recibo.numero = numero
+    Recibo.objects.bulk_create(recibos)
+    generar_en_segundo_plano([pago.pk for pago in pagos])
+    return pagos
+
+
+def registrar(filas, con_factura, usuario):
+    """Valida con las ventas bloqueadas y escribe pagos y recibos en una transacción.
+
+    Devuelve los pagos creados, o una lista vacía si alguna fila no pasó la
+    validación (en ese caso no se escribe nada y las filas traen sus errores).
+    """
+    with transaction.atomic():
+        if not validar(filas, bloquear=True):
+            return []
+        return guardar_con_recibos([
+            PagoVenta(
+                venta=fila.venta,
+                monto=fila.monto,
+                fecha_pago=fila.fecha,
+                forma_pago=fila.forma_pago,
+                con_factura=con_factura,
+                created_by=usuario,
+            )
+            for fila in filas
+        ])
@@ -0,0 +1,207 @@
+"""PDF de detalle de una venta (reportlab).
+
+Lo fijo del documento se arma una vez por proceso (`_plantilla`): los estilos de
+párrafo, los estilos de tabla y el pie que se dibuja en cada página. Por venta
+solo se arman las filas de las tablas (`filas_venta`).
+
+El PDF queda en el cache de Django bajo el hash de esas filas, así que volver a
+descargar una venta que no cambió no pasa por reportlab. Cualquier cambio en lo
+que se imprime (importes, pagos, estado, cliente) cambia el hash. La fecha de
+generación del documento es la del PDF guardado, a lo sumo `TIMEOUT` atrás.
+Lo fijo no entra en el hash: la clave lleva `VERSION_PLANTILLA`, que se sube a
+mano con cada cambio de `_plantilla` o `construir_pdf` para no seguir sirviendo
+PDFs con el diseño anterior.
+"""
+import hashlib
+import io
+import json
+from datetime import datetime
+from functools import lru_cache
+
+from django.core.cache import cache
+
+
+TIMEOUT = 3600
+# Subir con cada cambio de diseño del PDF (estilos, columnas, textos fijos).
+VERSION_PLANTILLA = 1
+PIE = 'Akuna Aberturas - Sistema de Gestión'
+
+
+def _moneda(valor):
+    return f"${valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def _estilo_grilla(encabezado=None, tamano_encabezado=10, relleno=8, extra=()):
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    comandos = [
+        ('BOTTOMPADDING', (0, 0), (-1, -1), relleno),
+        ('TOPPADDING', (0, 0), (-1, -1), relleno),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+    ]
+    if encabezado:
+        comandos = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(encabezado)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), tamano_encabezado),
+            *comandos,
+        ]
+    return TableStyle([*comandos, *extra])
+
+
+@lru_cache(maxsize=1)
+def _plantilla():
+    """Estilos, tablas fijas y pie del PDF de venta, armados una vez por proceso."""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+
+    styles = getSampleStyleSheet()
+    gris = colors.HexColor('#64748b')
+    resumen = [
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#dbeafe')),
+        ('BACKGROUND', (0, 4), (-1, 4), colors.HexColor('#dcfce7')),
+        ('FONTNAME', (0, 4), (-1, 4), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 5), (-1, 5), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 5), (-1, 5), 12),
+    ]
+
+    def pie(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 9)
+        canvas.setFillColor(gris)
+        canvas.drawCentredString(doc.pagesize[0] / 2, 0.3 * inch, PIE)
+        canvas.restoreState()
+
+    return {
+        'titulo': ParagraphStyle(
+            'CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#1e40af'),
+            spaceAfter=6, alignment=TA_CENTER, fontName='Helvetica-Bold',
+        ),
+        'subtitulo': ParagraphStyle(
+            'CustomSubtitle', parent=styles['Normal'], fontSize=11, textColor=gris,
+            spaceAfter=20, alignment=TA_CENTER,
+        ),
+        'seccion': ParagraphStyle(
+            'CustomHeading', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#1e293b'),
+            spaceAfter=12, spaceBefore=20, fontName='Helvetica-Bold',
+        ),
+        'pie': ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=gris, alignment=TA_CENTER),
+        'tabla_info': _estilo_grilla(extra=[
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f1f5f9')),
+            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f1f5f9')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1e293b')),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ]),
+        # La fila del saldo va en amarillo si queda algo por cobrar.
+        'tabla_resumen': {
+            con_saldo: _estilo_grilla('#1e40af', 11, 10, [
+                *resumen, ('BACKGROUND', (0, 5), (-1, 5), colors.HexColor(color)),
+            ])
+            for con_saldo, color in ((True, '#fef3c7'), (False, '#dcfce7'))
+        },
+        'tabla_pagos': _estilo_grilla('#1e40af', extra=[
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (4, 0), (4, -1), 'RIGHT'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+        ]),
+        'columnas_info': [1.2 * inch, 2.5 * inch, 1 * inch, 1.8 * inch],
+        'columnas_resumen': [4 * inch, 2.5 * inch],
+        'columnas_pagos': [1.1 * inch, 1.5 * inch, 1.3 * inch, 1.3 * inch, 1.3 * inch],
+        'pie_pagina': pie,
+    }
+
+
+def filas_venta(venta, pagos):
+    """Lo variable del PDF: las filas de cada tabla, ya formateadas."""
+    total_pagos = sum(pago.monto for pago in pagos)
+    info = [
+        ['Pedido N°:', venta.numero_pedido, 'Fecha:', venta.created_at.strftime('%d/%m/%Y')],
+        ['Cliente:', f"{venta.cliente}", 'Estado:', venta.get_estado_display()],
+    ]
+    if venta.numero_factura:
+        info.append(['Factura:', venta.get_numero_factura_display(), 'Tipo:', 'Blanco' if venta.con_factura else 'Negro'])
+    filas = {
+        'info': info,
+        'resumen': [
+            ['Concepto', 'Monto'],
+            ['Valor Total', _moneda(venta.valor_total)],
+            ['Seña Inicial', _moneda(venta.sena)],
+            ['Pagos Adicionales', _moneda(total_pagos)],
+            ['Total Pagado', _moneda(venta.sena + total_pagos)],
+            ['Saldo Pendiente', _moneda(venta.saldo)],
+        ],
+        'con_saldo': venta.saldo > 0,
+        'pagos': [],
+    }
+    if pagos or venta.sena > 0:
+        filas['pagos'] = [
+            ['Fecha', 'Concepto', 'Forma de Pago', 'N° Factura', 'Monto'],
+            [venta.created_at.strftime('%d/%m/%Y'), 'Seña Inicial', '-', venta.numero_factura or '-', _moneda(venta.sena)],
+            *(
+                [pago.fecha_pago.strftime('%d/%m/%Y'), 'Pago', pago.get_forma_pago_display(),
+                 pago.numero_factura or '-', _moneda(pago.monto)]
+                for pago in pagos
+            ),
+        ]
+    return filas
+
+
+def construir_pdf(filas):
+    """Bytes del PDF a partir de `filas_venta`."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    plantilla = _plantilla()
+    salida = io.BytesIO()
+    doc = SimpleDocTemplate(salida, pagesize=A4, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
+
+    def tabla(datos, estilo, columnas):
+        tabla = Table(datos, colWidths=plantilla[columnas])
+        tabla.setStyle(estilo)
+        return tabla
+
+    elementos = [
+        Paragraph('AKUNA ABERTURAS', plantilla['titulo']),
+        Paragraph('Detalle de Venta', plantilla['subtitulo']),
+        Spacer(1, 0.2 * inch),
+        tabla(filas['info'], plantilla['tabla_info'], 'columnas_info'),
+        Spacer(1, 0.3 * inch),
+        Paragraph('Resumen Financiero', plantilla['seccion']),
+        tabla(filas['resumen'], plantilla['tabla_resumen'][filas['con_saldo']], 'columnas_resumen'),
+        Spacer(1, 0.3 * inch),
+    ]
+    if filas['pagos']:
+        elementos += [
+            Paragraph('Historial de Pagos', plantilla['seccion']),
+            tabla(filas['pagos'], plantilla['tabla_pagos'], 'columnas_pagos'),
+        ]
+    elementos += [
+        Spacer(1, 0.5 * inch),
+        Paragraph(f"Documento generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", plantilla['pie']),
+    ]
+    doc.build(elementos, onFirstPage=plantilla['pie_pagina'], onLaterPages=plantilla['pie_pagina'])
+    return salida.getvalue()
+
+
+def pdf_venta(venta):
+    """PDF de la venta, del cache si ya se armó uno con el mismo contenido."""
+    pagos = list(venta.pagos.order_by('-fecha_pago'))
+    filas = filas_venta(venta, pagos)
+    contenido = json.dumps(filas, sort_keys=True).encode('utf-8')
+    clave = f'comercial:pdf_venta:v{VERSION_PLANTILLA}:{hashlib.sha256(contenido).hexdigest()}'
+    pdf = cache.get(clave)
+    if pdf is None:
+        pdf = construir_pdf(filas)
+        cache.set(clave, pdf, TIMEOUT)
+    return pdf
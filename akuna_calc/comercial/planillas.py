@@ -0,0 +1,85 @@
+"""Lectura de planillas que se pegan o suben en las cargas masivas (pagos, extractos bancarios).
+
+Devuelven filas como listas de valores crudos; cada carga decide qué columnas
+usa. Los montos y fechas aceptan el formato local (`1.234,56`, `dd/mm/aaaa`).
+"""
+import csv
+import io
+import re
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+
+FORMATOS_FECHA = ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d', '%d-%m-%Y')
+_CENTAVOS = Decimal('0.01')
+# `1.500` o `12.345.678`: puntos de miles sin decimales (no `1.50`).
+_MILES_CON_PUNTO = re.compile(r'-?\d{1,3}(\.\d{3})+')
+
+
+def normalizar(texto):
+    """Minúsculas, sin espacios en los bordes ni acentos."""
+    texto = unicodedata.normalize('NFKD', str(texto or '').strip().lower())
+    return ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+
+
+def leer_texto(texto):
+    """Filas pegadas desde una planilla (tabuladas) o CSV con `;` o `,`."""
+    lineas = str(texto or '').splitlines()
+    muestra = '\n'.join(lineas[:5])
+    separador = '\t' if '\t' in muestra else ';' if ';' in muestra else ','
+    return list(csv.reader(lineas, delimiter=separador))
+
+
+def leer_archivo(archivo):
+    """Filas de un archivo subido: XLSX (primera hoja) o CSV."""
+    if archivo.name.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        libro = load_workbook(io.BytesIO(archivo.read()), read_only=True, data_only=True)
+        try:
+            return [list(fila) for fila in libro.worksheets[0].iter_rows(values_only=True)]
+        finally:
+            libro.close()
+    return leer_texto(archivo.read().decode('utf-8-sig', errors='replace'))
+
+
+def fila_vacia(valores):
+    return not any(str(valor if valor is not None else '').strip() for valor in valores)
+
+
+def convertir_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or '').strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def convertir_monto(valor):
+    """Monto en formato local (`-1.234,56`) o con punto decimal (`1234.56`, `1,234.56`); None si no es un número.
+
+    Un punto seguido de exactamente tres dígitos y sin coma (`1.500`) es de
+    miles, como en el formato local. `NaN` e infinito no son montos.
+    """
+    if isinstance(valor, (int, float, Decimal)):
+        texto = str(valor)
+    else:
+        texto = str(valor or '').replace('$', '').replace(' ', '').strip()
+        if ',' in texto and texto.rfind(',') > texto.rfind('.'):
+            texto = texto.replace('.', '').replace(',', '.')
+        elif _MILES_CON_PUNTO.fullmatch(texto):
+            texto = texto.replace('.', '')
+        else:
+            texto = texto.replace(',', '')
+    try:
+        monto = Decimal(texto)
+        return monto.quantize(_CENTAVOS) if monto.is_finite() else None
+    except InvalidOperation:
+        return None
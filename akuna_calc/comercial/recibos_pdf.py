@@ -0,0 +1,149 @@
+"""Regeneración masiva de los PDF de recibos (`regenerar_recibos_pdf` y `regenerar_pdfs_ventas`).
+
+Los pagos se reparten en lotes de ids entre un pool de procesos. Cada proceso
+configura Django una sola vez al arrancar (`_iniciar_proceso`) y abre su propia
+conexión; adentro el logo queda cacheado como data URL y el template compilado
+lo cachea el loader de Django, así que por recibo solo se arma el HTML y se
+corre xhtml2pdf si su hash cambió respecto del guardado en `Recibo.pdf_hash`.
+
+Los recibos que faltan se crean antes, en el proceso principal y en orden de
+fecha, para que la numeración no dependa del reparto entre procesos. `Avance`
+lleva el último pago hasta el que están terminados todos los lotes, que es
+desde donde se retoma (`--desde` o el archivo de `--estado`).
+
+`generar_en_segundo_plano` usa el mismo lote para los recibos de una carga
+masiva de pagos, en un hilo que arranca después del commit.
+"""
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import PagoVenta, Recibo
+
+
+logger = logging.getLogger(__name__)
+
+REGENERADO = 'regenerado'
+SIN_CAMBIOS = 'sin_cambios'
+ERROR = 'error'
+
+
+def _iniciar_proceso(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+
+    django.setup()
+
+
+def pagos_a_procesar(desde=None):
+    pagos = PagoVenta.objects.order_by('pk')
+    if desde:
+        pagos = pagos.filter(pk__gt=desde)
+    return list(pagos.values_list('pk', flat=True))
+
+
+def crear_recibos_faltantes(pago_ids):
+    """Numera en orden de fecha los pagos que todavía no tienen recibo. Devuelve cuántos creó."""
+    pagos = (
+        PagoVenta.objects.filter(pk__in=pago_ids, recibos__isnull=True)
+        .select_related('venta')
+        .order_by('fecha_pago', 'pk')
+    )
+    creados = 0
+    for pago in pagos.iterator(chunk_size=500):
+        Recibo.desde_pago(pago)
+        creados += 1
+    return creados
+
+
+def regenerar_lote(pago_ids, aunque_no_cambie=False):
+    """Regenera los recibos de un lote de pagos: `[(pago_id, numero, estado, error)]`."""
+    resultados = []
+    pagos = (
+        PagoVenta.objects.filter(pk__in=pago_ids)
+        .select_related('venta', 'venta__cliente')
+        .prefetch_related('retenciones')
+        .order_by('pk')
+    )
+    for pago in pagos:
+        try:
+            recibo = Recibo.desde_pago(pago)
+            escrito = recibo.generar_pdf(force=True, aunque_no_cambie=aunque_no_cambie)
+        except Exception as exc:
+            resultados.append((pago.pk, None, ERROR, str(exc)))
+        else:
+            resultados.append((pago.pk, recibo.numero, REGENERADO if escrito else SIN_CAMBIOS, ''))
+    return resultados
+
+
+class Avance:
+    """Último pago hasta el que están terminados todos los lotes, aunque terminen desordenados."""
+
+    def __init__(self, lotes, ultimo=None):
+        self.pendientes = deque(lote[-1] for lote in lotes)
+        self.terminados = set()
+        self.ultimo = ultimo
+
+    def terminar(self, lote):
+        self.terminados.add(lote[-1])
+        while self.pendientes and self.pendientes[0] in self.terminados:
+            self.ultimo = self.pendientes.popleft()
+        return self.ultimo
+
+
+def regenerar(pago_ids, procesos=1, lote=50, aunque_no_cambie=False, al_terminar=None):
+    """Regenera los recibos de `pago_ids` en lotes; llama `al_terminar(lote, resultados)` por cada uno.
+
+    Con un solo proceso corre acá mismo, sin pool.
+    """
+    lotes = [pago_ids[inicio:inicio + lote] for inicio in range(0, len(pago_ids), lote)]
+    al_terminar = al_terminar or (lambda lote, resultados: None)
+    if procesos <= 1:
+        for ids in lotes:
+            al_terminar(ids, regenerar_lote(ids, aunque_no_cambie))
+        return
+
+    # Que los procesos hijos no hereden la conexión abierta del principal.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        initializer=_iniciar_proceso,
+        initargs=(settings.SETTINGS_MODULE,),
+    ) as pool:
+        futuros = {pool.submit(regenerar_lote, ids, aunque_no_cambie): ids for ids in lotes}
+        try:
+            for futuro in as_completed(futuros):
+                al_terminar(futuros[futuro], futuro.result())
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
+def _generar_lote_en_hilo(pago_ids):
+    try:
+        for pago_id, _, resultado, error in regenerar_lote(pago_ids):
+            if resultado == ERROR:
+                logger.warning('No se pudo generar el recibo PDF del pago %s: %s', pago_id, error)
+    except Exception:
+        logger.exception('Falló la generación en segundo plano de %s recibos', len(pago_ids))
+    finally:
+        # El hilo abrió su propia conexión.
+        connections.close_all()
+
+
+def generar_en_segundo_plano(pago_ids):
+    """Genera los PDF de los recibos de esos pagos en un hilo, cuando la transacción actual hace commit.
+
+    Si el proceso se corta antes, los recibos quedan sin PDF hasta la próxima
+    corrida de `regenerar_recibos_pdf`; la descarga del recibo lo arma igual en el momento.
+    """
+    pago_ids = list(pago_ids)
+    if pago_ids:
+        transaction.on_commit(
+            lambda: threading.Thread(target=_generar_lote_en_hilo, args=(pago_ids,), daemon=True).start()
+        )
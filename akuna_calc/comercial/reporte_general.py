@@ -0,0 +1,140 @@
+"""Cifras del reporte general: ingresos (señas y pagos de ventas) y gastos (compras), en blanco y en negro.
+
+`reporte_general_datos(desde, hasta)` resuelve todo con una consulta por tabla
+usando sumas condicionales (`Sum(..., filter=Q(con_factura=True))`), en lugar de
+una consulta por cifra; con `por_mes=True` agrega el mismo desglose agrupado por
+mes (una consulta más por tabla).
+
+El resultado queda en el cache de Django por período. La clave lleva una
+versión que `invalidar` cambia después del commit de cualquier escritura que
+mueva los resúmenes mensuales (`resumenes.Deltas`, `resumenes.reconciliar`),
+así que un cambio descarta todos los períodos a la vez. `TIMEOUT` acota cuánto
+puede durar un valor viejo si el cache no se comparte entre procesos.
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils.dateparse import parse_date
+
+from .models import Compra, PagoVenta, Venta, rango_de_dias
+
+
+CLAVE_VERSION = 'comercial:reporte_general:version'
+TIMEOUT = 300
+
+_CERO = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _sumas(campo):
+    return {
+        'blanco': Coalesce(Sum(campo, filter=Q(con_factura=True)), _CERO),
+        'negro': Coalesce(Sum(campo, filter=Q(con_factura=False)), _CERO),
+        'cantidad': Count('pk'),
+    }
+
+
+def _fecha(valor):
+    if isinstance(valor, date) or not valor:
+        return valor or None
+    return parse_date(str(valor))
+
+
+def _tablas(desde, hasta):
+    """`(queryset, campo sumado, campo de fecha)` de señas, pagos y compras del período."""
+    senas = Venta.alive.filter(sena__gt=0)
+    pagos = PagoVenta.objects.filter(venta__deleted_at__isnull=True)
+    compras = Compra.alive.all()
+    if desde or hasta:
+        senas = senas.filter(rango_de_dias('created_at', desde, hasta))
+    if desde:
+        pagos = pagos.filter(fecha_pago__gte=desde)
+        compras = compras.filter(fecha_pago__gte=desde)
+    if hasta:
+        pagos = pagos.filter(fecha_pago__lte=hasta)
+        compras = compras.filter(fecha_pago__lte=hasta)
+    return (senas, 'sena', 'created_at'), (pagos, 'monto', 'fecha_pago'), (compras, 'valor_total', 'fecha_pago')
+
+
+def _vacio():
+    return {'blanco': Decimal('0'), 'negro': Decimal('0'), 'cantidad': 0}
+
+
+def _armar(senas, pagos, compras):
+    ingresos_blanco = senas['blanco'] + pagos['blanco']
+    ingresos_negro = senas['negro'] + pagos['negro']
+    total_ingresos = ingresos_blanco + ingresos_negro
+    total_gastos = compras['blanco'] + compras['negro']
+    return {
+        'ingresos': {
+            'blanco': ingresos_blanco,
+            'negro': ingresos_negro,
+            'total': total_ingresos,
+            'cantidad': senas['cantidad'] + pagos['cantidad'],
+        },
+        'gastos': {
+            'blanco': compras['blanco'],
+            'negro': compras['negro'],
+            'total': total_gastos,
+            'cantidad': compras['cantidad'],
+        },
+        'balance': {
+            'blanco': ingresos_blanco - compras['blanco'],
+            'negro': ingresos_negro - compras['negro'],
+            'total': total_ingresos - total_gastos,
+        },
+    }
+
+
+def _por_mes(tablas):
+    meses = {}
+    for posicion, (queryset, campo, campo_fecha) in enumerate(tablas):
+        filas = (
+            queryset.order_by()
+            .annotate(mes=TruncMonth(campo_fecha))
+            .values('mes')
+            .annotate(**_sumas(campo))
+            .values_list('mes', 'blanco', 'negro', 'cantidad')
+        )
+        for mes, blanco, negro, cantidad in filas:
+            mes = mes.date() if hasattr(mes, 'date') else mes
+            fila = meses.setdefault(mes, [_vacio(), _vacio(), _vacio()])
+            fila[posicion] = {'blanco': blanco, 'negro': negro, 'cantidad': cantidad}
+    return [{'mes': mes, **_armar(*meses[mes])} for mes in sorted(meses)]
+
+
+def calcular(desde=None, hasta=None, por_mes=False):
+    """Las cifras del período leídas de la base, sin pasar por el cache."""
+    tablas = _tablas(desde, hasta)
+    datos = _armar(*(queryset.aggregate(**_sumas(campo)) for queryset, campo, _ in tablas))
+    if por_mes:
+        datos['meses'] = _por_mes(tablas)
+    return datos
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar():
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex, None)
+
+
+def reporte_general_datos(desde=None, hasta=None, por_mes=False):
+    """Ingresos, gastos y balance del período (fechas o `aaaa-mm-dd`; None es sin límite), con cache."""
+    desde, hasta = _fecha(desde), _fecha(hasta)
+    clave = 'comercial:reporte_general:{}:{}:{}:{}'.format(
+        _version(), desde or '', hasta or '', int(bool(por_mes)),
+    )
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular(desde, hasta, por_mes)
+        cache.set(clave, datos, TIMEOUT)
+    return datos
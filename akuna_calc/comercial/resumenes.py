@@ -0,0 +1,614 @@
+"""Resúmenes mensuales para los tableros (dashboard comercial y home).
+
+`ResumenVentasMes` acumula por mes, cliente y blanco/negro las ventas vivas
+(total, cantidad y pendientes) y lo cobrado: las señas en el mes de la venta y
+los pagos en el de su fecha de pago. `ResumenComprasMes` acumula las compras
+vivas por mes de pago, tipo de cuenta y blanco/negro. Los tableros leen unas
+pocas decenas de filas de acá en lugar de agregar las tablas completas.
+
+`ClienteResumen` es la fila de la ficha de cada cliente: total, saldo y
+cantidad por estado de sus ventas vivas y lo cobrado en pagos. La última compra
+y el total por mes (que no se pueden mover con una suma) se releen del resumen
+mensual del cliente cuando una venta cambia su aporte. El saldo también lo
+mueven los pagos y percepciones, desde `Venta.aplicar_delta_saldo`.
+
+Cada guardado de venta, pago, compra o cuenta resta su aporte anterior y suma
+el nuevo con `UPDATE ... SET campo = campo + delta` en la misma transacción.
+Lo que no pasa por `save()` (bulk_update, update(), borrados físicos) lo
+corrige el comando nocturno `reconciliar_resumenes`, que rehace los acumulados
+con consultas agrupadas (`reconciliar`) y escribe solo las diferencias.
+
+Lo que mueve un resumen también mueve el reporte general: tras el commit se
+invalida su cache (`reporte_general.invalidar`).
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from django.apps import apps as apps_globales
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.utils import timezone
+
+from . import reporte_general
+from .models import ClienteResumen, Compra, Cuenta, PagoVenta, ResumenComprasMes, ResumenVentasMes, Venta
+
+
+_CERO = Decimal('0')
+
+CLAVES_VENTAS = ('mes', 'cliente_id', 'con_factura')
+CAMPOS_VENTAS = ('total_ventas', 'cantidad_ventas', 'cantidad_pendientes', 'total_cobrado', 'cantidad_cobros')
+CLAVES_COMPRAS = ('mes', 'tipo_cuenta_id', 'con_factura')
+CAMPOS_COMPRAS = ('total', 'cantidad')
+CLAVES_CLIENTES = ('cliente_id',)
+CAMPOS_CLIENTES = (
+    'total_comprado', 'total_cobrado', 'saldo_pendiente', 'cantidad_ventas',
+    'ventas_pendientes', 'ventas_entregadas', 'ventas_colocadas', 'ultima_compra', 'ventas_por_mes',
+)
+CAMPO_POR_ESTADO = {'pendiente': 'ventas_pendientes', 'entregado': 'ventas_entregadas', 'colocado': 'ventas_colocadas'}
+
+# Campos cuyo cambio mueve el aporte de cada modelo.
+CAMPOS_VENTA = ('cliente', *Venta.CAMPOS_RESUMEN)
+CAMPOS_PAGO = ('venta', 'venta_id', 'fecha_pago', 'con_factura', 'monto')
+CAMPOS_COMPRA = ('cuenta', 'cuenta_id', 'fecha_pago', 'con_factura', 'valor_total', 'deleted_at')
+
+_ESTADO_PAGO = ('venta_id', 'fecha_pago', 'con_factura', 'monto')
+# Posiciones del estado de la venta que mueven la última compra y las ventas por mes del cliente.
+_CAMPOS_ULTIMA = tuple(Venta.CAMPOS_RESUMEN.index(campo) for campo in ('cliente_id', 'created_at', 'deleted_at'))
+_CAMPOS_SERIE = (*_CAMPOS_ULTIMA, Venta.CAMPOS_RESUMEN.index('valor_total'))
+_ESTADO_COMPRA = ('cuenta_id', 'fecha_pago', 'con_factura', 'valor_total', 'deleted_at')
+
+
+def _modelo(nombre, apps=None):
+    # La migración que arma los resúmenes pasa sus modelos históricos.
+    return (apps or apps_globales).get_model('comercial', nombre)
+
+
+def afecta(update_fields, campos):
+    """Si un save con `update_fields` puede mover el aporte."""
+    return update_fields is None or bool(set(update_fields) & set(campos))
+
+
+def mes_de(valor):
+    """Primer día del mes de una fecha (o de una fecha y hora, en hora local)."""
+    if isinstance(valor, datetime):
+        valor = timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+    return valor.replace(day=1)
+
+
+def _en_memoria(instancia, campos):
+    """Valores de la instancia normalizados como los devuelve la base."""
+    return tuple(
+        instancia._meta.get_field(campo).to_python(getattr(instancia, campo))
+        for campo in campos
+    )
+
+
+class Deltas:
+    """Diferencias por fila del resumen, `{clave: {campo: delta}}`, aplicadas con UPDATE."""
+
+    def __init__(self, modelo, claves, mueve_reporte=True):
+        self.modelo = modelo
+        self.claves = claves
+        self.mueve_reporte = mueve_reporte
+        self.filas = {}
+
+    def sumar(self, signo, clave, **importes):
+        fila = self.filas.setdefault(clave, {})
+        for campo, valor in importes.items():
+            fila[campo] = fila.get(campo, 0) + signo * valor
+
+    def aplicar(self):
+        if self.filas and self.mueve_reporte:
+            # Aunque se compensen dentro del mes (p. ej. otra fecha de pago), el
+            # reporte general filtra por día.
+            transaction.on_commit(reporte_general.invalidar)
+        for clave, importes in self.filas.items():
+            importes = {campo: valor for campo, valor in importes.items() if valor}
+            if not importes:
+                continue
+            filtro = dict(zip(self.claves, clave))
+            if self._actualizar(filtro, importes):
+                continue
+            try:
+                with transaction.atomic():
+                    self.modelo.objects.create(**filtro, **importes)
+            except IntegrityError:
+                # Otra transacción creó la fila entre el UPDATE y el INSERT.
+                self._actualizar(filtro, importes)
+
+    def _actualizar(self, filtro, importes):
+        return self.modelo.objects.filter(**filtro).update(
+            **{campo: F(campo) + valor for campo, valor in importes.items()}
+        )
+
+
+# Ventas y cobranzas ------------------------------------------------------------
+
+def _pagos_agrupados(venta_id):
+    return list(
+        PagoVenta.objects.filter(venta_id=venta_id).order_by()
+        .annotate(mes=TruncMonth('fecha_pago'))
+        .values('mes', 'con_factura')
+        .annotate(total=Sum('monto'), cantidad=Count('pk'))
+        .values_list('mes', 'con_factura', 'total', 'cantidad')
+    )
+
+
+def _aporte_venta(deltas, signo, estado, pagos=()):
+    cliente_id, created_at, con_factura, estado_venta, valor_total, sena, _, deleted_at = estado
+    if deleted_at is not None:
+        return
+    con_sena = sena > 0
+    deltas.sumar(
+        signo, (mes_de(created_at), cliente_id, con_factura),
+        total_ventas=valor_total,
+        cantidad_ventas=1,
+        cantidad_pendientes=int(estado_venta == 'pendiente'),
+        total_cobrado=sena if con_sena else _CERO,
+        cantidad_cobros=int(con_sena),
+    )
+    for mes, con_factura_pago, total, cantidad in pagos:
+        deltas.sumar(signo, (mes_de(mes), cliente_id, con_factura_pago), total_cobrado=total, cantidad_cobros=cantidad)
+
+
+def _aporte_cliente(deltas, signo, estado, movimientos=(_CERO, _CERO)):
+    """Aporte de la venta a la ficha del cliente; `movimientos` es `(percepciones, pagos)` si se mueve entera."""
+    cliente_id, _, _, estado_venta, valor_total, sena, retenciones, deleted_at = estado
+    if deleted_at is not None:
+        return
+    percepciones, pagos = movimientos
+    deltas.sumar(
+        signo, (cliente_id,),
+        total_comprado=valor_total,
+        total_cobrado=pagos,
+        saldo_pendiente=valor_total + percepciones + retenciones - sena - pagos,
+        cantidad_ventas=1,
+        **{CAMPO_POR_ESTADO[estado_venta]: 1},
+    )
+
+
+def _serie(filas):
+    """`[["aaaa-mm", "total"], ...]` de filas `(mes, total)` ordenadas por mes."""
+    return [[mes_de(mes).strftime('%Y-%m'), f'{total:.2f}'] for mes, total in filas]
+
+
+def refrescar_cliente(cliente_id, ultima_compra=None, releer_ultima=False):
+    """Relee el total por mes del cliente del resumen mensual (ya actualizado).
+
+    La última compra avanza a `ultima_compra` si es posterior; con `releer_ultima`
+    (se borró o se movió una venta) se vuelve a buscar entre las ventas vivas.
+    """
+    filas = (
+        ResumenVentasMes.objects.filter(cliente_id=cliente_id).order_by()
+        .values('mes')
+        .annotate(total=Sum('total_ventas'), cantidad=Sum('cantidad_ventas'))
+        .filter(cantidad__gt=0)
+        .order_by('mes')
+        .values_list('mes', 'total')
+    )
+    cambios = {'ventas_por_mes': _serie(filas)}
+    if releer_ultima:
+        cambios['ultima_compra'] = (
+            Venta.alive.filter(cliente_id=cliente_id)
+            .aggregate(ultima=Max('created_at'))['ultima']
+        )
+    elif ultima_compra is not None:
+        cambios['ultima_compra'] = Greatest(Coalesce('ultima_compra', Value(ultima_compra)), Value(ultima_compra))
+    ClienteResumen.objects.filter(cliente_id=cliente_id).update(**cambios)
+
+
+def estado_venta(venta):
+    """Aporte guardado de la venta, a tomar antes de guardarla (None si es nueva).
+
+    Sale de lo que se leyó con la instancia (`Venta.from_db`) o, si se cargó con
+    campos diferidos, de una consulta.
+    """
+    if venta.pk is None:
+        return None
+    guardado = getattr(venta, '_resumen_guardado', None)
+    if guardado is not None:
+        return guardado
+    return Venta._base_manager.filter(pk=venta.pk).values_list(*Venta.CAMPOS_RESUMEN).first()
+
+
+def sincronizar_venta(venta, anterior, update_fields=None):
+    """Mueve el aporte de la venta (y el de sus pagos si cambió de cliente o se borró)."""
+    nuevo = _en_memoria(venta, Venta.CAMPOS_RESUMEN)
+    if anterior is not None and update_fields is not None:
+        # Lo que el save no escribió sigue en la base con el valor anterior.
+        escritos = {venta._meta.get_field(campo).attname for campo in update_fields}
+        nuevo = tuple(
+            valor if campo in escritos else previo
+            for campo, valor, previo in zip(Venta.CAMPOS_RESUMEN, nuevo, anterior)
+        )
+    venta._resumen_guardado = nuevo
+    if anterior == nuevo:
+        return
+    pagos = ()
+    movimientos = (_CERO, _CERO)
+    if anterior is not None and (anterior[0], anterior[-1] is None) != (nuevo[0], nuevo[-1] is None):
+        # Cambió de cliente o se borró / restauró: se mueven también sus pagos y percepciones.
+        pagos = _pagos_agrupados(venta.pk)
+        movimientos = venta._totales_movimientos()
+    deltas = Deltas(ResumenVentasMes, CLAVES_VENTAS)
+    clientes = Deltas(ClienteResumen, CLAVES_CLIENTES, mueve_reporte=False)
+    if anterior is not None:
+        _aporte_venta(deltas, -1, anterior, pagos)
+        _aporte_cliente(clientes, -1, anterior, movimientos)
+    _aporte_venta(deltas, 1, nuevo, pagos)
+    _aporte_cliente(clientes, 1, nuevo, movimientos)
+    deltas.aplicar()
+    clientes.aplicar()
+    if anterior is None:
+        refrescar_cliente(nuevo[0], ultima_compra=nuevo[1] if nuevo[-1] is None else None)
+    elif any(anterior[i] != nuevo[i] for i in _CAMPOS_SERIE):
+        # Cambió el total, la fecha, el cliente o si está viva.
+        releer = any(anterior[i] != nuevo[i] for i in _CAMPOS_ULTIMA)
+        for cliente_id in {anterior[0], nuevo[0]}:
+            refrescar_cliente(cliente_id, releer_ultima=releer)
+
+
+def _aporte_pago(deltas, signo, estado):
+    cliente_id, venta_borrada, fecha_pago, con_factura, monto = estado
+    if venta_borrada is None:
+        deltas.sumar(signo, (mes_de(fecha_pago), cliente_id, con_factura), total_cobrado=monto, cantidad_cobros=1)
+
+
+def _cobro_cliente(deltas, signo, estado):
+    # El saldo lo mueve `Venta.aplicar_delta_saldo`, acá solo lo cobrado.
+    cliente_id, venta_borrada, _, _, monto = estado
+    if venta_borrada is None:
+        deltas.sumar(signo, (cliente_id,), total_cobrado=monto)
+
+
+def estado_pago(pago_id):
+    """(venta_id, cliente_id, venta.deleted_at, fecha_pago, con_factura, monto) guardados."""
+    if pago_id is None:
+        return None
+    return (
+        PagoVenta._base_manager.filter(pk=pago_id)
+        .values_list('venta_id', 'venta__cliente_id', 'venta__deleted_at', 'fecha_pago', 'con_factura', 'monto')
+        .first()
+    )
+
+
+def sincronizar_pago(pago, anterior, borrado=False):
+    nuevo = None
+    if not borrado:
+        venta_id, fecha_pago, con_factura, monto = _en_memoria(pago, _ESTADO_PAGO)
+        if anterior is not None and (anterior[0], *anterior[3:]) == (venta_id, fecha_pago, con_factura, monto):
+            return
+        venta = pago._state.fields_cache.get('venta')
+        if venta is not None and venta.pk == venta_id:
+            cliente_id, deleted_at = venta.cliente_id, venta.deleted_at
+        else:
+            cliente_id, deleted_at = (
+                Venta._base_manager.filter(pk=venta_id).values_list('cliente_id', 'deleted_at').get()
+            )
+        nuevo = (cliente_id, deleted_at, fecha_pago, con_factura, monto)
+    deltas = Deltas(ResumenVentasMes, CLAVES_VENTAS)
+    clientes = Deltas(ClienteResumen, CLAVES_CLIENTES, mueve_reporte=False)
+    if anterior is not None:
+        _aporte_pago(deltas, -1, anterior[1:])
+        _cobro_cliente(clientes, -1, anterior[1:])
+    if nuevo is not None:
+        _aporte_pago(deltas, 1, nuevo)
+        _cobro_cliente(clientes, 1, nuevo)
+    deltas.aplicar()
+    clientes.aplicar()
+
+
+# Compras -----------------------------------------------------------------------
+
+def _tipo_cuenta_id(cuenta_id, cuenta=None):
+    if cuenta is not None and cuenta.pk == cuenta_id:
+        return cuenta.tipo_cuenta_id
+    return Cuenta._base_manager.filter(pk=cuenta_id).values_list('tipo_cuenta_id', flat=True).get()
+
+
+def _aporte_compra(deltas, signo, tipo_cuenta_id, estado):
+    _, fecha_pago, con_factura, valor_total, deleted_at = estado
+    if deleted_at is None:
+        deltas.sumar(signo, (mes_de(fecha_pago), tipo_cuenta_id, con_factura), total=valor_total, cantidad=1)
+
+
+def estado_compra(compra_id):
+    """(tipo de cuenta, cuenta_id, fecha_pago, con_factura, valor_total, deleted_at) guardados."""
+    if compra_id is None:
+        return None
+    return (
+        Compra._base_manager.filter(pk=compra_id)
+        .values_list('cuenta__tipo_cuenta_id', *_ESTADO_COMPRA)
+        .first()
+    )
+
+
+def sincronizar_compra(compra, anterior):
+    nuevo = _en_memoria(compra, _ESTADO_COMPRA)
+    if anterior is not None and anterior[1:] == nuevo:
+        return
+    deltas = Deltas(ResumenComprasMes, CLAVES_COMPRAS)
+    if anterior is not None:
+        _aporte_compra(deltas, -1, anterior[0], anterior[1:])
+    if nuevo[-1] is None:
+        _aporte_compra(deltas, 1, _tipo_cuenta_id(compra.cuenta_id, compra._state.fields_cache.get('cuenta')), nuevo)
+    deltas.aplicar()
+
+
+def estado_cuenta(cuenta_id):
+    """Tipo de cuenta guardado (None si la cuenta es nueva)."""
+    if cuenta_id is None:
+        return None
+    return Cuenta._base_manager.filter(pk=cuenta_id).values_list('tipo_cuenta_id', flat=True).first()
+
+
+def sincronizar_cuenta(cuenta, anterior_tipo_id):
+    """Si la cuenta cambió de tipo, pasa sus compras vivas de un tipo al otro."""
+    if anterior_tipo_id is None or anterior_tipo_id == cuenta.tipo_cuenta_id:
+        return
+    compras = (
+        Compra.alive.filter(cuenta_id=cuenta.pk).order_by()
+        .annotate(mes=TruncMonth('fecha_pago'))
+        .values('mes', 'con_factura')
+        .annotate(total=Sum('valor_total'), cantidad=Count('pk'))
+        .values_list('mes', 'con_factura', 'total', 'cantidad')
+    )
+    deltas = Deltas(ResumenComprasMes, CLAVES_COMPRAS)
+    for mes, con_factura, total, cantidad in compras:
+        deltas.sumar(-1, (mes_de(mes), anterior_tipo_id, con_factura), total=total, cantidad=cantidad)
+        deltas.sumar(1, (mes_de(mes), cuenta.tipo_cuenta_id, con_factura), total=total, cantidad=cantidad)
+    deltas.aplicar()
+
+
+# Reconciliación ----------------------------------------------------------------
+
+# Valor de un campo sin aporte, para los que no son sumas.
+_VACIOS = {'ultima_compra': None, 'ventas_por_mes': []}
+
+
+def _acumular(esperado, clave, **importes):
+    fila = esperado.setdefault(clave, {})
+    for campo, valor in importes.items():
+        fila[campo] = fila.get(campo, 0) + (valor or 0)
+
+
+def calcular_ventas(apps=None, ids=None):
+    """Resumen de ventas rehecho desde las tablas: `{(mes, cliente_id, con_factura): {campo: valor}}`.
+
+    Con `ids`, solo el de esos clientes.
+    """
+    Venta = _modelo('Venta', apps)
+    PagoVenta = _modelo('PagoVenta', apps)
+    con_sena = Q(sena__gt=0)
+    vivas = Venta.objects.filter(deleted_at__isnull=True)
+    pagos = PagoVenta.objects.filter(venta__deleted_at__isnull=True)
+    if ids is not None:
+        vivas = vivas.filter(cliente_id__in=ids)
+        pagos = pagos.filter(venta__cliente_id__in=ids)
+    ventas = (
+        vivas.order_by()
+        .annotate(mes=TruncMonth('created_at'))
+        .values('mes', 'cliente_id', 'con_factura')
+        .annotate(
+            total=Sum('valor_total'),
+            cantidad=Count('pk'),
+            pendientes=Count('pk', filter=Q(estado='pendiente')),
+            cobrado=Sum('sena', filter=con_sena),
+            cobros=Count('pk', filter=con_sena),
+        )
+        .values_list('mes', 'cliente_id', 'con_factura', 'total', 'cantidad', 'pendientes', 'cobrado', 'cobros')
+    )
+    pagos = (
+        pagos.order_by()
+        .annotate(mes=TruncMonth('fecha_pago'))
+        .values('mes', 'venta__cliente_id', 'con_factura')
+        .annotate(total=Sum('monto'), cantidad=Count('pk'))
+        .values_list('mes', 'venta__cliente_id', 'con_factura', 'total', 'cantidad')
+    )
+    esperado = {}
+    for mes, cliente_id, con_factura, total, cantidad, pendientes, cobrado, cobros in ventas:
+        _acumular(
+            esperado, (mes_de(mes), cliente_id, con_factura),
+            total_ventas=total, cantidad_ventas=cantidad, cantidad_pendientes=pendientes,
+            total_cobrado=cobrado, cantidad_cobros=cobros,
+        )
+    for mes, cliente_id, con_factura, total, cantidad in pagos:
+        _acumular(esperado, (mes_de(mes), cliente_id, con_factura), total_cobrado=total, cantidad_cobros=cantidad)
+    return esperado
+
+
+def calcular_compras(apps=None, ids=None):
+    """Resumen de compras rehecho desde las tablas: `{(mes, tipo_cuenta_id, con_factura): {campo: valor}}`.
+
+    Con `ids`, solo el de esos tipos de cuenta.
+    """
+    compras = _modelo('Compra', apps).objects.filter(deleted_at__isnull=True)
+    if ids is not None:
+        compras = compras.filter(cuenta__tipo_cuenta_id__in=ids)
+    compras = (
+        compras.order_by()
+        .annotate(mes=TruncMonth('fecha_pago'))
+        .values('mes', 'cuenta__tipo_cuenta_id', 'con_factura')
+        .annotate(total=Sum('valor_total'), cantidad=Count('pk'))
+        .values_list('mes', 'cuenta__tipo_cuenta_id', 'con_factura', 'total', 'cantidad')
+    )
+    esperado = {}
+    for mes, tipo_cuenta_id, con_factura, total, cantidad in compras:
+        _acumular(esperado, (mes_de(mes), tipo_cuenta_id, con_factura), total=total, cantidad=cantidad)
+    return esperado
+
+
+def calcular_clientes(apps=None, ids=None):
+    """Fichas de clientes rehechas desde las tablas: `{(cliente_id,): {campo: valor}}`.
+
+    Con `ids`, solo las de esos clientes.
+    """
+    Venta = _modelo('Venta', apps)
+    vivas = Venta.objects.filter(deleted_at__isnull=True).order_by()
+    pagos = _modelo('PagoVenta', apps).objects.filter(venta__deleted_at__isnull=True)
+    if ids is not None:
+        vivas = vivas.filter(cliente_id__in=ids)
+        pagos = pagos.filter(venta__cliente_id__in=ids)
+    ventas = (
+        vivas.values('cliente_id')
+        .annotate(
+            total=Sum('valor_total'),
+            saldo=Sum('saldo'),
+            cantidad=Count('pk'),
+            ultima=Max('created_at'),
+            **{campo: Count('pk', filter=Q(estado=estado)) for estado, campo in CAMPO_POR_ESTADO.items()},
+        )
+        .values_list('cliente_id', 'total', 'saldo', 'cantidad', 'ultima', *CAMPO_POR_ESTADO.values())
+    )
+    pagos = (
+        pagos.order_by()
+        .values('venta__cliente_id')
+        .annotate(total=Sum('monto'))
+        .values_list('venta__cliente_id', 'total')
+    )
+    meses = (
+        vivas.annotate(mes=TruncMonth('created_at'))
+        .values('cliente_id', 'mes')
+        .annotate(total=Sum('valor_total'))
+        .order_by('cliente_id', 'mes')
+        .values_list('cliente_id', 'mes', 'total')
+    )
+    esperado = {}
+    for cliente_id, total, saldo, cantidad, ultima, *por_estado in ventas:
+        _acumular(
+            esperado, (cliente_id,),
+            total_comprado=total, saldo_pendiente=saldo, cantidad_ventas=cantidad,
+            **dict(zip(CAMPO_POR_ESTADO.values(), por_estado)),
+        )
+        esperado[(cliente_id,)]['ultima_compra'] = ultima
+    for cliente_id, total in pagos:
+        _acumular(esperado, (cliente_id,), total_cobrado=total)
+    series = {}
+    for cliente_id, mes, total in meses:
+        series.setdefault(cliente_id, []).append((mes, total))
+    for cliente_id, filas in series.items():
+        esperado[(cliente_id,)]['ventas_por_mes'] = _serie(filas)
+    return esperado
+
+
+def _conciliar(modelo, claves, campos, calcular, verificar, apps, dueno=None, ids=None):
+    """Compara las filas guardadas con las que arma `calcular` y, salvo `verificar`, corrige las diferencias.
+
+    Con `ids` se limita a las filas cuya clave `dueno` está en `ids`.
+
+    Devuelve `(nuevas, corregidas, sobrantes, vacias)`: filas que faltaban, con
+    valores distintos, sin respaldo en las tablas y en cero (estas últimas no son
+    un desfasaje, quedan de deltas que se compensaron).
+    """
+    # Las filas guardadas se bloquean antes de calcular, así un delta concurrente
+    # espera en lugar de perderse entre la lectura y la escritura.
+    guardadas = modelo.objects.select_for_update()
+    if ids is not None:
+        guardadas = guardadas.filter(**{f'{dueno}__in': ids})
+    guardadas = list(guardadas.values_list('pk', *claves, *campos))
+    esperado = calcular(apps, ids)
+    corregir, borrar = [], []
+    vacias = 0
+    for pk, *fila in guardadas:
+        clave, valores = tuple(fila[:len(claves)]), fila[len(claves):]
+        calculado = esperado.pop(clave, None)
+        if calculado is None:
+            borrar.append(pk)
+            vacias += not any(valores)
+            continue
+        calculado = [calculado.get(campo, _VACIOS.get(campo, 0)) for campo in campos]
+        if valores != calculado:
+            corregir.append(modelo(pk=pk, **dict(zip(campos, calculado))))
+    nuevas = [
+        modelo(**dict(zip(claves, clave)), **{campo: valores.get(campo, _VACIOS.get(campo, 0)) for campo in campos})
+        for clave, valores in esperado.items()
+    ]
+    if not verificar:
+        modelo.objects.filter(pk__in=borrar).delete()
+        modelo.objects.bulk_update(corregir, campos, batch_size=500)
+        modelo.objects.bulk_create(nuevas, batch_size=500)
+    return len(nuevas), len(corregir), len(borrar) - vacias, vacias
+
+
+# (modelo, claves, campos, cálculo, clave por la que se piden `ids`)
+RESUMENES = {
+    'ventas': ('ResumenVentasMes', CLAVES_VENTAS, CAMPOS_VENTAS, calcular_ventas, 'cliente_id'),
+    'compras': ('ResumenComprasMes', CLAVES_COMPRAS, CAMPOS_COMPRAS, calcular_compras, 'tipo_cuenta_id'),
+    'clientes': ('ClienteResumen', CLAVES_CLIENTES, CAMPOS_CLIENTES, calcular_clientes, 'cliente_id'),
+}
+
+
+def reconciliar(verificar=False, apps=None, resumenes=tuple(RESUMENES), ids=None):
+    """Rehace los resúmenes pedidos; devuelve `{'ventas': (...), 'compras': (...), 'clientes': (...)}` con lo que difería.
+
+    Con `ids` rehace solo las filas de esos clientes (ventas y fichas) o tipos de
+    cuenta (compras), p. ej. después de fusionar dos registros.
+    """
+    with transaction.atomic():
+        if not verificar:
+            transaction.on_commit(reporte_general.invalidar)
+        resultado = {}
+        for nombre in resumenes:
+            modelo, claves, campos, calcular, dueno = RESUMENES[nombre]
+            resultado[nombre] = _conciliar(
+                _modelo(modelo, apps), claves, campos, calcular, verificar, apps, dueno, ids,
+            )
+        return resultado
+
+
+# Lecturas de los tableros ------------------------------------------------------
+
+def totales():
+    """Totales históricos de las tarjetas, en dos agregados sobre los resúmenes."""
+    ventas = ResumenVentasMes.objects.aggregate(
+        total=Sum('total_ventas'), pendientes=Sum('cantidad_pendientes'),
+    )
+    compras = ResumenComprasMes.objects.aggregate(total=Sum('total'))
+    return {
+        'total_ventas': ventas['total'] or _CERO,
+        'total_compras': compras['total'] or _CERO,
+        'ventas_pendientes': ventas['pendientes'] or 0,
+    }
+
+
+def _por_mes(modelo, campo_total, campo_cantidad, desde):
+    return list(
+        modelo.objects.filter(mes__gte=desde).order_by()
+        .values('mes')
+        .annotate(total=Sum(campo_total), cantidad=Sum(campo_cantidad))
+        .filter(cantidad__gt=0)
+        .order_by('mes')
+        .values('mes', 'total')
+    )
+
+
+def ventas_por_mes(desde):
+    return _por_mes(ResumenVentasMes, 'total_ventas', 'cantidad_ventas', desde)
+
+
+def compras_por_mes(desde):
+    return _por_mes(ResumenComprasMes, 'total', 'cantidad', desde)
+
+
+def top_clientes(cantidad=5):
+    return list(
+        ResumenVentasMes.objects.order_by()
+        .values('cliente__nombre', 'cliente__apellido')
+        .annotate(total=Sum('total_ventas'), ventas=Sum('cantidad_ventas'))
+        .filter(ventas__gt=0)
+        .order_by('-total')
+        .values('cliente__nombre', 'cliente__apellido', 'total')[:cantidad]
+    )
+
+
+def compras_por_tipo():
+    """[(tipo, total)] de mayor a menor, con el código de `TipoCuenta.tipo`."""
+    return list(
+        ResumenComprasMes.objects.order_by()
+        .values('tipo_cuenta__tipo')
+        .annotate(suma=Sum('total'), compras=Sum('cantidad'))
+        .filter(compras__gt=0)
+        .order_by('-suma')
+        .values_list('tipo_cuenta__tipo', 'suma')
+    )
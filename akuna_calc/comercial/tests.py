@@ -22,7 +22,7 @@ from decimal import Decimal
 from datetime import datetime, date, timezone as dt_timezone
 import json
 from unittest.mock import patch
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
 from core.navigation import RETURN_TO_PARAM, append_return_to
@@ -1453,6 +1453,25 @@ class ReporteVentasPorFechaPedidoTest(TestCase):
 
         self.assertEqual(ventas['lista'][0]['fecha'], date(2026, 8, 7))
 
+    def test_rango_de_dias_equivale_al_filtro_por_fecha_local(self):
+        from .models import rango_de_dias
+
+        # Buenos Aires es UTC-3: 02:59 UTC del 1/9 todavía es 31/8 local.
+        for pedido, creada in (('VTA-31', (2026, 9, 1, 2, 59)), ('VTA-01', (2026, 9, 1, 3, 0)), ('VTA-JUL', (2026, 8, 1, 2, 0))):
+            venta = self._venta(pedido, creada[:3])
+            Venta.objects.filter(pk=venta.pk).update(created_at=datetime(*creada, tzinfo=dt_timezone.utc))
+
+        for desde, hasta in (('2026-08-01', '2026-08-31'), (date(2026, 9, 1), None), (None, '2026-07-31'), ('2026-08-01', 'no-es-fecha')):
+            filtro_date = {}
+            if desde:
+                filtro_date['created_at__date__gte'] = desde
+            if hasta and hasta != 'no-es-fecha':
+                filtro_date['created_at__date__lte'] = hasta
+            self.assertEqual(
+                set(Venta.objects.filter(rango_de_dias('created_at', desde, hasta)).values_list('numero_pedido', flat=True)),
+                set(Venta.objects.filter(**filtro_date).values_list('numero_pedido', flat=True)),
+            )
+
 
 class ReporteCobranzasTest(TestCase):
     def setUp(self):
@@ -1721,6 +1740,181 @@ class ReporteCobranzasTest(TestCase):
         self.assertEqual(reporte_cobranzas['lista'][0]['pedido'], 'VTA-ORDER-HIGH')
         self.assertEqual(reporte_cobranzas['lista'][0]['monto'], Decimal('250'))
 
+    def _cargar_pagos(self, cantidad):
+        venta = Venta.objects.create(
+            numero_pedido='VTA-PAGINADA',
+            cliente=self.cliente,
+            valor_total=Decimal('100000'),
+            sena=Decimal('10'),
+            forma_pago='efectivo',
+        )
+        PagoVenta.objects.bulk_create([
+            PagoVenta(
+                venta=venta,
+                monto=Decimal(indice + 1),
+                fecha_pago=date(2026, 3, 1 + indice % 28),
+                forma_pago='transferencia',
+                con_factura=indice % 2 == 0,
+                created_by=self.user,
+            )
+            for indice in range(cantidad)
+        ])
+
+    def test_reporte_cobranzas_pagina_en_la_base_con_totales_de_todo_el_filtro(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from comercial.views import COBRANZAS_POR_PAGINA
+
+        self._cargar_pagos(COBRANZAS_POR_PAGINA + 10)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client_http.post(reverse('comercial:reportes_cobranzas'), {
+                'orden': 'monto_asc',
+                'pagina': '2',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        reporte_cobranzas = response.context['reporte_data']['cobranzas']
+        self.assertEqual(reporte_cobranzas['cantidad'], COBRANZAS_POR_PAGINA + 11)
+        self.assertEqual(reporte_cobranzas['cantidad_senas'], 1)
+        self.assertEqual(reporte_cobranzas['total'], Decimal('10') + sum(Decimal(n) for n in range(1, COBRANZAS_POR_PAGINA + 11)))
+        self.assertEqual(reporte_cobranzas['page_obj'].number, 2)
+        self.assertEqual(len(reporte_cobranzas['lista']), 11)
+        self.assertEqual(reporte_cobranzas['lista'][0]['monto'], Decimal(COBRANZAS_POR_PAGINA))
+        sql_union = [q['sql'] for q in consultas.captured_queries if 'UNION ALL' in q['sql']]
+        # Un agregado para los totales y la página: sin COUNT aparte del paginador.
+        self.assertEqual(len(sql_union), 2)
+        self.assertTrue(any('LIMIT' in sql for sql in sql_union))
+
+    def test_exportar_reporte_cobranzas_excel_usa_los_filtros_del_reporte(self):
+        from io import BytesIO
+
+        from openpyxl import load_workbook
+
+        self._cargar_pagos(5)
+        self.client_http.post(reverse('comercial:reportes_cobranzas'), {
+            'tipo_factura': ['blanco'],
+            'orden': 'monto_desc',
+        })
+
+        response = self.client_http.get(reverse('comercial:exportar_reporte_cobranzas_excel'))
+
+        self.assertEqual(response.status_code, 200)
+        hoja = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        filas = [fila for fila in hoja.iter_rows(min_row=9, values_only=True) if fila[0]]
+        self.assertEqual([fila[7] for fila in filas], [10, 5, 3, 1])
+        self.assertEqual({fila[8] for fila in filas}, {'Blanco'})
+        self.assertEqual(hoja['B5'].value, 19)
+
+
+class ExportacionesExcelTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='exportes', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='exportes', password='testpass')
+        self.cliente = Cliente.objects.create(
+            nombre='Eva', apellido='Excel', razon_social='Excel SA', direccion='Dir 1', localidad='CABA',
+        )
+
+    def _hoja(self, response):
+        from io import BytesIO
+
+        from openpyxl import load_workbook
+
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        return load_workbook(BytesIO(b''.join(response.streaming_content))).active
+
+    def test_libro_usa_estilos_con_nombre_y_columnas_declaradas(self):
+        from comercial.excel import Columna, LibroExcel
+
+        libro = LibroExcel()
+        hoja = libro.hoja('Prueba', [
+            Columna('Texto', 'texto', 20),
+            Columna('Importe', lambda fila: fila['importe'] * 2, 12, 'moneda'),
+        ])
+        hoja.encabezados()
+        escritas = hoja.filas({'texto': f'fila {n}', 'importe': Decimal(n)} for n in range(3))
+
+        hoja = self._hoja(libro.respuesta('prueba.xlsx'))
+        self.assertEqual(escritas, 3)
+        self.assertEqual(hoja.column_dimensions['A'].width, 20)
+        self.assertEqual([celda.value for celda in hoja[1]], ['Texto', 'Importe'])
+        self.assertEqual(hoja['B1'].style, 'encabezado_366092')
+        self.assertEqual([hoja.cell(fila, 2).value for fila in (2, 3, 4)], [0, 2, 4])
+        self.assertEqual({hoja.cell(fila, 2).style for fila in (2, 3, 4)}, {'moneda'})
+        self.assertEqual(hoja['B3'].number_format, '$#,##0.00')
+
+    def test_exportar_ventas_excel_escribe_filas_y_totales_sin_consultas_por_venta(self):
+        for indice in range(5):
+            Venta.objects.create(
+                numero_pedido=f'EXP-{indice}',
+                cliente=self.cliente,
+                valor_total=Decimal('1000'),
+                sena=Decimal('100'),
+                con_factura=indice % 2 == 0,
+            )
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as consultas:
+            hoja = self._hoja(self.client_http.get(reverse('comercial:exportar_ventas_excel')))
+
+        # Un agregado para los totales y una lectura de las filas (con la factura electrónica en el JOIN).
+        sql_ventas = [q['sql'] for q in consultas.captured_queries if 'FROM "comercial_venta"' in q['sql']]
+        self.assertEqual(len(sql_ventas), 2)
+        self.assertFalse(any(q['sql'].startswith('SELECT') and 'FROM "facturacion_factura"' in q['sql'] for q in consultas.captured_queries))
+
+        self.assertEqual(hoja['A1'].value, 'N° Pedido')
+        self.assertEqual(hoja['D1'].value, 'Razón Social')
+        self.assertEqual(sorted(hoja.cell(fila, 1).value for fila in range(2, 7)), [f'EXP-{n}' for n in range(5)])
+        self.assertEqual([hoja.cell(7, col).value for col in (1, 5, 6, 7)], ['TOTALES', 5000, 500, 4500])
+        self.assertEqual(hoja['E7'].style, 'numero_total')
+
+    def test_exportar_reporte_gastos_excel_totaliza_en_la_base(self):
+        tipo = TipoCuenta.objects.create(tipo='varios', descripcion='Varios')
+        cuenta = Cuenta.objects.create(nombre='Luz', tipo_cuenta=tipo)
+        for monto, con_factura in ((Decimal('300'), True), (Decimal('200'), False)):
+            Compra.objects.create(
+                numero_pedido=f'G-{monto}', cuenta=cuenta, fecha_pago='2026-05-01',
+                valor_total=monto, sena=Decimal('0'), con_factura=con_factura, created_by=self.user,
+            )
+
+        hoja = self._hoja(self.client_http.get(reverse('comercial:exportar_reporte_gastos_excel')))
+
+        self.assertEqual([hoja['B3'].value, hoja['B4'].value, hoja['B5'].value], [300, 200, 500])
+        self.assertEqual([celda.value for celda in hoja[7]][:3], ['Fecha Pago', 'N° Pedido', 'N° Factura'])
+        self.assertEqual({hoja['F8'].value, hoja['F9'].value}, {300, 200})
+
+    def test_exportar_reporte_general_excel_usa_el_periodo_de_la_sesion(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        venta = Venta.objects.create(numero_pedido='RG-1', cliente=self.cliente, valor_total=Decimal('5000'))
+        for monto, con_factura in ((800, True), (200, False)):
+            PagoVenta.objects.create(
+                venta=venta, monto=Decimal(monto), fecha_pago=date(2026, 5, 1), forma_pago='efectivo',
+                con_factura=con_factura, created_by=self.user,
+            )
+        cuenta = Cuenta.objects.create(nombre='Fletes', tipo_cuenta=TipoCuenta.objects.create(tipo='fletes', descripcion='Fletes'))
+        for monto, con_factura, fecha in ((300, True, date(2026, 5, 2)), (100, False, date(2026, 5, 3)), (999, True, date(2025, 12, 1))):
+            Compra.objects.create(
+                numero_pedido=f'G-{monto}', cuenta=cuenta, fecha_pago=fecha,
+                valor_total=Decimal(monto), con_factura=con_factura, created_by=self.user,
+            )
+        sesion = self.client_http.session
+        sesion['reporte_general_data'] = {'fecha_desde': '2026-01-01', 'fecha_hasta': None}
+        sesion.save()
+
+        hoja = self._hoja(self.client_http.get(reverse('comercial:exportar_reporte_general_excel')))
+
+        self.assertEqual(hoja['A3'].value, 'Período: 2026-01-01 - Hoy')
+        self.assertEqual([celda.value for celda in hoja[6]], ['INGRESOS', 800, 200, 1000, '100%'])
+        self.assertEqual([celda.value for celda in hoja[7]], ['GASTOS', 300, 100, 400, '40.0%'])
+        self.assertEqual(hoja['A8'].value, 'BALANCE')
+        self.assertEqual(hoja['D8'].style, 'general_balance_importe')
+
 
 class ReportesGastosTest(TestCase):
     def setUp(self):
@@ -1746,3 +1940,1495 @@ class ReportesGastosTest(TestCase):
         self.assertIsNone(response.context['reporte_data'])
         self.assertContains(response, 'Usá los filtros para generar el reporte')
         self.assertNotContains(response, 'COMP-GET-001')
+
+
+class SaldoVentaIncrementalTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='saldos', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='saldos', password='testpass')
+        self.cliente = Cliente.objects.create(nombre='Saldo', apellido='Cliente', direccion='Dir 1', localidad='CABA')
+        self.venta = Venta.objects.create(
+            numero_pedido='SALDO-001', cliente=self.cliente,
+            valor_total=Decimal('1000'), sena=Decimal('100'), monto_retenciones=Decimal('50'),
+        )
+
+    def _pago(self, monto, venta=None):
+        return PagoVenta.objects.create(
+            venta=venta or self.venta, monto=Decimal(monto), fecha_pago='2026-04-01',
+            forma_pago='efectivo', created_by=self.user,
+        )
+
+    def _saldo(self, venta=None):
+        return Venta.objects.values_list('saldo', flat=True).get(pk=(venta or self.venta).pk)
+
+    def test_pagos_y_percepciones_aplican_delta(self):
+        from .models import Percepcion
+
+        self.assertEqual(self._saldo(), Decimal('950'))
+        pago = self._pago('300')
+        self.assertEqual(self._saldo(), Decimal('650'))
+        self.assertEqual(pago.venta.saldo, Decimal('650'))
+
+        percepcion = Percepcion.objects.create(venta=self.venta, tipo='iva', importe=Decimal('20'))
+        self.assertEqual(self._saldo(), Decimal('670'))
+
+        pago = PagoVenta.objects.get(pk=pago.pk)
+        pago.monto = Decimal('400')
+        pago.save()
+        self.assertEqual(self._saldo(), Decimal('570'))
+
+        percepcion.delete()
+        pago.delete()
+        self.assertEqual(self._saldo(), Decimal('950'))
+
+    def test_mover_pago_de_venta_ajusta_ambos_saldos(self):
+        otra = Venta.objects.create(numero_pedido='SALDO-002', cliente=self.cliente, valor_total=Decimal('500'))
+        pago = self._pago('200')
+        pago = PagoVenta.objects.get(pk=pago.pk)
+        pago.venta = otra
+        pago.save()
+        self.assertEqual(self._saldo(), Decimal('950'))
+        self.assertEqual(self._saldo(otra), Decimal('300'))
+
+    def test_save_de_venta_no_pisa_el_saldo_ajustado_por_pagos(self):
+        venta = Venta.objects.get(pk=self.venta.pk)
+        self._pago('300')
+        venta.estado = 'entregado'
+        venta.save()
+        self.assertEqual(self._saldo(), Decimal('650'))
+
+        venta.valor_total = Decimal('2000')
+        # totales de pagos/percepciones + UPDATE + deltas del resumen mensual y de la ficha del cliente
+        # + ventas por mes de la ficha (entre SAVEPOINT y RELEASE)
+        with self.assertNumQueries(8):
+            venta.save(update_fields=['valor_total'])
+        self.assertEqual(self._saldo(), Decimal('1650'))
+
+        with self.assertNumQueries(3):
+            venta.save(update_fields=['estado'])
+
+    def test_eliminar_pago_desde_la_vista_devuelve_el_saldo(self):
+        pago = self._pago('300')
+        response = self.client_http.post(reverse('comercial:eliminar_pago', args=[pago.pk]))
+        self.assertEqual(response.json(), {'success': True, 'saldo': 950.0})
+        self.assertEqual(self._saldo(), Decimal('950'))
+
+    def test_recalcular_saldos_corrige_y_verifica(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        self._pago('300')
+        Venta.objects.filter(pk=self.venta.pk).update(saldo=Decimal('1'))
+
+        salida = StringIO()
+        call_command('recalcular_saldos', '--verificar', stdout=salida)
+        self.assertIn('1 con saldo desfasado', salida.getvalue())
+        self.assertEqual(self._saldo(), Decimal('1'))
+
+        call_command('recalcular_saldos', stdout=StringIO())
+        self.assertEqual(self._saldo(), Decimal('650'))
+
+        salida = StringIO()
+        call_command('recalcular_saldos', '--dry-run', stdout=salida)
+        self.assertIn('0 con saldo desfasado', salida.getvalue())
+
+    def test_recalcular_saldos_corrige_el_saldo_pendiente_del_cliente(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from . import resumenes
+        from .models import ClienteResumen
+
+        otro = Cliente.objects.create(nombre='Otro', apellido='Cliente', direccion='Dir 2', localidad='CABA')
+        Venta.objects.create(numero_pedido='SALDO-002', cliente=otro, valor_total=Decimal('400'))
+        self._pago('300')
+        Venta.objects.filter(pk=self.venta.pk).update(saldo=Decimal('1'))
+        ClienteResumen.objects.filter(cliente=self.cliente).update(saldo_pendiente=Decimal('1'))
+
+        call_command('recalcular_saldos', '--dry-run', stdout=StringIO())
+        self.assertEqual(ClienteResumen.objects.get(cliente=self.cliente).saldo_pendiente, Decimal('1'))
+
+        with patch('comercial.resumenes.reconciliar', wraps=resumenes.reconciliar) as reconciliar:
+            call_command('recalcular_saldos', stdout=StringIO())
+        reconciliar.assert_called_once_with(resumenes=('clientes',), ids={self.cliente.pk})
+        self.assertEqual(ClienteResumen.objects.get(cliente=self.cliente).saldo_pendiente, Decimal('650'))
+        self.assertEqual(ClienteResumen.objects.get(cliente=otro).saldo_pendiente, Decimal('400'))
+
+    def test_recalcular_saldos_por_lotes_escribe_solo_las_desfasadas(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import Percepcion
+
+        ventas = [
+            Venta.objects.create(numero_pedido=f'LOTE-{n}', cliente=self.cliente, valor_total=Decimal('100'))
+            for n in range(5)
+        ]
+        self._pago('30', ventas[1])
+        Percepcion.objects.create(venta=ventas[2], tipo='iva', importe=Decimal('10'))
+        Venta.objects.filter(pk__in=[ventas[1].pk, ventas[2].pk]).update(saldo=Decimal('0'))
+
+        salida = StringIO()
+        with patch.object(Venta.objects, 'bulk_update', wraps=Venta.objects.bulk_update) as bulk_update:
+            call_command('recalcular_saldos', '--lote', '2', stdout=salida)
+        actualizadas = [venta.pk for llamada in bulk_update.call_args_list for venta in llamada.args[0]]
+        self.assertEqual(sorted(actualizadas), [ventas[1].pk, ventas[2].pk])
+        self.assertIn('6 ventas revisadas, 2 saldos corregidos', salida.getvalue())
+        self.assertIn('100% (6/6)', salida.getvalue())
+        self.assertEqual(self._saldo(ventas[1]), Decimal('70'))
+        self.assertEqual(self._saldo(ventas[2]), Decimal('110'))
+
+    def test_recalcular_saldos_since_filtra_por_movimientos_recientes(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        reciente = Venta.objects.create(numero_pedido='NUEVA', cliente=self.cliente, valor_total=Decimal('100'))
+        Venta.objects.filter(pk=self.venta.pk).update(updated_at=datetime(2020, 1, 1, tzinfo=dt_timezone.utc))
+        Venta.objects.filter(pk__in=[self.venta.pk, reciente.pk]).update(saldo=Decimal('0'))
+
+        salida = StringIO()
+        call_command('recalcular_saldos', '--since', date.today().isoformat(), stdout=salida)
+        self.assertIn('1 ventas revisadas, 1 saldos corregidos', salida.getvalue())
+        self.assertEqual(self._saldo(), Decimal('0'))
+        self.assertEqual(self._saldo(reciente), Decimal('100'))
+
+
+class CuentaCorrienteLibroTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='libro', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='libro', password='testpass')
+        self.tipo_proveedor = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        self.proveedor = Cuenta.objects.create(nombre='Proveedor Libro', tipo_cuenta=self.tipo_proveedor)
+
+    def _compra(self, numero, fecha, total, sena='0', cuenta=None):
+        return Compra.objects.create(
+            numero_pedido=numero, cuenta=cuenta or self.proveedor, fecha_pago=fecha,
+            valor_total=Decimal(total), sena=Decimal(sena), forma_pago_sena='efectivo' if Decimal(sena) else '',
+            created_by=self.user,
+        )
+
+    def _pago(self, compra, fecha, monto):
+        return PagoCompra.objects.create(
+            compra=compra, monto=Decimal(monto), fecha_pago=fecha,
+            forma_pago='transferencia', con_factura=True, created_by=self.user,
+        )
+
+    def _libro(self, cuenta=None):
+        from .models import MovimientoCuenta
+
+        return list(
+            MovimientoCuenta.objects.filter(cuenta=cuenta or self.proveedor)
+            .values_list('tipo', 'fecha', 'debe', 'haber', 'saldo')
+        )
+
+    def _saldos(self, cuenta=None):
+        return [fila[-1] for fila in self._libro(cuenta)]
+
+    def test_insertar_en_el_medio_corre_los_saldos_posteriores(self):
+        primera = self._compra('OC-1', '2026-04-01', '1000', sena='200')
+        self._compra('OC-3', '2026-04-20', '500')
+        self._pago(primera, '2026-04-10', '300')
+        self.assertEqual(self._saldos(), [Decimal('1000'), Decimal('800'), Decimal('500'), Decimal('1000')])
+
+        self._compra('OC-2', '2026-04-05', '100')
+        self.assertEqual(
+            [fila[0] for fila in self._libro()], ['compra', 'sena', 'compra', 'pago', 'compra'],
+        )
+        self.assertEqual(
+            self._saldos(),
+            [Decimal('1000'), Decimal('800'), Decimal('900'), Decimal('600'), Decimal('1100')],
+        )
+
+    def test_editar_y_borrar_pago_y_compra_mantienen_el_libro(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        compra = self._compra('OC-1', '2026-04-01', '1000')
+        otra = self._compra('OC-2', '2026-04-15', '400')
+        pago = self._pago(compra, '2026-04-10', '300')
+
+        pago.monto = Decimal('450')
+        pago.fecha_pago = date(2026, 4, 20)
+        pago.save()
+        self.assertEqual(self._saldos(), [Decimal('1000'), Decimal('1400'), Decimal('950')])
+
+        pago.delete()
+        self.assertEqual(self._saldos(), [Decimal('1000'), Decimal('1400')])
+
+        compra.delete()  # baja lógica
+        self.assertEqual(self._saldos(), [Decimal('400')])
+
+        otro_proveedor = Cuenta.objects.create(nombre='Otro', tipo_cuenta=self.tipo_proveedor)
+        otra.cuenta = otro_proveedor
+        otra.save()
+        self.assertEqual(self._saldos(), [])
+        self.assertEqual(self._saldos(otro_proveedor), [Decimal('400')])
+
+        incremental = self._libro(otro_proveedor)
+        call_command('reconstruir_cuenta_corriente', stdout=StringIO())
+        self.assertEqual(self._libro(otro_proveedor), incremental)
+
+    def _consultas_al_libro(self, funcion):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = funcion()
+        return resultado, [q['sql'] for q in contexto.captured_queries if 'comercial_movimientocuenta' in q['sql']]
+
+    def test_guardar_compra_sin_cambios_no_reescribe_el_libro(self):
+        compra = self._compra('OC-1', '2026-04-01', '1000')
+        self._pago(compra, '2026-04-10', '300')
+        compra = Compra.objects.get(pk=compra.pk)
+        _, consultas = self._consultas_al_libro(compra.save)
+        self.assertEqual(len(consultas), 2)
+        self.assertTrue(all(sql.startswith('SELECT') for sql in consultas))
+
+    def test_reporte_proveedores_resuelve_los_totales_en_una_consulta(self):
+        for indice in range(5):
+            proveedor = Cuenta.objects.create(nombre=f'Proveedor {indice}', tipo_cuenta=self.tipo_proveedor)
+            compra = self._compra(f'OC-{indice}', '2026-04-01', '1000', sena='100', cuenta=proveedor)
+            self._pago(compra, '2026-04-02', '250')
+
+        response, consultas = self._consultas_al_libro(
+            lambda: self.client_http.get(reverse('comercial:reportes_proveedores'))
+        )
+        self.assertEqual(len(consultas), 1)
+        resumen = [item for item in response.context['resumen_proveedores'] if item['cantidad_movimientos']]
+        self.assertEqual(len(resumen), 5)
+        self.assertEqual({item['saldo_actual'] for item in resumen}, {Decimal('650')})
+        self.assertEqual({item['total_pagos'] for item in resumen}, {Decimal('250')})
+
+    def test_detalle_pagina_el_libro_por_clave(self):
+        from .cuenta_corriente import pagina_movimientos
+
+        for indice in range(5):
+            self._compra(f'OC-{indice}', f'2026-04-0{indice + 1}', '100')
+
+        movimientos, numero, siguiente = pagina_movimientos(self.proveedor.pk, limite=2)
+        self.assertEqual((len(movimientos), numero), (2, 1))
+        movimientos, numero, siguiente = pagina_movimientos(self.proveedor.pk, siguiente, limite=2)
+        self.assertEqual([m['saldo'] for m in movimientos], [Decimal('300'), Decimal('400')])
+        self.assertEqual(numero, 3)
+        movimientos, numero, siguiente = pagina_movimientos(self.proveedor.pk, siguiente, limite=2)
+        self.assertEqual(([m['saldo'] for m in movimientos], siguiente), ([Decimal('500')], None))
+
+        with patch('comercial.cuenta_corriente.MOVIMIENTOS_POR_PAGINA', 2):
+            response = self.client_http.get(reverse('comercial:reporte_proveedor_detalle', args=[self.proveedor.pk]))
+        self.assertEqual(response.context['cuenta_corriente']['cantidad_movimientos'], 5)
+        self.assertIn('desde=', response.context['siguiente_url'])
+
+
+class ResumenesMensualesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='resumen', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='resumen', password='testpass')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='Resumen', direccion='Calle 1', localidad='CABA')
+        self.otro_cliente = Cliente.objects.create(nombre='Beto', apellido='Resumen', direccion='Calle 2', localidad='CABA')
+        self.tipo_fletes = TipoCuenta.objects.create(tipo='fletes', descripcion='Fletes')
+        self.tipo_varios = TipoCuenta.objects.create(tipo='varios', descripcion='Varios')
+        self.cuenta = Cuenta.objects.create(nombre='Fletero', tipo_cuenta=self.tipo_fletes)
+
+    def _venta(self, total, sena='0', con_factura=True, cliente=None):
+        return Venta.objects.create(
+            numero_pedido='RES', cliente=cliente or self.cliente, valor_total=Decimal(total),
+            sena=Decimal(sena), con_factura=con_factura,
+        )
+
+    def _pago(self, venta, monto, fecha, con_factura=True):
+        return PagoVenta.objects.create(
+            venta=venta, monto=Decimal(monto), fecha_pago=fecha, forma_pago='efectivo',
+            con_factura=con_factura, created_by=self.user,
+        )
+
+    def _compra(self, total, fecha, con_factura=True, cuenta=None):
+        return Compra.objects.create(
+            numero_pedido='OC', cuenta=cuenta or self.cuenta, fecha_pago=fecha,
+            valor_total=Decimal(total), con_factura=con_factura, created_by=self.user,
+        )
+
+    def _ventas(self):
+        from .models import ResumenVentasMes
+
+        return {
+            (fila.mes, fila.cliente_id, fila.con_factura): (
+                fila.total_ventas, fila.cantidad_ventas, fila.cantidad_pendientes, fila.total_cobrado, fila.cantidad_cobros,
+            )
+            for fila in ResumenVentasMes.objects.all()
+            if fila.cantidad_ventas or fila.cantidad_cobros
+        }
+
+    def _compras(self):
+        from .models import ResumenComprasMes
+
+        return {
+            (fila.mes, fila.tipo_cuenta_id, fila.con_factura): (fila.total, fila.cantidad)
+            for fila in ResumenComprasMes.objects.all()
+            if fila.cantidad
+        }
+
+    def _sin_desfasajes(self):
+        from .resumenes import reconciliar
+
+        resultado = reconciliar(verificar=True)
+        self.assertEqual({nombre: valores[:3] for nombre, valores in resultado.items()}, {
+            'ventas': (0, 0, 0), 'compras': (0, 0, 0), 'clientes': (0, 0, 0),
+        })
+
+    def test_guardados_mantienen_los_resumenes_al_dia(self):
+        from django.utils import timezone
+        from .resumenes import mes_de
+
+        mes = mes_de(timezone.now())
+        venta = self._venta('1000', sena='200')
+        negro = self._venta('500', con_factura=False)
+        pago = self._pago(venta, '300', date(2026, 3, 10))
+        self._pago(negro, '100', date(2026, 3, 20), con_factura=False)
+        self.assertEqual(self._ventas(), {
+            (mes, self.cliente.pk, True): (Decimal('1000'), 1, 1, Decimal('200'), 1),
+            (mes, self.cliente.pk, False): (Decimal('500'), 1, 1, Decimal('0'), 0),
+            (date(2026, 3, 1), self.cliente.pk, True): (Decimal('0'), 0, 0, Decimal('300'), 1),
+            (date(2026, 3, 1), self.cliente.pk, False): (Decimal('0'), 0, 0, Decimal('100'), 1),
+        })
+
+        pago.monto = Decimal('350')
+        pago.fecha_pago = date(2026, 4, 2)
+        pago.save()
+        venta.estado = 'entregado'
+        venta.cliente = self.otro_cliente
+        venta.save()
+        negro.delete()
+        self.assertEqual(self._ventas(), {
+            (mes, self.otro_cliente.pk, True): (Decimal('1000'), 1, 0, Decimal('200'), 1),
+            (date(2026, 4, 1), self.otro_cliente.pk, True): (Decimal('0'), 0, 0, Decimal('350'), 1),
+        })
+        pago.delete()
+        self.assertNotIn((date(2026, 4, 1), self.otro_cliente.pk, True), self._ventas())
+
+        compra = self._compra('800', date(2026, 2, 5))
+        self._compra('200', date(2026, 2, 15), con_factura=False)
+        compra.fecha_pago = date(2026, 3, 1)
+        compra.save()
+        self.cuenta.tipo_cuenta = self.tipo_varios
+        self.cuenta.save()
+        self.assertEqual(self._compras(), {
+            (date(2026, 3, 1), self.tipo_varios.pk, True): (Decimal('800'), 1),
+            (date(2026, 2, 1), self.tipo_varios.pk, False): (Decimal('200'), 1),
+        })
+        compra.delete()
+        self.assertEqual(list(self._compras()), [(date(2026, 2, 1), self.tipo_varios.pk, False)])
+
+        self._sin_desfasajes()
+
+    def test_comando_corrige_lo_que_no_pasa_por_save(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        venta = self._venta('1000')
+        self._compra('400', date(2026, 5, 5))
+        Venta.objects.filter(pk=venta.pk).update(valor_total=Decimal('1500'))
+        Compra.objects.update(deleted_at=datetime(2026, 5, 6, tzinfo=dt_timezone.utc))
+
+        salida = StringIO()
+        call_command('reconciliar_resumenes', '--verificar', stdout=salida)
+        # Resumen de ventas, de compras y la ficha del cliente.
+        self.assertIn('3 filas desfasadas (sin cambios', salida.getvalue())
+        self.assertEqual(list(self._ventas().values()), [(Decimal('1000'), 1, 1, Decimal('0'), 0)])
+
+        call_command('reconciliar_resumenes', stdout=StringIO())
+        self.assertEqual(list(self._ventas().values()), [(Decimal('1500'), 1, 1, Decimal('0'), 0)])
+        self.assertEqual(self.cliente.resumen.total_comprado, Decimal('1500'))
+        self.assertEqual(self._compras(), {})
+        self._sin_desfasajes()
+
+    def test_tableros_leen_los_resumenes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._venta('1000', sena='100')
+        self._venta('300', cliente=self.otro_cliente).delete()
+        self._venta('700', cliente=self.otro_cliente)
+        self._compra('250', date.today())
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client_http.get(reverse('comercial:dashboard'))
+        tablas = ('"comercial_venta"', '"comercial_compra"', '"comercial_pagoventa"')
+        self.assertFalse([q['sql'] for q in contexto.captured_queries if any(tabla in q['sql'] for tabla in tablas)])
+        self.assertEqual(response.context['total_ventas'], Decimal('1700'))
+        self.assertEqual(response.context['total_compras'], Decimal('250'))
+        self.assertEqual(response.context['ventas_pendientes'], 2)
+        self.assertEqual(
+            [(c['cliente__nombre'], c['total']) for c in response.context['top_clientes']],
+            [('Ana', Decimal('1000')), ('Beto', Decimal('700'))],
+        )
+        self.assertEqual(json.loads(response.context['compras_por_tipo']), [{'tipo': 'Fletes', 'total': 250.0}])
+        ventas_por_mes = json.loads(response.context['ventas_por_mes'])
+        self.assertEqual(len(ventas_por_mes), 1)
+        self.assertTrue(ventas_por_mes[0]['mes'].endswith('-01T00:00:00-03:00'))
+
+        response = self.client_http.get(reverse('home'))
+        self.assertEqual(response.context['total_ventas'], Decimal('1700'))
+        self.assertEqual(response.context['ventas_pendientes'], 2)
+
+
+class RegeneracionRecibosTest(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=self.media.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.user = User.objects.create_user(username='recibos', password='testpass')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='Recibos', direccion='Calle 1', localidad='CABA')
+        self.pagos = []
+        # Las fechas van al revés de los ids: la numeración tiene que seguir la fecha.
+        for indice, dia in enumerate((20, 10, 1)):
+            venta = Venta.objects.create(numero_pedido=f'REC-{indice}', cliente=cliente, valor_total=Decimal('1000'))
+            self.pagos.append(PagoVenta.objects.create(
+                venta=venta, monto=Decimal('400'), fecha_pago=date(2026, 4, dia),
+                forma_pago='efectivo', created_by=self.user,
+            ))
+
+    def _regenerar(self, *opciones):
+        from io import StringIO
+        from django.core.management import call_command
+
+        salida = StringIO()
+        call_command('regenerar_recibos_pdf', '--procesos', '1', '--lote', '1', *opciones, stdout=salida)
+        return salida.getvalue()
+
+    def test_numera_por_fecha_y_saltea_los_recibos_sin_cambios(self):
+        salida = self._regenerar()
+        self.assertIn('Recibos nuevos numerados: 3', salida)
+        self.assertIn('Total de recibos generados: 3', salida)
+        numeros = list(Recibo.objects.order_by('pago__fecha_pago').values_list('numero', flat=True))
+        self.assertEqual(numeros, sorted(numeros))
+        self.assertTrue(all(Recibo.objects.values_list('pdf_hash', flat=True)))
+
+        with patch('comercial.models._pdf_desde_html') as pdf:
+            salida = self._regenerar()
+        pdf.assert_not_called()
+        self.assertIn('Sin cambios (mismo contenido): 3', salida)
+
+        pago = self.pagos[0]
+        pago.monto = Decimal('500')
+        pago.save()
+        self.assertIn('Total de recibos generados: 1', self._regenerar())
+        self.assertEqual(Recibo.objects.get(pago=pago).importe, Decimal('500'))
+        self.assertIn('Total de recibos generados: 3', self._regenerar('--todos'))
+
+    def test_corrida_sin_cambios_no_escribe_recibos(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._regenerar()
+        with CaptureQueriesContext(connection) as contexto:
+            self._regenerar()
+        self.assertFalse([q['sql'] for q in contexto.captured_queries if q['sql'].startswith('UPDATE "comercial_recibo"')])
+
+        pago = self.pagos[0]
+        pago.monto = Decimal('500')
+        pago.save()
+        recibo = Recibo.desde_pago(pago)
+        recibo.refresh_from_db()
+        self.assertEqual((recibo.importe, recibo.importe_letras), (Decimal('500'), 'QUINIENTOS'))
+
+    def test_retoma_desde_el_ultimo_pago_terminado(self):
+        import os
+
+        estado = os.path.join(self.media.name, 'estado.txt')
+        with open(estado, 'w') as archivo:
+            archivo.write(str(self.pagos[0].pk))
+
+        salida = self._regenerar('--estado', estado)
+        self.assertIn('Total de recibos generados: 2', salida)
+        self.assertFalse(Recibo.objects.filter(pago=self.pagos[0]).exists())
+        with open(estado) as archivo:
+            self.assertEqual(archivo.read(), str(self.pagos[-1].pk))
+
+    def test_avance_espera_a_los_lotes_anteriores(self):
+        from .recibos_pdf import Avance
+
+        avance = Avance([[1, 2], [3, 4], [5]], ultimo=0)
+        self.assertEqual(avance.terminar([3, 4]), 0)
+        self.assertEqual(avance.terminar([1, 2]), 4)
+        self.assertEqual(avance.terminar([5]), 5)
+
+
+class RegeneracionRecibosParalelaTest(TransactionTestCase):
+    """`regenerar_recibos_pdf` con pool de procesos (el default es uno por CPU).
+
+    Los procesos hijos abren su propia conexión: corre contra MySQL o SQLite en
+    disco (`TEST_SQLITE_NAME=/tmp/akun_test.sqlite3`).
+    """
+
+    def setUp(self):
+        import tempfile
+        from django.db import connection
+        from django.test import override_settings
+
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Requiere una base que vean otros procesos (MySQL o SQLite en disco).')
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=self.media.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        user = User.objects.create_user(username='recibos-pool', password='testpass')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='Pool', direccion='Calle 1', localidad='CABA')
+        for indice in range(4):
+            venta = Venta.objects.create(numero_pedido=f'POOL-{indice}', cliente=cliente, valor_total=Decimal('1000'))
+            PagoVenta.objects.create(
+                venta=venta, monto=Decimal('400'), fecha_pago=date(2026, 4, 1 + indice),
+                forma_pago='efectivo', created_by=user,
+            )
+
+    def _regenerar(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        salida = StringIO()
+        call_command('regenerar_recibos_pdf', '--procesos', '2', '--lote', '1', stdout=salida)
+        return salida.getvalue()
+
+    def test_regenera_en_varios_procesos(self):
+        salida = self._regenerar()
+        self.assertIn('Total de recibos generados: 4', salida)
+        self.assertNotIn('Errores', salida)
+        self.assertEqual(Recibo.objects.exclude(pdf_hash='').count(), 4)
+        self.assertIn('Sin cambios (mismo contenido): 4', self._regenerar())
+
+
+class PagosMasivosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='masivos', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='masivos', password='testpass')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='Masivos', direccion='Calle 1', localidad='CABA')
+        self.venta_a = Venta.objects.create(numero_pedido='PM-1', cliente=cliente, valor_total=Decimal('1000'))
+        self.venta_b = Venta.objects.create(numero_pedido='PM-2', cliente=cliente, valor_total=Decimal('500'))
+        # Pedido repetido: vale solo la que tiene saldo.
+        saldada = Venta.objects.create(numero_pedido='PM-2', cliente=cliente, valor_total=Decimal('300'))
+        PagoVenta.objects.create(
+            venta=saldada, monto=Decimal('300'), fecha_pago=date(2026, 9, 1),
+            forma_pago='efectivo', created_by=self.user,
+        )
+        Recibo.objects.create(numero=7, venta=saldada, pago=saldada.pagos.get(), importe=300, importe_letras='x', concepto='SALDO')
+
+    def test_lee_texto_pegado_con_formato_local(self):
+        from . import pagos_masivos
+
+        filas = pagos_masivos.leer_texto('pedido;fecha;monto;forma\nPM-1;05/10/2026;$ 1.000,00;Efectivo\n\n')
+        self.assertEqual(len(filas), 1)
+        self.assertTrue(pagos_masivos.validar(filas))
+        self.assertEqual(filas[0].venta, self.venta_a)
+        self.assertEqual(filas[0].monto, Decimal('1000.00'))
+        self.assertEqual(filas[0].fecha, date(2026, 10, 5))
+        self.assertEqual(filas[0].forma_pago, 'efectivo')
+
+    def test_montos_nan_y_miles_con_punto(self):
+        from . import pagos_masivos
+        from .planillas import convertir_monto
+
+        self.assertIsNone(convertir_monto('NaN'))
+        self.assertIsNone(convertir_monto(float('nan')))
+        self.assertIsNone(convertir_monto('Infinity'))
+        self.assertEqual(convertir_monto('1.500'), Decimal('1500.00'))
+        self.assertEqual(convertir_monto('-12.345.678'), Decimal('-12345678.00'))
+        self.assertEqual(convertir_monto('1.50'), Decimal('1.50'))
+        self.assertEqual(convertir_monto('1,234.56'), Decimal('1234.56'))
+
+        filas = pagos_masivos.leer_texto('PM-1;05/10/2026;nan;efectivo\n')
+        self.assertFalse(pagos_masivos.validar(filas))
+        self.assertEqual(filas[0].errores, ['Monto inválido: "nan".'])
+
+    def test_una_fila_con_error_no_escribe_nada(self):
+        from . import pagos_masivos
+
+        filas = pagos_masivos.leer_texto(
+            'PM-1\t05/10/2026\t600\ttransferencia\n'
+            'PM-1\t06/10/2026\t600\ttransferencia\n'  # pasa el saldo acumulado
+            'PM-9\t06/10/2026\t10\tcheque\n'
+        )
+        pagos_antes = PagoVenta.objects.count()
+        self.assertEqual(pagos_masivos.registrar(filas, False, self.user), [])
+        self.assertEqual(PagoVenta.objects.count(), pagos_antes)
+        self.assertEqual(filas[0].errores, [])
+        self.assertIn('saldo pendiente', filas[1].errores[0])
+        self.assertEqual(len(filas[2].errores), 1)
+        self.venta_a.refresh_from_db()
+        self.assertEqual(self.venta_a.saldo, Decimal('1000'))
+
+    def test_registra_pagos_recibos_y_saldos_en_una_transaccion(self):
+        from . import pagos_masivos, resumenes
+
+        filas = pagos_masivos.leer_texto(
+            'PM-1\t05/10/2026\t400\ttransferencia\n'
+            'PM-2\t05/10/2026\t500\tefectivo\n'
+            'PM-1\t06/10/2026\t600\tcheque\n'
+        )
+        with patch('comercial.recibos_pdf.threading.Thread') as hilo, self.captureOnCommitCallbacks(execute=True):
+            pagos = pagos_masivos.registrar(filas, True, self.user)
+        self.assertEqual(len(pagos), 3)
+        # Los PDF se generan en un hilo que arranca después del commit.
+        self.assertEqual(hilo.call_args.kwargs['args'], ([pago.pk for pago in pagos],))
+        hilo.return_value.start.assert_called_once()
+
+        self.venta_a.refresh_from_db()
+        self.venta_b.refresh_from_db()
+        self.assertEqual((self.venta_a.saldo, self.venta_b.saldo), (Decimal('0'), Decimal('0')))
+        recibos = list(Recibo.objects.filter(pago__in=pagos).order_by('pago_id').values_list('numero', 'concepto'))
+        self.assertEqual(recibos, [(8, 'PAGO PARCIAL'), (9, 'SALDO'), (10, 'SALDO')])
+        resultado = resumenes.reconciliar(verificar=True)
+        self.assertEqual({nombre: valores[:3] for nombre, valores in resultado.items()}, {
+            'ventas': (0, 0, 0), 'compras': (0, 0, 0), 'clientes': (0, 0, 0),
+        })
+
+    def test_endpoint_json(self):
+        url = reverse('comercial:pagos_masivos')
+        cuerpo = {'filas': [{'pedido': 'PM-1', 'fecha': '2026-10-05', 'monto': '250.50', 'forma_pago': 'Transferencia'}]}
+        with self.captureOnCommitCallbacks():
+            resp = self.client_http.post(url, json.dumps(cuerpo), content_type='application/json')
+        self.assertEqual(resp.status_code, 201)
+        datos = resp.json()['pagos']
+        self.assertEqual(datos[0]['venta_id'], self.venta_a.pk)
+        self.assertEqual(datos[0]['recibo'], 8)
+
+        cuerpo['filas'][0]['monto'] = '5000'
+        resp = self.client_http.post(url, json.dumps(cuerpo), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertTrue(resp.json()['filas'][0]['errores'])
+
+    def test_pantalla_valida_y_confirma(self):
+        url = reverse('comercial:pagos_masivos')
+        texto = 'PM-2\t05/10/2026\t500\tefectivo'
+        resp = self.client_http.post(url, {'texto': texto, 'accion': 'validar'})
+        self.assertContains(resp, 'Registrar 1 pago')
+        self.assertFalse(PagoVenta.objects.filter(venta=self.venta_b).exists())
+
+        with self.captureOnCommitCallbacks():
+            resp = self.client_http.post(url, {'texto': texto, 'accion': 'confirmar'})
+        self.assertRedirects(resp, reverse('comercial:ventas_list'), fetch_redirect_response=False)
+        self.assertEqual(PagoVenta.objects.filter(venta=self.venta_b).count(), 1)
+
+
+class ConciliacionBancariaTest(TestCase):
+    EXTRACTO = 'comercial/fixtures/extracto_banco.csv'
+
+    def setUp(self):
+        from django.conf import settings
+
+        self.extracto = f'{settings.BASE_DIR}/{self.EXTRACTO}'
+        self.user = User.objects.create_superuser(username='conciliacion', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='conciliacion', password='testpass')
+        ana = Cliente.objects.create(nombre='Ana', apellido='Gomez', cuit='20123456786', direccion='Calle 1', localidad='CABA')
+        beto = Cliente.objects.create(nombre='Beto', apellido='Sosa', direccion='Calle 2', localidad='CABA')
+        octubre = date(2026, 10, 1)
+        self.venta_cuit = Venta.objects.create(numero_pedido='CB-1', cliente=ana, valor_total=Decimal('1500'), fecha_pago=octubre)
+        self.venta_factura = Venta.objects.create(
+            numero_pedido='CB-2', cliente=beto, valor_total=Decimal('2000'), numero_factura='0001-00004321', fecha_pago=octubre,
+        )
+        # Dos ventas con el mismo saldo y nada más que las distinga: empate.
+        self.ventas_empate = [
+            Venta.objects.create(numero_pedido=f'CB-E{indice}', cliente=beto, valor_total=Decimal('3000'), fecha_pago=octubre)
+            for indice in range(2)
+        ]
+        tipo = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        cuenta = Cuenta.objects.create(nombre='Vidrios', razon_social='Vidrios SA', cuit='30712345671', tipo_cuenta=tipo)
+        self.compra = Compra.objects.create(
+            numero_pedido='OC-1', cuenta=cuenta, fecha_pago=octubre, valor_total=Decimal('45000'), created_by=self.user,
+        )
+
+    def _propuestas(self):
+        from . import conciliacion_bancaria as conciliacion
+        from .planillas import leer_texto
+
+        with open(self.extracto, encoding='utf-8') as archivo:
+            movimientos, ignoradas = conciliacion.leer_extracto(leer_texto(archivo.read()))
+        self.assertEqual((len(movimientos), ignoradas), (6, 1))
+        return {propuesta.movimiento.linea: propuesta for propuesta in conciliacion.proponer(movimientos)}
+
+    def test_propone_por_cuit_factura_e_importe(self):
+        propuestas = self._propuestas()
+        self.assertEqual(propuestas[6].documento.pk, self.venta_cuit.pk)
+        self.assertEqual(propuestas[6].motivos, ['cuit', 'importe', 'fecha'])
+        self.assertTrue(propuestas[6].segura)
+        # Pago parcial de una factura: se propone pero no viene marcado.
+        self.assertEqual(propuestas[7].documento.pk, self.venta_factura.pk)
+        self.assertFalse(propuestas[7].segura)
+        self.assertIsNone(propuestas[8].documento)
+        self.assertEqual((propuestas[9].documento.tipo, propuestas[9].documento.pk), ('compra', self.compra.pk))
+        self.assertTrue(propuestas[9].segura)
+        self.assertEqual(propuestas[10].empatados, 1)
+        self.assertFalse(propuestas[10].segura)
+        self.assertIsNone(propuestas[11].documento)
+
+    def test_registra_los_confirmados_como_pagos(self):
+        from . import conciliacion_bancaria as conciliacion
+
+        propuestas = self._propuestas()
+        confirmados = [conciliacion.leer_valor(propuestas[linea].valor()) for linea in (6, 7, 9)]
+        with patch('comercial.recibos_pdf.threading.Thread') as hilo, self.captureOnCommitCallbacks(execute=True):
+            pagos_venta, pagos_compra, errores = conciliacion.registrar(confirmados, self.user)
+        self.assertEqual((len(pagos_venta), len(pagos_compra), errores), (2, 1, []))
+        hilo.return_value.start.assert_called_once()
+        self.venta_cuit.refresh_from_db()
+        self.venta_factura.refresh_from_db()
+        self.compra.refresh_from_db()
+        self.assertEqual(self.venta_cuit.saldo, Decimal('0'))
+        self.assertEqual(self.venta_factura.saldo, Decimal('1200'))
+        self.assertEqual((self.compra.saldo, self.compra.estado), (Decimal('0'), 'pagado'))
+        self.assertEqual(Recibo.objects.filter(pago__in=pagos_venta).count(), 2)
+
+    def test_confirmacion_con_importe_no_finito_no_registra(self):
+        from . import conciliacion_bancaria as conciliacion
+
+        for importe in ('NaN', 'Infinity', '-sNaN'):
+            self.assertIsNone(conciliacion.leer_valor(f'venta:{self.venta_cuit.pk}:2026-10-03:{importe}'))
+        url = reverse('comercial:conciliacion_bancaria')
+        resp = self.client_http.post(url, {'accion': 'registrar', 'confirmar': [f'venta:{self.venta_cuit.pk}:2026-10-03:NaN']})
+        self.assertRedirects(resp, url, fetch_redirect_response=False)
+        self.assertFalse(PagoVenta.objects.filter(venta=self.venta_cuit).exists())
+
+    def test_no_registra_nada_si_se_pasa_del_saldo(self):
+        from . import conciliacion_bancaria as conciliacion
+
+        confirmados = [
+            ('venta', self.venta_cuit.pk, date(2026, 10, 3), Decimal('1000')),
+            ('venta', self.venta_cuit.pk, date(2026, 10, 4), Decimal('1000')),
+        ]
+        pagos_venta, pagos_compra, errores = conciliacion.registrar(confirmados, self.user)
+        self.assertEqual((pagos_venta, pagos_compra, len(errores)), ([], [], 1))
+        self.assertFalse(PagoVenta.objects.filter(venta=self.venta_cuit).exists())
+
+    def test_pantalla_sube_extracto_y_registra(self):
+        url = reverse('comercial:conciliacion_bancaria')
+        with open(self.extracto, 'rb') as archivo:
+            resp = self.client_http.post(url, {'archivo': archivo})
+        self.assertContains(resp, 'Venta CB-1')
+        self.assertContains(resp, 'DEPOSITO EN EFECTIVO')
+        marcados = resp.context['propuestas']
+        valores = [propuesta.valor() for propuesta in marcados if propuesta.segura]
+        self.assertEqual(len(valores), 2)
+
+        with self.captureOnCommitCallbacks():
+            resp = self.client_http.post(url, {'accion': 'registrar', 'confirmar': valores})
+        self.assertRedirects(resp, url, fetch_redirect_response=False)
+        self.assertTrue(PagoVenta.objects.filter(venta=self.venta_cuit).exists())
+        self.assertTrue(self.compra.pagos_compra.exists())
+
+
+class ReporteGeneralDatosTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_superuser(username='general', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='general', password='testpass')
+        cliente = Cliente.objects.create(nombre='Gina', apellido='General', direccion='Calle 1', localidad='CABA')
+        self.venta = Venta.objects.create(numero_pedido='RG', cliente=cliente, valor_total=Decimal('2000'), sena=Decimal('100'))
+        Venta.objects.create(numero_pedido='RG-N', cliente=cliente, valor_total=Decimal('500'), sena=Decimal('50'), con_factura=False)
+        self._pago(Decimal('300'), date(2026, 4, 10), con_factura=True)
+        self._pago(Decimal('70'), date(2026, 5, 10), con_factura=False)
+        cuenta = Cuenta.objects.create(nombre='Flete', tipo_cuenta=TipoCuenta.objects.create(tipo='fletes', descripcion='Fletes'))
+        Compra.objects.create(
+            numero_pedido='OC', cuenta=cuenta, fecha_pago=date(2026, 4, 20), valor_total=Decimal('120'), created_by=self.user,
+        )
+
+    def _pago(self, monto, fecha, con_factura=True):
+        return PagoVenta.objects.create(
+            venta=self.venta, monto=monto, fecha_pago=fecha, forma_pago='efectivo', con_factura=con_factura, created_by=self.user,
+        )
+
+    def _consultas_a_tablas(self, funcion):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as capturadas:
+            resultado = funcion()
+        tablas = ('comercial_venta', 'comercial_pagoventa', 'comercial_compra')
+        return resultado, sum(1 for query in capturadas if any(tabla in query['sql'] for tabla in tablas))
+
+    def test_una_consulta_por_tabla(self):
+        from .reporte_general import calcular
+
+        datos, consultas = self._consultas_a_tablas(calcular)
+        self.assertEqual(consultas, 3)
+        self.assertEqual(datos['ingresos'], {
+            'blanco': Decimal('400'), 'negro': Decimal('120'), 'total': Decimal('520'), 'cantidad': 4,
+        })
+        self.assertEqual(datos['gastos']['total'], Decimal('120'))
+        self.assertEqual(datos['balance']['total'], Decimal('400'))
+
+        datos, consultas = self._consultas_a_tablas(lambda: calcular(desde=date(2026, 5, 1), hasta=date(2026, 5, 31), por_mes=True))
+        self.assertEqual(consultas, 6)
+        self.assertEqual([mes['mes'] for mes in datos['meses']], [date(2026, 5, 1)])
+        self.assertEqual(datos['meses'][0]['ingresos']['negro'], Decimal('70'))
+
+    def test_cache_se_invalida_al_escribir(self):
+        from .reporte_general import reporte_general_datos
+
+        primero, _ = self._consultas_a_tablas(lambda: reporte_general_datos('2026-04-01', '2026-04-30'))
+        segundo, consultas = self._consultas_a_tablas(lambda: reporte_general_datos('2026-04-01', '2026-04-30'))
+        self.assertEqual(consultas, 0)
+        self.assertEqual(primero, segundo)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pago = self._pago(Decimal('30'), date(2026, 4, 11))
+        self.assertEqual(reporte_general_datos('2026-04-01', '2026-04-30')['ingresos']['blanco'], Decimal('330'))
+
+        # Otra fecha dentro del mismo mes no mueve el resumen mensual, pero sí el reporte por día.
+        with self.captureOnCommitCallbacks(execute=True):
+            pago.fecha_pago = date(2026, 4, 25)
+            pago.save()
+        self.assertEqual(reporte_general_datos('2026-04-01', '2026-04-20')['ingresos']['blanco'], Decimal('300'))
+
+    def test_vista_con_desglose_por_mes(self):
+        resp = self.client_http.post(reverse('comercial:reporte_general'), {
+            'fecha_desde': '2026-04-01', 'fecha_hasta': '2026-05-31', 'por_mes': 'true',
+        })
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['reporte_data']['meses']), 2)
+        self.assertContains(resp, '04/2026')
+        self.assertEqual(self.client_http.session['reporte_general_data']['por_mes'], True)
+
+
+class ClienteAutocompletadoTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='autocompletado', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='autocompletado', password='testpass')
+        self.jose = Cliente.objects.create(
+            nombre='José', apellido='Pérez', razon_social='Aberturas Pérez SRL', cuit='20123456781',
+            direccion='Dir 1', localidad='CABA',
+        )
+        self.otro = Cliente.objects.create(
+            nombre='Marta', apellido='Gómez', razon_social='Aberturas Pérez SRL', direccion='Dir 2', localidad='Lanús',
+        )
+
+    def _buscar(self, **params):
+        resp = self.client_http.get(reverse('comercial:clientes_list_api'), params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def _ids(self, **params):
+        return {fila['id'] for fila in self._buscar(**params)['results']}
+
+    def test_busqueda_sin_acentos_por_nombre_razon_social_y_cuit(self):
+        self.assertEqual(self._ids(q='jose perez'), {self.jose.pk})
+        self.assertEqual(self._ids(q='GOM'), {self.otro.pk})
+        self.assertEqual(self._ids(q='aberturas'), {self.jose.pk, self.otro.pk})
+        self.assertEqual(self._ids(q='20-1234'), {self.jose.pk})
+        self.assertEqual(self._ids(q='20123456781'), {self.jose.pk})
+
+        self.otro.delete()
+        self.assertEqual(self._ids(q='aberturas'), {self.jose.pk})
+        texto = self._buscar(q='jose')['results'][0]['text']
+        self.assertEqual(texto, 'Aberturas Pérez SRL — CUIT 20123456781')
+
+    def test_pagina_de_a_veinte(self):
+        from .autocompletado import POR_PAGINA
+
+        Cliente.objects.bulk_create([
+            Cliente(nombre=f'N{indice:02d}', apellido='Serie', direccion='Dir', localidad='CABA')
+            for indice in range(POR_PAGINA + 5)
+        ])
+        primera = self._buscar()
+        self.assertEqual(len(primera['results']), POR_PAGINA)
+        self.assertTrue(primera['pagination']['more'])
+        segunda = self._buscar(page='2')
+        self.assertEqual(len(segunda['results']), 7)
+        self.assertFalse(segunda['pagination']['more'])
+        self.assertEqual(self._buscar(page='x')['results'], primera['results'])
+
+    def test_razones_sociales_distintas(self):
+        datos = self._buscar(campo='razon_social', q='pérez')
+        self.assertEqual(datos['results'], [{'id': 'Aberturas Pérez SRL', 'text': 'Aberturas Pérez SRL'}])
+
+    def test_formularios_solo_renderizan_las_opciones_elegidas(self):
+        resp = self.client_http.get(reverse('comercial:venta_create'))
+        self.assertContains(resp, 'data-autocomplete-url')
+        self.assertNotContains(resp, 'Gómez')
+
+        resp = self.client_http.post(reverse('comercial:reportes'), {
+            'cliente': [self.jose.pk], 'razon_social': ['Aberturas Pérez SRL'],
+        })
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.context['form'].is_valid())
+        self.assertContains(resp, f'<option value="{self.jose.pk}" selected>')
+        self.assertContains(resp, '<option value="Aberturas Pérez SRL" selected>')
+        self.assertNotContains(resp, f'<option value="{self.otro.pk}"')
+
+    def test_razon_social_inexistente_no_valida(self):
+        from .forms import ReporteForm
+
+        form = ReporteForm({'razon_social': ['No Existe SA']})
+        self.assertFalse(form.is_valid())
+        self.assertIn('razon_social', form.errors)
+
+
+class ClienteResumenTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='ficha', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='ficha', password='testpass')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='Ficha', direccion='Calle 1', localidad='CABA')
+        self.otro = Cliente.objects.create(nombre='Beto', apellido='Ficha', direccion='Calle 2', localidad='CABA')
+
+    def _venta(self, total, sena='0', cliente=None):
+        return Venta.objects.create(
+            numero_pedido='FICHA', cliente=cliente or self.cliente, valor_total=Decimal(total), sena=Decimal(sena),
+        )
+
+    def _pago(self, venta, monto):
+        return PagoVenta.objects.create(
+            venta=venta, monto=Decimal(monto), fecha_pago=date(2026, 9, 1), forma_pago='efectivo', created_by=self.user,
+        )
+
+    def _ficha(self, cliente=None):
+        from .models import ClienteResumen
+
+        resumen = ClienteResumen.objects.get(cliente=cliente or self.cliente)
+        return (
+            resumen.total_comprado, resumen.total_cobrado, resumen.saldo_pendiente, resumen.cantidad_ventas,
+            resumen.ventas_pendientes, resumen.ventas_entregadas, resumen.ventas_colocadas,
+        )
+
+    def _sin_desfasajes(self):
+        from .resumenes import reconciliar
+
+        self.assertEqual(reconciliar(verificar=True, resumenes=('clientes',))['clientes'][:3], (0, 0, 0))
+
+    def test_ventas_pagos_y_percepciones_mueven_la_ficha(self):
+        from django.utils import timezone
+        from .models import Percepcion
+
+        venta = self._venta('1000', sena='100')
+        otra = self._venta('500')
+        self.assertEqual(self._ficha(), (Decimal('1500'), 0, Decimal('1400'), 2, 2, 0, 0))
+
+        pago = self._pago(venta, '300')
+        Percepcion.objects.create(venta=venta, tipo='iva', importe=Decimal('50'))
+        otra.estado = 'colocado'
+        otra.save()
+        self.assertEqual(self._ficha(), (Decimal('1500'), Decimal('300'), Decimal('1150'), 2, 1, 0, 1))
+        self._sin_desfasajes()
+
+        pago.monto = Decimal('400')
+        pago.save()
+        venta.cliente = self.otro
+        venta.save()
+        self.assertEqual(self._ficha(), (Decimal('500'), 0, Decimal('500'), 1, 0, 0, 1))
+        self.assertEqual(self._ficha(self.otro), (Decimal('1000'), Decimal('400'), Decimal('550'), 1, 1, 0, 0))
+
+        otra.delete()
+        self.assertEqual(self._ficha(), (0, 0, 0, 0, 0, 0, 0))
+        resumen = self.cliente.resumen
+        self.assertIsNone(resumen.ultima_compra)
+        self.assertEqual(resumen.ventas_por_mes, [])
+        resumen_otro = self.otro.resumen
+        self.assertEqual(resumen_otro.ultima_compra, Venta.objects.get(pk=venta.pk).created_at)
+        self.assertEqual(resumen_otro.ventas_por_mes, [[timezone.localtime().strftime('%Y-%m'), '1000.00']])
+        self._sin_desfasajes()
+
+    def test_detalle_lee_la_ficha_y_pagina_las_ventas(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for _ in range(25):
+            self._venta('100')
+        self._pago(Venta.objects.first(), '40')
+
+        url = reverse('comercial:cliente_detail', args=[self.cliente.pk])
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client_http.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_comprado'], Decimal('2500'))
+        self.assertEqual(response.context['total_cobrado'], Decimal('40'))
+        self.assertEqual(response.context['saldo_pendiente'], Decimal('2460'))
+        self.assertEqual(response.context['cantidad_ventas'], 25)
+        self.assertEqual(json.loads(response.context['estados_data']), [25])
+        self.assertEqual(len(response.context['ventas']), 20)
+        sumas = [q['sql'] for q in contexto.captured_queries if 'SUM(' in q['sql'] or 'GROUP BY' in q['sql']]
+        self.assertEqual(sumas, [])
+
+        response = self.client_http.get(url, {'page': 2})
+        self.assertEqual(len(response.context['ventas']), 5)
+
+    def test_cliente_sin_ventas(self):
+        response = self.client_http.get(reverse('comercial:cliente_detail', args=[self.otro.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cantidad_ventas'], 0)
+        self.assertEqual(response.context['meses_labels'], '[]')
+
+
+class VentasListAnotacionesTest(TestCase):
+    """El listado resuelve percepciones y facturas de pagos en la consulta de la página."""
+
+    PAGOS_POR_VENTA = 50
+
+    def setUp(self):
+        from .models import Percepcion
+
+        self.user = User.objects.create_superuser(username='listadoanotado', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='listadoanotado', password='testpass')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='Listado', direccion='Dir 1', localidad='CABA')
+        ventas = Venta.objects.bulk_create([
+            Venta(numero_pedido=f'VTA-ANOT-{indice}', cliente=cliente, valor_total=Decimal('1000'),
+                  sena=Decimal('0'), numero_factura=f'0001-{indice:08d}')
+            for indice in range(20)
+        ])
+        PagoVenta.objects.bulk_create([
+            PagoVenta(venta=venta, monto=Decimal('10'), fecha_pago=date(2026, 5, 1 + indice % 28),
+                      forma_pago='efectivo', numero_factura=f'0002-{indice % 10:08d}' if indice % 2 else '',
+                      created_by=self.user)
+            for venta in ventas for indice in range(self.PAGOS_POR_VENTA)
+        ])
+        Percepcion.objects.bulk_create([
+            Percepcion(venta=venta, tipo='iibb_ba', importe=Decimal('12.50'))
+            for venta in ventas for _ in range(2)
+        ])
+        # La primera request crea la configuración de seguridad; no entra en la cuenta.
+        self.client_http.get(reverse('comercial:ventas_list'))
+
+    def _listado(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import Percepcion
+
+        with patch.object(PagoVenta, 'from_db', wraps=PagoVenta.from_db) as pagos, \
+                patch.object(Percepcion, 'from_db', wraps=Percepcion.from_db) as percepciones, \
+                CaptureQueriesContext(connection) as contexto:
+            response = self.client_http.get(reverse('comercial:ventas_list'))
+        self.assertEqual(response.status_code, 200)
+        # Ni un pago ni una percepción se cargan como objeto: 1.000 pagos por página con prefetch.
+        self.assertEqual(pagos.call_count, 0)
+        self.assertEqual(percepciones.call_count, 0)
+        return response, len(contexto.captured_queries)
+
+    def test_pagina_sin_recorrer_pagos_ni_percepciones(self):
+        response, consultas = self._listado()
+        ventas = list(response.context['ventas'])
+        self.assertEqual(len(ventas), 20)
+        venta = ventas[0]
+        self.assertEqual(venta.get_total_percepciones(), Decimal('25.00'))
+        self.assertEqual(venta.get_total_con_percepciones(), Decimal('1025.00'))
+        facturas = venta.get_facturas_relacionadas()
+        self.assertEqual(facturas[0], venta.numero_factura)
+        self.assertEqual(sorted(facturas[1:]), [f'0002-{numero:08d}' for numero in (1, 3, 5, 7, 9)])
+        self.assertContains(response, '$1.025,00')
+
+        # Las consultas no dependen de cuántas ventas tiene la página.
+        Venta.objects.filter(pk__in=[v.pk for v in ventas[2:]]).update(deleted_at=datetime(2026, 5, 1, tzinfo=dt_timezone.utc))
+        _, consultas_dos_ventas = self._listado()
+        self.assertEqual(consultas, consultas_dos_ventas)
+
+    def test_metodos_sin_anotar_dan_lo_mismo(self):
+        anotada = Venta.anotar_listado(Venta.objects.all()).first()
+        venta = Venta.objects.get(pk=anotada.pk)
+        self.assertEqual(anotada.get_total_percepciones(), venta.get_total_percepciones())
+        self.assertEqual(sorted(anotada.get_facturas_relacionadas()), sorted(venta.get_facturas_relacionadas()))
+        self.assertEqual(anotada.get_numero_factura_display(), venta.get_numero_factura_display())
+
+
+class VentaPdfTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_superuser(username='pdfventa', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='pdfventa', password='testpass')
+        cliente = Cliente.objects.create(nombre='Pablo', apellido='Pdf', direccion='Dir 1', localidad='CABA')
+        self.venta = Venta.objects.create(
+            numero_pedido='VTA-PDF-1', cliente=cliente, valor_total=Decimal('1000'), sena=Decimal('100'),
+        )
+        self.url = reverse('comercial:generar_pdf_venta', args=[self.venta.pk])
+
+    def _pago(self, monto):
+        PagoVenta.objects.create(
+            venta=self.venta, monto=Decimal(monto), fecha_pago='2026-05-01', forma_pago='efectivo', created_by=self.user,
+        )
+
+    def test_pdf_se_arma_una_vez_por_contenido(self):
+        from . import pdf_venta
+
+        self._pago('200')
+        with patch.object(pdf_venta, 'construir_pdf', wraps=pdf_venta.construir_pdf) as construir:
+            primero = self.client_http.get(self.url)
+            segundo = self.client_http.get(self.url)
+            self.assertEqual(construir.call_count, 1)
+            self.assertEqual(primero.content, segundo.content)
+
+            self._pago('50')
+            tercero = self.client_http.get(self.url)
+            self.assertEqual(construir.call_count, 2)
+
+        self.assertEqual(tercero.status_code, 200)
+        self.assertEqual(tercero['Content-Type'], 'application/pdf')
+        self.assertIn('venta_VTA-PDF-1.pdf', tercero['Content-Disposition'])
+        self.assertTrue(tercero.content.startswith(b'%PDF'))
+
+    def test_otra_version_de_plantilla_no_usa_el_pdf_guardado(self):
+        from . import pdf_venta
+
+        with patch.object(pdf_venta, 'construir_pdf', wraps=pdf_venta.construir_pdf) as construir:
+            self.client_http.get(self.url)
+            with patch.object(pdf_venta, 'VERSION_PLANTILLA', pdf_venta.VERSION_PLANTILLA + 1):
+                self.client_http.get(self.url)
+                self.client_http.get(self.url)
+            self.assertEqual(construir.call_count, 2)
+
+    def test_filas_con_pagos_y_saldo(self):
+        from .pdf_venta import filas_venta
+
+        self._pago('200')
+        venta = Venta.objects.select_related('cliente').get(pk=self.venta.pk)
+        filas = filas_venta(venta, list(venta.pagos.all()))
+        self.assertEqual(filas['resumen'][4], ['Total Pagado', '$300,00'])
+        self.assertEqual(filas['resumen'][5], ['Saldo Pendiente', '$700,00'])
+        self.assertTrue(filas['con_saldo'])
+        self.assertEqual(len(filas['pagos']), 3)
+
+
+class CotizacionUSDTest(TestCase):
+    CSV = 'Fecha;Valor\n01/04/2026;1.000,00\n03/04/2026;1.100,00\n06/04/2026;1200\n;\nsin fecha;5\n'
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_superuser(username='cotizaciones', password='testpass')
+
+    def _importar(self, texto=None):
+        from . import cotizaciones, planillas
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return cotizaciones.importar(planillas.leer_texto(texto or self.CSV), fuente='BNA')
+
+    def test_importar_csv_y_actualizar(self):
+        from .models import CotizacionUSD
+
+        self.assertEqual(self._importar(), (3, 1))
+        self.assertEqual(CotizacionUSD.objects.get(fecha=date(2026, 4, 1)).valor, Decimal('1000.00'))
+        self.assertEqual(self._importar('fecha,cotizacion\n2026-04-01,1050.5\n'), (1, 0))
+        self.assertEqual(CotizacionUSD.objects.count(), 3)
+        self.assertEqual(CotizacionUSD.objects.get(fecha=date(2026, 4, 1)).valor, Decimal('1050.50'))
+
+    def test_importar_sin_destino_de_conflicto_como_mysql(self):
+        from django.db import connection
+        from django.db.models.constants import OnConflict
+        from .models import CotizacionUSD
+
+        def sin_destino(fields, on_conflict, update_fields, unique_fields):
+            # Como el ON DUPLICATE KEY UPDATE de MySQL: choca contra cualquier índice único.
+            self.assertEqual(list(unique_fields), [])
+            self.assertEqual(on_conflict, OnConflict.UPDATE)
+            asignaciones = ', '.join(f'{campo} = EXCLUDED.{campo}' for campo in map(connection.ops.quote_name, update_fields))
+            return f'ON CONFLICT DO UPDATE SET {asignaciones}'
+
+        with patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                patch.object(connection.ops, 'on_conflict_suffix_sql', side_effect=sin_destino):
+            self.assertEqual(self._importar(), (3, 1))
+            self.assertEqual(self._importar('fecha;valor\n01/04/2026;1050,5\n06/04/2026;1250\n'), (2, 0))
+        self.assertEqual(CotizacionUSD.objects.count(), 3)
+        self.assertEqual(CotizacionUSD.objects.get(fecha=date(2026, 4, 1)).valor, Decimal('1050.50'))
+        self.assertEqual(CotizacionUSD.objects.get(fecha=date(2026, 4, 6)).valor, Decimal('1250.00'))
+
+    def test_sin_encabezado_es_error(self):
+        from . import cotizaciones, planillas
+
+        with self.assertRaises(ValueError):
+            cotizaciones.importar(planillas.leer_texto('01/04/2026;1000\n'))
+
+    def test_serie_en_memoria_y_conversion(self):
+        from . import cotizaciones
+
+        self._importar()
+        serie = cotizaciones.serie()
+        with self.assertNumQueries(0):
+            self.assertIs(cotizaciones.serie(), serie)
+        # El sábado 4 y el domingo 5 usan la del viernes 3; antes del 1 no hay cotización.
+        self.assertEqual(serie.valor(date(2026, 4, 5)), Decimal('1100.00'))
+        self.assertIsNone(serie.valor(date(2026, 3, 31)))
+        self.assertEqual(
+            serie.convertir([
+                (date(2026, 4, 6), Decimal('2400')),
+                (date(2026, 3, 1), Decimal('100')),
+                (datetime(2026, 4, 4, 15, 30, tzinfo=dt_timezone.utc), Decimal('550')),
+                (date(2026, 4, 1), Decimal('1000')),
+                (None, Decimal('1')),
+            ]),
+            [Decimal('2.00'), None, Decimal('0.50'), Decimal('1.00'), None],
+        )
+
+        self._importar('fecha;valor\n05/04/2026;1150\n')
+        self.assertEqual(cotizaciones.serie().valor(date(2026, 4, 5)), Decimal('1150.00'))
+
+    def test_cotizacion_del_dia_en_la_base(self):
+        from .cotizaciones import cotizacion_del_dia
+
+        self._importar()
+        cliente = Cliente.objects.create(nombre='Dora', apellido='Dolar', direccion='Dir', localidad='CABA')
+        venta = Venta.objects.create(numero_pedido='VTA-COT', cliente=cliente, valor_total=Decimal('5000'), sena=0)
+        for dia in (2, 5, 9):
+            PagoVenta.objects.create(venta=venta, monto=Decimal('1100'), fecha_pago=date(2026, 4, dia),
+                                     forma_pago='efectivo', created_by=self.user)
+        cotizados = PagoVenta.objects.annotate(cotizacion=cotizacion_del_dia('fecha_pago')).order_by('fecha_pago')
+        self.assertEqual([pago.cotizacion for pago in cotizados], [Decimal('1000'), Decimal('1100'), Decimal('1200')])
+
+    def test_reporte_cobranzas_en_usd_a_la_fecha(self):
+        self._importar()
+        client_http = Client()
+        client_http.login(username='cotizaciones', password='testpass')
+        cliente = Cliente.objects.create(nombre='Dora', apellido='Dolar', direccion='Dir', localidad='CABA')
+        venta = Venta.objects.create(numero_pedido='VTA-COT-REP', cliente=cliente, valor_total=Decimal('5000'), sena=0)
+        PagoVenta.objects.create(venta=venta, monto=Decimal('2200'), fecha_pago=date(2026, 4, 4),
+                                 forma_pago='efectivo', created_by=self.user)
+        PagoVenta.objects.create(venta=venta, monto=Decimal('1000'), fecha_pago=date(2026, 4, 6), forma_pago='efectivo',
+                                 pago_en_dolares=True, monto_usd=Decimal('1'), cotizacion_usd=Decimal('1000'),
+                                 created_by=self.user)
+
+        response = client_http.post(reverse('comercial:reportes_cobranzas'), {'orden': 'fecha_asc'})
+
+        filas = response.context['reporte_data']['cobranzas']['lista']
+        self.assertEqual([fila['usd_a_la_fecha'] for fila in filas], [Decimal('2.00'), Decimal('1')])
+        self.assertContains(response, '≈ USD 2,00')
+
+
+class ReporteAntiguedadTest(TestCase):
+    HOY = date(2026, 10, 19)
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='antiguedad', password='testpass')
+        self.blanco = Cliente.objects.create(nombre='Ana', apellido='Blanco', razon_social='Blanco SRL', direccion='Dir', localidad='CABA')
+        self.negro = Cliente.objects.create(nombre='Beto', apellido='Negro', direccion='Dir', localidad='CABA')
+        # (cliente, días, saldo, en blanco)
+        for indice, (cliente, dias, saldo, con_factura) in enumerate([
+            (self.blanco, 0, '100', True),
+            (self.blanco, 30, '200', True),
+            (self.blanco, 31, '300', True),
+            (self.negro, 60, '400', False),
+            (self.negro, 61, '500', False),
+            (self.blanco, 90, '600', True),
+            (self.negro, 91, '700', False),
+            (self.negro, 400, '800', False),
+        ]):
+            self._venta(f'VTA-ANT-{indice}', cliente, dias, Decimal(saldo), con_factura)
+        # Sin saldo o borrada: no entran.
+        self._venta('VTA-ANT-PAGA', self.blanco, 10, Decimal('0'), True)
+        borrada = self._venta('VTA-ANT-BORRADA', self.blanco, 10, Decimal('900'), True)
+        Venta.objects.filter(pk=borrada.pk).update(deleted_at=datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+
+    def _venta(self, numero, cliente, dias, saldo, con_factura):
+        from datetime import time, timedelta
+        from django.utils import timezone
+
+        venta = Venta.objects.create(
+            numero_pedido=numero, cliente=cliente, valor_total=saldo + Decimal('50'), sena=Decimal('50'),
+            con_factura=con_factura,
+        )
+        fecha = timezone.make_aware(datetime.combine(self.HOY - timedelta(days=dias), time(12)))
+        Venta.objects.filter(pk=venta.pk).update(created_at=fecha)
+        return venta
+
+    def test_tramos_en_una_consulta(self):
+        from . import antiguedad
+
+        with self.assertNumQueries(1):
+            filas = antiguedad.por_cliente(antiguedad.ventas_abiertas(), self.HOY)
+        totales = antiguedad.totales_de(filas)
+
+        self.assertEqual(totales['total'], Decimal('3600'))
+        self.assertEqual(totales['cantidad'], 8)
+        self.assertEqual(totales['cantidad_clientes'], 2)
+        self.assertEqual(
+            [(tramo['clave'], tramo['saldo'], tramo['cantidad']) for tramo in totales['tramos']],
+            [('0_30', Decimal('300'), 2), ('31_60', Decimal('700'), 2),
+             ('61_90', Decimal('1100'), 2), ('mas_90', Decimal('1500'), 2)],
+        )
+
+    def test_por_cliente_y_filtros(self):
+        from . import antiguedad
+
+        with self.assertNumQueries(2):
+            filas = list(antiguedad.filas_cliente(antiguedad.por_cliente(antiguedad.ventas_abiertas(), self.HOY)))
+        self.assertEqual([(fila['cliente'], fila['total']) for fila in filas], [('Beto Negro', Decimal('2400')), ('Ana Blanco', Decimal('1200'))])
+        self.assertEqual(filas[0]['saldo_mas_90'], Decimal('1500'))
+        self.assertEqual(filas[1]['saldo_mas_90'], 0)
+
+        def total(**filtros):
+            return antiguedad.totales_de(antiguedad.por_cliente(antiguedad.ventas_abiertas(**filtros), self.HOY))['total']
+
+        self.assertEqual(total(tipo_factura_filtro=['blanco']), Decimal('1200'))
+        self.assertEqual(total(razon_social_filtro=['Blanco SRL']), Decimal('1200'))
+        self.assertEqual(total(cliente_filtro=[self.negro]), Decimal('2400'))
+        self.assertEqual(total(tipo_factura_filtro=['blanco', 'negro']), Decimal('3600'))
+
+    def test_vista_y_export(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        client_http = Client()
+        client_http.login(username='antiguedad', password='testpass')
+        with patch('django.utils.timezone.localdate', return_value=self.HOY):
+            response = client_http.get(reverse('comercial:reporte_antiguedad'), {'tipo_factura': 'negro'})
+            export = client_http.get(reverse('comercial:exportar_reporte_antiguedad_excel'), {'tipo_factura': 'negro'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['totales']['total'], Decimal('2400'))
+        self.assertEqual([fila['cliente'] for fila in response.context['clientes']], ['Beto Negro'])
+        self.assertContains(response, 'tipo_factura=negro')
+
+        libro = load_workbook(BytesIO(b''.join(export.streaming_content)))
+        por_cliente, ventas = libro.worksheets
+        self.assertIn('Beto Negro', [celda.value for celda in por_cliente['A']])
+        filas = list(ventas.iter_rows(min_row=2, values_only=True))
+        self.assertEqual([(fila[1], fila[7], fila[8]) for fila in filas], [
+            ('VTA-ANT-7', 400, 'Más de 90 días'),
+            ('VTA-ANT-6', 91, 'Más de 90 días'),
+            ('VTA-ANT-4', 61, '61 a 90 días'),
+            ('VTA-ANT-3', 60, '31 a 60 días'),
+        ])
+
+
+class GastosConsultaCompartidaTest(TestCase):
+    def setUp(self):
+        from .models import TipoGasto
+
+        self.user = User.objects.create_superuser(username='gastos-sql', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='gastos-sql', password='testpass')
+        fletes = TipoCuenta.objects.create(tipo='fletes', descripcion='Fletes')
+        varios = TipoCuenta.objects.create(tipo='varios', descripcion='Varios')
+        self.flete = Cuenta.objects.create(nombre='Flete Sur', tipo_cuenta=fletes)
+        self.luz = Cuenta.objects.create(nombre='Luz', tipo_cuenta=varios)
+        self.combustible = TipoGasto.objects.create(nombre='Combustible', tipo_cuenta=fletes)
+        # 45 gastos en 15 días (tres por día) para cruzar páginas dentro de una misma fecha.
+        for indice in range(45):
+            Compra.objects.create(
+                numero_pedido=f'G-{indice:02d}', cuenta=self.flete if indice % 3 else self.luz,
+                tipo_gasto=self.combustible if indice % 3 else None,
+                fecha_pago=date(2026, 5, 1 + indice // 3), valor_total=Decimal('100') + indice,
+                con_factura=indice % 2 == 0, created_by=self.user,
+            )
+        Compra.objects.filter(numero_pedido='G-44').update(deleted_at=datetime(2026, 6, 1, tzinfo=dt_timezone.utc))
+
+    def _esperados(self):
+        return list(Compra.objects.filter(deleted_at__isnull=True).order_by('-fecha_pago', '-pk').values_list('pk', flat=True))
+
+    def test_compras_list_pagina_por_clave(self):
+        vistos, url, consultas = [], reverse('comercial:compras_list'), []
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client_http.get(url)
+        while url:
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client_http.get(url)
+            consultas.append(len(capturadas))
+            vistos += [compra.pk for compra in response.context['compras']]
+            url = response.context.get('siguiente_url')
+
+        self.assertEqual(vistos, self._esperados())
+        self.assertEqual(len(consultas), 3)
+        # Una página profunda no suma consultas (ni COUNT ni OFFSET).
+        self.assertEqual(consultas[0], consultas[-1])
+        self.assertIn('primera_url', response.context)
+        self.assertEqual(response.context['totales']['cantidad'], 44)
+
+    def test_compras_list_filtros_y_cursor_invalido(self):
+        response = self.client_http.get(reverse('comercial:compras_list'), {'con_factura': 'no', 'q': 'luz', 'desde': 'x'})
+        compras = response.context['compras']
+        self.assertTrue(compras)
+        self.assertTrue(all(not compra.con_factura and compra.cuenta_id == self.luz.pk for compra in compras))
+        self.assertEqual(response.context['totales']['cantidad'], len(compras))
+
+    def test_reporte_y_export_comparten_filtros(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        from . import gastos
+
+        compras = gastos.construir(tipo_factura_filtro=['negro'])
+        with self.assertNumQueries(1):
+            totales = gastos.totales(compras)
+        negras = Compra.objects.filter(deleted_at__isnull=True, con_factura=False)
+        self.assertEqual(totales['total_negro'], sum(c.valor_total for c in negras))
+        self.assertEqual((totales['total_blanco'], totales['cantidad']), (0, negras.count()))
+
+        response = self.client_http.post(reverse('comercial:reportes_gastos'), {'tipo_factura': ['negro']})
+        datos = response.context['reporte_data']['gastos']
+        self.assertEqual(datos['total'], totales['total'])
+        self.assertEqual(len(datos['lista']), 22)
+        self.assertIsNone(datos['siguiente'])
+        self.assertEqual(
+            [(fila['nombre'], fila['cantidad']) for fila in datos['por_tipo_gasto']],
+            [('Combustible', 15), ('Sin tipo', 7)],
+        )
+        self.assertEqual({fila['nombre'] for fila in datos['por_tipo_cuenta']}, {'Fletes', 'Varios'})
+
+        hoja = load_workbook(BytesIO(b''.join(
+            self.client_http.get(reverse('comercial:exportar_reporte_gastos_excel')).streaming_content
+        ))).active
+        self.assertEqual(hoja['B5'].value, totales['total'])
+        filas = [fila for fila in hoja.iter_rows(min_row=8, values_only=True) if fila[0]]
+        self.assertEqual(len(filas), 22)
+        self.assertEqual({fila[6] for fila in filas}, {'Negro'})
+
+    def test_reporte_pagina_por_clave(self):
+        from . import gastos
+
+        primera, siguiente = gastos.pagina(gastos.construir(), limite=20)
+        response = self.client_http.post(reverse('comercial:reportes_gastos'), {'desde': siguiente})
+        datos = response.context['reporte_data']['gastos']
+        self.assertFalse(datos['es_primera'])
+        pedidos = list(Compra.objects.filter(pk__in=self._esperados()).order_by('-fecha_pago', '-pk').values_list('numero_pedido', flat=True))
+        self.assertEqual([c.numero_pedido for c in primera] + [fila['numero_pedido'] for fila in datos['lista']], pedidos)
+
+
+class ManagersEliminacionLogicaTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='vivos', password='testpass')
+        self.client_http = Client()
+        self.client_http.login(username='vivos', password='testpass')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='Vivo', direccion='Calle 1', localidad='CABA')
+        self.viva = Venta.objects.create(numero_pedido='VIVA', cliente=self.cliente, valor_total=1000, sena=0)
+        self.eliminada = Venta.objects.create(numero_pedido='ELIMINADA', cliente=self.cliente, valor_total=1000, sena=0)
+        self.eliminada.delete()
+        tipo = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        self.cuenta = Cuenta.objects.create(nombre='Proveedor', tipo_cuenta=tipo)
+        self.compra = Compra.objects.create(
+            numero_pedido='C-1', cuenta=self.cuenta, fecha_pago=date(2026, 5, 4), valor_total=Decimal('500'), created_by=self.user,
+        )
+
+    def test_alive_excluye_eliminados_y_all_objects_los_incluye(self):
+        self.assertEqual(list(Venta.alive.values_list('numero_pedido', flat=True)), ['VIVA'])
+        self.assertEqual(set(Venta.all_objects.values_list('numero_pedido', flat=True)), {'VIVA', 'ELIMINADA'})
+        # `objects` sigue sin filtrar (validación de únicos, admin).
+        self.assertEqual(Venta.objects.count(), 2)
+        self.assertEqual(list(self.cliente.venta_set.alive()), [self.viva])
+
+    def test_vistas_devuelven_404_para_eliminados(self):
+        for nombre in ('venta_detail', 'venta_edit', 'registrar_pago'):
+            self.assertEqual(self.client_http.get(reverse(f'comercial:{nombre}', args=[self.eliminada.pk])).status_code, 404, nombre)
+        self.assertEqual(self.client_http.get(reverse('comercial:venta_detail', args=[self.viva.pk])).status_code, 200)
+
+        self.compra.delete()
+        self.assertEqual(self.client_http.get(reverse('comercial:compra_edit', args=[self.compra.pk])).status_code, 404)
+
+    def test_formulario_de_compra_conserva_la_cuenta_eliminada(self):
+        from .forms import CompraForm
+
+        self.cuenta.delete()
+        self.assertNotIn(self.cuenta, CompraForm().fields['cuenta'].queryset)
+        self.assertIn(self.cuenta, CompraForm(instance=self.compra).fields['cuenta'].queryset)
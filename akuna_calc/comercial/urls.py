@@ -14,6 +14,8 @@ urlpatterns = [
     path('ventas/<int:pk>/editar/', views.venta_edit, name='venta_edit'),
     path('ventas/<int:pk>/eliminar/', views.venta_delete, name='venta_delete'),
     path('ventas/<int:pk>/pago/', views.registrar_pago, name='registrar_pago'),
+    path('ventas/pagos-masivos/', views.pagos_masivos, name='pagos_masivos'),
+    path('conciliacion-bancaria/', views.conciliacion_bancaria, name='conciliacion_bancaria'),
     path('ventas/<int:pk>/pdf/', views.generar_pdf_venta, name='generar_pdf_venta'),
     path('ventas/<int:pk>/recibo-pdf/', views.descargar_pdf_recibo_venta, name='descargar_pdf_recibo_venta'),
     path('recibos/<int:pk>/pdf/', views.descargar_pdf_recibo, name='descargar_pdf_recibo'),
@@ -56,6 +58,9 @@ urlpatterns = [
     path('reportes/', views.reportes, name='reportes'),
     path('reportes/cobranzas/', views.reportes_cobranzas, name='reportes_cobranzas'),
     path('reportes/exportar-excel/', views.exportar_reporte_excel, name='exportar_reporte_excel'),
+    path('reportes/cobranzas/exportar-excel/', views.exportar_reporte_cobranzas_excel, name='exportar_reporte_cobranzas_excel'),
+    path('reportes/antiguedad/', views.reporte_antiguedad, name='reporte_antiguedad'),
+    path('reportes/antiguedad/exportar-excel/', views.exportar_reporte_antiguedad_excel, name='exportar_reporte_antiguedad_excel'),
     path('reportes/gastos/', views.reportes_gastos, name='reportes_gastos'),
     path('reportes/gastos/exportar-excel/', views.exportar_reporte_gastos_excel, name='exportar_reporte_gastos_excel'),
     path('reportes/proveedores/', views.reportes_proveedores, name='reportes_proveedores'),
@@ -1,5 +1,5 @@
+import json
 import logging
-from collections import defaultdict
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
@@ -9,9 +9,14 @@ from django.db.models import Sum, Q
 from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from datetime import datetime
 from decimal import Decimal
+from core.busqueda import buscar as buscar_texto
 from core.navigation import append_return_to, resolve_return_url
-from .models import Cliente, Venta, Cuenta, Compra, TipoCuenta, TipoGasto, PagoVenta, PagoCompra, Percepcion, Recibo
-from .forms import ClienteForm, VentaForm, CuentaForm, CompraForm, ReporteForm, ReporteCobranzasForm, ReporteProveedorForm
+from . import antiguedad as reporte_antiguedad_saldos
+from . import cobranzas as reporte_cobranzas
+from . import gastos as reporte_gastos
+from .cuenta_corriente import anotar_resumen, pagina_movimientos, resumen as resumen_cuenta_corriente
+from .models import Cliente, Venta, Cuenta, Compra, TipoCuenta, TipoGasto, PagoVenta, PagoCompra, Percepcion, Recibo, rango_de_dias
+from .forms import ClienteForm, VentaForm, CuentaForm, CompraForm, ReporteForm, ReporteAntiguedadForm, ReporteCobranzasForm, ReporteProveedorForm
 
 
 logger = logging.getLogger(__name__)
@@ -123,150 +128,43 @@ def _resolver_monto_pago_venta(monto, pago_en_dolares, monto_usd, cotizacion_usd
 
 @login_required
 def dashboard_comercial(request):
-    from datetime import datetime, timedelta
-    from django.db.models.functions import TruncMonth
+    from datetime import datetime, time, timedelta
     import json
     from django.core.serializers.json import DjangoJSONEncoder
-    
-    # Estad�sticas generales
-    total_ventas = Venta.objects.filter(deleted_at__isnull=True).aggregate(Sum('valor_total'))['valor_total__sum'] or 0
-    total_compras = Compra.objects.filter(deleted_at__isnull=True).aggregate(Sum('valor_total'))['valor_total__sum'] or 0
-    ventas_pendientes = Venta.objects.filter(deleted_at__isnull=True, estado='pendiente').count()
-    
-    # �ltimos 6 meses
-    hace_6_meses = datetime.now() - timedelta(days=180)
-    
-    # Ventas por mes
-    ventas_por_mes = Venta.objects.filter(deleted_at__isnull=True, created_at__gte=hace_6_meses).annotate(
-        mes=TruncMonth('created_at')
-    ).values('mes').annotate(
-        total=Sum('valor_total')
-    ).order_by('mes')
-    
-    # Compras por mes
-    compras_por_mes = Compra.objects.filter(deleted_at__isnull=True, fecha_pago__gte=hace_6_meses).annotate(
-        mes=TruncMonth('fecha_pago')
-    ).values('mes').annotate(
-        total=Sum('valor_total')
-    ).order_by('mes')
-    
-    # Top 5 clientes
-    top_clientes = Venta.objects.filter(deleted_at__isnull=True).values('cliente__nombre', 'cliente__apellido').annotate(
-        total=Sum('valor_total')
-    ).order_by('-total')[:5]
-    
-    # Compras por tipo de cuenta
-    compras_por_tipo_raw = Compra.objects.filter(deleted_at__isnull=True).values('cuenta__tipo_cuenta__id', 'cuenta__tipo_cuenta__tipo').annotate(
-        total=Sum('valor_total')
-    ).order_by('-total')
-    
-    # Formatear datos para el gr�fico
-    compras_por_tipo = []
-    for item in compras_por_tipo_raw:
-        tipo_cuenta = TipoCuenta.objects.filter(id=item['cuenta__tipo_cuenta__id']).first()
-        if tipo_cuenta:
-            compras_por_tipo.append({
-                'tipo': tipo_cuenta.get_tipo_display(),
-                'total': float(item['total'])
-            })
-    
+    from django.utils import timezone
+    from . import resumenes
+
+    # Todo sale de los resúmenes mensuales: unas pocas filas en lugar de agregar
+    # ventas, pagos y compras completas en cada visita.
+    desde = resumenes.mes_de(timezone.localdate() - timedelta(days=180))
+
+    def serie(filas):
+        # El gráfico arma la etiqueta con `new Date(mes)`: va el inicio del mes en hora local.
+        return json.dumps(
+            [{'mes': timezone.make_aware(datetime.combine(fila['mes'], time.min)), 'total': fila['total']} for fila in filas],
+            cls=DjangoJSONEncoder,
+        )
+
+    etiquetas_tipo = dict(TipoCuenta.TIPOS_CUENTA)
+    compras_por_tipo = [
+        {'tipo': etiquetas_tipo.get(tipo, tipo), 'total': float(total)}
+        for tipo, total in resumenes.compras_por_tipo()
+    ]
+
     context = {
-        'total_ventas': total_ventas,
-        'total_compras': total_compras,
-        'ventas_pendientes': ventas_pendientes,
-        'clientes_count': Cliente.objects.filter(deleted_at__isnull=True).count(),
-        'ventas_por_mes': json.dumps(list(ventas_por_mes), cls=DjangoJSONEncoder),
-        'compras_por_mes': json.dumps(list(compras_por_mes), cls=DjangoJSONEncoder),
-        'top_clientes': list(top_clientes),
+        **resumenes.totales(),
+        'clientes_count': Cliente.alive.count(),
+        'ventas_por_mes': serie(resumenes.ventas_por_mes(desde)),
+        'compras_por_mes': serie(resumenes.compras_por_mes(desde)),
+        'top_clientes': resumenes.top_clientes(),
         'compras_por_tipo': json.dumps(compras_por_tipo),
     }
     return render(request, 'comercial/dashboard.html', context)
 
 
 def construir_cuenta_corriente_proveedor(proveedor):
-    compras = list(
-        Compra.objects.filter(
-            deleted_at__isnull=True,
-            cuenta=proveedor,
-        ).order_by('fecha_pago', 'created_at', 'pk')
-    )
-    pagos = list(
-        PagoCompra.objects.filter(
-            compra__deleted_at__isnull=True,
-            compra__cuenta=proveedor,
-        ).select_related('compra').order_by('fecha_pago', 'created_at', 'pk')
-    )
-    pagos_por_compra = defaultdict(list)
-    for pago in pagos:
-        pagos_por_compra[pago.compra_id].append(pago)
-
-    movimientos = []
-    saldo_acumulado = Decimal('0')
-
-    for compra in compras:
-        saldo_acumulado += compra.valor_total
-        movimientos.append({
-            'fecha': compra.fecha_pago,
-            'tipo': 'compra',
-            'descripcion': f'Compra #{compra.numero_pedido}',
-            'referencia': compra.numero_factura or compra.numero_pedido,
-            'forma_pago': '-',
-            'debe': compra.valor_total,
-            'haber': Decimal('0'),
-            'saldo': saldo_acumulado,
-            'compra': compra,
-        })
-
-        if compra.sena > 0:
-            saldo_acumulado -= compra.sena
-            movimientos.append({
-                'fecha': compra.fecha_pago,
-                'tipo': 'sena',
-                'descripcion': f'Seña inicial de compra #{compra.numero_pedido}',
-                'referencia': compra.numero_factura or compra.numero_pedido,
-                'forma_pago': compra.get_forma_pago_sena_display() if compra.forma_pago_sena else 'Sin informar',
-                'debe': Decimal('0'),
-                'haber': compra.sena,
-                'saldo': saldo_acumulado,
-                'compra': compra,
-            })
-
-        for pago in pagos_por_compra.get(compra.pk, []):
-            saldo_acumulado -= pago.monto
-            movimientos.append({
-                'fecha': pago.fecha_pago,
-                'tipo': 'pago',
-                'descripcion': f'Pago de compra #{compra.numero_pedido}',
-                'referencia': pago.numero_factura or compra.numero_pedido,
-                'forma_pago': pago.get_forma_pago_display(),
-                'debe': Decimal('0'),
-                'haber': pago.monto,
-                'saldo': saldo_acumulado,
-                'compra': compra,
-                'pago': pago,
-            })
-
-    movimientos.sort(key=lambda item: (item['fecha'], 0 if item['tipo'] == 'compra' else 1, item['descripcion']))
-
-    saldo_acumulado = Decimal('0')
-    for movimiento in movimientos:
-        saldo_acumulado += movimiento['debe'] - movimiento['haber']
-        movimiento['saldo'] = saldo_acumulado
-
-    total_compras = sum((compra.valor_total for compra in compras), Decimal('0'))
-    total_senas = sum((compra.sena for compra in compras), Decimal('0'))
-    total_pagos = sum((pago.monto for pago in pagos), Decimal('0'))
-    saldo_actual = total_compras - total_senas - total_pagos
-
-    return {
-        'proveedor': proveedor,
-        'compras': compras,
-        'movimientos': movimientos,
-        'total_compras': total_compras,
-        'total_senas': total_senas,
-        'total_pagos': total_pagos,
-        'saldo_actual': saldo_actual,
-    }
+    """Cuenta corriente de un proveedor leída del libro `MovimientoCuenta` (un agregado)."""
+    return resumen_cuenta_corriente(anotar_resumen(Cuenta.objects.filter(pk=proveedor.pk)).get())
 
 
 # VENTAS
@@ -275,7 +173,7 @@ def ventas_list(request):
     from django.core.paginator import Paginator
     from django.db.models import Case, When, Value, IntegerField, Sum, Count, Exists, OuterRef
 
-    ventas = Venta.objects.filter(deleted_at__isnull=True).select_related('cliente', 'factura_electronica').prefetch_related('pagos', 'percepciones').annotate(
+    ventas = Venta.alive.select_related('cliente').annotate(
         tiene_pagos=Exists(PagoVenta.objects.filter(venta_id=OuterRef('pk'))),
         tiene_percepciones=Exists(Percepcion.objects.filter(venta_id=OuterRef('pk'))),
     )
@@ -301,14 +199,8 @@ def ventas_list(request):
         ventas = ventas.filter(con_factura=False)
 
     if buscar:
-        ventas = ventas.filter(
-            Q(numero_pedido__icontains=buscar) |
-            Q(cliente__nombre__icontains=buscar) |
-            Q(cliente__apellido__icontains=buscar) |
-            Q(cliente__razon_social__icontains=buscar) |
-            Q(numero_factura__icontains=buscar) |
-            Q(pagos__numero_factura__icontains=buscar)
-        ).distinct()
+        # Número de pedido, facturas (propia y de pagos) y cliente: índice de texto completo.
+        ventas = buscar_texto(ventas, buscar)
 
     if razon_social:
         ventas = ventas.filter(cliente__razon_social__icontains=razon_social)
@@ -360,11 +252,13 @@ def ventas_list(request):
             ventas = ventas.order_by('factura_order', 'numero_factura')
         else:
             ventas = ventas.order_by('factura_order', '-numero_factura')
+    elif buscar and 'orden' not in request.GET:
+        ventas = ventas.order_by('-relevancia', '-created_at')
     else:
         ventas = ventas.order_by(orden)
 
     # Paginaci�n
-    paginator = Paginator(ventas, 20)
+    paginator = Paginator(Venta.anotar_listado(ventas), 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
@@ -382,7 +276,7 @@ def ventas_list(request):
         'fecha_hasta': fecha_hasta,
         'tipo_fecha': tipo_fecha,
         'orden_actual': orden,
-        'razones_sociales': Cliente.objects.filter(deleted_at__isnull=True, razon_social__isnull=False).exclude(razon_social='').values_list('razon_social', flat=True).distinct().order_by('razon_social'),
+        'razones_sociales': Cliente.alive.filter(razon_social__isnull=False).exclude(razon_social='').values_list('razon_social', flat=True).distinct().order_by('razon_social'),
         'total_monto': total_monto,
         'total_saldo': total_saldo,
         'total_count': total_count,
@@ -406,10 +300,9 @@ def venta_create(request):
             tipo_factura = form.cleaned_data.get('tipo_factura')
             
             if numero_factura:
-                venta_existente = Venta.objects.filter(
+                venta_existente = Venta.alive.filter(
                     numero_factura=numero_factura,
                     tipo_factura=tipo_factura,
-                    deleted_at__isnull=True
                 ).exists()
                 
                 if venta_existente:
@@ -426,7 +319,7 @@ def venta_create(request):
 
 @login_required
 def venta_edit(request, pk):
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(Venta.alive, pk=pk)
     return_url = _ventas_return_url(request)
     if request.method == 'POST':
         form = VentaForm(request.POST, instance=venta)
@@ -436,10 +329,9 @@ def venta_edit(request, pk):
             tipo_factura = form.cleaned_data.get('tipo_factura')
             
             if numero_factura:
-                venta_existente = Venta.objects.filter(
+                venta_existente = Venta.alive.filter(
                     numero_factura=numero_factura,
                     tipo_factura=tipo_factura,
-                    deleted_at__isnull=True
                 ).exclude(pk=pk).exists()
                 
                 if venta_existente:
@@ -456,7 +348,7 @@ def venta_edit(request, pk):
 
 @login_required
 def venta_delete(request, pk):
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(Venta.alive, pk=pk)
     return_url = _ventas_return_url(request)
     if request.method == 'POST':
         venta.delete()  # Eliminado l�gico
@@ -468,7 +360,7 @@ def venta_delete(request, pk):
 @login_required
 def venta_detail(request, pk):
     from django.utils import timezone
-    venta = get_object_or_404(Venta.objects.select_related('cliente').prefetch_related('pagos__retenciones', 'recibos'), pk=pk)
+    venta = get_object_or_404(Venta.alive.select_related('cliente').prefetch_related('pagos__retenciones', 'recibos'), pk=pk)
     pagos = venta.pagos.all().order_by('fecha_pago')
     total_pagado = venta.sena + sum(p.monto for p in pagos)
     total = venta.get_total_con_percepciones()
@@ -494,7 +386,7 @@ def venta_detail(request, pk):
 
 @login_required
 def duplicar_venta(request, pk):
-    original = get_object_or_404(Venta, pk=pk, deleted_at__isnull=True)
+    original = get_object_or_404(Venta.alive, pk=pk)
     nueva = Venta.objects.create(
         numero_pedido=original.numero_pedido,
         cliente=original.cliente,
@@ -518,10 +410,10 @@ def duplicar_venta(request, pk):
 def guardar_nota_venta(request, pk):
     if request.method != 'POST':
         return JsonResponse({'error': 'Metodo no permitido'}, status=405)
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(Venta.alive, pk=pk)
     try:
         venta.notas_internas = request.POST.get('nota', '')
-        venta.save()
+        venta.save(update_fields=['notas_internas', 'updated_at'])
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
@@ -530,7 +422,7 @@ def guardar_nota_venta(request, pk):
 @login_required
 def registrar_pago(request, pk):
     from .models import Retencion
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(Venta.alive, pk=pk)
     
     if request.method == 'POST':
         monto = request.POST.get('monto')
@@ -595,10 +487,8 @@ def registrar_pago(request, pk):
                             importe_retenido=importe_decimal,
                             fecha_comprobante=fecha_pago
                         )
-            
-            # Recalcular saldo
-            venta.save()
 
+            # El pago ya descontó su monto del saldo (también en `venta`).
             try:
                 Recibo.obtener_o_crear_desde_pago(pago, force=True)
             except Exception as recibo_error:
@@ -617,12 +507,133 @@ def registrar_pago(request, pk):
     return redirect('comercial:venta_detail', pk=pk)
 
 
+def _leer_filas_pagos_masivos(request):
+    from . import pagos_masivos
+
+    if request.FILES.get('archivo'):
+        return pagos_masivos.leer_archivo(request.FILES['archivo'])
+    return pagos_masivos.leer_texto(request.POST.get('texto', ''))
+
+
+@login_required
+def pagos_masivos(request):
+    """Carga de muchos pagos de ventas juntos: se validan todas las filas y se escriben en una transacción.
+
+    Con el formulario, `validar` muestra la vista previa y `confirmar` registra.
+    Con un cuerpo JSON (`{"filas": [{"pedido", "fecha", "monto", "forma_pago"}], "con_factura"}`)
+    valida y registra en el mismo pedido.
+    """
+    from . import pagos_masivos as carga
+
+    if request.method == 'POST' and request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+            filas = [
+                carga.FilaPago(linea, fila.get('pedido'), fila.get('fecha'), fila.get('monto'), fila.get('forma_pago'))
+                for linea, fila in enumerate(data.get('filas') or [], 1)
+            ]
+        except (json.JSONDecodeError, AttributeError, TypeError):
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+        if not filas:
+            return JsonResponse({'error': 'No hay filas para registrar'}, status=400)
+        pagos = carga.registrar(filas, bool(data.get('con_factura')), request.user)
+        if not pagos:
+            return JsonResponse({'error': 'Hay filas con errores', 'filas': [fila.como_dict() for fila in filas]}, status=400)
+        recibos = dict(Recibo.objects.filter(pago__in=pagos).values_list('pago_id', 'numero'))
+        return JsonResponse({
+            'pagos': [
+                {'id': pago.pk, 'venta_id': pago.venta_id, 'monto': str(pago.monto), 'recibo': recibos.get(pago.pk)}
+                for pago in pagos
+            ],
+        }, status=201)
+
+    contexto = {'con_factura': request.POST.get('con_factura') == 'true', 'texto': request.POST.get('texto', '')}
+    if request.method == 'POST':
+        try:
+            filas = _leer_filas_pagos_masivos(request)
+        except Exception as e:
+            messages.error(request, f'No se pudo leer el archivo: {e}')
+            return render(request, 'comercial/ventas/pagos_masivos.html', contexto)
+        if not filas:
+            messages.error(request, 'No hay filas para registrar.')
+            return render(request, 'comercial/ventas/pagos_masivos.html', contexto)
+
+        if request.POST.get('accion') == 'confirmar':
+            pagos = carga.registrar(filas, contexto['con_factura'], request.user)
+            if pagos:
+                total = sum((pago.monto for pago in pagos), Decimal('0'))
+                messages.success(request, f'{len(pagos)} pagos registrados por ${total}. Los recibos PDF se generan en segundo plano.')
+                saldadas = sorted({pago.venta.numero_pedido for pago in pagos if pago.venta.saldo <= 0})
+                if saldadas:
+                    messages.info(request, f'Quedaron con saldo 0: {", ".join(saldadas)}')
+                return redirect('comercial:ventas_list')
+        else:
+            carga.validar(filas)
+
+        contexto.update({
+            'filas': filas,
+            'hay_errores': any(fila.errores for fila in filas),
+            'total': sum((fila.monto for fila in filas if fila.monto), Decimal('0')),
+        })
+        if not contexto['hay_errores']:
+            contexto['texto'] = '\n'.join(fila.como_texto() for fila in filas)
+    return render(request, 'comercial/ventas/pagos_masivos.html', contexto)
+
+
+@login_required
+def conciliacion_bancaria(request):
+    """Propone a qué venta o compra corresponde cada movimiento del extracto y registra los confirmados como pagos."""
+    from . import conciliacion_bancaria as conciliacion
+    from .planillas import leer_archivo
+
+    if request.method == 'POST' and request.POST.get('accion') == 'registrar':
+        confirmados = [
+            valor for valor in map(conciliacion.leer_valor, request.POST.getlist('confirmar')) if valor
+        ]
+        if not confirmados:
+            messages.error(request, 'No se marcó ningún movimiento para registrar.')
+            return redirect('comercial:conciliacion_bancaria')
+        pagos_venta, pagos_compra, errores = conciliacion.registrar(confirmados, request.user)
+        if errores:
+            for error in errores:
+                messages.error(request, error)
+            messages.error(request, 'No se registró ningún pago. Volvé a subir el extracto.')
+        else:
+            messages.success(
+                request,
+                f'Registrados {len(pagos_venta)} cobros de ventas y {len(pagos_compra)} pagos de compras. '
+                'Los recibos PDF se generan en segundo plano.',
+            )
+        return redirect('comercial:conciliacion_bancaria')
+
+    contexto = {}
+    if request.method == 'POST' and request.FILES.get('archivo'):
+        try:
+            movimientos, ignoradas = conciliacion.leer_extracto(leer_archivo(request.FILES['archivo']))
+        except Exception as e:
+            messages.error(request, f'No se pudo leer el extracto: {e}')
+            return redirect('comercial:conciliacion_bancaria')
+        propuestas = conciliacion.proponer(movimientos)
+        con_documento = [propuesta for propuesta in propuestas if propuesta.documento]
+        sin_documento = [propuesta for propuesta in propuestas if not propuesta.documento]
+        contexto = {
+            'archivo': request.FILES['archivo'].name,
+            'cantidad_movimientos': len(movimientos),
+            'ignoradas': ignoradas,
+            'propuestas': con_documento,
+            'seguras': sum(1 for propuesta in con_documento if propuesta.segura),
+            'sin_documento': sin_documento[:200],
+            'cantidad_sin_documento': len(sin_documento),
+        }
+    return render(request, 'comercial/conciliacion/bancaria.html', contexto)
+
+
 @login_required
 def cambiar_estado_venta(request, pk):
     if request.method != 'POST':
         return JsonResponse({'error': 'Metodo no permitido'}, status=405)
 
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(Venta.alive, pk=pk)
     nuevo_estado = request.POST.get('estado')
 
     estados_validos = [e[0] for e in Venta.ESTADO_CHOICES]
@@ -630,7 +641,7 @@ def cambiar_estado_venta(request, pk):
         return JsonResponse({'error': 'Estado no valido'}, status=400)
 
     venta.estado = nuevo_estado
-    venta.save()
+    venta.save(update_fields=['estado', 'updated_at'])
 
     return JsonResponse({'success': True, 'nuevo_estado': venta.get_estado_display()})
 
@@ -638,195 +649,23 @@ def cambiar_estado_venta(request, pk):
 @login_required
 def generar_pdf_venta(request, pk):
     from django.http import HttpResponse
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-    from reportlab.pdfgen import canvas
-    
-    venta = get_object_or_404(Venta.objects.select_related('cliente').prefetch_related('pagos'), pk=pk)
-    pagos = venta.pagos.all().order_by('-fecha_pago')
-    total_pagado = venta.sena + sum(p.monto for p in pagos)
-    
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
+    from .pdf_venta import pdf_venta
+
+    venta = get_object_or_404(Venta.alive.select_related('cliente'), pk=pk)
+    response = HttpResponse(pdf_venta(venta), content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="venta_{venta.numero_pedido}.pdf"'
-    
-    # Crear PDF
-    doc = SimpleDocTemplate(response, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Estilos personalizados
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1e40af'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#64748b'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#1e293b'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Encabezado
-    elements.append(Paragraph("AKUNA ABERTURAS", title_style))
-    elements.append(Paragraph("Detalle de Venta", subtitle_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Informaci�n de la venta
-    info_data = [
-        ['Pedido N�:', venta.numero_pedido, 'Fecha:', venta.created_at.strftime('%d/%m/%Y')],
-        ['Cliente:', f"{venta.cliente}", 'Estado:', venta.get_estado_display()],
-    ]
-    
-    if venta.numero_factura:
-        info_data.append(['Factura:', venta.get_numero_factura_display(), 'Tipo:', 'Blanco' if venta.con_factura else 'Negro'])
-    
-    info_table = Table(info_data, colWidths=[1.2*inch, 2.5*inch, 1*inch, 1.8*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f1f5f9')),
-        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f1f5f9')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1e293b')),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-    ]))
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Resumen financiero
-    elements.append(Paragraph("Resumen Financiero", heading_style))
-    
-    def format_currency(value):
-        return f"${value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-    
-    resumen_data = [
-        ['Concepto', 'Monto'],
-        ['Valor Total', format_currency(venta.valor_total)],
-        ['Se�a Inicial', format_currency(venta.sena)],
-        ['Pagos Adicionales', format_currency(sum(p.monto for p in pagos))],
-        ['Total Pagado', format_currency(total_pagado)],
-        ['Saldo Pendiente', format_currency(venta.saldo)],
-    ]
-    
-    resumen_table = Table(resumen_data, colWidths=[4*inch, 2.5*inch])
-    resumen_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#dbeafe')),
-        ('BACKGROUND', (0, 4), (-1, 4), colors.HexColor('#dcfce7')),
-        ('FONTNAME', (0, 4), (-1, 4), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, 5), (-1, 5), colors.HexColor('#fef3c7') if venta.saldo > 0 else colors.HexColor('#dcfce7')),
-        ('FONTNAME', (0, 5), (-1, 5), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 5), (-1, 5), 12),
-    ]))
-    elements.append(resumen_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Historial de pagos
-    if pagos.exists() or venta.sena > 0:
-        elements.append(Paragraph("Historial de Pagos", heading_style))
-        
-        pagos_data = [['Fecha', 'Concepto', 'Forma de Pago', 'N� Factura', 'Monto']]
-        
-        # Se�a inicial
-        pagos_data.append([
-            venta.created_at.strftime('%d/%m/%Y'),
-            'Se�a Inicial',
-            '-',
-            venta.numero_factura or '-',
-            format_currency(venta.sena)
-        ])
-        
-        # Pagos adicionales
-        for pago in pagos:
-            pagos_data.append([
-                pago.fecha_pago.strftime('%d/%m/%Y'),
-                'Pago',
-                pago.get_forma_pago_display(),
-                pago.numero_factura or '-',
-                format_currency(pago.monto)
-            ])
-        
-        pagos_table = Table(pagos_data, colWidths=[1.1*inch, 1.5*inch, 1.3*inch, 1.3*inch, 1.3*inch])
-        pagos_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (4, 0), (4, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
-        ]))
-        elements.append(pagos_table)
-    
-    # Pie de p�gina
-    elements.append(Spacer(1, 0.5*inch))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#64748b'),
-        alignment=TA_CENTER
-    )
-    elements.append(Paragraph(f"Documento generado el {datetime.now().strftime('%d/%m/%Y %H:%M')}", footer_style))
-    elements.append(Paragraph("Akuna Aberturas - Sistema de Gesti�n", footer_style))
-    
-    # Construir PDF
-    doc.build(elements)
     return response
 
 
 # CLIENTES
 @login_required
 def clientes_list(request):
-    clientes = Cliente.objects.filter(deleted_at__isnull=True).all()
+    clientes = Cliente.alive.all()
     
     # Filtros
     buscar = request.GET.get('q', '')
     if buscar:
-        clientes = clientes.filter(
-            Q(nombre__icontains=buscar) | 
-            Q(apellido__icontains=buscar) | 
-            Q(razon_social__icontains=buscar) |
-            Q(localidad__icontains=buscar)
-        )
+        clientes = buscar_texto(clientes, buscar).order_by('-relevancia', 'pk')
     
     return render(request, 'comercial/clientes/list.html', {'clientes': clientes})
 
@@ -877,7 +716,7 @@ def cliente_create(request):
 
 @login_required
 def cliente_edit(request, pk):
-    cliente = get_object_or_404(Cliente, pk=pk)
+    cliente = get_object_or_404(Cliente.alive, pk=pk)
     return_url = _clientes_return_url(request)
     if request.method == 'POST':
         form = ClienteForm(request.POST, instance=cliente)
@@ -892,11 +731,11 @@ def cliente_edit(request, pk):
 
 @login_required
 def cliente_delete(request, pk):
-    cliente = get_object_or_404(Cliente, pk=pk)
+    cliente = get_object_or_404(Cliente.alive, pk=pk)
     return_url = _clientes_return_url(request)
     if request.method == 'POST':
         # Contar ventas relacionadas
-        ventas_relacionadas = Venta.objects.filter(cliente=cliente, deleted_at__isnull=True).count()
+        ventas_relacionadas = Venta.alive.filter(cliente=cliente).count()
         
         # Eliminar el cliente (l�gico)
         cliente.delete()
@@ -912,12 +751,14 @@ def cliente_delete(request, pk):
 
 @login_required
 def exportar_ventas_excel(request):
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
-    from django.http import HttpResponse
+    from django.db.models.functions import Coalesce
+    from .excel import Columna, FILAS_POR_LOTE, LibroExcel
 
-    ventas = Venta.objects.filter(deleted_at__isnull=True).select_related('cliente').order_by('-created_at')
+    ventas = (
+        Venta.alive
+        .select_related('cliente', 'factura_electronica__punto_venta')
+        .order_by('-created_at')
+    )
 
     # Mismos filtros que ventas_list
     estado = request.GET.get('estado', '')
@@ -935,150 +776,111 @@ def exportar_ventas_excel(request):
     elif con_factura == 'no':
         ventas = ventas.filter(con_factura=False)
     if buscar:
-        ventas = ventas.filter(
-            Q(numero_pedido__icontains=buscar) |
-            Q(cliente__nombre__icontains=buscar) |
-            Q(cliente__apellido__icontains=buscar) |
-            Q(cliente__razon_social__icontains=buscar) |
-            Q(numero_factura__icontains=buscar)
-        )
+        ventas = buscar_texto(ventas, buscar)
     if razon_social:
         ventas = ventas.filter(cliente__razon_social__icontains=razon_social)
-    if fecha_desde:
-        ventas = ventas.filter(created_at__date__gte=fecha_desde)
-    if fecha_hasta:
-        ventas = ventas.filter(created_at__date__lte=fecha_hasta)
+    if fecha_desde or fecha_hasta:
+        ventas = ventas.filter(rango_de_dias('created_at', fecha_desde, fecha_hasta))
     if con_saldo == 'si':
         ventas = ventas.filter(saldo__gt=0)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ventas"
-
-    # Estilos
-    header_fill = PatternFill(start_color="1e293b", end_color="1e293b", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    total_fill = PatternFill(start_color="dbeafe", end_color="dbeafe", fill_type="solid")
-    total_font = Font(bold=True, size=11)
-    thin = Side(style='thin', color='CBD5E1')
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-    headers = ['N� Pedido', 'Fecha', 'Cliente', 'Raz�n Social', 'Valor Total', 'Se�a', 'Saldo Pendiente', 'Estado', 'Tipo', 'N� Factura']
-    col_widths = [14, 14, 28, 28, 16, 14, 18, 14, 10, 18]
-
-    for i, (h, w) in enumerate(zip(headers, col_widths), 1):
-        cell = ws.cell(row=1, column=i, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-        ws.column_dimensions[get_column_letter(i)].width = w
-
-    ws.row_dimensions[1].height = 22
-
-    for row_num, venta in enumerate(ventas, 2):
-        datos = [
-            venta.numero_pedido,
-            venta.created_at.strftime('%d/%m/%Y'),
-            str(venta.cliente),
-            venta.cliente.razon_social or '',
-            float(venta.valor_total),
-            float(venta.sena),
-            float(venta.saldo),
-            venta.get_estado_display(),
-            'Blanco' if venta.con_factura else 'Negro',
-            venta.get_numero_factura_display(),
-        ]
-        for col_num, valor in enumerate(datos, 1):
-            cell = ws.cell(row=row_num, column=col_num, value=valor)
-            cell.border = border
-            cell.alignment = Alignment(vertical='center')
-            if col_num in [5, 6, 7]:
-                cell.number_format = '#,##0.00'
-
-    # Fila de totales
-    total_row = ws.max_row + 1
-    ws.cell(row=total_row, column=1, value='TOTALES').font = total_font
-    ws.cell(row=total_row, column=5, value=sum(float(v.valor_total) for v in ventas)).number_format = '#,##0.00'
-    ws.cell(row=total_row, column=6, value=sum(float(v.sena) for v in ventas)).number_format = '#,##0.00'
-    ws.cell(row=total_row, column=7, value=sum(float(v.saldo) for v in ventas)).number_format = '#,##0.00'
-    for col in range(1, 11):
-        ws.cell(row=total_row, column=col).fill = total_fill
-        ws.cell(row=total_row, column=col).font = total_font
-        ws.cell(row=total_row, column=col).border = border
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="ventas.xlsx"'
-    wb.save(response)
-    return response
+    totales = ventas.order_by().aggregate(
+        valor_total=Coalesce(Sum('valor_total'), Decimal('0')),
+        sena=Coalesce(Sum('sena'), Decimal('0')),
+        saldo=Coalesce(Sum('saldo'), Decimal('0')),
+    )
+
+    columnas = [
+        Columna('N° Pedido', 'numero_pedido', 14, 'celda'),
+        Columna('Fecha', lambda v: v.created_at.strftime('%d/%m/%Y'), 14, 'celda'),
+        Columna('Cliente', lambda v: str(v.cliente), 28, 'celda'),
+        Columna('Razón Social', lambda v: v.cliente.razon_social, 28, 'celda'),
+        Columna('Valor Total', 'valor_total', 16, 'numero_celda'),
+        Columna('Seña', 'sena', 14, 'numero_celda'),
+        Columna('Saldo Pendiente', 'saldo', 18, 'numero_celda'),
+        Columna('Estado', lambda v: v.get_estado_display(), 14, 'celda'),
+        Columna('Tipo', lambda v: 'Blanco' if v.con_factura else 'Negro', 10, 'celda'),
+        Columna('N° Factura', lambda v: v.get_numero_factura_display(), 18, 'celda'),
+    ]
+    libro = LibroExcel(color_encabezado='1E293B', borde_encabezado=True)
+    hoja = libro.hoja('Ventas', columnas)
+    hoja.encabezados()
+    hoja.filas(ventas.iterator(chunk_size=FILAS_POR_LOTE))
+    hoja.fila(
+        ('TOTALES', 'total'), ('', 'total'), ('', 'total'), ('', 'total'),
+        (totales['valor_total'], 'numero_total'),
+        (totales['sena'], 'numero_total'),
+        (totales['saldo'], 'numero_total'),
+        ('', 'total'), ('', 'total'), ('', 'total'),
+    )
+    return libro.respuesta('ventas.xlsx')
 
 
 @login_required
 def cliente_detail(request, pk):
     from facturacion.models import Factura
-    from django.db.models import Sum, Count
-    from django.db.models.functions import TruncMonth
-    from datetime import datetime, timedelta
+    from django.core.paginator import Paginator
+    from datetime import date
     import json
     from django.core.serializers.json import DjangoJSONEncoder
+    from .models import ClienteResumen
 
-    cliente = get_object_or_404(Cliente, pk=pk, deleted_at__isnull=True)
-
-    ventas = Venta.objects.filter(
-        cliente=cliente, deleted_at__isnull=True
-    ).prefetch_related('pagos', 'percepciones').order_by('-created_at')
+    cliente = get_object_or_404(Cliente.alive.select_related('resumen'), pk=pk)
+    try:
+        resumen = cliente.resumen
+    except ClienteResumen.DoesNotExist:
+        # Sin ventas todavía: la ficha en cero.
+        resumen = ClienteResumen(cliente=cliente)
 
-    # KPIs
-    kpis = ventas.aggregate(
-        total_comprado=Sum('valor_total'),
-        saldo_pendiente=Sum('saldo'),
-        cantidad_ventas=Count('id'),
-    )
-    total_comprado = kpis['total_comprado'] or 0
-    saldo_pendiente = kpis['saldo_pendiente'] or 0
-    cantidad_ventas = kpis['cantidad_ventas'] or 0
+    ventas = Venta.alive.filter(cliente=cliente).order_by('-created_at', '-pk')
+    page_obj = Paginator(ventas, 20).get_page(request.GET.get('page'))
+    # El resto de la query (p. ej. la URL de vuelta) se conserva al cambiar de página.
+    parametros_pagina = request.GET.copy()
+    parametros_pagina.pop('page', None)
 
     # Pagos recibidos
     pagos = PagoVenta.objects.filter(
         venta__cliente=cliente,
         venta__deleted_at__isnull=True,
     ).select_related('venta').order_by('-fecha_pago')
-    total_cobrado = pagos.aggregate(total=Sum('monto'))['total'] or 0
-
-    # Facturas electr�nicas
-    facturas = Factura.objects.filter(cliente=cliente).select_related('venta', 'punto_venta').order_by('-fecha')
-    cantidad_facturas = facturas.count()
-
-    # Gr�fico 1: ventas por mes (�ltimos 12 meses)
-    hace_12_meses = datetime.now() - timedelta(days=365)
-    ventas_por_mes = (
-        ventas.filter(created_at__gte=hace_12_meses)
-        .order_by()
-        .annotate(mes=TruncMonth('created_at'))
-        .values('mes')
-        .annotate(total=Sum('valor_total'))
-        .order_by('mes')
+
+    # Facturas electrónicas
+    facturas = list(
+        Factura.objects.filter(cliente=cliente).select_related('venta', 'punto_venta').order_by('-fecha')
     )
-    meses_labels = [v['mes'].strftime('%b %Y') for v in ventas_por_mes]
-    meses_data = [float(v['total']) for v in ventas_por_mes]
-
-    # Gr�fico 2: distribuci�n por estado
-    ESTADO_DISPLAY = {'pendiente': 'Pendiente', 'entregado': 'Entregado', 'colocado': 'Colocado'}
-    estados_qs = ventas.order_by().values('estado').annotate(cantidad=Count('id'))
-    estados_labels = [ESTADO_DISPLAY.get(e['estado'], e['estado']) for e in estados_qs]
-    estados_data = [e['cantidad'] for e in estados_qs]
+
+    # Gráfico 1: ventas por mes (últimos 12 meses)
+    hoy = date.today()
+    desde = f'{hoy.year - 1:04d}-{hoy.month:02d}'
+    ventas_por_mes = [(mes, total) for mes, total in resumen.ventas_por_mes if mes > desde]
+    meses_labels = [date(int(mes[:4]), int(mes[5:]), 1).strftime('%b %Y') for mes, _ in ventas_por_mes]
+    meses_data = [float(total) for _, total in ventas_por_mes]
+
+    # Gráfico 2: distribución por estado
+    estados = [
+        ('Pendiente', resumen.ventas_pendientes),
+        ('Entregado', resumen.ventas_entregadas),
+        ('Colocado', resumen.ventas_colocadas),
+    ]
+    estados = [(etiqueta, cantidad) for etiqueta, cantidad in estados if cantidad]
+    estados_labels = [etiqueta for etiqueta, _ in estados]
+    estados_data = [cantidad for _, cantidad in estados]
     return_url = _clientes_return_url(request)
 
     context = {
         'cliente': cliente,
-        'ventas': ventas,
+        'resumen': resumen,
+        'ventas': page_obj,
+        'page_obj': page_obj,
+        'parametros_pagina': parametros_pagina.urlencode(),
         'pagos': pagos[:30],
         'facturas': facturas,
-        'total_comprado': total_comprado,
-        'saldo_pendiente': saldo_pendiente,
-        'cantidad_ventas': cantidad_ventas,
-        'cantidad_facturas': cantidad_facturas,
-        'total_cobrado': total_cobrado,
+        'total_comprado': resumen.total_comprado,
+        'saldo_pendiente': resumen.saldo_pendiente,
+        'cantidad_ventas': resumen.cantidad_ventas,
+        'cantidad_facturas': len(facturas),
+        'total_cobrado': resumen.total_cobrado,
+        'ultima_compra': resumen.ultima_compra,
         'meses_labels': json.dumps(meses_labels, cls=DjangoJSONEncoder),
         'meses_data': json.dumps(meses_data, cls=DjangoJSONEncoder),
         'estados_labels': json.dumps(estados_labels, cls=DjangoJSONEncoder),
@@ -1091,47 +893,37 @@ def cliente_detail(request, pk):
 # COMPRAS
 @login_required
 def compras_list(request):
-    from django.core.paginator import Paginator
-    
-    compras = Compra.objects.filter(deleted_at__isnull=True).select_related('cuenta', 'cuenta__tipo_cuenta').all()
-    
-    # Filtros
     tipo_cuenta = request.GET.get('tipo_cuenta', '')
     con_factura = request.GET.get('con_factura', '')
     buscar = request.GET.get('q', '')
-    
-    if tipo_cuenta:
-        compras = compras.filter(cuenta__tipo_cuenta_id=tipo_cuenta)
-    
-    if con_factura == 'si':
-        compras = compras.filter(con_factura=True)
-    elif con_factura == 'no':
-        compras = compras.filter(con_factura=False)
-    
-    if buscar:
-        compras = compras.filter(
-            Q(numero_pedido__icontains=buscar) |
-            Q(cuenta__nombre__icontains=buscar) |
-            Q(numero_factura__icontains=buscar)
-        )
-    
-    # Ordenar por fecha de pago descendente
-    compras = compras.order_by('-fecha_pago')
-    
-    # Paginaci�n
-    paginator = Paginator(compras, 20)  # 20 items por p�gina
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+
+    compras = reporte_gastos.construir(
+        tipo_cuenta_filtro=[tipo_cuenta] if tipo_cuenta.isdigit() else None,
+        tipo_factura_filtro={'si': ['blanco'], 'no': ['negro']}.get(con_factura),
+        buscar=buscar,
+    )
+    # Paginación por clave sobre (fecha_pago, pk): "siguientes" lleva el cursor de la última fila.
+    filas, siguiente = reporte_gastos.pagina(
+        compras.select_related('cuenta', 'cuenta__tipo_cuenta'), request.GET.get('desde'),
+    )
+
+    filtros = request.GET.copy()
+    filtros.pop('desde', None)
+    url_pagina = reverse('comercial:compras_list')
     context = {
-        'compras': page_obj,
-        'page_obj': page_obj,
+        'compras': filas,
+        'totales': reporte_gastos.totales(compras),
         'tipos_cuenta': TipoCuenta.objects.filter(activo=True),
         'filtro_tipo': tipo_cuenta,
         'filtro_factura': con_factura,
         'buscar': buscar,
         'titulo': 'Gastos'
     }
+    if request.GET.get('desde'):
+        context['primera_url'] = f'{url_pagina}?{filtros.urlencode()}' if filtros else url_pagina
+    if siguiente:
+        filtros['desde'] = siguiente
+        context['siguiente_url'] = f'{url_pagina}?{filtros.urlencode()}'
     return render(request, 'comercial/compras/list.html', context)
 
 
@@ -1153,7 +945,7 @@ def compra_create(request):
     context = {
         'form': form,
         'title': 'Nuevo Gasto',
-        'tipos_cuenta': TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True),
+        'tipos_cuenta': TipoCuenta.alive.filter(activo=True),
         'return_url': return_url,
     }
     return render(request, 'comercial/compras/form.html', context)
@@ -1161,7 +953,7 @@ def compra_create(request):
 
 @login_required
 def compra_edit(request, pk):
-    compra = get_object_or_404(Compra, pk=pk)
+    compra = get_object_or_404(Compra.alive, pk=pk)
     return_url = _compras_return_url(request)
     if request.method == 'POST':
         form = CompraForm(request.POST, instance=compra)
@@ -1182,7 +974,7 @@ def compra_edit(request, pk):
     context = {
         'form': form,
         'title': 'Editar Gasto',
-        'tipos_cuenta': TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True),
+        'tipos_cuenta': TipoCuenta.alive.filter(activo=True),
         'compra': compra,
         'return_url': return_url,
     }
@@ -1191,7 +983,7 @@ def compra_edit(request, pk):
 
 @login_required
 def compra_delete(request, pk):
-    compra = get_object_or_404(Compra, pk=pk)
+    compra = get_object_or_404(Compra.alive, pk=pk)
     return_url = _compras_return_url(request)
     if request.method == 'POST':
         compra.delete()
@@ -1203,7 +995,7 @@ def compra_delete(request, pk):
 @login_required
 def compra_detail(request, pk):
     from django.utils import timezone
-    compra = get_object_or_404(Compra.objects.select_related('cuenta', 'cuenta__tipo_cuenta', 'tipo_gasto').prefetch_related('pagos_compra'), pk=pk, deleted_at__isnull=True)
+    compra = get_object_or_404(Compra.alive.select_related('cuenta', 'cuenta__tipo_cuenta', 'tipo_gasto').prefetch_related('pagos_compra'), pk=pk)
     pagos = compra.pagos_compra.all().order_by('fecha_pago')
     total_pagado = compra.sena + sum(p.monto for p in pagos)
     porcentaje_pagado = int((total_pagado / compra.valor_total * 100)) if compra.valor_total > 0 else 0
@@ -1225,7 +1017,7 @@ def compra_detail(request, pk):
 
 @login_required
 def registrar_pago_compra(request, pk):
-    compra = get_object_or_404(Compra, pk=pk)
+    compra = get_object_or_404(Compra.alive, pk=pk)
     if request.method == 'POST':
         monto = request.POST.get('monto')
         fecha_pago = request.POST.get('fecha_pago')
@@ -1362,7 +1154,7 @@ def eliminar_pago_compra(request, pk):
 @login_required
 def guardar_nota_compra(request, pk):
     if request.method == 'POST':
-        compra = get_object_or_404(Compra, pk=pk)
+        compra = get_object_or_404(Compra.alive, pk=pk)
         nota = request.POST.get('nota', '')
         Compra.objects.filter(pk=pk).update(notas_internas=nota)
         return JsonResponse({'success': True})
@@ -1372,7 +1164,7 @@ def guardar_nota_compra(request, pk):
 # CUENTAS
 @login_required
 def cuentas_list(request):
-    cuentas = Cuenta.objects.filter(deleted_at__isnull=True).select_related('tipo_cuenta').all()
+    cuentas = Cuenta.alive.select_related('tipo_cuenta').all()
     
     # Filtros
     buscar = request.GET.get('q', '')
@@ -1392,7 +1184,7 @@ def cuentas_list(request):
     elif estado == 'inactivo':
         cuentas = cuentas.filter(activo=False)
     
-    tipos_cuenta_filtro = TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True)
+    tipos_cuenta_filtro = TipoCuenta.alive.filter(activo=True)
     
     return render(request, 'comercial/cuentas/list.html', {
         'cuentas': cuentas,
@@ -1434,7 +1226,7 @@ def cuenta_create(request):
 
 @login_required
 def cuenta_edit(request, pk):
-    cuenta = get_object_or_404(Cuenta, pk=pk)
+    cuenta = get_object_or_404(Cuenta.alive, pk=pk)
     return_url = _cuentas_return_url(request)
     if request.method == 'POST':
         form = CuentaForm(request.POST, instance=cuenta)
@@ -1449,11 +1241,11 @@ def cuenta_edit(request, pk):
 
 @login_required
 def cuenta_delete(request, pk):
-    cuenta = get_object_or_404(Cuenta, pk=pk)
+    cuenta = get_object_or_404(Cuenta.alive, pk=pk)
     return_url = _cuentas_return_url(request)
     if request.method == 'POST':
         # Contar compras relacionadas
-        compras_relacionadas = Compra.objects.filter(cuenta=cuenta, deleted_at__isnull=True).count()
+        compras_relacionadas = Compra.alive.filter(cuenta=cuenta).count()
         
         # Eliminar la cuenta (l�gico)
         cuenta.delete()
@@ -1470,7 +1262,7 @@ def cuenta_delete(request, pk):
 # TIPOS DE CUENTA
 @login_required
 def tipos_cuenta_list(request):
-    tipos = TipoCuenta.objects.filter(deleted_at__isnull=True).all()
+    tipos = TipoCuenta.alive.all()
     
     # Filtros
     buscar = request.GET.get('q', '')
@@ -1521,7 +1313,7 @@ def tipo_cuenta_create(request):
 
 @login_required
 def tipo_cuenta_edit(request, pk):
-    tipo = get_object_or_404(TipoCuenta, pk=pk)
+    tipo = get_object_or_404(TipoCuenta.alive, pk=pk)
     
     if request.method == 'POST':
         tipo.tipo = request.POST.get('tipo')
@@ -1536,15 +1328,15 @@ def tipo_cuenta_edit(request, pk):
 
 @login_required
 def tipo_cuenta_delete(request, pk):
-    tipo = get_object_or_404(TipoCuenta, pk=pk)
+    tipo = get_object_or_404(TipoCuenta.alive, pk=pk)
     if request.method == 'POST':
         # Desactivar cuentas relacionadas
-        cuentas_afectadas = Cuenta.objects.filter(tipo_cuenta=tipo, deleted_at__isnull=True)
+        cuentas_afectadas = Cuenta.alive.filter(tipo_cuenta=tipo)
         for cuenta in cuentas_afectadas:
             cuenta.delete()  # Eliminado l�gico
         
         # Desactivar tipos de gasto relacionados
-        tipos_gasto_afectados = TipoGasto.objects.filter(tipo_cuenta=tipo, deleted_at__isnull=True)
+        tipos_gasto_afectados = TipoGasto.alive.filter(tipo_cuenta=tipo)
         for tipo_gasto in tipos_gasto_afectados:
             tipo_gasto.delete()  # Eliminado l�gico
         
@@ -1558,7 +1350,7 @@ def tipo_cuenta_delete(request, pk):
 # TIPOS DE GASTO
 @login_required
 def tipos_gasto_list(request):
-    tipos = TipoGasto.objects.filter(deleted_at__isnull=True).select_related('tipo_cuenta').all()
+    tipos = TipoGasto.alive.select_related('tipo_cuenta').all()
     
     # Filtros
     buscar = request.GET.get('q', '')
@@ -1578,7 +1370,7 @@ def tipos_gasto_list(request):
     elif estado == 'inactivo':
         tipos = tipos.filter(activo=False)
     
-    tipos_cuenta_filtro = TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True)
+    tipos_cuenta_filtro = TipoCuenta.alive.filter(activo=True)
     
     return render(request, 'comercial/tipos_gasto/list.html', {
         'tipos': tipos,
@@ -1602,13 +1394,13 @@ def tipo_gasto_create(request):
             messages.success(request, 'Tipo de gasto creado exitosamente.')
             return redirect('comercial:tipos_gasto_list')
     
-    tipos_cuenta = TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True)
+    tipos_cuenta = TipoCuenta.alive.filter(activo=True)
     return render(request, 'comercial/tipos_gasto/form.html', {'tipos_cuenta': tipos_cuenta, 'title': 'Nuevo Tipo de Gasto'})
 
 
 @login_required
 def tipo_gasto_edit(request, pk):
-    tipo = get_object_or_404(TipoGasto, pk=pk)
+    tipo = get_object_or_404(TipoGasto.alive, pk=pk)
     
     if request.method == 'POST':
         tipo_cuenta_id = request.POST.get('tipo_cuenta')
@@ -1623,16 +1415,16 @@ def tipo_gasto_edit(request, pk):
             messages.success(request, 'Tipo de gasto actualizado exitosamente.')
             return redirect('comercial:tipos_gasto_list')
     
-    tipos_cuenta = TipoCuenta.objects.filter(activo=True, deleted_at__isnull=True)
+    tipos_cuenta = TipoCuenta.alive.filter(activo=True)
     return render(request, 'comercial/tipos_gasto/form.html', {'tipos_cuenta': tipos_cuenta, 'tipo': tipo, 'title': 'Editar Tipo de Gasto'})
 
 
 @login_required
 def tipo_gasto_delete(request, pk):
-    tipo = get_object_or_404(TipoGasto, pk=pk)
+    tipo = get_object_or_404(TipoGasto.alive, pk=pk)
     if request.method == 'POST':
         # Contar compras relacionadas
-        compras_relacionadas = Compra.objects.filter(tipo_gasto=tipo, deleted_at__isnull=True).count()
+        compras_relacionadas = Compra.alive.filter(tipo_gasto=tipo).count()
         
         # Eliminar el tipo de gasto (l�gico)
         tipo.delete()
@@ -1647,7 +1439,7 @@ def tipo_gasto_delete(request, pk):
 
 
 # REPORTES
-def construir_reporte_ventas(
+def filtrar_reporte_ventas(
     fecha_desde=None,
     fecha_hasta=None,
     cliente_filtro=None,
@@ -1655,79 +1447,13 @@ def construir_reporte_ventas(
     estado_venta_filtro=None,
     tipo_factura_filtro=None,
 ):
-    from django.utils import timezone
-
-    ventas_query = Venta.objects.filter(deleted_at__isnull=True).select_related('cliente').prefetch_related('percepciones')
+    ventas_query = Venta.alive.select_related('cliente')
 
     # El rango se aplica sobre la fecha del pedido (created_at), que es la que
     # muestra el listado de ventas debajo del numero de pedido. Antes se usaba
     # fecha_pago, que dejaba afuera las ventas sin pago registrado.
-    if fecha_desde:
-        ventas_query = ventas_query.filter(created_at__date__gte=fecha_desde)
-    if fecha_hasta:
-        ventas_query = ventas_query.filter(created_at__date__lte=fecha_hasta)
-    if cliente_filtro:
-        ventas_query = ventas_query.filter(cliente__in=cliente_filtro)
-    if razon_social_filtro:
-        ventas_query = ventas_query.filter(cliente__razon_social__in=razon_social_filtro)
-    if estado_venta_filtro:
-        ventas_query = ventas_query.filter(estado__in=estado_venta_filtro)
-    if tipo_factura_filtro:
-        if 'blanco' in tipo_factura_filtro and 'negro' not in tipo_factura_filtro:
-            ventas_query = ventas_query.filter(con_factura=True)
-        elif 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
-            ventas_query = ventas_query.filter(con_factura=False)
-
-    ventas = []
-    for venta in ventas_query.order_by('-created_at', '-pk'):
-        ventas.append({
-            'fecha': timezone.localtime(venta.created_at).date(),
-            'pedido': venta.numero_pedido,
-            'numero_factura': venta.numero_factura or '-',
-            'factura_id': venta.id if venta.numero_factura else None,
-            'cliente': str(venta.cliente),
-            'razon_social': venta.cliente.razon_social or '-',
-            'forma_pago': venta.get_forma_pago_display() if venta.forma_pago else '-',
-            'monto': venta.valor_total,
-            'venta_en_dolares': venta.venta_en_dolares,
-            'monto_usd': venta.valor_total_usd if venta.venta_en_dolares else None,
-            'cotizacion_usd': venta.cotizacion_usd if venta.venta_en_dolares else None,
-            'tipo': 'Blanco' if venta.con_factura else 'Negro',
-            'venta_id': venta.id,
-        })
-
-    return ventas
-
-
-def construir_reporte_cobranzas(
-    fecha_desde=None,
-    fecha_hasta=None,
-    cliente_filtro=None,
-    razon_social_filtro=None,
-    estado_venta_filtro=None,
-    tipo_factura_filtro=None,
-    numero_factura_filtro=None,
-    moneda_cobranza_filtro='todas',
-):
-    cobranzas = []
-
-    def _filtrar_queryset_por_moneda(queryset, *, flag_field, usd_field):
-        if moneda_cobranza_filtro == 'usd':
-            return queryset.filter(**{flag_field: True, f'{usd_field}__gt': 0})
-        if moneda_cobranza_filtro == 'ars':
-            return queryset.filter(
-                Q(**{flag_field: False}) |
-                Q(**{f'{usd_field}__isnull': True}) |
-                Q(**{f'{usd_field}__lte': 0})
-            )
-        return queryset
-
-    ventas_query = Venta.objects.filter(deleted_at__isnull=True, sena__gt=0).select_related('cliente')
-
-    if fecha_desde:
-        ventas_query = ventas_query.filter(created_at__date__gte=fecha_desde)
-    if fecha_hasta:
-        ventas_query = ventas_query.filter(created_at__date__lte=fecha_hasta)
+    if fecha_desde or fecha_hasta:
+        ventas_query = ventas_query.filter(rango_de_dias('created_at', fecha_desde, fecha_hasta))
     if cliente_filtro:
         ventas_query = ventas_query.filter(cliente__in=cliente_filtro)
     if razon_social_filtro:
@@ -1739,90 +1465,32 @@ def construir_reporte_cobranzas(
             ventas_query = ventas_query.filter(con_factura=True)
         elif 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
             ventas_query = ventas_query.filter(con_factura=False)
-    if numero_factura_filtro:
-        ventas_query = ventas_query.filter(numero_factura__icontains=numero_factura_filtro)
-    ventas_query = _filtrar_queryset_por_moneda(
-        ventas_query,
-        flag_field='sena_en_dolares',
-        usd_field='sena_usd',
-    )
 
-    for venta in ventas_query:
-        cobranzas.append({
-            'fecha': venta.created_at.date(),
-            'pedido': venta.numero_pedido,
-            'numero_factura': venta.numero_factura or '-',
-            'cliente': str(venta.cliente),
-            'razon_social': venta.cliente.razon_social or '-',
-            'concepto': 'Seña inicial',
-            'forma_pago': venta.get_forma_pago_display() if venta.forma_pago else '-',
-            'monto': venta.sena,
-            'tipo': 'Blanco' if venta.con_factura else 'Negro',
-            'venta_id': venta.id,
-            'pago_en_dolares': venta.sena_en_dolares,
-            'monto_usd': venta.sena_usd if venta.sena_en_dolares else None,
-            'cotizacion_usd': venta.cotizacion_sena_usd if venta.sena_en_dolares else None,
-        })
-
-    pagos_query = PagoVenta.objects.filter(venta__deleted_at__isnull=True).select_related('venta', 'venta__cliente')
+    return ventas_query.order_by('-created_at', '-pk')
 
-    if fecha_desde:
-        pagos_query = pagos_query.filter(fecha_pago__gte=fecha_desde)
-    if fecha_hasta:
-        pagos_query = pagos_query.filter(fecha_pago__lte=fecha_hasta)
-    if cliente_filtro:
-        pagos_query = pagos_query.filter(venta__cliente__in=cliente_filtro)
-    if razon_social_filtro:
-        pagos_query = pagos_query.filter(venta__cliente__razon_social__in=razon_social_filtro)
-    if estado_venta_filtro:
-        pagos_query = pagos_query.filter(venta__estado__in=estado_venta_filtro)
-    if tipo_factura_filtro:
-        if 'blanco' in tipo_factura_filtro and 'negro' not in tipo_factura_filtro:
-            pagos_query = pagos_query.filter(con_factura=True)
-        elif 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
-            pagos_query = pagos_query.filter(con_factura=False)
-    if numero_factura_filtro:
-        pagos_query = pagos_query.filter(
-            Q(numero_factura__icontains=numero_factura_filtro) |
-            Q(venta__numero_factura__icontains=numero_factura_filtro)
-        )
-    pagos_query = _filtrar_queryset_por_moneda(
-        pagos_query,
-        flag_field='pago_en_dolares',
-        usd_field='monto_usd',
-    )
 
-    for pago in pagos_query.order_by('-fecha_pago', '-created_at'):
-        cobranzas.append({
-            'fecha': pago.fecha_pago,
-            'pedido': pago.venta.numero_pedido,
-            'numero_factura': pago.numero_factura or pago.venta.numero_factura or '-',
-            'cliente': str(pago.venta.cliente),
-            'razon_social': pago.venta.cliente.razon_social or '-',
-            'concepto': 'Pago',
-            'forma_pago': pago.get_forma_pago_display(),
-            'monto': pago.monto,
-            'tipo': 'Blanco' if pago.con_factura else 'Negro',
-            'venta_id': pago.venta.id,
-            'pago_en_dolares': pago.pago_en_dolares,
-            'monto_usd': pago.monto_usd,
-            'cotizacion_usd': pago.cotizacion_usd,
-        })
+def item_reporte_venta(venta):
+    from django.utils import timezone
 
-    cobranzas.sort(key=lambda item: item['fecha'], reverse=True)
-    return cobranzas
+    return {
+        'fecha': timezone.localtime(venta.created_at).date(),
+        'pedido': venta.numero_pedido,
+        'numero_factura': venta.numero_factura or '-',
+        'factura_id': venta.id if venta.numero_factura else None,
+        'cliente': str(venta.cliente),
+        'razon_social': venta.cliente.razon_social or '-',
+        'forma_pago': venta.get_forma_pago_display() if venta.forma_pago else '-',
+        'monto': venta.valor_total,
+        'venta_en_dolares': venta.venta_en_dolares,
+        'monto_usd': venta.valor_total_usd if venta.venta_en_dolares else None,
+        'cotizacion_usd': venta.cotizacion_usd if venta.venta_en_dolares else None,
+        'tipo': 'Blanco' if venta.con_factura else 'Negro',
+        'venta_id': venta.id,
+    }
 
 
-def ordenar_reporte_cobranzas(cobranzas, orden='fecha_desc'):
-    if orden == 'fecha_asc':
-        return sorted(cobranzas, key=lambda item: (item['fecha'], item['pedido'], item['monto']))
-    if orden == 'monto_desc':
-        return sorted(cobranzas, key=lambda item: (item['monto'], item['fecha'], item['pedido']), reverse=True)
-    if orden == 'monto_asc':
-        return sorted(cobranzas, key=lambda item: (item['monto'], item['fecha'], item['pedido']))
-    if orden == 'cliente_asc':
-        return sorted(cobranzas, key=lambda item: (str(item['cliente']).lower(), item['fecha'], item['pedido']))
-    return sorted(cobranzas, key=lambda item: (item['fecha'], item['pedido'], item['monto']), reverse=True)
+def construir_reporte_ventas(**filtros):
+    return [item_reporte_venta(venta) for venta in filtrar_reporte_ventas(**filtros)]
 
 
 @login_required
@@ -1894,8 +1562,13 @@ def reportes(request):
     return render(request, 'comercial/reportes/reportes.html', context)
 
 
+COBRANZAS_POR_PAGINA = 50
+
+
 @login_required
 def reportes_cobranzas(request):
+    from django.core.paginator import Paginator
+
     form = ReporteCobranzasForm()
     reporte_data = None
 
@@ -1922,7 +1595,18 @@ def reportes_cobranzas(request):
             orden_cobranzas = form.cleaned_data.get('orden') or 'fecha_desc'
             moneda_cobranza_filtro = form.cleaned_data.get('moneda_cobranza') or 'todas'
 
-            cobranzas = construir_reporte_cobranzas(
+            request.session['reporte_cobranzas_filtros'] = {
+                'fecha_desde': fecha_desde.isoformat() if fecha_desde else None,
+                'fecha_hasta': fecha_hasta.isoformat() if fecha_hasta else None,
+                'cliente_id': [c.id for c in cliente_filtro] if cliente_filtro else None,
+                'razon_social': list(razon_social_filtro) if razon_social_filtro else None,
+                'estado_venta': list(estado_venta_filtro) if estado_venta_filtro else None,
+                'tipo_factura': list(tipo_factura_filtro) if tipo_factura_filtro else None,
+                'numero_factura': numero_factura_filtro or None,
+                'moneda_cobranza': moneda_cobranza_filtro,
+                'orden': orden_cobranzas,
+            }
+            cobranzas = reporte_cobranzas.construir(
                 fecha_desde=fecha_desde,
                 fecha_hasta=fecha_hasta,
                 cliente_filtro=cliente_filtro,
@@ -1932,40 +1616,22 @@ def reportes_cobranzas(request):
                 numero_factura_filtro=numero_factura_filtro,
                 moneda_cobranza_filtro=moneda_cobranza_filtro,
             )
-            cobranzas = ordenar_reporte_cobranzas(cobranzas, orden_cobranzas)
+            totales = reporte_cobranzas.totales(cobranzas)
 
-            total_blanco = sum(item['monto'] for item in cobranzas if item['tipo'] == 'Blanco')
-            total_negro = sum(item['monto'] for item in cobranzas if item['tipo'] == 'Negro')
-            total = total_blanco + total_negro
-            total_usd = sum(
-                (
-                    item['monto_usd']
-                    for item in cobranzas
-                    if item['pago_en_dolares'] and item['monto_usd']
-                ),
-                Decimal('0'),
-            )
-            cantidad_blanco = len([item for item in cobranzas if item['tipo'] == 'Blanco'])
-            cantidad_negro = len([item for item in cobranzas if item['tipo'] == 'Negro'])
-            cantidad_usd = len([item for item in cobranzas if item['pago_en_dolares'] and item['monto_usd']])
-            cantidad_senas = len([item for item in cobranzas if item['concepto'] == 'Seña inicial'])
-            cantidad_pagos = len(cobranzas) - cantidad_senas
+            paginator = Paginator(reporte_cobranzas.ordenar(cobranzas, orden_cobranzas), COBRANZAS_POR_PAGINA)
+            # La cantidad ya salió del agregado: evita el COUNT extra del paginador.
+            paginator.count = totales['cantidad']
+            page_obj = paginator.get_page(request.POST.get('pagina'))
 
             reporte_data = {
                 'cobranzas': {
-                    'total_blanco': total_blanco,
-                    'total_negro': total_negro,
-                    'total': total,
-                    'total_usd': total_usd,
-                    'cantidad_blanco': cantidad_blanco,
-                    'cantidad_negro': cantidad_negro,
-                    'cantidad': len(cobranzas),
-                    'cantidad_usd': cantidad_usd,
-                    'cantidad_senas': cantidad_senas,
-                    'cantidad_pagos': cantidad_pagos,
-                    'lista': cobranzas,
+                    **totales,
+                    'lista': reporte_cobranzas.con_usd_a_la_fecha(reporte_cobranzas.como_dicts(page_obj.object_list)),
+                    'page_obj': page_obj,
                 }
             }
+    else:
+        request.session.pop('reporte_cobranzas_filtros', None)
 
     return render(request, 'comercial/reportes/reportes_cobranzas.html', {
         'form': form,
@@ -1979,10 +1645,9 @@ def get_tipos_gasto_by_cuenta(request):
     if cuenta_id:
         cuenta = Cuenta.objects.filter(id=cuenta_id).first()
         if cuenta:
-            tipos_gasto = TipoGasto.objects.filter(
+            tipos_gasto = TipoGasto.alive.filter(
                 tipo_cuenta=cuenta.tipo_cuenta,
                 activo=True,
-                deleted_at__isnull=True
             ).values('id', 'nombre')
             return JsonResponse(list(tipos_gasto), safe=False)
     return JsonResponse([], safe=False)
@@ -1997,8 +1662,12 @@ def get_cuentas_by_tipo(request):
 
 @login_required
 def get_clientes_list(request):
-    clientes = Cliente.objects.filter(deleted_at__isnull=True).values('id', 'nombre', 'apellido')
-    return JsonResponse(list(clientes), safe=False)
+    """Autocompletado de clientes (o de razones sociales con `campo=razon_social`) en el formato de select2."""
+    from . import autocompletado
+
+    buscar_opciones = autocompletado.razones_sociales if request.GET.get('campo') == 'razon_social' else autocompletado.clientes
+    resultados, hay_mas = buscar_opciones(request.GET.get('q', ''), request.GET.get('page'))
+    return JsonResponse({'results': resultados, 'pagination': {'more': hay_mas}})
 
 
 @login_required
@@ -2043,11 +1712,9 @@ def editar_pago(request, pk):
             pago.pago_en_dolares = pago_en_dolares
             pago.monto_usd = monto_usd if pago_en_dolares else None
             pago.cotizacion_usd = cotizacion_usd if pago_en_dolares else None
+            # Guardar el pago ajusta el saldo de la venta con la diferencia de monto.
             pago.save()
 
-            # Recalcular saldo de la venta
-            pago.venta.save()
-
             return JsonResponse({
                 'success': True,
                 'pago': {
@@ -2072,16 +1739,15 @@ def editar_pago(request, pk):
 
 @login_required
 def exportar_reporte_excel(request):
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill
-    from django.http import HttpResponse
-    
-    # Recuperar filtros de la sesi�n
+    from django.db.models.functions import Coalesce
+    from .excel import Columna, FILAS_POR_LOTE, LibroExcel
+
+    # Recuperar filtros de la sesión
     filtros = request.session.get('reporte_filtros', {})
-    
+
     cliente_ids = filtros.get('cliente_id')
     cliente_filtro = Cliente.objects.filter(id__in=cliente_ids) if cliente_ids else None
-    ventas_reporte = construir_reporte_ventas(
+    ventas = filtrar_reporte_ventas(
         fecha_desde=datetime.fromisoformat(filtros['fecha_desde']).date() if filtros.get('fecha_desde') else None,
         fecha_hasta=datetime.fromisoformat(filtros['fecha_hasta']).date() if filtros.get('fecha_hasta') else None,
         cliente_filtro=cliente_filtro,
@@ -2089,183 +1755,220 @@ def exportar_reporte_excel(request):
         estado_venta_filtro=filtros.get('estado_venta'),
         tipo_factura_filtro=filtros.get('tipo_factura'),
     )
-    
-    # Calcular totales
-    total_blanco = sum(float(i['monto']) for i in ventas_reporte if i['tipo'] == 'Blanco')
-    total_negro = sum(float(i['monto']) for i in ventas_reporte if i['tipo'] == 'Negro')
-    total = total_blanco + total_negro
-    
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte Ventas"
-    
-    # Estilos
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    title_font = Font(bold=True, size=14)
-    
-    # T�tulo
-    ws['A1'] = 'REPORTE DE VENTAS'
-    ws['A1'].font = title_font
-    ws.merge_cells('A1:H1')
-    
-    # Resumen
-    ws['A3'] = 'Total Ventas Blanco:'
-    ws['B3'] = total_blanco
-    ws['B3'].number_format = '$#,##0.00'
-    ws['A3'].font = Font(bold=True)
-    
-    ws['A4'] = 'Total Ventas Negro:'
-    ws['B4'] = total_negro
-    ws['B4'].number_format = '$#,##0.00'
-    ws['A4'].font = Font(bold=True)
-    
-    ws['A5'] = 'TOTAL VENTAS:'
-    ws['B5'] = total
-    ws['B5'].number_format = '$#,##0.00'
-    ws['A5'].font = Font(bold=True, size=12)
-    ws['B5'].font = Font(bold=True, size=12)
-    
-    # Headers
-    headers = ['Fecha Venta', 'Pedido', 'ID Factura', 'Cliente', 'Raz�n Social', 'Forma Pago', 'Monto', 'Tipo']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(7, col, header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Datos
-    for row, ingreso in enumerate(ventas_reporte, 8):
-        ws.cell(row, 1, ingreso['fecha'].strftime('%d/%m/%Y'))
-        ws.cell(row, 2, ingreso['pedido'])
-        ws.cell(row, 3, ingreso['numero_factura'])
-        ws.cell(row, 4, ingreso['cliente'])
-        ws.cell(row, 5, ingreso['razon_social'])
-        ws.cell(row, 6, ingreso['forma_pago'])
-        cell = ws.cell(row, 7, ingreso['monto'])
-        cell.number_format = '$#,##0.00'
-        ws.cell(row, 8, ingreso['tipo'])
-    
-    # Ajustar anchos
-    ws.column_dimensions['A'].width = 12
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 25
-    ws.column_dimensions['E'].width = 25
-    ws.column_dimensions['F'].width = 15
-    ws.column_dimensions['G'].width = 15
-    ws.column_dimensions['H'].width = 10
-    
-    # Respuesta HTTP
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=reporte_ventas.xlsx'
-    wb.save(response)
-    return response
+    totales = ventas.order_by().aggregate(
+        blanco=Coalesce(Sum('valor_total', filter=Q(con_factura=True)), Decimal('0')),
+        negro=Coalesce(Sum('valor_total', filter=Q(con_factura=False)), Decimal('0')),
+    )
+
+    columnas = [
+        Columna('Fecha Venta', lambda i: i['fecha'].strftime('%d/%m/%Y'), 12),
+        Columna('Pedido', 'pedido', 15),
+        Columna('ID Factura', 'numero_factura', 15),
+        Columna('Cliente', 'cliente', 25),
+        Columna('Razón Social', 'razon_social', 25),
+        Columna('Forma Pago', 'forma_pago', 15),
+        Columna('Monto', 'monto', 15, 'moneda'),
+        Columna('Tipo', 'tipo', 10),
+    ]
+    libro = LibroExcel(color_encabezado='366092')
+    hoja = libro.hoja('Reporte Ventas', columnas)
+    hoja.titulo('REPORTE DE VENTAS')
+    hoja.vacia()
+    hoja.dato('Total Ventas Blanco:', totales['blanco'])
+    hoja.dato('Total Ventas Negro:', totales['negro'])
+    hoja.dato('TOTAL VENTAS:', totales['blanco'] + totales['negro'], 'moneda_total', 'etiqueta_total')
+    hoja.vacia()
+    hoja.encabezados()
+    hoja.filas(item_reporte_venta(venta) for venta in ventas.iterator(chunk_size=FILAS_POR_LOTE))
+    return libro.respuesta('reporte_ventas.xlsx')
+
+
+@login_required
+def exportar_reporte_cobranzas_excel(request):
+    from .excel import Columna, FILAS_POR_LOTE, LibroExcel
+
+    filtros = request.session.get('reporte_cobranzas_filtros', {})
+    cliente_ids = filtros.get('cliente_id')
+    cobranzas = reporte_cobranzas.construir(
+        fecha_desde=datetime.fromisoformat(filtros['fecha_desde']).date() if filtros.get('fecha_desde') else None,
+        fecha_hasta=datetime.fromisoformat(filtros['fecha_hasta']).date() if filtros.get('fecha_hasta') else None,
+        cliente_filtro=Cliente.objects.filter(id__in=cliente_ids) if cliente_ids else None,
+        razon_social_filtro=filtros.get('razon_social'),
+        estado_venta_filtro=filtros.get('estado_venta'),
+        tipo_factura_filtro=filtros.get('tipo_factura'),
+        numero_factura_filtro=filtros.get('numero_factura'),
+        moneda_cobranza_filtro=filtros.get('moneda_cobranza') or 'todas',
+    )
+    totales = reporte_cobranzas.totales(cobranzas)
+
+    columnas = [
+        Columna('Fecha', lambda i: i['fecha'].strftime('%d/%m/%Y'), 12),
+        Columna('Pedido', 'pedido', 15),
+        Columna('ID Factura', 'numero_factura', 15),
+        Columna('Cliente', 'cliente', 25),
+        Columna('Razón Social', 'razon_social', 25),
+        Columna('Concepto', 'concepto', 14),
+        Columna('Forma Pago', 'forma_pago', 15),
+        Columna('Monto', 'monto', 15, 'moneda'),
+        Columna('Tipo', 'tipo', 10),
+        Columna('Monto USD', lambda i: i['monto_usd'] if i['pago_en_dolares'] else None, 12, 'numero'),
+        Columna('Cotización', lambda i: i['cotizacion_usd'] if i['pago_en_dolares'] else None, 12, 'numero'),
+        Columna('USD a la fecha', 'usd_a_la_fecha', 14, 'numero'),
+    ]
+    libro = LibroExcel(color_encabezado='366092')
+    hoja = libro.hoja('Reporte Cobranzas', columnas)
+    hoja.titulo('REPORTE DE COBRANZAS')
+    hoja.vacia()
+    hoja.dato('Total Cobranzas Blanco:', totales['total_blanco'])
+    hoja.dato('Total Cobranzas Negro:', totales['total_negro'])
+    hoja.dato('TOTAL COBRANZAS:', totales['total'], 'moneda_total', 'etiqueta_total')
+    hoja.dato('Total USD:', totales['total_usd'], 'numero')
+    hoja.vacia()
+    hoja.encabezados()
+    filas = reporte_cobranzas.ordenar(cobranzas, filtros.get('orden') or 'fecha_desc')
+    hoja.filas(reporte_cobranzas.dicts_con_usd(filas.iterator(chunk_size=FILAS_POR_LOTE), FILAS_POR_LOTE))
+    return libro.respuesta('reporte_cobranzas.xlsx')
+
+
+ANTIGUEDAD_POR_PAGINA = 50
+
+
+def _ventas_antiguedad(form):
+    filtros = form.cleaned_data if form.is_valid() else {}
+    return reporte_antiguedad_saldos.ventas_abiertas(
+        cliente_filtro=filtros.get('cliente'),
+        razon_social_filtro=filtros.get('razon_social'),
+        tipo_factura_filtro=filtros.get('tipo_factura'),
+    )
+
+
+@login_required
+def reporte_antiguedad(request):
+    from django.core.paginator import Paginator
+    from django.utils import timezone
+
+    form = ReporteAntiguedadForm(request.GET or None)
+    hoy = timezone.localdate()
+    # Una fila por cliente con saldo: los totales salen de esas mismas filas.
+    filas = reporte_antiguedad_saldos.por_cliente(_ventas_antiguedad(form), hoy)
+    totales = reporte_antiguedad_saldos.totales_de(filas)
+    page_obj = Paginator(filas, ANTIGUEDAD_POR_PAGINA).get_page(request.GET.get('pagina'))
+
+    filtros = request.GET.copy()
+    filtros.pop('pagina', None)
+    return render(request, 'comercial/reportes/reporte_antiguedad.html', {
+        'form': form,
+        'hoy': hoy,
+        'totales': totales,
+        'tramos': reporte_antiguedad_saldos.TRAMOS,
+        'clientes': list(reporte_antiguedad_saldos.filas_cliente(page_obj.object_list)),
+        'page_obj': page_obj,
+        'filtros': filtros.urlencode(),
+    })
+
+
+@login_required
+def exportar_reporte_antiguedad_excel(request):
+    from django.utils import timezone
+    from .excel import Columna, FILAS_POR_LOTE, LibroExcel
+
+    ventas = _ventas_antiguedad(ReporteAntiguedadForm(request.GET or None))
+    hoy = timezone.localdate()
+    filas = reporte_antiguedad_saldos.por_cliente(ventas, hoy)
+    totales = reporte_antiguedad_saldos.totales_de(filas)
+    tramos = reporte_antiguedad_saldos.TRAMOS
+
+    libro = LibroExcel(color_encabezado='366092')
+    hoja = libro.hoja('Antigüedad por cliente', [
+        Columna('Cliente', 'cliente', 28),
+        Columna('Razón Social', 'razon_social', 28),
+        *[Columna(etiqueta, f'saldo_{clave}', 16, 'moneda') for clave, etiqueta, _, _ in tramos],
+        Columna('Saldo Total', 'total', 16, 'moneda'),
+        Columna('Ventas', 'cantidad', 10),
+    ])
+    hoja.titulo(f"ANTIGÜEDAD DE SALDOS AL {hoy.strftime('%d/%m/%Y')}")
+    hoja.vacia()
+    for tramo in totales['tramos']:
+        hoja.dato(f"{tramo['etiqueta']}:", tramo['saldo'])
+    hoja.dato('SALDO TOTAL:', totales['total'], 'moneda_total', 'etiqueta_total')
+    hoja.vacia()
+    hoja.encabezados()
+    hoja.filas(reporte_antiguedad_saldos.filas_cliente(filas, FILAS_POR_LOTE))
+
+    hoja = libro.hoja('Ventas con saldo', [
+        Columna('Fecha', lambda v: v['fecha'].strftime('%d/%m/%Y'), 12),
+        Columna('Pedido', 'pedido', 15),
+        Columna('Cliente', 'cliente', 28),
+        Columna('Razón Social', 'razon_social', 28),
+        Columna('Tipo', 'tipo', 10),
+        Columna('Valor Total', 'valor_total', 16, 'moneda'),
+        Columna('Saldo', 'saldo', 16, 'moneda'),
+        Columna('Días', 'dias', 8),
+        Columna('Tramo', 'tramo', 16),
+    ])
+    hoja.encabezados()
+    hoja.filas(
+        reporte_antiguedad_saldos.como_fila_venta(fila, hoy)
+        for fila in reporte_antiguedad_saldos.detalle(ventas).iterator(chunk_size=FILAS_POR_LOTE)
+    )
+    return libro.respuesta('antiguedad_saldos.xlsx')
+
+
+GASTOS_POR_PAGINA = 50
+
+
+def _construir_gastos(filtros):
+    """Compras del reporte de gastos según los filtros guardados en la sesión."""
+    return reporte_gastos.construir(
+        fecha_desde=datetime.fromisoformat(filtros['fecha_desde']).date() if filtros.get('fecha_desde') else None,
+        fecha_hasta=datetime.fromisoformat(filtros['fecha_hasta']).date() if filtros.get('fecha_hasta') else None,
+        cuenta_filtro=filtros.get('cuenta_id'),
+        tipo_cuenta_filtro=filtros.get('tipo_cuenta_id'),
+        tipo_gasto_filtro=filtros.get('tipo_gasto_id'),
+        tipo_factura_filtro=filtros.get('tipo_factura'),
+    )
 
 
 @login_required
 def reportes_gastos(request):
-    from datetime import datetime
     from .forms import ReporteGastosForm
-    
+
     form = ReporteGastosForm()
     reporte_data = None
-    
-    fecha_desde = None
-    fecha_hasta = None
-    cuenta_filtro = None
-    tipo_cuenta_filtro = None
-    tipo_gasto_filtro = None
-    tipo_factura_filtro = None
 
     if request.method == 'POST':
         form = ReporteGastosForm(request.POST)
         if form.is_valid():
-            fecha_desde = form.cleaned_data.get('fecha_desde')
-            fecha_hasta = form.cleaned_data.get('fecha_hasta')
-            cuenta_filtro = form.cleaned_data.get('cuenta')
-            tipo_cuenta_filtro = form.cleaned_data.get('tipo_cuenta')
-            tipo_gasto_filtro = form.cleaned_data.get('tipo_gasto')
-            tipo_factura_filtro = form.cleaned_data.get('tipo_factura')
-
-            request.session['reporte_gastos_filtros'] = {
-                'fecha_desde': fecha_desde.isoformat() if fecha_desde else None,
-                'fecha_hasta': fecha_hasta.isoformat() if fecha_hasta else None,
-                'cuenta_id': [c.id for c in cuenta_filtro] if cuenta_filtro else None,
-                'tipo_cuenta_id': [t.id for t in tipo_cuenta_filtro] if tipo_cuenta_filtro else None,
-                'tipo_gasto_id': [t.id for t in tipo_gasto_filtro] if tipo_gasto_filtro else None,
-                'tipo_factura': list(tipo_factura_filtro) if tipo_factura_filtro else None,
+            datos = form.cleaned_data
+            filtros = {
+                'fecha_desde': datos['fecha_desde'].isoformat() if datos.get('fecha_desde') else None,
+                'fecha_hasta': datos['fecha_hasta'].isoformat() if datos.get('fecha_hasta') else None,
+                'cuenta_id': [c.id for c in datos['cuenta']] if datos.get('cuenta') else None,
+                'tipo_cuenta_id': [t.id for t in datos['tipo_cuenta']] if datos.get('tipo_cuenta') else None,
+                'tipo_gasto_id': [t.id for t in datos['tipo_gasto']] if datos.get('tipo_gasto') else None,
+                'tipo_factura': list(datos['tipo_factura']) if datos.get('tipo_factura') else None,
             }
-            gastos = []
-            compras_query = Compra.objects.filter(deleted_at__isnull=True).select_related('cuenta', 'cuenta__tipo_cuenta', 'tipo_gasto')
-
-            if fecha_desde:
-                compras_query = compras_query.filter(fecha_pago__gte=fecha_desde)
-            if fecha_hasta:
-                compras_query = compras_query.filter(fecha_pago__lte=fecha_hasta)
-            if cuenta_filtro:
-                compras_query = compras_query.filter(cuenta__in=cuenta_filtro)
-            if tipo_cuenta_filtro:
-                compras_query = compras_query.filter(cuenta__tipo_cuenta__in=tipo_cuenta_filtro)
-            if tipo_gasto_filtro:
-                compras_query = compras_query.filter(tipo_gasto__in=tipo_gasto_filtro)
-            if tipo_factura_filtro:
-                if 'blanco' in tipo_factura_filtro and 'negro' not in tipo_factura_filtro:
-                    compras_query = compras_query.filter(con_factura=True)
-                elif 'negro' in tipo_factura_filtro and 'blanco' not in tipo_factura_filtro:
-                    compras_query = compras_query.filter(con_factura=False)
-
-            for compra in compras_query:
-                gastos.append({
-                    'fecha': compra.fecha_pago,
-                    'numero_pedido': compra.numero_pedido or '-',
-                    'numero_factura': compra.numero_factura or '-',
-                    'cuenta': str(compra.cuenta),
-                    'tipo_cuenta': compra.cuenta.tipo_cuenta.get_tipo_display(),
-                    'tipo_gasto': compra.tipo_gasto.nombre if compra.tipo_gasto else 'Sin tipo',
-                    'monto': compra.valor_total,
-                    'tipo': 'Blanco' if compra.con_factura else 'Negro'
-                })
-
-            gastos.sort(key=lambda x: x['fecha'], reverse=True)
-
-            total_blanco = sum(g['monto'] for g in gastos if g['tipo'] == 'Blanco')
-            total_negro = sum(g['monto'] for g in gastos if g['tipo'] == 'Negro')
-            total = total_blanco + total_negro
-
-            cantidad_blanco = len([g for g in gastos if g['tipo'] == 'Blanco'])
-            cantidad_negro = len([g for g in gastos if g['tipo'] == 'Negro'])
-
-            resumen_tipo_cuenta = {}
-            resumen_tipo_gasto = {}
-            for g in gastos:
-                rc = resumen_tipo_cuenta.setdefault(g['tipo_cuenta'], {'nombre': g['tipo_cuenta'], 'total': 0, 'cantidad': 0})
-                rc['total'] += g['monto']
-                rc['cantidad'] += 1
-                rg = resumen_tipo_gasto.setdefault(g['tipo_gasto'], {'nombre': g['tipo_gasto'], 'total': 0, 'cantidad': 0})
-                rg['total'] += g['monto']
-                rg['cantidad'] += 1
-
-            por_tipo_cuenta = sorted(resumen_tipo_cuenta.values(), key=lambda x: x['total'], reverse=True)
-            por_tipo_gasto = sorted(resumen_tipo_gasto.values(), key=lambda x: x['total'], reverse=True)
+            request.session['reporte_gastos_filtros'] = filtros
+            compras = _construir_gastos(filtros)
+            lista, siguiente = reporte_gastos.pagina(
+                compras.select_related('cuenta', 'cuenta__tipo_cuenta', 'tipo_gasto'),
+                request.POST.get('desde'),
+                GASTOS_POR_PAGINA,
+            )
 
             reporte_data = {
                 'gastos': {
-                    'total_blanco': total_blanco,
-                    'total_negro': total_negro,
-                    'total': total,
-                    'cantidad_blanco': cantidad_blanco,
-                    'cantidad_negro': cantidad_negro,
-                    'cantidad': len(gastos),
-                    'lista': gastos,
-                    'por_tipo_cuenta': por_tipo_cuenta,
-                    'por_tipo_gasto': por_tipo_gasto,
+                    **reporte_gastos.totales(compras),
+                    'lista': [reporte_gastos.como_dict(compra) for compra in lista],
+                    'siguiente': siguiente,
+                    'es_primera': not request.POST.get('desde'),
+                    'por_tipo_cuenta': reporte_gastos.por_tipo_cuenta(compras),
+                    'por_tipo_gasto': reporte_gastos.por_tipo_gasto(compras),
                 }
             }
     else:
         request.session.pop('reporte_gastos_filtros', None)
-    
+
     context = {
         'form': form,
         'reporte_data': reporte_data,
@@ -2280,13 +1983,10 @@ def reportes_proveedores(request):
     form = ReporteProveedorForm(request.GET or None)
     # Incluir también proveedores desactivados que conserven movimientos, para
     # que sus compras y pagos no desaparezcan del reporte al ser dados de baja.
-    proveedores = Cuenta.objects.filter(
-        deleted_at__isnull=True,
+    proveedores = Cuenta.alive.filter(
         tipo_cuenta__tipo='proveedores',
     ).annotate(
-        tiene_movimientos=Exists(
-            Compra.objects.filter(cuenta=OuterRef('pk'), deleted_at__isnull=True)
-        )
+        tiene_movimientos=Exists(Compra.alive.filter(cuenta=OuterRef('pk')))
     ).filter(
         Q(activo=True) | Q(tiene_movimientos=True)
     ).select_related('tipo_cuenta').order_by('nombre')
@@ -2296,10 +1996,8 @@ def reportes_proveedores(request):
         proveedor_filtro = form.cleaned_data['proveedor']
         proveedores = proveedores.filter(pk=proveedor_filtro.pk)
 
-    resumen_proveedores = []
-    for proveedor in proveedores:
-        cuenta_corriente = construir_cuenta_corriente_proveedor(proveedor)
-        resumen_proveedores.append(cuenta_corriente)
+    # Totales y saldo de todos los proveedores en una sola consulta sobre el libro.
+    resumen_proveedores = [resumen_cuenta_corriente(proveedor) for proveedor in anotar_resumen(proveedores)]
 
     context = {
         'form': form,
@@ -2312,186 +2010,92 @@ def reportes_proveedores(request):
 @login_required
 def reporte_proveedor_detalle(request, pk):
     proveedor = get_object_or_404(
-        Cuenta.objects.filter(
-            deleted_at__isnull=True,
-            tipo_cuenta__tipo='proveedores',
-        ).select_related('tipo_cuenta'),
+        Cuenta.alive.filter(tipo_cuenta__tipo='proveedores').select_related('tipo_cuenta'),
         pk=pk,
     )
     cuenta_corriente = construir_cuenta_corriente_proveedor(proveedor)
+    movimientos, numero_inicial, siguiente = pagina_movimientos(proveedor.pk, request.GET.get('desde'))
+    cuenta_corriente['movimientos'] = movimientos
 
     context = {
         'cuenta_corriente': cuenta_corriente,
+        'numero_inicial': numero_inicial,
         'return_url': _reportes_proveedores_return_url(request),
     }
+    # Paginación por clave: "siguientes" lleva el cursor del último movimiento mostrado.
+    url_pagina = reverse('comercial:reporte_proveedor_detalle', kwargs={'pk': pk})
+    if request.GET.get('desde'):
+        context['primera_url'] = append_return_to(url_pagina, context['return_url'])
+    if siguiente:
+        context['siguiente_url'] = append_return_to(f'{url_pagina}?desde={siguiente}', context['return_url'])
     return render(request, 'comercial/reportes/reporte_proveedor_detalle.html', context)
 
 
 @login_required
 def exportar_reporte_proveedores_excel(request):
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill
-    from django.http import HttpResponse
+    from .excel import Columna, FILAS_POR_LOTE, LibroExcel
 
     proveedor_id = request.GET.get('proveedor')
     proveedor = get_object_or_404(
-        Cuenta.objects.filter(
-            deleted_at__isnull=True,
-            tipo_cuenta__tipo='proveedores',
-        ).select_related('tipo_cuenta'),
+        Cuenta.alive.filter(tipo_cuenta__tipo='proveedores').select_related('tipo_cuenta'),
         pk=proveedor_id,
     )
 
     cuenta_corriente = construir_cuenta_corriente_proveedor(proveedor)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Cuenta Proveedor'
-
-    title_font = Font(bold=True, size=14)
-    section_font = Font(bold=True, size=11)
-    header_font = Font(bold=True, color='FFFFFF', size=11)
-    header_fill = PatternFill(start_color='1E293B', end_color='1E293B', fill_type='solid')
-
-    ws['A1'] = 'CUENTA CORRIENTE DE PROVEEDOR'
-    ws['A1'].font = title_font
-    ws.merge_cells('A1:G1')
-
-    ws['A3'] = 'Proveedor:'
-    ws['B3'] = proveedor.nombre
-    ws['A4'] = 'Razón Social:'
-    ws['B4'] = proveedor.razon_social or '-'
-    ws['A5'] = 'Total Compras:'
-    ws['B5'] = float(cuenta_corriente['total_compras'])
-    ws['A6'] = 'Total Señas:'
-    ws['B6'] = float(cuenta_corriente['total_senas'])
-    ws['A7'] = 'Total Pagos:'
-    ws['B7'] = float(cuenta_corriente['total_pagos'])
-    ws['A8'] = 'Saldo Actual:'
-    ws['B8'] = float(cuenta_corriente['saldo_actual'])
-
-    for cell_ref in ('A3', 'A4', 'A5', 'A6', 'A7', 'A8'):
-        ws[cell_ref].font = section_font
-
-    for cell_ref in ('B5', 'B6', 'B7', 'B8'):
-        ws[cell_ref].number_format = '$#,##0.00'
-
-    headers = ['Fecha', 'Movimiento', 'Referencia', 'Forma de Pago', 'Debe', 'Haber', 'Saldo']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(10, col, header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-
-    for row, movimiento in enumerate(cuenta_corriente['movimientos'], 11):
-        ws.cell(row, 1, movimiento['fecha'].strftime('%d/%m/%Y'))
-        ws.cell(row, 2, movimiento['descripcion'])
-        ws.cell(row, 3, movimiento['referencia'])
-        ws.cell(row, 4, movimiento['forma_pago'])
-
-        debe_cell = ws.cell(row, 5, float(movimiento['debe']))
-        haber_cell = ws.cell(row, 6, float(movimiento['haber']))
-        saldo_cell = ws.cell(row, 7, float(movimiento['saldo']))
-        for money_cell in (debe_cell, haber_cell, saldo_cell):
-            money_cell.number_format = '$#,##0.00'
-
-    ws.column_dimensions['A'].width = 14
-    ws.column_dimensions['B'].width = 34
-    ws.column_dimensions['C'].width = 18
-    ws.column_dimensions['D'].width = 18
-    ws.column_dimensions['E'].width = 14
-    ws.column_dimensions['F'].width = 14
-    ws.column_dimensions['G'].width = 14
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename=cuenta_proveedor_{proveedor.id}.xlsx'
-    wb.save(response)
-    return response
+    columnas = [
+        Columna('Fecha', lambda m: m['fecha'].strftime('%d/%m/%Y'), 14),
+        Columna('Movimiento', 'descripcion', 34),
+        Columna('Referencia', 'referencia', 18),
+        Columna('Forma de Pago', 'forma_pago', 18),
+        Columna('Debe', 'debe', 14, 'moneda'),
+        Columna('Haber', 'haber', 14, 'moneda'),
+        Columna('Saldo', 'saldo', 14, 'moneda'),
+    ]
+    libro = LibroExcel(color_encabezado='1E293B')
+    hoja = libro.hoja('Cuenta Proveedor', columnas)
+    hoja.titulo('CUENTA CORRIENTE DE PROVEEDOR')
+    hoja.vacia()
+    hoja.dato('Proveedor:', proveedor.nombre, None)
+    hoja.dato('Razón Social:', proveedor.razon_social or '-', None)
+    hoja.dato('Total Compras:', cuenta_corriente['total_compras'])
+    hoja.dato('Total Señas:', cuenta_corriente['total_senas'])
+    hoja.dato('Total Pagos:', cuenta_corriente['total_pagos'])
+    hoja.dato('Saldo Actual:', cuenta_corriente['saldo_actual'])
+    hoja.vacia()
+    hoja.encabezados()
+    hoja.filas(cuenta_corriente['movimientos'].iterator(chunk_size=FILAS_POR_LOTE))
+    return libro.respuesta(f'cuenta_proveedor_{proveedor.id}.xlsx')
 
 
 @login_required
 def exportar_reporte_gastos_excel(request):
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill
-    from django.http import HttpResponse
-    
-    gastos = []
-    compras_query = Compra.objects.filter(deleted_at__isnull=True).select_related('cuenta', 'cuenta__tipo_cuenta')
-    
-    for compra in compras_query:
-        gastos.append({
-            'fecha': compra.fecha_pago,
-            'numero_pedido': compra.numero_pedido or '-',
-            'numero_factura': compra.numero_factura or '-',
-            'cuenta': str(compra.cuenta),
-            'tipo_cuenta': compra.cuenta.tipo_cuenta.get_tipo_display(),
-            'monto': float(compra.valor_total),
-            'tipo': 'Blanco' if compra.con_factura else 'Negro'
-        })
-    
-    gastos.sort(key=lambda x: x['fecha'], reverse=True)
-    
-    total_blanco = sum(g['monto'] for g in gastos if g['tipo'] == 'Blanco')
-    total_negro = sum(g['monto'] for g in gastos if g['tipo'] == 'Negro')
-    total = total_blanco + total_negro
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte Gastos"
-    
-    header_fill = PatternFill(start_color="DC2626", end_color="DC2626", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    title_font = Font(bold=True, size=14)
-    
-    ws['A1'] = 'REPORTE DE GASTOS'
-    ws['A1'].font = title_font
-    ws.merge_cells('A1:G1')
-    
-    ws['A3'] = 'Total Gastos Blanco:'
-    ws['B3'] = total_blanco
-    ws['B3'].number_format = '$#,##0.00'
-    ws['A3'].font = Font(bold=True)
-    
-    ws['A4'] = 'Total Gastos Negro:'
-    ws['B4'] = total_negro
-    ws['B4'].number_format = '$#,##0.00'
-    ws['A4'].font = Font(bold=True)
-    
-    ws['A5'] = 'TOTAL GASTOS:'
-    ws['B5'] = total
-    ws['B5'].number_format = '$#,##0.00'
-    ws['A5'].font = Font(bold=True, size=12)
-    ws['B5'].font = Font(bold=True, size=12)
-    
-    headers = ['Fecha Pago', 'N� Pedido', 'N� Factura', 'Cuenta', 'Tipo Cuenta', 'Monto', 'Tipo']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(7, col, header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-    
-    for row, gasto in enumerate(gastos, 8):
-        ws.cell(row, 1, gasto['fecha'].strftime('%d/%m/%Y'))
-        ws.cell(row, 2, gasto['numero_pedido'])
-        ws.cell(row, 3, gasto['numero_factura'])
-        ws.cell(row, 4, gasto['cuenta'])
-        ws.cell(row, 5, gasto['tipo_cuenta'])
-        cell = ws.cell(row, 6, gasto['monto'])
-        cell.number_format = '$#,##0.00'
-        ws.cell(row, 7, gasto['tipo'])
-    
-    ws.column_dimensions['A'].width = 12
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 25
-    ws.column_dimensions['E'].width = 20
-    ws.column_dimensions['F'].width = 15
-    ws.column_dimensions['G'].width = 10
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=reporte_gastos.xlsx'
-    wb.save(response)
-    return response
+    from .excel import Columna, FILAS_POR_LOTE, LibroExcel
+
+    compras = _construir_gastos(request.session.get('reporte_gastos_filtros', {}))
+    totales = reporte_gastos.totales(compras)
+
+    columnas = [
+        Columna('Fecha Pago', lambda c: c.fecha_pago.strftime('%d/%m/%Y'), 12),
+        Columna('N° Pedido', lambda c: c.numero_pedido or '-', 15),
+        Columna('N° Factura', lambda c: c.numero_factura or '-', 15),
+        Columna('Cuenta', lambda c: str(c.cuenta), 25),
+        Columna('Tipo Cuenta', lambda c: c.cuenta.tipo_cuenta.get_tipo_display(), 20),
+        Columna('Monto', 'valor_total', 15, 'moneda'),
+        Columna('Tipo', lambda c: 'Blanco' if c.con_factura else 'Negro', 10),
+    ]
+    libro = LibroExcel(color_encabezado='DC2626')
+    hoja = libro.hoja('Reporte Gastos', columnas)
+    hoja.titulo('REPORTE DE GASTOS')
+    hoja.vacia()
+    hoja.dato('Total Gastos Blanco:', totales['total_blanco'])
+    hoja.dato('Total Gastos Negro:', totales['total_negro'])
+    hoja.dato('TOTAL GASTOS:', totales['total'], 'moneda_total', 'etiqueta_total')
+    hoja.vacia()
+    hoja.encabezados()
+    filas = reporte_gastos.ordenar(compras.select_related('cuenta', 'cuenta__tipo_cuenta'))
+    hoja.filas(filas.iterator(chunk_size=FILAS_POR_LOTE))
+    return libro.respuesta('reporte_gastos.xlsx')
 
 
 @login_required
@@ -2500,7 +2104,7 @@ def editar_fecha_sena(request, pk):
     from datetime import datetime
     
     if request.method == 'POST':
-        venta = get_object_or_404(Venta, pk=pk)
+        venta = get_object_or_404(Venta.alive, pk=pk)
         
         try:
             if request.POST:
@@ -2521,7 +2125,7 @@ def editar_fecha_sena(request, pk):
             # Actualizar created_at (fecha de se�a) y fecha_pago (fecha de venta total)
             venta.created_at = fecha_sena
             venta.fecha_pago = fecha_sena.date()
-            venta.save()
+            venta.save(update_fields=['created_at', 'fecha_pago', 'updated_at'])
             
             return JsonResponse({
                 'success': True,
@@ -2542,12 +2146,9 @@ def eliminar_pago(request, pk):
         venta = pago.venta
         
         try:
-            # Eliminar el pago
+            # Eliminar el pago devuelve su monto al saldo de la venta
             pago.delete()
             
-            # Recalcular saldo de la venta
-            venta.save()
-            
             return JsonResponse({
                 'success': True,
                 'saldo': float(venta.saldo)
@@ -2607,221 +2208,121 @@ def agregar_retencion_pago(request, pk):
 @login_required
 def reporte_general(request):
     """Vista para reporte general combinando ingresos y gastos."""
-    from django.db.models import Sum, Value, DecimalField, Q
-    from django.db.models.functions import Coalesce
-    
+    from .reporte_general import reporte_general_datos
+
     reporte_data = None
     fecha_desde = None
     fecha_hasta = None
-    
+    por_mes = False
+
     if request.method == 'POST':
         fecha_desde = request.POST.get('fecha_desde')
         fecha_hasta = request.POST.get('fecha_hasta')
-        
-        # INGRESOS = Señas + Pagos adicionales
-        # 1. Señas de ventas
-        ventas_senas = Venta.objects.filter(deleted_at__isnull=True, sena__gt=0)
-        if fecha_desde:
-            ventas_senas = ventas_senas.filter(created_at__date__gte=fecha_desde)
-        if fecha_hasta:
-            ventas_senas = ventas_senas.filter(created_at__date__lte=fecha_hasta)
-        
-        senas_blanco = ventas_senas.filter(con_factura=True).aggregate(
-            total=Coalesce(Sum('sena'), Value(0, output_field=DecimalField()))
-        )['total']
-        senas_negro = ventas_senas.filter(con_factura=False).aggregate(
-            total=Coalesce(Sum('sena'), Value(0, output_field=DecimalField()))
-        )['total']
-        
-        # 2. Pagos adicionales
-        pagos = PagoVenta.objects.filter(venta__deleted_at__isnull=True)
-        if fecha_desde:
-            pagos = pagos.filter(fecha_pago__gte=fecha_desde)
-        if fecha_hasta:
-            pagos = pagos.filter(fecha_pago__lte=fecha_hasta)
-        
-        pagos_blanco = pagos.filter(con_factura=True).aggregate(
-            total=Coalesce(Sum('monto'), Value(0, output_field=DecimalField()))
-        )['total']
-        pagos_negro = pagos.filter(con_factura=False).aggregate(
-            total=Coalesce(Sum('monto'), Value(0, output_field=DecimalField()))
-        )['total']
-        
-        # Total ingresos = señas + pagos
-        ingresos_blanco = senas_blanco + pagos_blanco
-        ingresos_negro = senas_negro + pagos_negro
-        total_ingresos = ingresos_blanco + ingresos_negro
-        
-        # GASTOS (Compra)
-        compras = Compra.objects.filter(deleted_at__isnull=True)
-        if fecha_desde:
-            compras = compras.filter(fecha_pago__gte=fecha_desde)
-        if fecha_hasta:
-            compras = compras.filter(fecha_pago__lte=fecha_hasta)
-        
-        gastos_blanco = compras.filter(con_factura=True).aggregate(
-            total=Coalesce(Sum('valor_total'), Value(0, output_field=DecimalField()))
-        )['total']
-        gastos_negro = compras.filter(con_factura=False).aggregate(
-            total=Coalesce(Sum('valor_total'), Value(0, output_field=DecimalField()))
-        )['total']
-        total_gastos = gastos_blanco + gastos_negro
-        
-        # Balance
-        balance_blanco = ingresos_blanco - gastos_blanco
-        balance_negro = ingresos_negro - gastos_negro
-        balance_total = total_ingresos - total_gastos
-        
-        reporte_data = {
-            'ingresos': {
-                'blanco': ingresos_blanco,
-                'negro': ingresos_negro,
-                'total': total_ingresos,
-                'cantidad': ventas_senas.count() + pagos.count(),
-            },
-            'gastos': {
-                'blanco': gastos_blanco,
-                'negro': gastos_negro,
-                'total': total_gastos,
-                'cantidad': compras.count(),
-            },
-            'balance': {
-                'blanco': balance_blanco,
-                'negro': balance_negro,
-                'total': balance_total,
-            },
-        }
-        
+        por_mes = request.POST.get('por_mes') == 'true'
+        reporte_data = reporte_general_datos(fecha_desde, fecha_hasta, por_mes=por_mes)
+
+        # La exportación vuelve a pedir las cifras del mismo período (salen del cache).
         request.session['reporte_general_data'] = {
             'fecha_desde': fecha_desde,
             'fecha_hasta': fecha_hasta,
-            'ingresos_blanco': float(ingresos_blanco),
-            'ingresos_negro': float(ingresos_negro),
-            'total_ingresos': float(total_ingresos),
-            'gastos_blanco': float(gastos_blanco),
-            'gastos_negro': float(gastos_negro),
-            'total_gastos': float(total_gastos),
-            'balance_blanco': float(balance_blanco),
-            'balance_negro': float(balance_negro),
-            'balance_total': float(balance_total),
+            'por_mes': por_mes,
         }
-    
+
     return render(request, 'comercial/reportes/reporte_general.html', {
         'reporte_data': reporte_data,
         'fecha_desde': fecha_desde,
         'fecha_hasta': fecha_hasta,
+        'por_mes': por_mes,
     })
 
 
 @login_required
 def exportar_reporte_general_excel(request):
     """Exportar reporte general a Excel."""
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from django.http import HttpResponse
-    from datetime import datetime
-    
-    data = request.session.get('reporte_general_data', {})
-    
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Reporte General"
-    
-    # Estilos
-    header_fill = PatternFill(start_color="1F4788", end_color="1F4788", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    title_font = Font(bold=True, size=14)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+    from openpyxl.styles import Border, Font, PatternFill, Side
+    from .excel import Columna, LibroExcel
+
+    from .reporte_general import reporte_general_datos
+
+    periodo = request.session.get('reporte_general_data', {})
+    datos = reporte_general_datos(
+        periodo.get('fecha_desde'), periodo.get('fecha_hasta'), por_mes=periodo.get('por_mes', False),
     )
-    
-    # T�tulo
-    ws.merge_cells('A1:E1')
-    ws['A1'] = 'REPORTE GENERAL - INGRESOS Y GASTOS'
-    ws['A1'].font = title_font
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    
-    # Per�odo
-    row = 3
-    if data.get('fecha_desde') or data.get('fecha_hasta'):
-        periodo = f"Per�odo: {data.get('fecha_desde', 'Inicio')} - {data.get('fecha_hasta', 'Hoy')}"
-        ws.merge_cells(f'A{row}:E{row}')
-        ws[f'A{row}'] = periodo
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'A{row}'].alignment = Alignment(horizontal='center')
-        row += 2
-    
-    # Encabezados
-    headers = ['Concepto', 'Blanco', 'Negro', 'Total', 'Porcentaje']
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=row, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-    
-    row += 1
-    
-    # INGRESOS
-    ws.cell(row=row, column=1, value='INGRESOS').font = Font(bold=True)
-    ws.cell(row=row, column=2, value=data.get('ingresos_blanco', 0))
-    ws.cell(row=row, column=3, value=data.get('ingresos_negro', 0))
-    ws.cell(row=row, column=4, value=data.get('total_ingresos', 0))
-    ws.cell(row=row, column=5, value='100%')
-    for col in range(1, 6):
-        ws.cell(row=row, column=col).border = border
-        if col > 1:
-            ws.cell(row=row, column=col).number_format = '"$"#,##0.00'
-    row += 1
-    
-    # GASTOS
-    ws.cell(row=row, column=1, value='GASTOS').font = Font(bold=True)
-    ws.cell(row=row, column=2, value=data.get('gastos_blanco', 0))
-    ws.cell(row=row, column=3, value=data.get('gastos_negro', 0))
-    ws.cell(row=row, column=4, value=data.get('total_gastos', 0))
-    total_ingresos = data.get('total_ingresos', 0)
-    porcentaje_gastos = (data.get('total_gastos', 0) / total_ingresos * 100) if total_ingresos > 0 else 0
-    ws.cell(row=row, column=5, value=f'{porcentaje_gastos:.1f}%')
-    for col in range(1, 6):
-        ws.cell(row=row, column=col).border = border
-        if col > 1 and col < 5:
-            ws.cell(row=row, column=col).number_format = '"$"#,##0.00'
-    row += 1
-    
-    # BALANCE
-    balance_fill = PatternFill(start_color="D4EDDA" if data.get('balance_total', 0) >= 0 else "F8D7DA", 
-                               end_color="D4EDDA" if data.get('balance_total', 0) >= 0 else "F8D7DA", 
-                               fill_type="solid")
-    ws.cell(row=row, column=1, value='BALANCE').font = Font(bold=True, size=12)
-    ws.cell(row=row, column=2, value=data.get('balance_blanco', 0))
-    ws.cell(row=row, column=3, value=data.get('balance_negro', 0))
-    ws.cell(row=row, column=4, value=data.get('balance_total', 0))
-    ws.cell(row=row, column=5, value='')
-    for col in range(1, 6):
-        ws.cell(row=row, column=col).fill = balance_fill
-        ws.cell(row=row, column=col).border = border
-        ws.cell(row=row, column=col).font = Font(bold=True)
-        if col > 1 and col < 5:
-            ws.cell(row=row, column=col).number_format = '"$"#,##0.00'
-    
-    # Ajustar anchos
-    ws.column_dimensions['A'].width = 20
-    ws.column_dimensions['B'].width = 18
-    ws.column_dimensions['C'].width = 18
-    ws.column_dimensions['D'].width = 18
-    ws.column_dimensions['E'].width = 15
-    
-    # Preparar respuesta
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    ingresos, gastos, balance = datos['ingresos'], datos['gastos'], datos['balance']
+
+    linea = Side(style='thin')
+    borde = Border(left=linea, right=linea, top=linea, bottom=linea)
+    importe = '"$"#,##0.00'
+    color_balance = 'D4EDDA' if balance['total'] >= 0 else 'F8D7DA'
+    relleno_balance = PatternFill(start_color=color_balance, end_color=color_balance, fill_type='solid')
+    estilos = {
+        'general_concepto': {'font': Font(bold=True), 'border': borde},
+        'general_celda': {'border': borde},
+        'general_importe': {'border': borde, 'number_format': importe},
+        'general_balance': {'font': Font(bold=True), 'fill': relleno_balance, 'border': borde},
+        'general_balance_importe': {'font': Font(bold=True), 'fill': relleno_balance, 'border': borde, 'number_format': importe},
+    }
+
+    columnas = [
+        Columna('Concepto', 'concepto', 20),
+        Columna('Blanco', 'blanco', 18),
+        Columna('Negro', 'negro', 18),
+        Columna('Total', 'total', 18),
+        Columna('Porcentaje', 'porcentaje', 15),
+    ]
+    libro = LibroExcel(color_encabezado='1F4788', borde_encabezado=True, estilos=estilos)
+    hoja = libro.hoja('Reporte General', columnas)
+    hoja.titulo('REPORTE GENERAL - INGRESOS Y GASTOS')
+    hoja.vacia()
+
+    if periodo.get('fecha_desde') or periodo.get('fecha_hasta'):
+        hoja.fila((f"Período: {periodo.get('fecha_desde') or 'Inicio'} - {periodo.get('fecha_hasta') or 'Hoy'}", 'etiqueta'))
+        hoja.vacia()
+
+    hoja.encabezados()
+
+    porcentaje_gastos = (gastos['total'] / ingresos['total'] * 100) if ingresos['total'] > 0 else 0
+    hoja.fila(
+        ('INGRESOS', 'general_concepto'),
+        (ingresos['blanco'], 'general_importe'),
+        (ingresos['negro'], 'general_importe'),
+        (ingresos['total'], 'general_importe'),
+        ('100%', 'general_celda'),
+    )
+    hoja.fila(
+        ('GASTOS', 'general_concepto'),
+        (gastos['blanco'], 'general_importe'),
+        (gastos['negro'], 'general_importe'),
+        (gastos['total'], 'general_importe'),
+        (f'{porcentaje_gastos:.1f}%', 'general_celda'),
+    )
+    hoja.fila(
+        ('BALANCE', 'general_balance'),
+        (balance['blanco'], 'general_balance_importe'),
+        (balance['negro'], 'general_balance_importe'),
+        (balance['total'], 'general_balance_importe'),
+        ('', 'general_balance'),
     )
-    filename = f'reporte_general_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
 
+    if datos.get('meses'):
+        columnas_mes = [
+            Columna('Mes', 'mes', 12),
+            Columna('Ingresos blanco', 'ingresos_blanco', 18),
+            Columna('Ingresos negro', 'ingresos_negro', 18),
+            Columna('Gastos blanco', 'gastos_blanco', 18),
+            Columna('Gastos negro', 'gastos_negro', 18),
+            Columna('Balance', 'balance', 18),
+        ]
+        hoja_mes = libro.hoja('Por mes', columnas_mes)
+        hoja_mes.encabezados()
+        for mes in datos['meses']:
+            hoja_mes.fila(
+                (mes['mes'].strftime('%m/%Y'), 'general_celda'),
+                (mes['ingresos']['blanco'], 'general_importe'),
+                (mes['ingresos']['negro'], 'general_importe'),
+                (mes['gastos']['blanco'], 'general_importe'),
+                (mes['gastos']['negro'], 'general_importe'),
+                (mes['balance']['total'], 'general_importe'),
+            )
 
+    return libro.respuesta(f'reporte_general_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'core'
\ No newline at end of file
+    name = 'core'
+
+    def ready(self):
+        from .busqueda import instalar_indices_post_migrate
+
+        # Índices FTS5 de la búsqueda en SQLite (en MySQL los crean las migraciones).
+        post_migrate.connect(instalar_indices_post_migrate, sender=self, dispatch_uid='core.busqueda')
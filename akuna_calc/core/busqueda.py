@@ -0,0 +1,230 @@
+"""Búsqueda de texto completo compartida (presupuestos, ventas, clientes).
+
+Cada modelo buscable guarda en `documento_busqueda` un texto desnormalizado con
+todo lo que se puede buscar de la fila (número, datos del cliente, facturas...),
+ya normalizado: minúsculas, sin acentos y con los números de comprobante también
+sin ceros a la izquierda (para que "999" encuentre "0001-00000999"). El modelo
+lo arma en `armar_documento_busqueda()` y lo actualiza al guardarse.
+
+La búsqueda usa el índice de texto completo del motor:
+
+- MySQL: índice FULLTEXT sobre la columna (lo crean las migraciones) y
+  `MATCH ... AGAINST` en modo booleano, con cada término como prefijo.
+- SQLite (tests y desarrollo): una tabla virtual FTS5 por modelo, de contenido
+  externo, mantenida con triggers. La crea `instalar_indices_sqlite` en
+  `post_migrate`, así que existe también en la base de tests.
+
+`buscar()` filtra por coincidencia y anota `relevancia` para ordenar. Las
+palabras van al índice como prefijo; los términos con dígitos, los cortos y las
+stopwords se buscan con `icontains` sobre la columna (una sola columna, sin
+JOINs). Así un fragmento interno de un número de pedido o de un CUIT ("0123" en
+"PVC-00123", "3456" en "20123456786") sigue encontrándose como antes del índice,
+y MySQL no descarta en silencio lo que FULLTEXT no indexa.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+
+CAMPO = 'documento_busqueda'
+
+# innodb_ft_min_token_size por defecto: MySQL ignora palabras más cortas.
+LARGO_MINIMO_MYSQL = 3
+# Stopwords por defecto de InnoDB con 3 letras o más.
+_STOPWORDS_INNODB = {
+    'about', 'are', 'com', 'for', 'from', 'how', 'that', 'the', 'this',
+    'was', 'what', 'when', 'where', 'who', 'will', 'with', 'und', 'www',
+}
+
+_PALABRA = re.compile(r'[0-9a-z]+')
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ("Pérez" -> "perez")."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def palabras(texto):
+    return _PALABRA.findall(normalizar(texto))
+
+
+def armar_documento(*partes):
+    """Texto a indexar: palabras normalizadas, sin repetir, más cada número sin ceros a la izquierda."""
+    vistas = []
+    for parte in partes:
+        for palabra in palabras(parte):
+            variantes = [palabra]
+            if palabra.isdigit() and palabra.lstrip('0') and palabra.lstrip('0') != palabra:
+                variantes.append(palabra.lstrip('0'))
+            for variante in variantes:
+                if variante not in vistas:
+                    vistas.append(variante)
+    return ' '.join(vistas)
+
+
+def tabla_fts(modelo):
+    return f'{modelo._meta.db_table}_fts'
+
+
+def _es_literal(termino):
+    """Términos que no van al índice sino a `icontains`: con dígitos, cortos o stopwords."""
+    return (
+        any(caracter.isdigit() for caracter in termino)
+        or len(termino) < LARGO_MINIMO_MYSQL
+        or termino in _STOPWORDS_INNODB
+    )
+
+
+def _consulta_mysql(terminos):
+    return ' '.join(f'+{t}*' for t in terminos)
+
+
+def _consulta_sqlite(terminos):
+    return ' '.join(f'"{t}"*' for t in terminos)
+
+
+def buscar(queryset, termino, ademas=None):
+    """Filtra `queryset` por `termino` sobre `documento_busqueda` y anota `relevancia`.
+
+    `ademas` es un Q opcional que también cuenta como coincidencia (filtros
+    exactos baratos, por ejemplo el total o el estado); esas filas quedan con
+    relevancia 0. No ordena: cada vista decide si la relevancia manda.
+    """
+    modelo = queryset.model
+    tabla = modelo._meta.db_table
+    terminos = palabras(termino)
+    vendor = connections[queryset.db].vendor
+
+    # Sin índice de texto (otro motor) todo va por icontains.
+    indexables = [t for t in terminos if not _es_literal(t)] if vendor in ('mysql', 'sqlite') else []
+    sueltos = [t for t in terminos if t not in indexables] if terminos else [normalizar(termino).strip()]
+    literales = Q()
+    for literal in sueltos:
+        literales &= Q(**{f'{CAMPO}__icontains': literal})
+
+    consulta = ''
+    if vendor == 'mysql':
+        consulta = _consulta_mysql(indexables)
+    elif vendor == 'sqlite':
+        consulta = _consulta_sqlite(indexables)
+
+    if not consulta:
+        coincide = literales
+        if ademas is not None:
+            coincide |= ademas
+        return queryset.filter(coincide).annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+    if vendor == 'mysql':
+        match = f'MATCH({CAMPO}) AGAINST (%s IN BOOLEAN MODE)'
+        ids = RawSQL(f'SELECT id FROM {tabla} WHERE {match}', (consulta,))
+        puntaje = RawSQL(f'MATCH({tabla}.{CAMPO}) AGAINST (%s IN BOOLEAN MODE)', (consulta,))
+    else:
+        fts = tabla_fts(modelo)
+        ids = RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (consulta,))
+        # bm25() es menor cuanto mejor la coincidencia: se invierte el signo.
+        puntaje = RawSQL(
+            f'SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = "{tabla}"."id"',
+            (consulta,),
+        )
+
+    coincide = Q(pk__in=ids) & literales
+    if ademas is not None:
+        coincide |= ademas
+    return queryset.filter(coincide).annotate(
+        relevancia=Coalesce(puntaje, Value(0.0), output_field=FloatField()),
+    )
+
+
+def actualizar_documento(obj, kwargs_save, campos):
+    """Recalcula `documento_busqueda` de `obj` antes de su `save()`.
+
+    Si el save viene con `update_fields` y no toca ninguno de `campos` (los que
+    entran en el documento), no hace nada; si los toca, agrega la columna.
+    """
+    update_fields = kwargs_save.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(campos):
+        return
+    setattr(obj, CAMPO, obj.armar_documento_busqueda())
+    if update_fields is not None:
+        kwargs_save['update_fields'] = {*update_fields, CAMPO}
+
+
+def refrescar_documentos(queryset, lote=500):
+    """Recalcula `documento_busqueda` de las filas del queryset y guarda las que cambiaron.
+
+    El queryset tiene que traer lo que use `armar_documento_busqueda()` del
+    modelo (select_related / prefetch_related) para no consultar por fila.
+    Devuelve la cantidad de filas actualizadas.
+    """
+    modelo = queryset.model
+    pendientes = []
+    actualizadas = 0
+    for obj in queryset.iterator(chunk_size=lote):
+        documento = obj.armar_documento_busqueda()
+        if documento != getattr(obj, CAMPO):
+            setattr(obj, CAMPO, documento)
+            pendientes.append(obj)
+        if len(pendientes) >= lote:
+            modelo.objects.bulk_update(pendientes, [CAMPO])
+            actualizadas += len(pendientes)
+            pendientes = []
+    if pendientes:
+        modelo.objects.bulk_update(pendientes, [CAMPO])
+        actualizadas += len(pendientes)
+    return actualizadas
+
+
+def instalar_indices_sqlite(modelos, using='default', reconstruir=False):
+    """Crea (si faltan) las tablas FTS5 y sus triggers para cada modelo. Solo SQLite.
+
+    Una tabla recién creada se reconstruye desde la tabla base; con
+    `reconstruir=True` se reconstruyen todas (comando `reindexar_busqueda`).
+    """
+    conexion = connections[using]
+    if conexion.vendor != 'sqlite':
+        return
+    existentes = set(conexion.introspection.table_names())
+    with conexion.cursor() as cursor:
+        for modelo in modelos:
+            tabla = modelo._meta.db_table
+            fts = tabla_fts(modelo)
+            if tabla not in existentes:
+                continue
+            nueva = fts not in existentes
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{CAMPO}, content='{tabla}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+                f"INSERT INTO {fts}(rowid, {CAMPO}) VALUES (new.id, new.{CAMPO}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {CAMPO}) VALUES ('delete', old.id, old.{CAMPO}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {CAMPO} ON {tabla} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {CAMPO}) VALUES ('delete', old.id, old.{CAMPO}); "
+                f"INSERT INTO {fts}(rowid, {CAMPO}) VALUES (new.id, new.{CAMPO}); END"
+            )
+            if nueva or reconstruir:
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def modelos_buscables():
+    from django.apps import apps
+
+    return [
+        modelo for modelo in apps.get_models()
+        if any(campo.name == CAMPO for campo in modelo._meta.concrete_fields)
+    ]
+
+
+def instalar_indices_post_migrate(sender, using='default', **kwargs):
+    instalar_indices_sqlite(modelos_buscables(), using=using)
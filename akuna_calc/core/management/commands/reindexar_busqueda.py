@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.busqueda import instalar_indices_sqlite, refrescar_documentos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula `documento_busqueda` de clientes, ventas y presupuestos y, en SQLite, "
+        "reconstruye las tablas FTS5 de la búsqueda."
+    )
+
+    def handle(self, *args, **options):
+        from comercial.models import Cliente, Venta
+        from presupuestos.models import Presupuesto
+
+        querysets = [
+            Cliente.objects.all(),
+            Venta.objects.select_related('cliente').prefetch_related('pagos'),
+            Presupuesto.objects.select_related('cliente'),
+        ]
+        for queryset in querysets:
+            actualizadas = refrescar_documentos(queryset)
+            self.stdout.write(f"{queryset.model._meta.verbose_name_plural}: {actualizadas} documentos actualizados")
+
+        instalar_indices_sqlite([qs.model for qs in querysets], reconstruir=True)
+        self.stdout.write(self.style.SUCCESS("Índice de búsqueda al día."))
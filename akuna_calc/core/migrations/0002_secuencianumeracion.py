@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaNumeracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('serie', models.CharField(max_length=50, unique=True, verbose_name='Serie')),
+                ('ultimo_valor', models.PositiveBigIntegerField(default=0, verbose_name='Último valor asignado')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de numeración',
+                'verbose_name_plural': 'Secuencias de numeración',
+                'ordering': ['serie'],
+            },
+        ),
+    ]
@@ -12,4 +12,21 @@ class Provincia(models.Model):
     class Meta:
         verbose_name = "Provincia"
         verbose_name_plural = "Provincias"
-        ordering = ['nombre']
\ No newline at end of file
+        ordering = ['nombre']
+
+class SecuenciaNumeracion(models.Model):
+    """Contador de una serie de numeración correlativa (una fila por serie).
+
+    Lo administra `core.numeracion`; no se edita a mano.
+    """
+    serie = models.CharField(max_length=50, unique=True, verbose_name='Serie')
+    ultimo_valor = models.PositiveBigIntegerField(default=0, verbose_name='Último valor asignado')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.serie}: {self.ultimo_valor}'
+
+    class Meta:
+        verbose_name = "Secuencia de numeración"
+        verbose_name_plural = "Secuencias de numeración"
+        ordering = ['serie']
@@ -0,0 +1,112 @@
+"""Numeración correlativa compartida (presupuestos, pedidos, órdenes, recibos).
+
+Cada serie tiene una fila en `SecuenciaNumeracion`. Asignar un número es un
+`UPDATE ... SET ultimo_valor = ultimo_valor + n` sobre esa fila: el UPDATE toma
+el lock de la fila (igual que `select_for_update`) antes de leer el valor, así
+que dos confirmaciones simultáneas nunca reciben el mismo número ni tienen que
+reintentar. En SQLite, donde `SELECT ... FOR UPDATE` no existe, el UPDATE toma
+el lock de escritura de la base y el resultado es el mismo.
+
+La primera vez que se usa una serie se inicializa con `inicial()`, que devuelve
+el último número ya emitido por el circuito anterior (MAX, parseo de prefijos,
+etc.). Ese cálculo corre una sola vez por serie.
+
+Opcionalmente un proceso puede reservar un bloque de números por serie
+(`settings.NUMERACION_BLOQUES`) y repartirlos sin volver a la base. El bloque
+recién se guarda cuando la transacción que lo reservó hace commit; si hay
+rollback, el contador vuelve atrás y el bloque se descarta. Los números de un
+bloque que no llegan a usarse (reinicio del proceso) quedan como huecos, por eso
+las series que tienen que ser continuas (recibos) no usan bloques.
+"""
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import SecuenciaNumeracion
+
+
+_bloques = {}
+_bloques_lock = threading.Lock()
+
+
+def _tamano_bloque(serie):
+    bloques = getattr(settings, 'NUMERACION_BLOQUES', {}) or {}
+    try:
+        return max(int(bloques.get(serie, 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _asegurar_serie(serie, inicial):
+    if SecuenciaNumeracion.objects.filter(serie=serie).exists():
+        return
+    valor_inicial = int(inicial() or 0) if inicial else 0
+    try:
+        with transaction.atomic():
+            SecuenciaNumeracion.objects.create(serie=serie, ultimo_valor=valor_inicial)
+    except IntegrityError:
+        # Otro proceso creó la serie en paralelo: se usa la suya.
+        pass
+
+
+def reservar_numeros(serie, cantidad=1, inicial=None):
+    """Reserva `cantidad` números consecutivos de la serie y devuelve el `range`."""
+    cantidad = int(cantidad)
+    if cantidad < 1:
+        raise ValueError('La cantidad de números a reservar debe ser al menos 1.')
+
+    with transaction.atomic():
+        actualizadas = SecuenciaNumeracion.objects.filter(serie=serie).update(
+            ultimo_valor=F('ultimo_valor') + cantidad,
+        )
+        if not actualizadas:
+            _asegurar_serie(serie, inicial)
+            SecuenciaNumeracion.objects.filter(serie=serie).update(
+                ultimo_valor=F('ultimo_valor') + cantidad,
+            )
+        ultimo = (
+            SecuenciaNumeracion.objects.select_for_update()
+            .values_list('ultimo_valor', flat=True)
+            .get(serie=serie)
+        )
+    return range(ultimo - cantidad + 1, ultimo + 1)
+
+
+def avanzar_hasta(serie, valor, inicial=None):
+    """Registra un número cargado a mano para que la serie no vuelva a emitirlo."""
+    _asegurar_serie(serie, inicial)
+    SecuenciaNumeracion.objects.filter(serie=serie, ultimo_valor__lt=valor).update(ultimo_valor=valor)
+
+
+def _guardar_bloque(serie, numeros):
+    with _bloques_lock:
+        _bloques.setdefault(serie, deque()).extend(numeros)
+
+
+def siguiente_numero(serie, inicial=None):
+    """Devuelve el próximo número de la serie.
+
+    Si la serie tiene bloque configurado, primero consume los números ya
+    reservados por este proceso y recién vuelve a la base al agotarlos.
+    """
+    tamano = _tamano_bloque(serie)
+    if tamano > 1:
+        with _bloques_lock:
+            pendientes = _bloques.get(serie)
+            if pendientes:
+                return pendientes.popleft()
+
+    numeros = reservar_numeros(serie, tamano, inicial)
+    if tamano > 1:
+        restantes = list(numeros[1:])
+        transaction.on_commit(lambda: _guardar_bloque(serie, restantes))
+    return numeros[0]
+
+
+def descartar_bloques():
+    """Olvida los bloques reservados por este proceso (tests, cambio de configuración)."""
+    with _bloques_lock:
+        _bloques.clear()
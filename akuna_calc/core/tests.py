@@ -1,13 +1,20 @@
+import threading
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from django.db import connection
+from django.db.models import Q
 from django.template.loader import render_to_string
-from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 
 from usuarios.models import PerfilAccesoUsuario, RolSistema
+from .busqueda import armar_documento, buscar
+from .models import SecuenciaNumeracion
+from .numeracion import avanzar_hasta, descartar_bloques, reservar_numeros, siguiente_numero
 from solicitudes.models import SolicitudPresupuesto
+from comercial.models import Cliente, PagoVenta, Venta
 
 
 class BaseTemplateSelect2HelperTest(SimpleTestCase):
@@ -233,3 +240,210 @@ class HomeVendedorTest(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertFalse(resp.context['es_vendedor'])
         self.assertContains(resp, 'Acciones Rápidas')
+
+
+class NumeracionTest(TestCase):
+    def tearDown(self):
+        descartar_bloques()
+
+    def test_serie_nueva_arranca_despues_del_ultimo_emitido(self):
+        self.assertEqual(siguiente_numero('prueba', inicial=lambda: 41), 42)
+        self.assertEqual(siguiente_numero('prueba', inicial=lambda: 41), 43)
+        self.assertEqual(SecuenciaNumeracion.objects.get(serie='prueba').ultimo_valor, 43)
+
+    def test_inicial_se_consulta_una_sola_vez(self):
+        llamadas = []
+
+        def inicial():
+            llamadas.append(1)
+            return 0
+
+        siguiente_numero('prueba', inicial=inicial)
+        siguiente_numero('prueba', inicial=inicial)
+        self.assertEqual(len(llamadas), 1)
+
+    def test_reservar_numeros_devuelve_rango_consecutivo(self):
+        siguiente_numero('prueba')
+        self.assertEqual(list(reservar_numeros('prueba', 3)), [2, 3, 4])
+        self.assertEqual(siguiente_numero('prueba'), 5)
+
+    def test_reservar_numeros_rechaza_cantidad_invalida(self):
+        with self.assertRaises(ValueError):
+            reservar_numeros('prueba', 0)
+
+    def test_avanzar_hasta_no_retrocede(self):
+        siguiente_numero('prueba', inicial=lambda: 10)
+        avanzar_hasta('prueba', 5)
+        self.assertEqual(siguiente_numero('prueba'), 12)
+        avanzar_hasta('prueba', 20)
+        self.assertEqual(siguiente_numero('prueba'), 21)
+
+    @override_settings(NUMERACION_BLOQUES={'prueba': 5})
+    def test_bloque_por_proceso_se_reparte_sin_volver_a_la_base(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(siguiente_numero('prueba'), 1)
+        self.assertEqual(SecuenciaNumeracion.objects.get(serie='prueba').ultimo_valor, 5)
+
+        with self.assertNumQueries(0):
+            self.assertEqual([siguiente_numero('prueba') for _ in range(4)], [2, 3, 4, 5])
+        self.assertEqual(siguiente_numero('prueba'), 6)
+
+    @override_settings(NUMERACION_BLOQUES={'prueba': 5})
+    def test_bloque_no_se_guarda_si_la_transaccion_no_confirma(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.assertEqual(siguiente_numero('prueba'), 1)
+        # Sin commit el resto del bloque no queda disponible en el proceso.
+        self.assertEqual(siguiente_numero('prueba'), 6)
+
+
+class NumeracionConcurrenteTest(TransactionTestCase):
+    """Varias conexiones asignando números a la vez.
+
+    SQLite en memoria (cache compartida) no espera locks: devuelve "table is
+    locked" al instante, así que este test corre contra MySQL o contra SQLite en
+    disco (`TEST_SQLITE_NAME=/tmp/akun_test.sqlite3`).
+    """
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Requiere una base que soporte conexiones concurrentes (MySQL o SQLite en disco).')
+
+    def tearDown(self):
+        descartar_bloques()
+
+    def test_hilos_concurrentes_no_repiten_numeros(self):
+        siguiente_numero('concurrente')
+        hilos_count, por_hilo = 8, 25
+        asignados = []
+        errores = []
+        asignados_lock = threading.Lock()
+        barrera = threading.Barrier(hilos_count)
+
+        def trabajar():
+            try:
+                barrera.wait()
+                propios = [siguiente_numero('concurrente') for _ in range(por_hilo)]
+                with asignados_lock:
+                    asignados.extend(propios)
+            except Exception as exc:  # pragma: no cover - se reporta abajo
+                errores.append(exc)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(hilos_count)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        total = hilos_count * por_hilo
+        self.assertEqual(len(asignados), total)
+        self.assertEqual(sorted(asignados), list(range(2, total + 2)))
+        self.assertEqual(SecuenciaNumeracion.objects.get(serie='concurrente').ultimo_valor, total + 1)
+
+
+class BusquedaTest(TestCase):
+    def _cliente(self, nombre, apellido='Test', razon_social='', localidad='CABA'):
+        return Cliente.objects.create(
+            nombre=nombre, apellido=apellido, razon_social=razon_social,
+            direccion='x', localidad=localidad,
+        )
+
+    def _venta(self, cliente, numero_pedido, numero_factura=''):
+        return Venta.objects.create(
+            numero_pedido=numero_pedido, cliente=cliente, numero_factura=numero_factura,
+            valor_total=1000,
+        )
+
+    def _ids(self, queryset, termino):
+        return list(buscar(queryset, termino).order_by('-relevancia', 'pk').values_list('pk', flat=True))
+
+    def test_documento_normaliza_y_agrega_numeros_sin_ceros(self):
+        self.assertEqual(
+            armar_documento('Pérez', 'PÉREZ', '0001-00000999'),
+            'perez 0001 1 00000999 999',
+        )
+
+    def test_busca_sin_acentos_por_prefijo_y_con_todas_las_palabras(self):
+        perez = self._cliente('José', 'Pérez', localidad='Rosario')
+        otro = self._cliente('Josefina', 'Gómez', localidad='Rosario')
+
+        self.assertEqual(self._ids(Cliente.objects.all(), 'perez'), [perez.pk])
+        self.assertEqual(self._ids(Cliente.objects.all(), 'jos'), [perez.pk, otro.pk])
+        self.assertEqual(self._ids(Cliente.objects.all(), 'jose perez rosario'), [perez.pk])
+        self.assertEqual(self._ids(Cliente.objects.all(), 'jose cordoba'), [])
+
+    def test_ordena_por_relevancia(self):
+        poco = self._cliente('Martín', 'Sosa', razon_social='Aberturas Norte')
+        mucho = self._cliente('Aberturas', 'Aberturas', razon_social='Aberturas Sur')
+
+        self.assertEqual(self._ids(Cliente.objects.all(), 'aberturas'), [mucho.pk, poco.pk])
+
+    def test_ademas_suma_coincidencias_exactas(self):
+        garcia = self._cliente('Garcia')
+        lopez = self._cliente('Lopez')
+
+        ids = buscar(Cliente.objects.all(), 'garcia', ademas=Q(pk=lopez.pk)).values_list('pk', flat=True)
+
+        self.assertCountEqual(ids, [garcia.pk, lopez.pk])
+
+    def test_venta_se_encuentra_por_factura_de_pago(self):
+        user = User.objects.create_user('busqueda_pagos', password='x')
+        cliente = self._cliente('Ana')
+        venta = self._venta(cliente, 'VTA-1')
+        self._venta(cliente, 'VTA-2')
+
+        PagoVenta.objects.create(
+            venta=venta, monto=100, fecha_pago='2026-04-10', forma_pago='efectivo',
+            numero_factura='0001-00000999', created_by=user,
+        )
+
+        self.assertEqual(self._ids(Venta.objects.all(), '999'), [venta.pk])
+        self.assertEqual(self._ids(Venta.objects.all(), '0001-00000999'), [venta.pk])
+
+    def test_fragmentos_de_numeros_y_terminos_cortos_por_icontains(self):
+        cliente = self._cliente('Ana', 'Pérez')
+        cliente.cuit = '20123456786'
+        cliente.save()
+        venta = self._venta(cliente, 'PVC-00123')
+        self._venta(self._cliente('Beto'), 'PVC-00456')
+
+        # Fragmentos internos: el índice solo encuentra prefijos de palabra.
+        self.assertEqual(self._ids(Venta.objects.all(), '0123'), [venta.pk])
+        self.assertEqual(self._ids(Cliente.objects.all(), '3456'), [cliente.pk])
+        # Palabra indexada y número juntos: tienen que coincidir los dos.
+        self.assertEqual(self._ids(Venta.objects.all(), 'perez 0123'), [venta.pk])
+        self.assertEqual(self._ids(Venta.objects.all(), 'perez 0456'), [])
+        # Menos letras que innodb_ft_min_token_size.
+        self.assertEqual(self._ids(Venta.objects.all(), 'pv'), sorted(Venta.objects.values_list('pk', flat=True)))
+
+    def test_listado_de_ventas_busca_por_numero_de_pedido(self):
+        from django.test import Client
+
+        User.objects.create_superuser('busqueda_listado', password='x')
+        cliente = Client()
+        cliente.login(username='busqueda_listado', password='x')
+        venta = self._venta(self._cliente('Ana'), 'PVC-0123')
+        self._venta(self._cliente('Beto'), 'PVC-0456')
+
+        for termino in ('PVC-0123', '0123', '123'):
+            response = cliente.get(reverse('comercial:ventas_list'), {'q': termino})
+            self.assertEqual([v.pk for v in response.context['ventas']], [venta.pk], termino)
+
+    def test_renombrar_cliente_actualiza_ventas_y_presupuestos(self):
+        from presupuestos.models import Presupuesto
+
+        user = User.objects.create_user('busqueda_renombre', password='x')
+        cliente = self._cliente('Carlos', 'Viejo')
+        venta = self._venta(cliente, 'VTA-9')
+        presupuesto = Presupuesto.objects.create(
+            numero='PRES-2026-900', cliente=cliente, fecha_expiracion='2026-12-31', created_by=user,
+        )
+
+        cliente.apellido = 'Nuevo'
+        cliente.save()
+
+        self.assertEqual(self._ids(Venta.objects.all(), 'nuevo'), [venta.pk])
+        self.assertEqual(self._ids(Presupuesto.objects.all(), 'carlos nuevo'), [presupuesto.pk])
+        self.assertEqual(self._ids(Venta.objects.all(), 'viejo'), [])
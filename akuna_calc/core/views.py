@@ -2,14 +2,12 @@ from django.contrib import messages
 from django.contrib.auth import get_user_model, login as auth_login, logout as auth_logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
-from django.db.models import Sum
 from django.http import HttpResponse
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from datetime import datetime
-from decimal import Decimal
 
 from usuarios.access_control import get_default_url_for_user
 
@@ -46,15 +44,14 @@ def index(request):
 
 @login_required
 def home(request):
-    from comercial.models import Venta, Compra, Cliente
+    from comercial import resumenes
+    from comercial.models import Cliente
     from usuarios.access_control import get_access_profile
     from solicitudes.models import SolicitudPresupuesto
 
-    # Estadísticas comerciales
-    total_ventas = Venta.objects.filter(deleted_at__isnull=True).aggregate(Sum('valor_total'))['valor_total__sum'] or Decimal('0')
-    total_compras = Compra.objects.filter(deleted_at__isnull=True).aggregate(Sum('valor_total'))['valor_total__sum'] or Decimal('0')
-    ventas_pendientes = Venta.objects.filter(deleted_at__isnull=True, estado='pendiente').count()
-    clientes_count = Cliente.objects.filter(deleted_at__isnull=True).count()
+    # Estadísticas comerciales, de los resúmenes mensuales.
+    totales = resumenes.totales()
+    clientes_count = Cliente.alive.count()
 
     # Bandeja del vendedor: sus solicitudes de presupuesto sin atender.
     perfil = get_access_profile(request.user)
@@ -68,9 +65,7 @@ def home(request):
         )
 
     context = {
-        'total_ventas': total_ventas,
-        'total_compras': total_compras,
-        'ventas_pendientes': ventas_pendientes,
+        **totales,
         'clientes_count': clientes_count,
         'es_vendedor': es_vendedor,
         'mis_solicitudes': mis_solicitudes,
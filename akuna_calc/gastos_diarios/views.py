@@ -328,7 +328,7 @@ def _registrar_compra(gasto, user):
     from comercial.models import TipoCuenta, Cuenta, TipoGasto, Compra
 
     numero_pedido = f'CAJA-{gasto.pk}'
-    if Compra.objects.filter(numero_pedido=numero_pedido, deleted_at__isnull=True).exists():
+    if Compra.alive.filter(numero_pedido=numero_pedido).exists():
         return
 
     tipo_key = gasto.tipo_cuenta or 'caja_chica'
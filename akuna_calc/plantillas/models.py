@@ -2,6 +2,8 @@ from django.db import models
 from django.db.models import Max
 from django.contrib.auth.models import User
 
+from core.numeracion import avanzar_hasta, reservar_numeros, siguiente_numero
+
 
 class PedidoFabrica(models.Model):
     ESTADO_CHOICES = [
@@ -36,6 +38,34 @@ class PedidoFabrica(models.Model):
     def __str__(self):
         return f"Pedido {self.numero} - {self.cliente}"
 
+    @staticmethod
+    def _correlativo(numero):
+        """Parte numérica de un número PF-NNNN, o None si no sigue el formato."""
+        if not (numero or '').startswith('PF-'):
+            return None
+        try:
+            return int(numero[3:])
+        except ValueError:
+            return None
+
+    @classmethod
+    def _ultimo_numero_emitido(cls):
+        """Mayor correlativo PF-NNNN ya emitido (inicializa la serie)."""
+        numeros = cls.objects.filter(numero__startswith='PF-').values_list('numero', flat=True)
+        return max((n for n in map(cls._correlativo, numeros) if n is not None), default=0)
+
+    @classmethod
+    def generar_numero(cls):
+        seq = siguiente_numero('pedido_fabrica', inicial=cls._ultimo_numero_emitido)
+        return f'PF-{seq:04d}'
+
+    @classmethod
+    def registrar_numero_manual(cls, numero):
+        """Un PF-NNNN cargado a mano adelanta la serie para no repetirse después."""
+        correlativo = cls._correlativo(numero)
+        if correlativo is not None:
+            avanzar_hasta('pedido_fabrica', correlativo, inicial=cls._ultimo_numero_emitido)
+
 
 class OrdenFabricacion(models.Model):
     """Orden de fabricación (planilla de fábrica). Una por ítem del presupuesto o manual."""
@@ -116,9 +146,18 @@ class OrdenFabricacion(models.Model):
     def numero_formateado(self):
         return f'{self.numero:04d}'
 
+    @classmethod
+    def _ultimo_numero_emitido(cls):
+        return cls.objects.aggregate(m=Max('numero'))['m'] or 0
+
     @classmethod
     def generar_numero(cls):
-        return (cls.objects.aggregate(m=Max('numero'))['m'] or 0) + 1
+        return siguiente_numero('orden_fabricacion', inicial=cls._ultimo_numero_emitido)
+
+    @classmethod
+    def reservar_numeros(cls, cantidad):
+        """Reserva `cantidad` números consecutivos para crear varias órdenes juntas."""
+        return reservar_numeros('orden_fabricacion', cantidad, inicial=cls._ultimo_numero_emitido)
 
 
 class MedidaOrdenFabricacion(models.Model):
@@ -200,6 +200,20 @@ class PedidoFabricaViewsTest(TestCase):
         self.assertRedirects(response, f'/plantillas/pedidos/{pedido.pk}/')
         self.assertEqual(pedido.usuario, self.user)
 
+    def test_pedido_create_manual_adelanta_la_numeracion(self):
+        self.client.post('/plantillas/pedidos/crear/', {'numero': 'PF-0009', 'cliente': 'Cliente nuevo'})
+
+        self.assertEqual(PedidoFabrica.generar_numero(), 'PF-0010')
+
+    def test_pedido_create_get_sugiere_el_proximo_numero(self):
+        PedidoFabrica.objects.create(numero='PF-0004', cliente='Cliente uno', usuario=self.user)
+
+        response = self.client.get('/plantillas/pedidos/crear/')
+
+        self.assertContains(response, 'PF-0005')
+        # Sugerir no consume el número.
+        self.assertEqual(PedidoFabrica.generar_numero(), 'PF-0005')
+
     def test_pedido_detail_muestra_datos(self):
         pedido = PedidoFabrica.objects.create(
             numero='PF-0002', cliente='Cliente dos', usuario=self.user,
@@ -246,8 +260,12 @@ class OrdenFabricacionViewsTest(TestCase):
 
     def test_generar_numero_es_correlativo(self):
         self.assertEqual(OrdenFabricacion.generar_numero(), 1)
+        self.assertEqual(OrdenFabricacion.generar_numero(), 2)
+
+    def test_generar_numero_continua_despues_de_las_ordenes_existentes(self):
         OrdenFabricacion.objects.create(pedido=self.pedido, numero=5)
         self.assertEqual(OrdenFabricacion.generar_numero(), 6)
+        self.assertEqual(OrdenFabricacion.generar_numero(), 7)
 
     def test_orden_create_manual_redirige_a_edicion(self):
         response = self.client.post(f'/plantillas/pedidos/{self.pedido.pk}/ordenes/crear/')
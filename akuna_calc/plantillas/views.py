@@ -12,6 +12,7 @@ from django.views.decorators.http import require_POST
 from xhtml2pdf import pisa
 
 from configuracion.models import ConfiguracionGeneral
+from core.models import SecuenciaNumeracion
 from .models import PedidoFabrica, OrdenFabricacion, MedidaOrdenFabricacion
 from .forms import OrdenFabricacionForm
 from .utils import cortar_a_max_length
@@ -60,12 +61,14 @@ def pedido_create(request):
             observaciones=observaciones,
             usuario=request.user
         )
+        PedidoFabrica.registrar_numero_manual(numero)
         messages.success(request, f'Pedido {numero} creado exitosamente')
         return redirect('plantillas:pedido_detail', pk=pedido.pk)
 
-    # Generar número automático
-    ultimo = PedidoFabrica.objects.count() + 1
-    numero_sugerido = f"PF-{ultimo:04d}"
+    # Número sugerido: el próximo de la serie, sin consumirlo (el usuario puede editarlo).
+    serie = SecuenciaNumeracion.objects.filter(serie='pedido_fabrica').values_list('ultimo_valor', flat=True).first()
+    ultimo = serie if serie is not None else PedidoFabrica._ultimo_numero_emitido()
+    numero_sugerido = f"PF-{ultimo + 1:04d}"
 
     return render(request, 'plantillas/pedido_form.html', {'numero_sugerido': numero_sugerido})
 
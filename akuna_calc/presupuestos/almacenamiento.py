@@ -0,0 +1,112 @@
+"""Almacenamiento compacto del resultado del cotizador de un ItemPresupuesto.
+
+Antes todo el resultado del cálculo vivía en un único JSON por ítem. Ahora se
+guarda repartido así:
+
+- columnas reales para los datos que se leen siempre: `precio_unitario_base`,
+  los recargos de renovación y los totales del `resumen`;
+- `datos_calculo`: un JSON liviano con el resto (tipo, snapshot del ítem,
+  valores del PVC, etc.);
+- `desglose_comprimido`: el `desglose` (perfiles, accesorios, vidrios...)
+  comprimido con zlib, que solo se lee al abrir el desglose del ítem.
+
+Las funciones de este módulo trabajan sobre diccionarios y no dependen del
+modelo, así las usa tanto `ItemPresupuesto` como la migración de datos.
+"""
+import json
+import zlib
+from decimal import Decimal, InvalidOperation
+
+
+CAMPOS_PRECIO = (
+    'precio_unitario_base',
+    'recargo_renovacion_unitario_aplicado',
+    'recargo_renovacion_total_aplicado',
+)
+
+CAMPOS_RESUMEN = (
+    'total_perfiles',
+    'total_accesorios',
+    'total_vidrios',
+    'total_secciones',
+    'total_tratamiento',
+    'total_mano_obra',
+    'total_opcionales',
+)
+
+CAMPOS_COLUMNA = CAMPOS_PRECIO + CAMPOS_RESUMEN
+
+_CENTAVOS = Decimal('0.01')
+
+
+def _a_decimal(valor):
+    if valor in (None, ''):
+        return None
+    try:
+        return Decimal(str(valor)).quantize(_CENTAVOS)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def _a_float(valor):
+    return float(valor) if valor is not None else None
+
+
+def comprimir_desglose(desglose):
+    if not desglose:
+        return None
+    contenido = json.dumps(desglose, ensure_ascii=False, separators=(',', ':'))
+    return zlib.compress(contenido.encode('utf-8'))
+
+
+def descomprimir_desglose(contenido):
+    if not contenido:
+        return {}
+    return json.loads(zlib.decompress(bytes(contenido)).decode('utf-8'))
+
+
+def separar_resultado(resultado):
+    """Reparte un resultado del cotizador en los campos de almacenamiento.
+
+    Devuelve un dict con una clave por columna de `CAMPOS_COLUMNA` más
+    `datos_calculo`, `desglose_comprimido` y `tiene_desglose`.
+    """
+    resultado = dict(resultado) if isinstance(resultado, dict) else {}
+    campos = {campo: _a_decimal(resultado.pop(campo, None)) for campo in CAMPOS_PRECIO}
+
+    resumen = resultado.pop('resumen', None)
+    resumen = dict(resumen) if isinstance(resumen, dict) else {}
+    for campo in CAMPOS_RESUMEN:
+        campos[campo] = _a_decimal(resumen.pop(campo, None))
+    if resumen:
+        # Claves del resumen que no tienen columna propia: quedan en el JSON liviano.
+        resultado['resumen'] = resumen
+
+    desglose = resultado.pop('desglose', None)
+    campos['desglose_comprimido'] = comprimir_desglose(desglose)
+    campos['tiene_desglose'] = campos['desglose_comprimido'] is not None
+    campos['datos_calculo'] = resultado
+    return campos
+
+
+def armar_resultado(campos, desglose=None):
+    """Inverso de `separar_resultado`: vuelve a armar el dict del cotizador.
+
+    `campos` tiene los valores de las columnas y `datos_calculo`. El desglose
+    se pasa aparte, ya descomprimido, porque es lo único caro de leer.
+    """
+    resultado = dict(campos.get('datos_calculo') or {})
+    for campo in CAMPOS_PRECIO:
+        if campos.get(campo) is not None:
+            resultado[campo] = _a_float(campos[campo])
+
+    resumen = dict(resultado.pop('resumen', None) or {})
+    for campo in CAMPOS_RESUMEN:
+        if campos.get(campo) is not None:
+            resumen[campo] = _a_float(campos[campo])
+    if resumen:
+        resultado['resumen'] = resumen
+
+    if desglose:
+        resultado['desglose'] = desglose
+    return resultado
@@ -23,7 +23,7 @@ class PresupuestoForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['cliente'].queryset = Cliente.objects.filter(deleted_at__isnull=True).order_by('apellido', 'nombre')
+        self.fields['cliente'].queryset = Cliente.alive.order_by('apellido', 'nombre')
         self.fields['notas'].required = False
         self.fields['cotizacion_usd'].required = False
         self.fields['cotizacion_usd'].label = 'Cotización USD'
@@ -104,7 +104,7 @@ class PresupuestoConfiguracionObraForm(forms.ModelForm):
 class ItemPresupuestoForm(forms.ModelForm):
     class Meta:
         model = ItemPresupuesto
-        fields = ['descripcion', 'cantidad', 'ancho_mm', 'alto_mm', 'margen_porcentaje', 'precio_unitario', 'resultado_json']
+        fields = ['descripcion', 'cantidad', 'ancho_mm', 'alto_mm', 'margen_porcentaje', 'precio_unitario', 'datos_calculo']
         widgets = {
             'descripcion': forms.TextInput(attrs={'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500'}),
             'cantidad': forms.NumberInput(attrs={'min': 1, 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500'}),
@@ -112,7 +112,7 @@ class ItemPresupuestoForm(forms.ModelForm):
             'alto_mm': forms.NumberInput(attrs={'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500'}),
             'margen_porcentaje': forms.NumberInput(attrs={'step': '0.01', 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500'}),
             'precio_unitario': forms.NumberInput(attrs={'step': '0.01', 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500'}),
-            'resultado_json': forms.HiddenInput(),
+            'datos_calculo': forms.HiddenInput(),
         }
 
 
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from presupuestos.models import CAMPOS_TEXTOS, ItemPresupuesto
+from presupuestos.pdf_descriptions import VERSION_TEXTOS
+
+
+class Command(BaseCommand):
+    help = (
+        "Redacta y guarda los textos del PDF (título, narrativa y resúmenes) de los ítems "
+        "que no los tienen o los tienen con una versión vieja de las reglas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Ítems por lote (default 500).')
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Regenera también los ítems que ya están en la versión vigente.',
+        )
+
+    def handle(self, *args, **options):
+        lote_max = max(options['lote'], 1)
+        # Los ítems sin snapshot redactan desde el desglose: se trae junto con la fila.
+        items = ItemPresupuesto.objects.defer(None).order_by('pk')
+        if not options['todos']:
+            items = items.exclude(textos_version=VERSION_TEXTOS)
+
+        total = 0
+        lote = []
+        for item in items.iterator(chunk_size=lote_max):
+            item.actualizar_textos_pdf()
+            lote.append(item)
+            if len(lote) >= lote_max:
+                ItemPresupuesto.objects.bulk_update(lote, CAMPOS_TEXTOS)
+                total += len(lote)
+                self.stdout.write(f'{total} ítems actualizados...')
+                lote = []
+        if lote:
+            ItemPresupuesto.objects.bulk_update(lote, CAMPOS_TEXTOS)
+            total += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'Textos del PDF al día (versión {VERSION_TEXTOS}): {total} ítems actualizados.'))
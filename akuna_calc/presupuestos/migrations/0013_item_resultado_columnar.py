@@ -0,0 +1,124 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+from presupuestos.almacenamiento import (
+    CAMPOS_COLUMNA,
+    armar_resultado,
+    descomprimir_desglose,
+    separar_resultado,
+)
+
+
+LOTE = 500
+CAMPOS_NUEVOS = [*CAMPOS_COLUMNA, 'datos_calculo', 'desglose_comprimido', 'tiene_desglose']
+
+
+def separar_resultados(apps, schema_editor):
+    """Reparte el `resultado_json` de cada ítem en columnas + desglose comprimido."""
+    ItemPresupuesto = apps.get_model('presupuestos', 'ItemPresupuesto')
+    lote = []
+    for item in ItemPresupuesto.objects.only('pk', 'resultado_json').iterator(chunk_size=LOTE):
+        for campo, valor in separar_resultado(item.resultado_json).items():
+            setattr(item, campo, valor)
+        lote.append(item)
+        if len(lote) >= LOTE:
+            ItemPresupuesto.objects.bulk_update(lote, CAMPOS_NUEVOS)
+            lote = []
+    if lote:
+        ItemPresupuesto.objects.bulk_update(lote, CAMPOS_NUEVOS)
+
+
+def juntar_resultados(apps, schema_editor):
+    ItemPresupuesto = apps.get_model('presupuestos', 'ItemPresupuesto')
+    lote = []
+    for item in ItemPresupuesto.objects.all().iterator(chunk_size=LOTE):
+        campos = {campo: getattr(item, campo) for campo in CAMPOS_COLUMNA}
+        campos['datos_calculo'] = item.datos_calculo
+        item.resultado_json = armar_resultado(campos, descomprimir_desglose(item.desglose_comprimido))
+        lote.append(item)
+        if len(lote) >= LOTE:
+            ItemPresupuesto.objects.bulk_update(lote, ['resultado_json'])
+            lote = []
+    if lote:
+        ItemPresupuesto.objects.bulk_update(lote, ['resultado_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presupuestos', '0012_presupuesto_solicitud'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='datos_calculo',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Datos del cálculo'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='desglose_comprimido',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Desglose comprimido'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='precio_unitario_base',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Precio unitario base'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='recargo_renovacion_total_aplicado',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Recargo renovación total'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='recargo_renovacion_unitario_aplicado',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Recargo renovación unitario'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='tiene_desglose',
+            field=models.BooleanField(default=False, verbose_name='Tiene desglose'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_accesorios',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total accesorios'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_mano_obra',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total mano de obra'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_opcionales',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total opcionales'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_perfiles',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total perfiles'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_secciones',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total secciones'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_tratamiento',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total tratamiento'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='total_vidrios',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Total vidrios'),
+        ),
+        migrations.RunPython(separar_resultados, juntar_resultados),
+        migrations.RemoveField(
+            model_name='itempresupuesto',
+            name='resultado_json',
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+from core.busqueda import armar_documento
+
+
+LOTE = 500
+TABLA = 'presupuestos_presupuesto'
+INDICE = 'presupuestos_presupuesto_busqueda_ft'
+
+
+def armar_documentos(apps, schema_editor):
+    """Completa `documento_busqueda` de los presupuestos existentes (como `Presupuesto.armar_documento_busqueda`)."""
+    Presupuesto = apps.get_model('presupuestos', 'Presupuesto')
+    lote = []
+    for presupuesto in Presupuesto.objects.select_related('cliente').iterator(chunk_size=LOTE):
+        cliente = presupuesto.cliente
+        presupuesto.documento_busqueda = armar_documento(
+            presupuesto.numero, cliente.nombre, cliente.apellido, cliente.razon_social,
+        )
+        lote.append(presupuesto)
+        if len(lote) >= LOTE:
+            Presupuesto.objects.bulk_update(lote, ['documento_busqueda'])
+            lote = []
+    if lote:
+        Presupuesto.objects.bulk_update(lote, ['documento_busqueda'])
+
+
+def crear_indice_fulltext(apps, schema_editor):
+    # En SQLite el índice es una tabla FTS5 que crea core.busqueda en post_migrate.
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'ALTER TABLE {TABLA} ADD FULLTEXT INDEX {INDICE} (documento_busqueda)')
+
+
+def borrar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'ALTER TABLE {TABLA} DROP INDEX {INDICE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercial', '0024_documento_busqueda'),
+        ('presupuestos', '0013_item_resultado_columnar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presupuesto',
+            name='documento_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(armar_documentos, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_fulltext, borrar_indice_fulltext),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presupuestos', '0014_documento_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='texto_narrativa',
+            field=models.TextField(blank=True, default='', verbose_name='Descripción narrativa (PDF)'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='texto_resumen_compacto',
+            field=models.TextField(blank=True, default='', verbose_name='Resumen compacto'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='texto_resumen_tecnico',
+            field=models.TextField(blank=True, default='', verbose_name='Resumen técnico (PDF)'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='texto_titulo',
+            field=models.TextField(blank=True, default='', verbose_name='Título (PDF)'),
+        ),
+        migrations.AddField(
+            model_name='itempresupuesto',
+            name='textos_version',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Versión de los textos'),
+        ),
+    ]
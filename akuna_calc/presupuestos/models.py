@@ -4,6 +4,17 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from core.busqueda import actualizar_documento, armar_documento
+from core.numeracion import siguiente_numero
+
+from .almacenamiento import (
+    CAMPOS_COLUMNA,
+    CAMPOS_PRECIO,
+    armar_resultado,
+    descomprimir_desglose,
+    separar_resultado,
+)
+
 
 def _decimal_or_zero(value):
     if value in (None, ''):
@@ -152,6 +163,7 @@ class Presupuesto(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    documento_busqueda = models.TextField(blank=True, default='', editable=False)
 
     class Meta:
         verbose_name = 'Presupuesto'
@@ -161,6 +173,18 @@ class Presupuesto(models.Model):
     def __str__(self):
         return f'{self.numero} - {self.cliente}'
 
+    def armar_documento_busqueda(self):
+        return armar_documento(
+            self.numero,
+            self.cliente.nombre,
+            self.cliente.apellido,
+            self.cliente.razon_social,
+        )
+
+    def save(self, *args, **kwargs):
+        actualizar_documento(self, kwargs, ('numero', 'cliente', 'cliente_id'))
+        super().save(*args, **kwargs)
+
     def esta_bloqueado(self):
         return self.estado in ('confirmado', 'cancelado')
 
@@ -289,22 +313,43 @@ class Presupuesto(models.Model):
         self.total = subtotal + iva
         self.save(update_fields=['total'])
 
+    @classmethod
+    def _ultimo_numero_emitido(cls, prefijo):
+        """Mayor correlativo ya emitido con el prefijo (inicializa la serie)."""
+        ultimo = 0
+        for numero in cls.objects.filter(numero__startswith=prefijo).values_list('numero', flat=True):
+            try:
+                ultimo = max(ultimo, int(numero.split('-')[-1]))
+            except (ValueError, IndexError):
+                continue
+        return ultimo
+
     @classmethod
     def generar_numero(cls):
         año = timezone.now().year
-        ultimo = (
-            cls.objects.filter(numero__startswith=f'PRES-{año}-')
-            .order_by('-numero')
-            .first()
+        prefijo = f'PRES-{año}-'
+        seq = siguiente_numero(
+            f'presupuesto-{año}',
+            inicial=lambda: cls._ultimo_numero_emitido(prefijo),
         )
-        if ultimo:
-            try:
-                seq = int(ultimo.numero.split('-')[-1]) + 1
-            except (ValueError, IndexError):
-                seq = 1
-        else:
-            seq = 1
-        return f'PRES-{año}-{seq:03d}'
+        return f'{prefijo}{seq:03d}'
+
+
+# Campos de los que salen los textos del PDF y campos donde se guardan.
+CAMPOS_TEXTOS_ORIGEN = (
+    'descripcion', 'cantidad', 'ancho_mm', 'alto_mm', 'margen_porcentaje',
+    'datos_calculo', 'desglose_comprimido',
+)
+CAMPOS_TEXTOS = (
+    'texto_titulo', 'texto_narrativa', 'texto_resumen_tecnico', 'texto_resumen_compacto', 'textos_version',
+)
+
+
+class ItemPresupuestoManager(models.Manager):
+    """No trae el desglose comprimido: se carga recién al pedirlo (`item.desglose`)."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('desglose_comprimido')
 
 
 class ItemPresupuesto(models.Model):
@@ -327,12 +372,39 @@ class ItemPresupuesto(models.Model):
     precio_total = models.DecimalField(
         max_digits=14, decimal_places=2, verbose_name='Precio total'
     )
-    resultado_json = models.JSONField(
-        default=dict, verbose_name='Detalle del cálculo'
+    precio_unitario_base = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Precio unitario base'
+    )
+    recargo_renovacion_unitario_aplicado = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Recargo renovación unitario'
+    )
+    recargo_renovacion_total_aplicado = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Recargo renovación total'
     )
+    total_perfiles = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total perfiles')
+    total_accesorios = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total accesorios')
+    total_vidrios = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total vidrios')
+    total_secciones = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total secciones')
+    total_tratamiento = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total tratamiento')
+    total_mano_obra = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total mano de obra')
+    total_opcionales = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Total opcionales')
+    datos_calculo = models.JSONField(
+        default=dict, blank=True, verbose_name='Datos del cálculo'
+    )
+    tiene_desglose = models.BooleanField(default=False, verbose_name='Tiene desglose')
+    desglose_comprimido = models.BinaryField(
+        null=True, blank=True, editable=False, verbose_name='Desglose comprimido'
+    )
+    texto_titulo = models.TextField(blank=True, default='', verbose_name='Título (PDF)')
+    texto_narrativa = models.TextField(blank=True, default='', verbose_name='Descripción narrativa (PDF)')
+    texto_resumen_tecnico = models.TextField(blank=True, default='', verbose_name='Resumen técnico (PDF)')
+    texto_resumen_compacto = models.TextField(blank=True, default='', verbose_name='Resumen compacto')
+    textos_version = models.PositiveSmallIntegerField(default=0, verbose_name='Versión de los textos')
     orden = models.PositiveIntegerField(default=0, verbose_name='Orden')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ItemPresupuestoManager()
+
     class Meta:
         verbose_name = 'Ítem de presupuesto'
         verbose_name_plural = 'Ítems de presupuesto'
@@ -341,16 +413,45 @@ class ItemPresupuesto(models.Model):
     def __str__(self):
         return f'{self.descripcion} ({self.presupuesto.numero})'
 
+    @property
+    def desglose(self):
+        if not self.tiene_desglose:
+            return {}
+        return descomprimir_desglose(self.desglose_comprimido)
+
+    @property
+    def snapshot_item(self):
+        snapshot = (self.datos_calculo or {}).get('snapshot_item')
+        return snapshot if isinstance(snapshot, dict) else None
+
+    @property
+    def resultado_resumido(self):
+        """Resultado del cotizador sin el desglose (no toca la columna comprimida)."""
+        campos = {campo: getattr(self, campo) for campo in CAMPOS_COLUMNA}
+        campos['datos_calculo'] = self.datos_calculo
+        return armar_resultado(campos)
+
+    @property
+    def resultado_json(self):
+        resultado = self.resultado_resumido
+        desglose = self.desglose
+        if desglose:
+            resultado['desglose'] = desglose
+        return resultado
+
+    @resultado_json.setter
+    def resultado_json(self, resultado):
+        for campo, valor in separar_resultado(resultado).items():
+            setattr(self, campo, valor)
+
     def get_precio_unitario_base(self):
-        resultado = self.resultado_json or {}
-        if 'precio_unitario_base' not in resultado:
+        if self.precio_unitario_base is None:
             return _decimal_or_zero(self.precio_unitario)
-        return _decimal_or_zero(resultado.get('precio_unitario_base'))
+        return self.precio_unitario_base
 
     def get_recargo_renovacion_unitario(self):
-        resultado = self.resultado_json or {}
-        if 'recargo_renovacion_unitario_aplicado' in resultado:
-            return _decimal_or_zero(resultado.get('recargo_renovacion_unitario_aplicado'))
+        if self.recargo_renovacion_unitario_aplicado is not None:
+            return self.recargo_renovacion_unitario_aplicado
         base = self.get_precio_unitario_base()
         recargo = _decimal_or_zero(self.precio_unitario) - base
         return recargo if recargo > 0 else Decimal('0')
@@ -367,16 +468,30 @@ class ItemPresupuesto(models.Model):
     def aplicar_recargo_renovacion(self, recargo_unitario):
         recargo_unitario = _decimal_or_zero(recargo_unitario)
         base = self.get_precio_unitario_base()
-        resultado = dict(self.resultado_json or {})
-        resultado['precio_unitario_base'] = float(base)
-        resultado['recargo_renovacion_unitario_aplicado'] = float(recargo_unitario)
-        resultado['recargo_renovacion_total_aplicado'] = float(recargo_unitario * self.cantidad)
-        self.resultado_json = resultado
+        self.precio_unitario_base = base
+        self.recargo_renovacion_unitario_aplicado = recargo_unitario
+        self.recargo_renovacion_total_aplicado = recargo_unitario * self.cantidad
         self.precio_unitario = base + recargo_unitario
-        self.save(update_fields=['precio_unitario', 'precio_total', 'resultado_json'])
+        self.save(update_fields=['precio_unitario', 'precio_total', *CAMPOS_PRECIO])
+
+    def actualizar_textos_pdf(self):
+        """Redacta y deja en el ítem (sin guardar) los textos del PDF."""
+        from .pdf_descriptions import VERSION_TEXTOS, build_item_texts
+
+        textos = build_item_texts(self)
+        self.texto_titulo = textos['titulo']
+        self.texto_narrativa = textos['descripcion_narrativa']
+        self.texto_resumen_tecnico = textos['resumen_tecnico']
+        self.texto_resumen_compacto = textos['resumen_compacto']
+        self.textos_version = VERSION_TEXTOS
 
     def save(self, *args, **kwargs):
         self.precio_total = self.precio_unitario * self.cantidad
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(CAMPOS_TEXTOS_ORIGEN):
+            self.actualizar_textos_pdf()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *CAMPOS_TEXTOS}
         super().save(*args, **kwargs)
 
 
@@ -8,6 +8,12 @@ from pricing.models import Hoja, Interior, Marco, MaterialCiego, Tratamiento, Vi
 from pricing.services.calculator import medida_seccion, orientacion_tirantes
 
 
+# Versión de las reglas de redacción de los textos del PDF. Los ítems guardan
+# sus textos ya armados junto con esta versión; al cambiar las reglas hay que
+# subirla y correr `manage.py regenerar_textos_pdf`. Mientras tanto, los ítems
+# con versión vieja se redactan en el momento.
+VERSION_TEXTOS = 1
+
 _GENERIC_DESCRIPTIONS = {
     '',
     'abertura sin descripcion',
@@ -460,9 +466,21 @@ def build_item_snapshot(config: Dict[str, Any], descripcion_manual: str, cantida
     return snapshot
 
 
+def _resultado_guardado(item: Any) -> Dict[str, Any]:
+    result = getattr(item, 'resultado_json', None)
+    return result if isinstance(result, dict) else {}
+
+
+def _snapshot_guardado(item: Any) -> Any:
+    # ItemPresupuesto expone el snapshot sin leer el desglose comprimido.
+    if hasattr(item, 'snapshot_item'):
+        return item.snapshot_item
+    return _resultado_guardado(item).get('snapshot_item')
+
+
 def _build_legacy_snapshot(item: Any) -> Dict[str, Any]:
-    result = item.resultado_json if isinstance(item.resultado_json, dict) else {}
-    desglose = result.get('desglose') or {}
+    desglose = item.desglose if hasattr(item, 'desglose') else _resultado_guardado(item).get('desglose')
+    desglose = desglose or {}
     vidrios = desglose.get('vidrios') or {}
     tratamiento = desglose.get('tratamiento') or {}
     opcionales = desglose.get('opcionales') or []
@@ -496,9 +514,9 @@ def _build_legacy_snapshot(item: Any) -> Dict[str, Any]:
     return snapshot
 
 
-def build_pdf_item_context(item: Any) -> Dict[str, Any]:
-    result = item.resultado_json if isinstance(item.resultado_json, dict) else {}
-    snapshot = result.get('snapshot_item') if isinstance(result, dict) else None
+def build_item_texts(item: Any) -> Dict[str, str]:
+    """Redacta título, narrativa y resúmenes de un ítem a partir de su snapshot."""
+    snapshot = _snapshot_guardado(item)
 
     if not isinstance(snapshot, dict):
         snapshot = _build_legacy_snapshot(item)
@@ -520,7 +538,6 @@ def build_pdf_item_context(item: Any) -> Dict[str, Any]:
             snapshot.setdefault('resumen_tecnico', build_technical_summary(snapshot))
 
     return {
-        'item': item,
         'titulo': _ajustar_todo_vidrio(snapshot.get('titulo_item') or _build_title(snapshot), snapshot),
         'descripcion_narrativa': _ajustar_todo_vidrio(
             snapshot.get('descripcion_narrativa') or build_narrative_from_snapshot(snapshot), snapshot
@@ -530,3 +547,21 @@ def build_pdf_item_context(item: Any) -> Dict[str, Any]:
             snapshot.get('resumen_tecnico') or build_technical_summary(snapshot), snapshot
         ),
     }
+
+
+def build_pdf_item_context(item: Any) -> Dict[str, Any]:
+    """Textos del ítem para el PDF y el detalle.
+
+    Si el ítem ya tiene los textos guardados con la versión vigente se usan tal
+    cual; si no (ítems viejos o reglas nuevas), se redactan en el momento.
+    """
+    if getattr(item, 'textos_version', None) == VERSION_TEXTOS:
+        textos = {
+            'titulo': item.texto_titulo,
+            'descripcion_narrativa': item.texto_narrativa,
+            'resumen_compacto': item.texto_resumen_compacto,
+            'resumen_tecnico': item.texto_resumen_tecnico,
+        }
+    else:
+        textos = build_item_texts(item)
+    return {'item': item, **textos}
@@ -1,9 +1,13 @@
+from io import StringIO
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 from decimal import Decimal
 
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, Client
 from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta, date
@@ -13,7 +17,7 @@ from plantillas.models import PedidoFabrica
 from usuarios.models import PerfilAccesoUsuario, RolSistema
 from .forms import PresupuestoForm
 from .models import Presupuesto, ItemPresupuesto, ComentarioPresupuesto
-from .pdf_descriptions import build_item_snapshot, build_narrative_from_snapshot, build_pdf_item_context, _serialize_tirantes
+from .pdf_descriptions import VERSION_TEXTOS, build_item_snapshot, build_narrative_from_snapshot, build_pdf_item_context, _serialize_tirantes
 
 
 def crear_cliente():
@@ -106,6 +110,18 @@ class PresupuestoModelTest(TestCase):
         self.assertEqual(p1.numero, f'PRES-{año}-001')
         self.assertEqual(p2.numero, f'PRES-{año}-002')
 
+    def test_generar_numero_continua_la_numeracion_existente_del_año(self):
+        año = timezone.now().year
+        Presupuesto.objects.create(
+            numero=f'PRES-{año}-1000', cliente=crear_cliente(),
+            fecha_expiracion=date.today(), created_by=self.user,
+        )
+        Presupuesto.objects.create(
+            numero=f'PRES-{año}-999', cliente=crear_cliente(),
+            fecha_expiracion=date.today(), created_by=self.user,
+        )
+        self.assertEqual(Presupuesto.generar_numero(), f'PRES-{año}-1001')
+
     def test_esta_bloqueado(self):
         p = crear_presupuesto(self.user)
         p.estado = 'confirmado'
@@ -288,6 +304,127 @@ class ItemPresupuestoModelTest(TestCase):
         self.assertEqual(item.get_precio_unitario_usd(), Decimal('500'))
         self.assertEqual(item.get_precio_total_usd(), Decimal('1000'))
 
+    def _resultado_aluminio(self):
+        return {
+            'precio_total': 1234.5,
+            'subtotal': 950,
+            'margen': 284.5,
+            'precio_unitario_base': 1234.5,
+            'recargo_renovacion_unitario_aplicado': 0,
+            'recargo_renovacion_total_aplicado': 0,
+            'resumen': {'total_perfiles': 600.25, 'total_vidrios': 349.75},
+            'desglose': {
+                'perfiles': [{'codigo': 'PERF-01', 'descripcion': 'Marco', 'precio_total': 600.25}],
+                'vidrios': {'codigo': 'FL4', 'descripcion': 'Float 4mm', 'precio_total': 349.75},
+            },
+            'snapshot_item': {'titulo_item': 'Ventana'},
+        }
+
+    def test_resultado_se_guarda_en_columnas_y_desglose_comprimido(self):
+        p = crear_presupuesto(self.user)
+        item = ItemPresupuesto.objects.create(
+            presupuesto=p, descripcion='Ventana', cantidad=1,
+            ancho_mm=1000, alto_mm=1200, margen_porcentaje=30,
+            precio_unitario=Decimal('1234.50'), resultado_json=self._resultado_aluminio(),
+        )
+        item = ItemPresupuesto.objects.get(pk=item.pk)
+
+        self.assertEqual(item.precio_unitario_base, Decimal('1234.50'))
+        self.assertEqual(item.total_perfiles, Decimal('600.25'))
+        self.assertEqual(item.total_vidrios, Decimal('349.75'))
+        self.assertIsNone(item.total_accesorios)
+        self.assertTrue(item.tiene_desglose)
+        self.assertNotIn('desglose', item.datos_calculo)
+        self.assertNotIn('resumen', item.datos_calculo)
+        self.assertEqual(item.snapshot_item, {'titulo_item': 'Ventana'})
+        self.assertEqual(item.resultado_json, self._resultado_aluminio())
+
+    def test_desglose_se_carga_recien_al_pedirlo(self):
+        p = crear_presupuesto(self.user)
+        ItemPresupuesto.objects.create(
+            presupuesto=p, descripcion='Ventana', cantidad=1,
+            ancho_mm=1000, alto_mm=1200, margen_porcentaje=30,
+            precio_unitario=Decimal('1234.50'), resultado_json=self._resultado_aluminio(),
+        )
+        item = p.items.get()
+
+        self.assertIn('desglose_comprimido', item.get_deferred_fields())
+        with self.assertNumQueries(0):
+            resumido = item.resultado_resumido
+            item.get_precio_unitario_base()
+        self.assertNotIn('desglose', resumido)
+        with self.assertNumQueries(1):
+            desglose = item.desglose
+        self.assertEqual(desglose['vidrios']['codigo'], 'FL4')
+
+    def _item_con_snapshot(self, presupuesto):
+        return ItemPresupuesto.objects.create(
+            presupuesto=presupuesto, descripcion='Ventana cocina', cantidad=1,
+            ancho_mm=1200, alto_mm=1500, margen_porcentaje=30, precio_unitario=350000,
+            resultado_json={'snapshot_item': {
+                'titulo_item': 'Ventana cocina',
+                'linea': {'nombre': 'MODENA'},
+                'producto': {'descripcion': 'BANDEROLA'},
+                'vidrio': {'descripcion': '4+9+4'},
+            }},
+        )
+
+    def test_guardar_redacta_los_textos_del_pdf(self):
+        item = self._item_con_snapshot(crear_presupuesto(self.user))
+        item.refresh_from_db()
+
+        self.assertEqual(item.textos_version, VERSION_TEXTOS)
+        self.assertEqual(item.texto_titulo, 'Ventana cocina')
+        self.assertIn('Vidrio 4+9+4', item.texto_resumen_tecnico)
+        self.assertIn('MODENA', item.texto_resumen_compacto)
+        self.assertTrue(item.texto_narrativa)
+
+    def test_contexto_pdf_usa_los_textos_guardados(self):
+        item = self._item_con_snapshot(crear_presupuesto(self.user))
+        item = ItemPresupuesto.objects.get(pk=item.pk)
+
+        with patch('presupuestos.pdf_descriptions.build_item_texts') as redactar:
+            contexto = build_pdf_item_context(item)
+
+        redactar.assert_not_called()
+        self.assertEqual(contexto['titulo'], item.texto_titulo)
+        self.assertEqual(contexto['resumen_tecnico'], item.texto_resumen_tecnico)
+
+    def test_contexto_pdf_redacta_si_la_version_es_vieja(self):
+        item = self._item_con_snapshot(crear_presupuesto(self.user))
+        ItemPresupuesto.objects.filter(pk=item.pk).update(textos_version=0, texto_titulo='viejo')
+        item = ItemPresupuesto.objects.get(pk=item.pk)
+
+        contexto = build_pdf_item_context(item)
+
+        self.assertEqual(contexto['titulo'], 'Ventana cocina')
+
+    def test_comando_regenera_textos_en_lotes(self):
+        p = crear_presupuesto(self.user)
+        items = [self._item_con_snapshot(p) for _ in range(3)]
+        ItemPresupuesto.objects.filter(pk__in=[i.pk for i in items[:2]]).update(
+            textos_version=0, texto_titulo='', texto_resumen_tecnico='',
+        )
+        salida = StringIO()
+
+        call_command('regenerar_textos_pdf', '--lote', '1', stdout=salida)
+
+        self.assertIn('2 ítems actualizados', salida.getvalue())
+        self.assertFalse(ItemPresupuesto.objects.exclude(textos_version=VERSION_TEXTOS).exists())
+        self.assertFalse(ItemPresupuesto.objects.filter(texto_titulo='').exists())
+
+    def test_item_sin_desglose_no_consulta_la_columna_comprimida(self):
+        p = crear_presupuesto(self.user)
+        ItemPresupuesto.objects.create(
+            presupuesto=p, descripcion='Ventana PVC', cantidad=1,
+            ancho_mm=0, alto_mm=0, margen_porcentaje=30, precio_unitario=500,
+            resultado_json={'tipo': 'pvc_simple', 'valor_usd': 100, 'margen': 30},
+        )
+        item = p.items.get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(item.resultado_json, {'tipo': 'pvc_simple', 'valor_usd': 100, 'margen': 30})
+
 
 class PdfDescriptionsHelpersTest(SimpleTestCase):
     def test_build_narrative_from_snapshot_full_sentence(self):
@@ -781,6 +918,35 @@ class PresupuestosViewsTest(TestCase):
         self.assertContains(res, 'resultado-item-')
         self.assertContains(res, 'application/json')
 
+    def test_detalle_no_embebe_el_desglose_y_lo_sirve_aparte(self):
+        self.client.login(username='viewuser', password='testpass')
+        p = crear_presupuesto(self.user)
+        item = ItemPresupuesto.objects.create(
+            presupuesto=p,
+            descripcion='Ventana cocina',
+            cantidad=1,
+            ancho_mm=1200,
+            alto_mm=1500,
+            margen_porcentaje=30,
+            precio_unitario=350000,
+            resultado_json={
+                'precio_total': 350000,
+                'resumen': {'total_perfiles': 120000},
+                'desglose': {'perfiles': [{'codigo': 'PERF-DESGLOSE', 'precio_total': 120000}]},
+            },
+        )
+
+        res = self.client.get(f'/presupuestos/{p.pk}/')
+        self.assertEqual(res.status_code, 200)
+        self.assertNotContains(res, 'PERF-DESGLOSE')
+        self.assertContains(res, f'/presupuestos/{p.pk}/item/{item.pk}/desglose/')
+
+        res = self.client.get(f'/presupuestos/{p.pk}/item/{item.pk}/desglose/')
+        self.assertEqual(res.status_code, 200)
+        datos = res.json()
+        self.assertEqual(datos['desglose']['perfiles'][0]['codigo'], 'PERF-DESGLOSE')
+        self.assertEqual(datos['resumen']['total_perfiles'], 120000.0)
+
     def test_detalle_muestra_resumen_compacto_del_item(self):
         self.client.login(username='viewuser', password='testpass')
         p = crear_presupuesto(self.user)
@@ -1731,6 +1897,35 @@ class ConfirmarPresupuestoTest(TestCase):
         pedido = p.pedidos_fabrica.get()
         self.assertEqual(pedido.ordenes.count(), 2)
 
+    def _queries_al_confirmar(self, cantidad_items):
+        p = crear_presupuesto(self.user)
+        for indice in range(cantidad_items):
+            self._crear_item(p, descripcion=f'V{indice}', producto={'descripcion': 'BANDEROLA'})
+        p.recalcular_total()
+        with CaptureQueriesContext(connection) as queries:
+            self._confirmar(p)
+        self.assertEqual(p.pedidos_fabrica.get().ordenes.count(), cantidad_items)
+        return len(queries)
+
+    def test_confirmar_usa_las_mismas_queries_sin_importar_la_cantidad_de_items(self):
+        # La primera confirmación inicializa las series de numeración.
+        self._queries_al_confirmar(1)
+        # 20 ítems entran en un solo INSERT aun con el límite de variables de SQLite.
+        self.assertEqual(self._queries_al_confirmar(2), self._queries_al_confirmar(20))
+
+    def test_confirmar_numera_las_ordenes_en_bloque_y_en_orden(self):
+        p = crear_presupuesto(self.user)
+        for indice in range(3):
+            self._crear_item(p, descripcion=f'V{indice}', ancho_mm=1000 + indice, alto_mm=900)
+        p.recalcular_total()
+
+        self._confirmar(p)
+
+        ordenes = list(p.pedidos_fabrica.get().ordenes.prefetch_related('medidas'))
+        self.assertEqual([o.numero for o in ordenes], [1, 2, 3])
+        self.assertEqual([o.orden for o in ordenes], [1, 2, 3])
+        self.assertEqual([o.medidas.get().medida for o in ordenes], ['1000 x 900', '1001 x 900', '1002 x 900'])
+
     def test_orden_generada_precarga_datos_del_item_y_cliente(self):
         p = crear_presupuesto(self.user)
         p.plazo_entrega_dias = 20
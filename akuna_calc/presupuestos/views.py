@@ -20,6 +20,7 @@ from django.views.decorators.http import require_POST
 from django.utils import timezone
 from xhtml2pdf import pisa
 
+from core.busqueda import buscar, normalizar
 from core.navigation import append_return_to, resolve_return_url
 from usuarios.access_control import get_access_profile, user_has_full_access
 from comercial.models import Venta, _formatear_cuit
@@ -138,30 +139,26 @@ def lista(request):
     if estado:
         qs = qs.filter(estado=estado)
     if q:
-        # Buscador único: matchea cualquier dato de la tabla.
-        filtros = (
-            Q(numero__icontains=q) |
-            Q(cliente__nombre__icontains=q) |
-            Q(cliente__apellido__icontains=q) |
-            Q(cliente__razon_social__icontains=q) |
-            Q(estado__icontains=q)
-        )
+        # Buscador único: número y cliente van por el índice de texto completo
+        # (`documento_busqueda`); estado, usuario y total son filtros exactos.
+        termino = normalizar(q)
+        estados = [clave for clave, etiqueta in Presupuesto.ESTADO_CHOICES if termino in clave or termino in normalizar(etiqueta)]
+        filtros = Q(estado__in=estados)
         # La columna Usuario/creador solo es visible (y buscable) con permiso.
         if puede_ver_creador:
-            filtros |= (
-                Q(created_by__first_name__icontains=q) |
-                Q(created_by__last_name__icontains=q) |
-                Q(created_by__username__icontains=q)
-            )
+            creadores = User.objects.filter(
+                Q(first_name__icontains=q) | Q(last_name__icontains=q) | Q(username__icontains=q)
+            ).values('pk')
+            filtros |= Q(created_by_id__in=creadores)
         # Total: solo si el término es un número.
         monto = _termino_a_decimal(q)
         if monto is not None:
             filtros |= Q(total=monto)
-        qs = qs.filter(filtros)
+        qs = buscar(qs, q, ademas=filtros)
     if creado_por.isdigit():
         qs = qs.filter(created_by_id=int(creado_por))
 
-    qs = qs.order_by('-created_at')
+    qs = qs.order_by('-relevancia', '-created_at') if q else qs.order_by('-created_at')
 
     usuarios_creadores = []
     if puede_ver_creador:
@@ -496,6 +493,18 @@ def editar_item(request, pk, ipk):
     return redirect('presupuestos:presupuestos-detalle', pk=pk)
 
 
+@login_required
+def desglose_item(request, pk, ipk):
+    """Resultado completo del cotizador de un ítem, con el desglose descomprimido.
+
+    El detalle del presupuesto solo embebe los datos livianos de cada ítem; el
+    desglose se pide acá recién cuando el usuario lo abre.
+    """
+    presupuesto = get_object_or_404(Presupuesto.objects.filter(deleted_at__isnull=True), pk=pk)
+    item = get_object_or_404(ItemPresupuesto, pk=ipk, presupuesto=presupuesto)
+    return JsonResponse(item.resultado_json)
+
+
 @login_required
 @require_POST
 def eliminar_item(request, pk, ipk):
@@ -536,13 +545,6 @@ def actualizar_notas(request, pk):
     return redirect('presupuestos:presupuestos-detalle', pk=pk)
 
 
-def _generar_numero_pedido_fabrica():
-    n = PedidoFabrica.objects.count() + 1
-    while PedidoFabrica.objects.filter(numero=f'PF-{n:04d}').exists():
-        n += 1
-    return f'PF-{n:04d}'
-
-
 def _crear_venta_desde_presupuesto(presupuesto):
     """Crea la Venta al confirmar el presupuesto, SIN seña (saldo = total completo).
 
@@ -569,20 +571,14 @@ def _crear_venta_desde_presupuesto(presupuesto):
 
 
 def _snapshot_de_item(item):
-    resultado = item.resultado_json if isinstance(item.resultado_json, dict) else {}
-    snapshot = resultado.get('snapshot_item')
-    return snapshot if isinstance(snapshot, dict) else {}
+    return item.snapshot_item or {}
 
 
-def _crear_orden_desde_item(pedido, item, numero, orden, presupuesto):
-    """Crea una OrdenFabricacion precargada con los datos disponibles del ítem y el cliente."""
+def _construir_orden_desde_item(pedido, item, numero, orden, presupuesto, fecha_comprometida):
+    """Arma (sin guardar) la OrdenFabricacion precargada con los datos del ítem y el cliente."""
     snapshot = _snapshot_de_item(item)
     cliente = presupuesto.cliente
 
-    fecha_comprometida = None
-    if presupuesto.plazo_entrega_dias:
-        fecha_comprometida = timezone.now().date() + timedelta(days=presupuesto.plazo_entrega_dias)
-
     def _cortar(campo, valor):
         return cortar_a_max_length(OrdenFabricacion, campo, valor)
 
@@ -612,7 +608,7 @@ def _crear_orden_desde_item(pedido, item, numero, orden, presupuesto):
         detalle_tirantes = f'Dividida por tirantes {sentido}: {vidrio_texto}.'
         nota = f'{nota}\n{detalle_tirantes}'.strip() if nota else detalle_tirantes
 
-    orden_fabricacion = OrdenFabricacion.objects.create(
+    return OrdenFabricacion(
         pedido=pedido,
         item_presupuesto=item,
         numero=numero,
@@ -630,17 +626,55 @@ def _crear_orden_desde_item(pedido, item, numero, orden, presupuesto):
         nota=nota,
     )
 
+
+def _construir_medida_desde_item(orden_fabricacion, item):
     medida = ''
     if item.ancho_mm and item.alto_mm:
         medida = f'{item.ancho_mm} x {item.alto_mm}'
-    MedidaOrdenFabricacion.objects.create(
+    return MedidaOrdenFabricacion(
         orden=orden_fabricacion,
         item='1',
         cantidad=item.cantidad or 1,
         medida=medida,
         orden_fila=1,
     )
-    return orden_fabricacion
+
+
+def _crear_ordenes_desde_items(pedido, items, presupuesto):
+    """Genera las órdenes de fabricación (y su fila de medidas) de todos los ítems.
+
+    Pipeline en etapas con una cantidad fija de queries, sin importar cuántos
+    ítems tenga la obra: se reserva el bloque de números, se arman órdenes y
+    medidas en memoria desde el snapshot de cada ítem y se insertan con
+    `bulk_create`. Debe correr dentro de la transacción de la confirmación.
+    """
+    if not items:
+        return []
+
+    fecha_comprometida = None
+    if presupuesto.plazo_entrega_dias:
+        fecha_comprometida = timezone.now().date() + timedelta(days=presupuesto.plazo_entrega_dias)
+
+    numeros = OrdenFabricacion.reservar_numeros(len(items))
+    ordenes = [
+        _construir_orden_desde_item(pedido, item, numero, indice + 1, presupuesto, fecha_comprometida)
+        for indice, (item, numero) in enumerate(zip(items, numeros))
+    ]
+    OrdenFabricacion.objects.bulk_create(ordenes)
+
+    # MySQL no devuelve los ids de un bulk_create: se recuperan por número (único).
+    if any(orden.pk is None for orden in ordenes):
+        ids_por_numero = dict(
+            OrdenFabricacion.objects.filter(numero__in=numeros).values_list('numero', 'pk')
+        )
+        for orden in ordenes:
+            orden.pk = ids_por_numero[orden.numero]
+
+    MedidaOrdenFabricacion.objects.bulk_create([
+        _construir_medida_desde_item(orden, item)
+        for orden, item in zip(ordenes, items)
+    ])
+    return ordenes
 
 
 def _procesar_confirmacion(request, presupuesto):
@@ -664,15 +698,13 @@ def _procesar_confirmacion(request, presupuesto):
     with transaction.atomic():
         venta = _crear_venta_desde_presupuesto(presupuesto)
         pedido = PedidoFabrica.objects.create(
-            numero=_generar_numero_pedido_fabrica(),
+            numero=PedidoFabrica.generar_numero(),
             cliente=cortar_a_max_length(PedidoFabrica, 'cliente', presupuesto.cliente.get_nombre_completo()),
             observaciones=f'Generado automáticamente desde el presupuesto {presupuesto.numero}.',
             usuario=request.user,
             presupuesto=presupuesto,
         )
-        numero_base = OrdenFabricacion.generar_numero()
-        for indice, item in enumerate(presupuesto.items.all()):
-            _crear_orden_desde_item(pedido, item, numero_base + indice, indice + 1, presupuesto)
+        _crear_ordenes_desde_items(pedido, list(presupuesto.items.all()), presupuesto)
         presupuesto.venta = venta
         presupuesto.estado = 'confirmado'
         presupuesto.save(update_fields=['estado', 'venta'])
@@ -3,9 +3,22 @@ registro ORIGEN a un DESTINO y da de baja lógica al origen.
 
 La reasignación es genérica: recorre las relaciones inversas (FK / OneToOne) que
 apuntan al modelo, así cubre todas las tablas actuales y cualquier FK futura sin
-tener que enumerarlas. El destino no se modifica (solo recibe los registros)."""
+tener que enumerarlas. El destino no se modifica (solo recibe los registros).
+
+Cada relación se mueve de a `LOTE` filas, cada lote en su propia transacción,
+para no tener bloqueada una tabla grande durante toda la fusión. Si algo falla a
+mitad de camino, el origen sigue vivo y volver a fusionar termina de moverlo.
+
+Las tablas derivadas (resúmenes del cliente, libro de la cuenta corriente) no
+se reasignan: después de mover todo, `_al_fusionar` las rehace solo para el
+origen y el destino, junto con los documentos de búsqueda que indexan el nombre
+del cliente. La baja del origen va en la misma transacción que ese rearmado."""
 
 from django.db import transaction
+from django.db.models import Count, IntegerField, Value
+
+
+LOTE = 1000
 
 
 def get_merge_entities():
@@ -16,51 +29,105 @@ def get_merge_entities():
         'cliente': {
             'label': 'Cliente',
             'model': Cliente,
-            'queryset': Cliente.objects.filter(deleted_at__isnull=True).order_by('apellido', 'nombre'),
+            'queryset': Cliente.alive.order_by('apellido', 'nombre'),
         },
         'proveedor': {
             'label': 'Proveedor',
             'model': Cuenta,
-            'queryset': Cuenta.objects.filter(
-                deleted_at__isnull=True, tipo_cuenta__tipo='proveedores',
-            ).order_by('nombre'),
+            'queryset': Cuenta.alive.filter(tipo_cuenta__tipo='proveedores').order_by('nombre'),
         },
         'cuenta': {
             'label': 'Cuenta',
             'model': Cuenta,
-            'queryset': Cuenta.objects.filter(deleted_at__isnull=True).order_by('nombre'),
+            'queryset': Cuenta.alive.order_by('nombre'),
         },
     }
 
 
+def _rehacer_cliente(origen, destino):
+    from comercial import resumenes
+    from core.busqueda import refrescar_documentos
+
+    resumenes.reconciliar(resumenes=('ventas', 'clientes'), ids=[origen.pk, destino.pk])
+    # Ventas y presupuestos indexan el nombre del cliente: solo cambian los movidos.
+    refrescar_documentos(destino.venta_set.select_related('cliente').prefetch_related('pagos'))
+    refrescar_documentos(destino.presupuestos.select_related('cliente'))
+
+
+def _rehacer_cuenta(origen, destino):
+    from comercial import resumenes
+    from comercial.cuenta_corriente import reconstruir_cuenta
+
+    reconstruir_cuenta(origen.pk)
+    reconstruir_cuenta(destino.pk)
+    if origen.tipo_cuenta_id != destino.tipo_cuenta_id:
+        resumenes.reconciliar(resumenes=('compras',), ids=[origen.tipo_cuenta_id, destino.tipo_cuenta_id])
+
+
+def _al_fusionar(model):
+    """`(tablas derivadas que no se reasignan, función que las rehace)` del modelo."""
+    from comercial.models import Cliente, ClienteResumen, Cuenta, MovimientoCuenta
+    derivados = {
+        Cliente: ((ClienteResumen,), _rehacer_cliente),
+        Cuenta: ((MovimientoCuenta,), _rehacer_cuenta),
+    }
+    return derivados.get(model, ((), None))
+
+
 def _fk_rels(model):
-    """Relaciones inversas FK/OneToOne (concretas, no M2M) que apuntan al modelo."""
+    """Relaciones inversas FK/OneToOne (concretas, no M2M) que apuntan al modelo,
+    sin las tablas derivadas."""
+    derivadas, _ = _al_fusionar(model)
     rels = []
     for rel in model._meta.related_objects:
         if rel.many_to_many:
             continue
         if not getattr(rel.field, 'concrete', True):
             continue
+        if rel.related_model in derivadas:
+            continue
         rels.append(rel)
     return rels
 
 
 def preview_merge(instance):
-    """Devuelve [{label, count}] de los registros relacionados que se moverían."""
-    resultado = []
-    for rel in _fk_rels(type(instance)):
-        modelo = rel.related_model
-        fname = rel.field.name
-        count = modelo._base_manager.filter(**{fname: instance}).count()
-        if count:
-            resultado.append({'label': str(modelo._meta.verbose_name_plural), 'count': count})
-    return resultado
+    """Devuelve [{label, count}] de los registros relacionados que se moverían,
+    contados en una sola consulta (UNION ALL de un COUNT por relación)."""
+    rels = _fk_rels(type(instance))
+    conteos = [
+        rel.related_model._base_manager.filter(**{rel.field.name: instance}).order_by()
+        .annotate(relacion=Value(posicion, output_field=IntegerField()))
+        .values('relacion')
+        .annotate(cantidad=Count('pk'))
+        .values_list('relacion', 'cantidad')
+        for posicion, rel in enumerate(rels)
+    ]
+    if not conteos:
+        return []
+    cantidades = dict(conteos[0].union(*conteos[1:], all=True))
+    return [
+        {'label': str(rel.related_model._meta.verbose_name_plural), 'count': cantidades[posicion]}
+        for posicion, rel in enumerate(rels)
+        if cantidades.get(posicion)
+    ]
+
+
+def _mover(modelo, fname, origen, destino):
+    """Pasa de `origen` a `destino` las filas de la relación, de a `LOTE` por transacción."""
+    pendientes = modelo._base_manager.filter(**{fname: origen}).order_by()
+    movidos = 0
+    while True:
+        with transaction.atomic():
+            pks = list(pendientes.values_list('pk', flat=True)[:LOTE])
+            if pks:
+                movidos += modelo._base_manager.filter(pk__in=pks).update(**{fname: destino})
+        if len(pks) < LOTE:
+            return movidos
 
 
-@transaction.atomic
 def merge_records(origen, destino):
-    """Reasigna los registros relacionados de `origen` a `destino` y da de baja al
-    origen. Atómico. Devuelve [(label_modelo, cantidad)] de lo movido."""
+    """Reasigna los registros relacionados de `origen` a `destino`, rehace lo
+    derivado y da de baja al origen. Devuelve [(label_modelo, cantidad)] de lo movido."""
     if origen.pk == destino.pk:
         raise ValueError('El origen y el destino no pueden ser el mismo registro.')
     if type(origen) is not type(destino):
@@ -69,10 +136,13 @@ def merge_records(origen, destino):
     movidos = []
     for rel in _fk_rels(type(origen)):
         modelo = rel.related_model
-        fname = rel.field.name
-        n = modelo._base_manager.filter(**{fname: origen}).update(**{fname: destino})
+        n = _mover(modelo, rel.field.name, origen, destino)
         if n:
             movidos.append((str(modelo._meta.verbose_name_plural), n))
 
-    origen.delete()  # baja lógica: el delete() de estos modelos setea deleted_at
+    _, rehacer = _al_fusionar(type(origen))
+    with transaction.atomic():
+        if rehacer:
+            rehacer(origen, destino)
+        origen.delete()  # baja lógica: el delete() de estos modelos setea deleted_at
     return movidos
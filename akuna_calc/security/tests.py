@@ -214,6 +214,75 @@ class FusionarMergeTest(TestCase):
         with self.assertRaises(ValueError):
             merge_records(self.origen, self.origen)
 
+    def test_preview_en_una_consulta(self):
+        from security.merge import preview_merge
+        self._venta(self.origen, 'V-M5')
+        self._venta(self.origen, 'V-M6')
+        self._presupuesto(self.origen, 'PRES-M5')
+        with self.assertNumQueries(1):
+            preview = preview_merge(self.origen)
+        self.assertEqual({x['label']: x['count'] for x in preview}, {'Ventas': 2, 'Presupuestos': 1})
+
+    def test_merge_cliente_con_10k_ventas(self):
+        from decimal import Decimal
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from comercial import resumenes
+        from comercial.models import ClienteResumen, PagoVenta, Venta
+        from security.merge import LOTE, merge_records
+        self._venta(self.destino, 'V-DEST')
+        Venta.objects.bulk_create([
+            Venta(numero_pedido=f'V-10K-{i}', cliente=self.origen, valor_total=Decimal('100'),
+                  sena=0, saldo=Decimal('100'))
+            for i in range(10_000)
+        ], batch_size=2_000)
+        pagada = Venta.objects.get(numero_pedido='V-10K-0')
+        PagoVenta.objects.create(venta=pagada, monto=Decimal('40'), fecha_pago='2026-05-01',
+                                 forma_pago='efectivo', created_by=self.admin)
+        resumenes.reconciliar()
+
+        with CaptureQueriesContext(connection) as contexto:
+            movidos = merge_records(self.origen, self.destino)
+        self.assertEqual(movidos, [('Ventas', 10_000)])
+        lotes = [q for q in contexto.captured_queries if q['sql'].startswith('UPDATE "comercial_venta" SET "cliente_id"')]
+        self.assertEqual(len(lotes), 10_000 // LOTE)
+
+        # Resúmenes y fichas quedan como si se rehicieran desde cero.
+        resultado = resumenes.reconciliar(verificar=True)
+        self.assertEqual({nombre: valores[:3] for nombre, valores in resultado.items()}, {
+            'ventas': (0, 0, 0), 'compras': (0, 0, 0), 'clientes': (0, 0, 0),
+        })
+        ficha = ClienteResumen.objects.get(cliente=self.destino)
+        self.assertEqual(ficha.cantidad_ventas, 10_001)
+        self.assertEqual(ficha.total_cobrado, Decimal('40'))
+        self.assertEqual(ficha.saldo_pendiente, Decimal('1000060'))
+        self.assertFalse(ClienteResumen.objects.filter(cliente=self.origen).exists())
+        venta = Venta.objects.select_related('cliente').get(pk=pagada.pk)
+        self.assertEqual(venta.documento_busqueda, venta.armar_documento_busqueda())
+
+    def test_merge_cuenta_rehace_libro_y_resumen(self):
+        from decimal import Decimal
+        from comercial import resumenes
+        from comercial.cuenta_corriente import reconstruir_cuenta
+        from comercial.models import Compra, Cuenta, MovimientoCuenta, TipoCuenta
+        from security.merge import merge_records
+        proveedores = TipoCuenta.objects.create(tipo='proveedores', descripcion='Proveedores')
+        varios = TipoCuenta.objects.create(tipo='varios', descripcion='Varios')
+        origen = Cuenta.objects.create(nombre='Vidrios SA', tipo_cuenta=varios)
+        destino = Cuenta.objects.create(nombre='Vidrios S.A.', tipo_cuenta=proveedores)
+        for cuenta, fecha, total in ((origen, '2026-05-02', '300'), (destino, '2026-05-01', '100'), (destino, '2026-05-03', '50')):
+            Compra.objects.create(numero_pedido=f'C-{fecha}', cuenta=cuenta, fecha_pago=fecha,
+                                  valor_total=Decimal(total), created_by=self.admin)
+
+        merge_records(origen, destino)
+
+        self.assertFalse(MovimientoCuenta.objects.filter(cuenta=origen).exists())
+        libro = list(MovimientoCuenta.objects.filter(cuenta=destino).values_list('debe', 'saldo'))
+        self.assertEqual([saldo for _, saldo in libro], [Decimal('100'), Decimal('400'), Decimal('450')])
+        self.assertEqual(reconstruir_cuenta(destino.pk), 3)
+        self.assertEqual(list(MovimientoCuenta.objects.filter(cuenta=destino).values_list('debe', 'saldo')), libro)
+        self.assertEqual(resumenes.reconciliar(verificar=True)['compras'][:3], (0, 0, 0))
+
     def test_view_requiere_admin(self):
         from django.urls import reverse
         url = reverse('security:fusionar')
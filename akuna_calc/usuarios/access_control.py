@@ -33,6 +33,7 @@ ACCESS_MODULES = [
             {'code': 'comercial.ventas', 'label': 'Ventas', 'route_name': 'comercial:ventas_list'},
             {'code': 'comercial.gastos', 'label': 'Gastos', 'route_name': 'comercial:compras_list'},
             {'code': 'comercial.cuentas', 'label': 'Cuentas', 'route_name': 'comercial:cuentas_list'},
+            {'code': 'comercial.conciliacion', 'label': 'Conciliación bancaria', 'route_name': 'comercial:conciliacion_bancaria'},
         ],
     },
     {
@@ -72,6 +73,7 @@ ACCESS_MODULES = [
             {'code': 'reportes.general', 'label': 'Reporte General', 'route_name': 'comercial:reporte_general'},
             {'code': 'reportes.ventas', 'label': 'Reporte Ventas', 'route_name': 'comercial:reportes'},
             {'code': 'reportes.cobranzas', 'label': 'Reporte Cobranzas', 'route_name': 'comercial:reportes_cobranzas'},
+            {'code': 'reportes.antiguedad', 'label': 'Antigüedad de Saldos', 'route_name': 'comercial:reporte_antiguedad'},
             {'code': 'reportes.gastos', 'label': 'Reporte Gastos', 'route_name': 'comercial:reportes_gastos'},
             {'code': 'reportes.proveedores', 'label': 'Reporte Proveedores', 'route_name': 'comercial:reportes_proveedores'},
         ],
@@ -225,14 +227,17 @@ for module in ACCESS_MODULES:
 
 _register_route('presupuestos.view', 'presupuestos:presupuestos-crear', 'presupuestos:presupuestos-detalle', 'presupuestos:presupuestos-editar', 'presupuestos:presupuestos-configuracion-obra', 'presupuestos:presupuestos-item-agregar', 'presupuestos:presupuestos-item-eliminar', 'presupuestos:presupuestos-comentar', 'presupuestos:presupuestos-estado', 'presupuestos:presupuestos-recibo', 'presupuestos:presupuestos-pdf')
 
-_register_route('comercial.clientes', 'comercial:cliente_create', 'comercial:cliente_detail', 'comercial:cliente_edit', 'comercial:cliente_delete', 'comercial:clientes_list_api')
-_register_route('comercial.ventas', 'comercial:venta_create', 'comercial:venta_detail', 'comercial:venta_edit', 'comercial:venta_delete', 'comercial:registrar_pago', 'comercial:generar_pdf_venta', 'comercial:descargar_pdf_recibo_venta', 'comercial:descargar_pdf_recibo', 'comercial:exportar_ventas_excel', 'comercial:editar_pago', 'comercial:eliminar_pago', 'comercial:agregar_retencion_pago', 'comercial:editar_fecha_sena', 'comercial:cambiar_estado_venta', 'comercial:guardar_nota_venta', 'comercial:duplicar_venta')
+_register_route('comercial.clientes', 'comercial:cliente_create', 'comercial:cliente_detail', 'comercial:cliente_edit', 'comercial:cliente_delete')
+_register_route('comercial.ventas', 'comercial:venta_create', 'comercial:venta_detail', 'comercial:venta_edit', 'comercial:venta_delete', 'comercial:registrar_pago', 'comercial:pagos_masivos', 'comercial:generar_pdf_venta', 'comercial:descargar_pdf_recibo_venta', 'comercial:descargar_pdf_recibo', 'comercial:exportar_ventas_excel', 'comercial:editar_pago', 'comercial:eliminar_pago', 'comercial:agregar_retencion_pago', 'comercial:editar_fecha_sena', 'comercial:cambiar_estado_venta', 'comercial:guardar_nota_venta', 'comercial:duplicar_venta')
 _register_route('comercial.gastos', 'comercial:compra_create', 'comercial:compra_detail', 'comercial:compra_edit', 'comercial:compra_delete', 'comercial:registrar_pago_compra', 'comercial:editar_pago_compra', 'comercial:eliminar_pago_compra', 'comercial:guardar_nota_compra')
 _register_route('comercial.cuentas', 'comercial:cuenta_create', 'comercial:cuenta_edit', 'comercial:cuenta_delete', 'comercial:cuentas_by_tipo')
 _register_route('configuracion.tipos_cuenta', 'comercial:tipo_cuenta_create', 'comercial:tipo_cuenta_edit', 'comercial:tipo_cuenta_delete')
 _register_route(['comercial.gastos', 'configuracion.tipos_gasto'], 'comercial:tipos_gasto_by_cuenta')
+_register_route(['comercial.clientes', 'comercial.ventas', 'reportes.ventas', 'reportes.cobranzas', 'reportes.antiguedad'], 'comercial:clientes_list_api')
 _register_route('configuracion.tipos_gasto', 'comercial:tipo_gasto_create', 'comercial:tipo_gasto_edit', 'comercial:tipo_gasto_delete')
 _register_route('reportes.ventas', 'comercial:exportar_reporte_excel')
+_register_route('reportes.cobranzas', 'comercial:exportar_reporte_cobranzas_excel')
+_register_route('reportes.antiguedad', 'comercial:exportar_reporte_antiguedad_excel')
 _register_route('reportes.gastos', 'comercial:exportar_reporte_gastos_excel')
 _register_route('reportes.proveedores', 'comercial:reporte_proveedor_detalle', 'comercial:exportar_reporte_proveedores_excel')
 _register_route('reportes.general', 'comercial:exportar_reporte_general_excel')